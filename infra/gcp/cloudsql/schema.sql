@@ -61,7 +61,7 @@ create table if not exists transform_sessions (
 );
 
 create table if not exists transform_events (
-  event_id text primary key,
+  event_id text not null,
   session_id text not null references transform_sessions(session_id) on delete cascade,
   sequence integer not null,
   event_type text not null,
@@ -72,6 +72,7 @@ create table if not exists transform_events (
   payload_json jsonb not null default '{}'::jsonb,
   idempotency_key text,
   created_at timestamptz not null default now(),
+  primary key (session_id, event_id),
   unique (session_id, sequence),
   unique (session_id, idempotency_key)
 );
@@ -0,0 +1,202 @@
+"""Columnar binary body-sim format (``.bsim``).
+
+``body-sim.json`` stores one dict per frame and seven named floats per segment
+per frame. ``.bsim`` stores the same simulation as contiguous arrays::
+
+    b"HBSM" | version u16 | reserved u16 | header_len u32 | header JSON (UTF-8)
+    | padding to 4 bytes | data
+
+The header holds ``frame_count``, ``segments``, the summary fields
+(``equipped``, ``equip_frame``, ``trigger_joint``) and a ``channels`` table
+of ``{name, dtype, offset, count}``, with offsets relative to the start of
+the data. Transform channels (``position_x`` … ``scale_z``) are little-endian
+float32 ``[frame][segment]``. ``dt_sec`` and ``hold_sec`` are float32
+``[frame]``. ``equipped`` is a bitmap of one bit per frame, least significant
+bit first.
+
+Values are float32, so reading a file back gives the simulation at float32
+precision. The JSON document stays available as an export
+(``BodySim.to_json``).
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator
+
+from .sim_stream import SimulationStream
+
+BODY_SIM_MAGIC = b"HBSM"
+BODY_SIM_VERSION = 1
+TRANSFORM_CHANNELS = ("position_x", "position_y", "position_z", "rotation_z", "scale_x", "scale_y", "scale_z")
+
+_PREAMBLE = struct.Struct("<4sHHI")
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def _pad4(size: int) -> int:
+    return (4 - size % 4) % 4
+
+
+class BodySimWriter:
+    """Collects frames into per-channel float32 arrays (about 4 bytes per value)."""
+
+    def __init__(self, segments: list[str]) -> None:
+        self.segments = list(segments)
+        self.channels = {name: array("f") for name in TRANSFORM_CHANNELS}
+        self.dt_sec = array("f")
+        self.hold_sec = array("f")
+        self.equipped = bytearray()
+        self.frame_count = 0
+
+    def add_frame(self, frame: dict[str, Any]) -> None:
+        segments = frame["segments"]
+        for name in TRANSFORM_CHANNELS:
+            self.channels[name].extend(float(segments[segment][name]) for segment in self.segments)
+        self.dt_sec.append(float(frame["dt_sec"]))
+        self.hold_sec.append(float(frame["hold_sec"]))
+        if self.frame_count % 8 == 0:
+            self.equipped.append(0)
+        if frame["equipped"]:
+            self.equipped[-1] |= 1 << (self.frame_count % 8)
+        self.frame_count += 1
+
+    def write(self, path: Path, summary: dict[str, Any]) -> Path:
+        columns: list[tuple[str, str, int, bytes]] = []
+        for name in TRANSFORM_CHANNELS:
+            columns.append((name, "float32", len(self.channels[name]), _le_bytes(self.channels[name])))
+        columns.append(("dt_sec", "float32", self.frame_count, _le_bytes(self.dt_sec)))
+        columns.append(("hold_sec", "float32", self.frame_count, _le_bytes(self.hold_sec)))
+        columns.append(("equipped", "bitmap", self.frame_count, bytes(self.equipped)))
+
+        table = []
+        offset = 0
+        for name, dtype, count, data in columns:
+            table.append({"name": name, "dtype": dtype, "offset": offset, "count": count})
+            offset += len(data) + _pad4(len(data))
+        header = {
+            "format": "henshin-body-sim",
+            "version": BODY_SIM_VERSION,
+            "frame_count": self.frame_count,
+            "segments": self.segments,
+            "equipped": bool(summary.get("equipped")),
+            "equip_frame": summary.get("equip_frame", -1),
+            "trigger_joint": summary.get("trigger_joint"),
+            "channels": table,
+        }
+        header_bytes = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with tmp_path.open("wb") as fp:
+            fp.write(_PREAMBLE.pack(BODY_SIM_MAGIC, BODY_SIM_VERSION, 0, len(header_bytes)))
+            fp.write(header_bytes + b"\0" * _pad4(_PREAMBLE.size + len(header_bytes)))
+            for _, _, _, data in columns:
+                fp.write(data + b"\0" * _pad4(len(data)))
+        tmp_path.replace(path)
+        return path
+
+
+def _le_bytes(values: array) -> bytes:
+    if not _LITTLE_ENDIAN:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_body_sim_binary(path: Path, stream: SimulationStream) -> dict[str, Any]:
+    """Run ``stream`` into a ``.bsim`` file at ``path`` and return its summary."""
+
+    writer = BodySimWriter(stream.summary()["segments"])
+    for frame in stream:
+        writer.add_frame(frame)
+    summary = stream.summary()
+    writer.write(path, summary)
+    return summary
+
+
+@dataclass(frozen=True)
+class BodySim:
+    header: dict[str, Any]
+    channels: dict[str, array]
+    equipped_bitmap: bytes
+
+    @property
+    def frame_count(self) -> int:
+        return int(self.header["frame_count"])
+
+    @property
+    def segments(self) -> list[str]:
+        return list(self.header["segments"])
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "equipped": self.header["equipped"],
+            "equip_frame": self.header["equip_frame"],
+            "trigger_joint": self.header.get("trigger_joint"),
+            "segments": self.segments,
+        }
+
+    def is_equipped(self, index: int) -> bool:
+        return bool(self.equipped_bitmap[index // 8] >> (index % 8) & 1)
+
+    def frame(self, index: int) -> dict[str, Any]:
+        """One frame in the ``body-sim.json`` shape."""
+
+        if not 0 <= index < self.frame_count:
+            raise IndexError(index)
+        width = len(self.header["segments"])
+        base = index * width
+        return {
+            "index": index,
+            "dt_sec": self.channels["dt_sec"][index],
+            "equipped": self.is_equipped(index),
+            "hold_sec": round(self.channels["hold_sec"][index], 4),
+            "segments": {
+                segment: {name: self.channels[name][base + position] for name in TRANSFORM_CHANNELS}
+                for position, segment in enumerate(self.header["segments"])
+            },
+        }
+
+    def frames(self) -> Iterator[dict[str, Any]]:
+        for index in range(self.frame_count):
+            yield self.frame(index)
+
+    def to_json(self) -> dict[str, Any]:
+        """The ``body-sim.json`` document (float32 precision)."""
+
+        return {**self.summary(), "frames": list(self.frames())}
+
+
+def read_body_sim(path: Path) -> BodySim:
+    data = path.read_bytes()
+    if len(data) < _PREAMBLE.size:
+        raise ValueError(f"{path} is not a body-sim file")
+    magic, version, _, header_len = _PREAMBLE.unpack_from(data)
+    if magic != BODY_SIM_MAGIC:
+        raise ValueError(f"{path} is not a body-sim file")
+    if version != BODY_SIM_VERSION:
+        raise ValueError(f"Unsupported body-sim version: {version}")
+    header = json.loads(data[_PREAMBLE.size : _PREAMBLE.size + header_len].decode("utf-8"))
+    data_start = _PREAMBLE.size + header_len
+    data_start += _pad4(data_start)
+    view = memoryview(data)
+    channels: dict[str, array] = {}
+    equipped = b""
+    for column in header["channels"]:
+        start = data_start + int(column["offset"])
+        count = int(column["count"])
+        if column["dtype"] == "bitmap":
+            equipped = bytes(view[start : start + (count + 7) // 8])
+            continue
+        values = array("f")
+        values.frombytes(view[start : start + 4 * count])
+        if not _LITTLE_ENDIAN:
+            values.byteswap()
+        channels[column["name"]] = values
+    return BodySim(header=header, channels=channels, equipped_bitmap=equipped)
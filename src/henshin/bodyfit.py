@@ -7,7 +7,7 @@ from __future__ import annotations
 
 import math
 from dataclasses import dataclass
-from typing import Iterable
+from typing import Iterable, Iterator
 
 
 def clamp(value: float, low: float, high: float) -> float:
@@ -180,56 +180,97 @@ DEFAULT_SEGMENT_SPECS: list[SegmentSpec] = [
 ]
 
 
-def run_body_sequence(
-    frames: Iterable[BodyFrame],
-    *,
-    mirror: bool = True,
-    cover_scale: CoverScale | None = None,
-    dock_center: Vec2 | None = None,
-    dock_radius: float = 0.18,
-    hold_to_equip_sec: float = 0.7,
-    trigger_joint: str = "right_wrist",
-    segment_specs: list[SegmentSpec] | None = None,
-) -> dict:
-    scale = cover_scale or CoverScale(1.0, 1.0)
-    center = dock_center or Vec2(0.55, -0.25)
-    specs = segment_specs or DEFAULT_SEGMENT_SPECS
+class BodySequenceStream:
+    """Body simulation that yields one frame at a time.
 
-    dock = DockCharger(center=center, radius=dock_radius, hold_to_equip_sec=hold_to_equip_sec)
-    followers = {spec.name: SegmentFollower(spec) for spec in specs}
-    for follower in followers.values():
-        follower.set_dock_pose(center)
+    Iterating yields the same per-frame dicts ``run_body_sequence`` collects,
+    without holding earlier frames. ``equipped`` and ``equip_frame`` are
+    updated as soon as the dock charger fires. ``records()`` wraps the frames
+    in header/equip/frame/end records for NDJSON writers. A stream can be
+    consumed once. Live sources call ``push`` per frame instead.
+    """
 
-    equipped = False
-    equip_frame = -1
-    output_frames = []
+    def __init__(
+        self,
+        frames: Iterable[BodyFrame],
+        *,
+        mirror: bool = True,
+        cover_scale: CoverScale | None = None,
+        dock_center: Vec2 | None = None,
+        dock_radius: float = 0.18,
+        hold_to_equip_sec: float = 0.7,
+        trigger_joint: str = "right_wrist",
+        segment_specs: list[SegmentSpec] | None = None,
+    ) -> None:
+        self._frames = frames
+        self.mirror = mirror
+        self.cover_scale = cover_scale or CoverScale(1.0, 1.0)
+        self.dock_center = dock_center or Vec2(0.55, -0.25)
+        self.specs = segment_specs or DEFAULT_SEGMENT_SPECS
+        self.trigger_joint = trigger_joint
+        self.dock = DockCharger(center=self.dock_center, radius=dock_radius, hold_to_equip_sec=hold_to_equip_sec)
+        self.followers = {spec.name: SegmentFollower(spec) for spec in self.specs}
+        for follower in self.followers.values():
+            follower.set_dock_pose(self.dock_center)
+        self.equipped = False
+        self.equip_frame = -1
+        self.frame_count = 0
 
-    for index, frame in enumerate(frames):
+    @property
+    def segments(self) -> list[str]:
+        return [spec.name for spec in self.specs]
+
+    def summary(self) -> dict:
+        return {
+            "equipped": self.equipped,
+            "equip_frame": self.equip_frame,
+            "trigger_joint": self.trigger_joint,
+            "segments": self.segments,
+        }
+
+    def __iter__(self) -> Iterator[dict]:
+        for index, frame in enumerate(self._frames):
+            yield self._step(index, frame)
+
+    def push(self, frame: BodyFrame) -> dict:
+        """Step one frame from a live source instead of iterating ``frames``."""
+
+        return self._step(self.frame_count, frame)
+
+    def records(self) -> Iterator[dict]:
+        yield {"type": "header", "trigger_joint": self.trigger_joint, "segments": self.segments}
+        for frame in self:
+            if frame["index"] == self.equip_frame:
+                yield {"type": "equip", "index": self.equip_frame, "dt_sec": frame["dt_sec"]}
+            yield {"type": "frame", "frame": frame}
+        yield {"type": "end", "frame_count": self.frame_count, "equipped": self.equipped, "equip_frame": self.equip_frame}
+
+    def _step(self, index: int, frame: BodyFrame) -> dict:
         joints_world: dict[str, Vec2] = {}
         for joint_name, xy in frame.joints_xy01.items():
             joints_world[joint_name] = norm_to_world(
                 float(xy[0]),
                 float(xy[1]),
-                mirror=mirror,
-                cover_scale=scale,
+                mirror=self.mirror,
+                cover_scale=self.cover_scale,
             )
 
-        trigger_point = joints_world.get(trigger_joint)
-        equip_now = dock.tick(dt_sec=frame.dt_sec, trigger_point=trigger_point, already_equipped=equipped)
-        if equip_now and not equipped:
-            equipped = True
-            equip_frame = index
+        trigger_point = joints_world.get(self.trigger_joint)
+        equip_now = self.dock.tick(dt_sec=frame.dt_sec, trigger_point=trigger_point, already_equipped=self.equipped)
+        if equip_now and not self.equipped:
+            self.equipped = True
+            self.equip_frame = index
 
         segment_data: dict[str, dict[str, float]] = {}
-        for spec in specs:
-            follower = followers[spec.name]
+        for spec in self.specs:
+            follower = self.followers[spec.name]
             start = joints_world.get(spec.start_joint)
             end = joints_world.get(spec.end_joint)
 
-            if equipped and start is not None and end is not None:
+            if self.equipped and start is not None and end is not None:
                 t = follower.follow(start=start, end=end, dt_sec=frame.dt_sec)
             else:
-                t = follower.set_dock_pose(center)
+                t = follower.set_dock_pose(self.dock_center)
 
             segment_data[spec.name] = {
                 "position_x": t.position_x,
@@ -241,20 +282,36 @@ def run_body_sequence(
                 "scale_z": t.scale_z,
             }
 
-        output_frames.append(
-            {
-                "index": index,
-                "dt_sec": frame.dt_sec,
-                "equipped": equipped,
-                "hold_sec": round(dock.hold_sec, 4),
-                "segments": segment_data,
-            }
-        )
+        self.frame_count = index + 1
+        return {
+            "index": index,
+            "dt_sec": frame.dt_sec,
+            "equipped": self.equipped,
+            "hold_sec": round(self.dock.hold_sec, 4),
+            "segments": segment_data,
+        }
+
 
-    return {
-        "equipped": equipped,
-        "equip_frame": equip_frame,
-        "trigger_joint": trigger_joint,
-        "segments": [spec.name for spec in specs],
-        "frames": output_frames,
-    }
+def run_body_sequence(
+    frames: Iterable[BodyFrame],
+    *,
+    mirror: bool = True,
+    cover_scale: CoverScale | None = None,
+    dock_center: Vec2 | None = None,
+    dock_radius: float = 0.18,
+    hold_to_equip_sec: float = 0.7,
+    trigger_joint: str = "right_wrist",
+    segment_specs: list[SegmentSpec] | None = None,
+) -> dict:
+    stream = BodySequenceStream(
+        frames,
+        mirror=mirror,
+        cover_scale=cover_scale,
+        dock_center=dock_center,
+        dock_radius=dock_radius,
+        hold_to_equip_sec=hold_to_equip_sec,
+        trigger_joint=trigger_joint,
+        segment_specs=segment_specs,
+    )
+    output_frames = list(stream)
+    return {**stream.summary(), "frames": output_frames}
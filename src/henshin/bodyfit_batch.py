@@ -0,0 +1,226 @@
+"""Vectorized engine for ``bodyfit.run_body_sequence``.
+
+Long mocopi captures (tens of thousands of frames) are slow and memory hungry
+through the per-frame ``Vec2``/``SegmentFollower`` path. This module runs the
+same math over arrays:
+
+- frames are a ``(frames, joints, 2)`` array of normalized xy (NaN = missing)
+  plus a ``dt`` array;
+- the dock charger is a scalar loop that stops at the equip frame (it never
+  changes state after equipping);
+- each follower's smoothing ``p[i] = p[i-1] + (target[i] - p[i-1]) * a[i]`` is
+  a first-order linear recurrence, evaluated for all segments and channels at
+  once with a log-step associative scan. Frames that show the dock pose reset
+  the recurrence.
+
+Results are columnar: ``transforms`` is ``(frames, segments, 7)`` in
+``TRANSFORM_FIELDS`` order. ``columns_to_frames`` converts them to the
+``run_body_sequence`` frame dicts for JSON export.
+
+NumPy is optional (``pip install gavai-henshin[fast]``).
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Iterable, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+from .bodyfit import DEFAULT_SEGMENT_SPECS, BodyFrame, CoverScale, SegmentSpec, Vec2, clamp
+
+TRANSFORM_FIELDS = ("position_x", "position_y", "position_z", "rotation_z", "scale_x", "scale_y", "scale_z")
+
+
+def numpy_available() -> bool:
+    return np is not None
+
+
+def _require_numpy() -> Any:
+    if np is None:
+        raise ValueError("numpy is required for the batch body engine (pip install gavai-henshin[fast])")
+    return np
+
+
+def body_frames_to_arrays(frames: Iterable[BodyFrame]) -> tuple[Any, Any, list[str]]:
+    """Pack ``BodyFrame`` objects into ``(xy, dt, joint_names)``; missing joints are NaN."""
+
+    numpy = _require_numpy()
+    frames = list(frames)
+    joint_names = sorted({name for frame in frames for name in frame.joints_xy01})
+    column = {name: index for index, name in enumerate(joint_names)}
+    xy = numpy.full((len(frames), len(joint_names), 2), numpy.nan)
+    for index, frame in enumerate(frames):
+        for name, value in frame.joints_xy01.items():
+            xy[index, column[name]] = (float(value[0]), float(value[1]))
+    dt = numpy.array([float(frame.dt_sec) for frame in frames], dtype=float)
+    return xy, dt, joint_names
+
+
+def run_body_sequence_batch(
+    frames_xy: Any,
+    dt_sec: Any,
+    joint_names: Sequence[str],
+    *,
+    mirror: bool = True,
+    cover_scale: CoverScale | None = None,
+    dock_center: Vec2 | None = None,
+    dock_radius: float = 0.18,
+    hold_to_equip_sec: float = 0.7,
+    trigger_joint: str = "right_wrist",
+    segment_specs: list[SegmentSpec] | None = None,
+) -> dict[str, Any]:
+    """Array counterpart of ``run_body_sequence`` with columnar outputs."""
+
+    numpy = _require_numpy()
+    scale = cover_scale or CoverScale(1.0, 1.0)
+    center = dock_center or Vec2(0.55, -0.25)
+    specs = segment_specs or DEFAULT_SEGMENT_SPECS
+    xy = numpy.asarray(frames_xy, dtype=float)
+    dt = numpy.asarray(dt_sec, dtype=float)
+    frame_count = len(dt)
+    if xy.shape != (frame_count, len(joint_names), 2):
+        raise ValueError("frames_xy must have shape (frames, joints, 2) matching dt_sec and joint_names")
+
+    # norm_to_world, with the same operation order as the scalar version.
+    x_norm = (1 - xy[..., 0]) if mirror else xy[..., 0]
+    world_x = (x_norm * 2 - 1) * scale.x
+    world_y = -(xy[..., 1] * 2 - 1) * scale.y
+    column = {name: index for index, name in enumerate(joint_names)}
+
+    equipped_mask, hold_sec, equip_frame = _dock_scan(
+        world_x, world_y, dt, column.get(trigger_joint), center, dock_radius, hold_to_equip_sec
+    )
+
+    transforms = numpy.empty((frame_count, len(specs), len(TRANSFORM_FIELDS)))
+    for position, spec in enumerate(specs):
+        transforms[:, position] = _segment_columns(spec, world_x, world_y, dt, column, equipped_mask, center)
+
+    return {
+        "equipped": equip_frame >= 0,
+        "equip_frame": equip_frame,
+        "trigger_joint": trigger_joint,
+        "segments": [spec.name for spec in specs],
+        "fields": list(TRANSFORM_FIELDS),
+        "dt_sec": dt,
+        "equipped_mask": equipped_mask,
+        "hold_sec": hold_sec,
+        "transforms": transforms,
+    }
+
+
+def _dock_scan(
+    world_x: Any,
+    world_y: Any,
+    dt: Any,
+    trigger_column: int | None,
+    center: Vec2,
+    radius: float,
+    hold_to_equip_sec: float,
+) -> tuple[Any, Any, int]:
+    numpy = np
+    frame_count = len(dt)
+    hold_sec = numpy.zeros(frame_count)
+    equipped_mask = numpy.zeros(frame_count, dtype=bool)
+    if trigger_column is None:
+        inside = [False] * frame_count
+    else:
+        inside = (numpy.hypot(world_x[:, trigger_column] - center.x, world_y[:, trigger_column] - center.y) <= radius).tolist()
+    steps = dt.tolist()
+    hold = 0.0
+    for index in range(frame_count):
+        if inside[index]:
+            hold += steps[index]
+        else:
+            hold = max(0.0, hold - steps[index] * 2.2)
+        if clamp(hold / hold_to_equip_sec, 0.0, 1.0) >= 1.0:
+            # DockCharger resets on equip and stays at 0 afterwards.
+            equipped_mask[index:] = True
+            return equipped_mask, hold_sec, index
+        hold_sec[index] = hold
+    return equipped_mask, hold_sec, -1
+
+
+def _segment_columns(
+    spec: SegmentSpec,
+    world_x: Any,
+    world_y: Any,
+    dt: Any,
+    column: dict[str, int],
+    equipped_mask: Any,
+    center: Vec2,
+) -> Any:
+    numpy = np
+    frame_count = len(dt)
+    dock = numpy.array(
+        [center.x + spec.dock_offset_x, center.y + spec.dock_offset_y, spec.z, 0.0, 1.0, 1.0, 1.0]
+    )
+    start, end = column.get(spec.start_joint), column.get(spec.end_joint)
+    if start is None or end is None:
+        return numpy.broadcast_to(dock, (frame_count, len(TRANSFORM_FIELDS)))
+
+    sx, sy, ex, ey = world_x[:, start], world_y[:, start], world_x[:, end], world_y[:, end]
+    following = equipped_mask & ~(numpy.isnan(sx) | numpy.isnan(sy) | numpy.isnan(ex) | numpy.isnan(ey))
+    dx, dy = ex - sx, ey - sy
+    length = numpy.hypot(dx, dy)
+    radius = numpy.clip(length * spec.radius_factor, spec.radius_min, spec.radius_max)
+    targets = numpy.stack(
+        [
+            (sx + ex) * 0.5,
+            (sy + ey) * 0.5,
+            numpy.full(frame_count, spec.z),
+            numpy.arctan2(dy, dx) - math.pi / 2,
+            radius,
+            length,
+            radius,
+        ],
+        axis=1,
+    )
+    rate = numpy.clip(dt * spec.smooth_gain, 0.0, 1.0)[:, None]
+
+    # p[i] = decay[i] * p[i-1] + drive[i]; dock frames reset p to the dock pose.
+    decay = numpy.where(following[:, None], 1.0 - rate, 0.0)
+    drive = numpy.where(following[:, None], targets * rate, dock)
+    decay, drive = _linear_scan(decay, drive)
+    columns = decay * dock + drive
+    columns[:, 2] = spec.z
+    return columns
+
+
+def _linear_scan(decay: Any, drive: Any) -> tuple[Any, Any]:
+    """Inclusive scan of affine maps ``p -> decay * p + drive`` (Hillis-Steele doubling)."""
+
+    decay = decay.copy()
+    drive = drive.copy()
+    shift = 1
+    while shift < len(decay):
+        drive[shift:] = decay[shift:] * drive[:-shift] + drive[shift:]
+        decay[shift:] = decay[shift:] * decay[:-shift]
+        shift *= 2
+    return decay, drive
+
+
+def columns_to_frames(result: dict[str, Any]) -> list[dict[str, Any]]:
+    """Expand columnar output into ``run_body_sequence`` frame dicts."""
+
+    frames = []
+    transforms = result["transforms"].tolist()
+    dt = result["dt_sec"].tolist()
+    equipped = result["equipped_mask"].tolist()
+    hold = result["hold_sec"].tolist()
+    for index, rows in enumerate(transforms):
+        frames.append(
+            {
+                "index": index,
+                "dt_sec": dt[index],
+                "equipped": equipped[index],
+                "hold_sec": round(hold[index], 4),
+                "segments": {
+                    name: dict(zip(TRANSFORM_FIELDS, row)) for name, row in zip(result["segments"], rows)
+                },
+            }
+        )
+    return frames
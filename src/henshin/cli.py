@@ -8,10 +8,23 @@ import http.server
 import json
 import os
 import socketserver
+import sys
+import time
+from dataclasses import asdict
 from pathlib import Path
+from typing import Any, Iterator
 
 from .archive import ensure_session_dir, save_session_bundle
-from .bodyfit import BodyFrame, CoverScale as BodyCoverScale, SegmentSpec, Vec2 as BodyVec2, run_body_sequence
+from .bodyfit import (
+    BodyFrame,
+    BodySequenceStream,
+    CoverScale as BodyCoverScale,
+    SegmentSpec,
+    Vec2 as BodyVec2,
+    run_body_sequence,
+)
+from .body_sim_format import BodySimWriter, read_body_sim, write_body_sim_binary
+from .bodyfit_batch import body_frames_to_arrays, columns_to_frames, run_body_sequence_batch
 from .constants import REFUSAL_CODES
 from .dashboard_server import serve_dashboard
 from .design_coherence import run_design_coherence_audit, write_design_coherence_markdown
@@ -31,6 +44,7 @@ from .iw_henshin import (
     DEFAULT_TRIGGER_PHRASE,
     IWSDKHenshinConfig,
     IWSDKHenshinRequest,
+    TRACKING_REPLAY_ENCODINGS,
     run_iwsdk_henshin,
 )
 from .part_generation import (
@@ -43,9 +57,25 @@ from .part_generation import (
 )
 from .image_providers import ImageProviderError
 from .manifest import project_suitspec_to_manifest
-from .rightarm import CoverScale, RightArmFrame, Vec2, run_rightarm_sequence
-from .sakura_ai_engine import resolve_sakura_config
+from .mocopi_ingest import DEFAULT_UDP_PORT, DEFAULT_WS_PORT, MocopiIngestServer, MocopiIngestSession, replay_mocopi_capture
+from .new_route_api import NewRouteApi
+from .new_route_store import STORE_BACKENDS
+from .rightarm import CoverScale, RightArmFrame, RightArmSequenceStream, Vec2, run_rightarm_sequence
+from .sakura_ai_engine import SakuraAIEngineError, resolve_sakura_config
+from .sim_stream import write_ndjson
+from .static_files import DEFAULT_PRECOMPRESS_DIRS, PRECOMPRESS_MIN_BYTES, StaticFileHandler, precompress_static_tree
+from .sweep_fit import (
+    RIGHTARM_SMOOTH_GAIN,
+    SWEEP_KINDS,
+    SweepGrid,
+    load_sweep_sequence,
+    parse_grid_values,
+    run_sweep,
+    write_sweep_csv,
+)
+from .tracking_codec import DEFAULT_PRECISION
 from .transform import ProtocolStateMachine
+from .tts_cache import DEFAULT_TTS_CACHE_MAX_BYTES, TTSCache, prewarm_tts_cache
 from .validators import load_json, validate_file
 from .vrm_authoring_audit import run_authoring_audit, write_authoring_audit
 
@@ -298,28 +328,28 @@ def _cmd_generate_parts(args: argparse.Namespace) -> int:
 
 def _cmd_simulate_rightarm(args: argparse.Namespace) -> int:
     payload = load_json(args.input)
-    raw_frames = payload.get("frames", [])
-    frames: list[RightArmFrame] = []
-    for item in raw_frames:
-        frames.append(
-            RightArmFrame(
-                dt_sec=float(item["dt_sec"]),
-                right_elbow_xy01=(float(item["right_elbow_xy01"][0]), float(item["right_elbow_xy01"][1])),
-                right_wrist_xy01=(float(item["right_wrist_xy01"][0]), float(item["right_wrist_xy01"][1])),
-            )
+    frames = (
+        RightArmFrame(
+            dt_sec=float(item["dt_sec"]),
+            right_elbow_xy01=(float(item["right_elbow_xy01"][0]), float(item["right_elbow_xy01"][1])),
+            right_wrist_xy01=(float(item["right_wrist_xy01"][0]), float(item["right_wrist_xy01"][1])),
         )
+        for item in payload.get("frames", [])
+    )
 
     cover = payload.get("cover_scale", {"x": 1.0, "y": 1.0})
     dock = payload.get("dock", {"center": [0.55, -0.25], "radius": 0.18, "hold_to_equip_sec": 0.7})
 
-    result = run_rightarm_sequence(
-        frames=frames,
-        mirror=bool(payload.get("mirror", True)),
-        cover_scale=CoverScale(float(cover["x"]), float(cover["y"])),
-        dock_center=Vec2(float(dock["center"][0]), float(dock["center"][1])),
-        dock_radius=float(dock["radius"]),
-        hold_to_equip_sec=float(dock.get("hold_to_equip_sec", 0.7)),
-    )
+    options = {
+        "mirror": bool(payload.get("mirror", True)),
+        "cover_scale": CoverScale(float(cover["x"]), float(cover["y"])),
+        "dock_center": Vec2(float(dock["center"][0]), float(dock["center"][1])),
+        "dock_radius": float(dock["radius"]),
+        "hold_to_equip_sec": float(dock.get("hold_to_equip_sec", 0.7)),
+    }
+    if args.stream:
+        return _write_stream_records(args.output, RightArmSequenceStream(frames, **options).records())
+    result = run_rightarm_sequence(frames=frames, **options)
 
     if args.output:
         out = Path(args.output)
@@ -332,16 +362,29 @@ def _cmd_simulate_rightarm(args: argparse.Namespace) -> int:
     return 0
 
 
+def _body_frame(item: dict[str, Any]) -> BodyFrame:
+    joints: dict[str, tuple[float, float]] = {}
+    for joint_name, xy in item.get("joints", {}).items():
+        joints[joint_name] = (float(xy[0]), float(xy[1]))
+    return BodyFrame(dt_sec=float(item["dt_sec"]), joints_xy01=joints)
+
+
+def _write_stream_records(output: str | None, records: Iterator[dict[str, Any]]) -> int:
+    if not output:
+        write_ndjson(sys.stdout, records)
+        return 0
+    out = Path(output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with out.open("w", encoding="utf-8") as fp:
+        count = write_ndjson(fp, records)
+    print(json.dumps({"ok": True, "output": str(out), "records": count}, ensure_ascii=False))
+    return 0
+
+
 def _cmd_simulate_body(args: argparse.Namespace) -> int:
     payload = load_json(args.input)
-    raw_frames = payload.get("frames", [])
-
-    frames: list[BodyFrame] = []
-    for item in raw_frames:
-        joints: dict[str, tuple[float, float]] = {}
-        for joint_name, xy in item.get("joints", {}).items():
-            joints[joint_name] = (float(xy[0]), float(xy[1]))
-        frames.append(BodyFrame(dt_sec=float(item["dt_sec"]), joints_xy01=joints))
+    # Frames are built lazily so --stream never holds more than one at a time.
+    frames = (_body_frame(item) for item in payload.get("frames", []))
 
     raw_specs = payload.get("segments", [])
     segment_specs: list[SegmentSpec] | None = None
@@ -366,16 +409,66 @@ def _cmd_simulate_body(args: argparse.Namespace) -> int:
     cover = payload.get("cover_scale", {"x": 1.0, "y": 1.0})
     dock = payload.get("dock", {"center": [0.55, -0.25], "radius": 0.18, "hold_to_equip_sec": 0.7})
 
-    result = run_body_sequence(
-        frames=frames,
-        mirror=bool(payload.get("mirror", True)),
-        cover_scale=BodyCoverScale(float(cover["x"]), float(cover["y"])),
-        dock_center=BodyVec2(float(dock["center"][0]), float(dock["center"][1])),
-        dock_radius=float(dock.get("radius", 0.18)),
-        hold_to_equip_sec=float(dock.get("hold_to_equip_sec", 0.7)),
-        trigger_joint=str(dock.get("trigger_joint", "right_wrist")),
-        segment_specs=segment_specs,
-    )
+    options = {
+        "mirror": bool(payload.get("mirror", True)),
+        "cover_scale": BodyCoverScale(float(cover["x"]), float(cover["y"])),
+        "dock_center": BodyVec2(float(dock["center"][0]), float(dock["center"][1])),
+        "dock_radius": float(dock.get("radius", 0.18)),
+        "hold_to_equip_sec": float(dock.get("hold_to_equip_sec", 0.7)),
+        "trigger_joint": str(dock.get("trigger_joint", "right_wrist")),
+        "segment_specs": segment_specs,
+    }
+    output_format = args.format or ("binary" if (args.output or "").endswith(".bsim") else "json")
+    if output_format == "binary" and (args.stream or not args.output):
+        print(json.dumps({"ok": False, "error": "--format binary needs --output and no --stream"}, ensure_ascii=False))
+        return 2
+    if args.stream:
+        if args.engine == "numpy":
+            print(json.dumps({"ok": False, "error": "--stream uses the python engine"}, ensure_ascii=False))
+            return 2
+        return _write_stream_records(args.output, BodySequenceStream(frames, **options).records())
+    if args.engine == "numpy":
+        try:
+            xy, dt, joint_names = body_frames_to_arrays(frames)
+            columns = run_body_sequence_batch(xy, dt, joint_names, **options)
+        except ValueError as exc:
+            print(json.dumps({"ok": False, "error": str(exc)}, ensure_ascii=False))
+            return 2
+        result = {
+            "equipped": columns["equipped"],
+            "equip_frame": columns["equip_frame"],
+            "trigger_joint": columns["trigger_joint"],
+            "segments": columns["segments"],
+            "frames": columns_to_frames(columns),
+        }
+    elif output_format == "binary":
+        result = None
+    else:
+        result = run_body_sequence(frames=frames, **options)
+
+    if output_format == "binary":
+        out = Path(args.output)
+        if result is None:
+            summary = write_body_sim_binary(out, BodySequenceStream(frames, **options))
+        else:
+            writer = BodySimWriter(result["segments"])
+            for frame in result["frames"]:
+                writer.add_frame(frame)
+            writer.write(out, result)
+            summary = result
+        print(
+            json.dumps(
+                {
+                    "ok": True,
+                    "output": str(out),
+                    "format": "binary",
+                    "equip_frame": summary["equip_frame"],
+                    "segments": len(summary["segments"]),
+                },
+                ensure_ascii=False,
+            )
+        )
+        return 0
 
     if args.output:
         out = Path(args.output)
@@ -397,6 +490,65 @@ def _cmd_simulate_body(args: argparse.Namespace) -> int:
     return 0
 
 
+def _cmd_export_body_sim(args: argparse.Namespace) -> int:
+    try:
+        body_sim = read_body_sim(Path(args.input))
+    except (OSError, ValueError) as exc:
+        print(json.dumps({"ok": False, "error": str(exc)}, ensure_ascii=False))
+        return 2
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(body_sim.to_json(), ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    print(json.dumps({"ok": True, "output": str(out), "frames": body_sim.frame_count}, ensure_ascii=False))
+    return 0
+
+
+def _cmd_sweep_fit(args: argparse.Namespace) -> int:
+    started = time.perf_counter()
+    try:
+        grid = SweepGrid(
+            dock_center_x=parse_grid_values(args.dock_center_x),
+            dock_center_y=parse_grid_values(args.dock_center_y),
+            dock_radius=parse_grid_values(args.dock_radius),
+            hold_to_equip_sec=parse_grid_values(args.hold_to_equip_sec),
+            smooth_gain=parse_grid_values(args.smooth_gain),
+        )
+        if args.kind == "rightarm" and grid.smooth_gain != (RIGHTARM_SMOOTH_GAIN,):
+            raise ValueError(f"rightarm simulations always smooth with gain {RIGHTARM_SMOOTH_GAIN}")
+        sequences = [
+            load_sweep_sequence(Path(path), kind=args.kind, expect_equip=expect)
+            for paths, expect in ((args.positive or [], True), (args.negative or [], False))
+            for path in paths
+        ]
+        workers = args.workers if args.workers is not None else (os.cpu_count() or 1)
+        rows = run_sweep(sequences, grid, workers=workers)
+    except (OSError, KeyError, ValueError) as exc:
+        print(json.dumps({"ok": False, "error": str(exc)}, ensure_ascii=False))
+        return 2
+    out = None
+    if args.output:
+        out = Path(args.output)
+        if out.suffix.lower() == ".csv":
+            write_sweep_csv(out, rows)
+        else:
+            write_json(out, {"grid": asdict(grid), "kind": args.kind, "rows": rows})
+    print(
+        json.dumps(
+            {
+                "ok": True,
+                "combinations": len(rows),
+                "positive": len(args.positive or []),
+                "negative": len(args.negative or []),
+                "elapsed_sec": round(time.perf_counter() - started, 3),
+                "output": str(out) if out else None,
+                "top": rows[: max(0, args.top)],
+            },
+            ensure_ascii=False,
+        )
+    )
+    return 0
+
+
 def _cmd_serve_viewer(args: argparse.Namespace) -> int:
     port = int(args.port)
     directory = Path(args.root).resolve()
@@ -404,8 +556,12 @@ def _cmd_serve_viewer(args: argparse.Namespace) -> int:
         print(json.dumps({"ok": False, "error": f"Directory not found: {directory}"}, ensure_ascii=False))
         return 2
 
-    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=str(directory))
-    with socketserver.TCPServer(("", port), handler) as httpd:
+    class ThreadingViewerServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+        daemon_threads = True
+        allow_reuse_address = True
+
+    handler = functools.partial(StaticFileHandler, directory=str(directory))
+    with ThreadingViewerServer(("", port), handler) as httpd:
         print(
             json.dumps(
                 {
@@ -426,7 +582,47 @@ def _cmd_serve_dashboard(args: argparse.Namespace) -> int:
     if not root.exists():
         print(json.dumps({"ok": False, "error": f"Directory not found: {root}"}, ensure_ascii=False))
         return 2
-    serve_dashboard(root=root, port=int(args.port))
+    serve_dashboard(
+        root=root,
+        port=int(args.port),
+        warm_validators=bool(args.warm_validators),
+        mocopi_udp_port=args.mocopi_udp_port,
+        mocopi_ws_port=args.mocopi_ws_port,
+        prewarm_tts=bool(args.prewarm_tts),
+    )
+    return 0
+
+
+def _cmd_reindex_trials(args: argparse.Namespace) -> int:
+    root = Path(args.root).resolve()
+    suit_store_root = Path(args.suit_store_root) if args.suit_store_root else None
+    result = NewRouteApi(
+        root,
+        suit_store_root=suit_store_root,
+        storage_backend=args.storage_backend,
+    ).rebuild_trial_index()
+    print(json.dumps(result, ensure_ascii=False))
+    return 0
+
+
+def _cmd_reindex_manifests(args: argparse.Namespace) -> int:
+    root = Path(args.root).resolve()
+    suit_store_root = Path(args.suit_store_root) if args.suit_store_root else None
+    api = NewRouteApi(root, suit_store_root=suit_store_root, storage_backend=args.storage_backend)
+    result = api.check_manifest_index() if args.check else api.rebuild_manifest_index()
+    print(json.dumps(result, ensure_ascii=False))
+    return 0 if result["ok"] else 1
+
+
+def _cmd_precompress_static(args: argparse.Namespace) -> int:
+    root = Path(args.root).resolve()
+    result = precompress_static_tree(
+        root,
+        args.dir or DEFAULT_PRECOMPRESS_DIRS,
+        min_bytes=int(args.min_bytes),
+        force=bool(args.force),
+    )
+    print(json.dumps(result, ensure_ascii=False))
     return 0
 
 
@@ -502,6 +698,10 @@ def _cmd_iw_henshin(args: argparse.Namespace) -> int:
             trigger_phrase=args.trigger_phrase or os.getenv("VOICE_TRIGGER_PHRASE") or DEFAULT_TRIGGER_PHRASE,
             explanation_text=args.explanation or DEFAULT_EXPLANATION,
             tts_enabled=not bool(args.no_tts),
+            body_sim_format=args.body_sim_format,
+            tracking_encoding=args.tracking_encoding,
+            tracking_precision=args.tracking_precision,
+            tts_cache=not bool(args.no_tts_cache),
         )
         sakura_config = resolve_sakura_config(
             token=args.sakura_token,
@@ -534,6 +734,88 @@ def _cmd_iw_henshin(args: argparse.Namespace) -> int:
     return 2 if result.get("error") else 1
 
 
+def _cmd_prewarm_tts(args: argparse.Namespace) -> int:
+    sakura_config = resolve_sakura_config(
+        token=args.sakura_token,
+        base_url=args.sakura_base_url,
+        tts_model=args.tts_model,
+        tts_voice=args.tts_voice,
+        tts_format=args.tts_format,
+        timeout_seconds=args.timeout,
+    )
+    if not sakura_config.token:
+        print(json.dumps({"ok": False, "error": "Sakura AI Engine token is missing."}, ensure_ascii=False))
+        return 2
+    try:
+        cache = TTSCache(args.root, max_bytes=int(args.max_mb * 1024 * 1024))
+        report = prewarm_tts_cache(cache, args.text or [DEFAULT_EXPLANATION], sakura_config)
+    except (ValueError, SakuraAIEngineError) as exc:
+        print(json.dumps({"ok": False, "error": str(exc)}, ensure_ascii=False))
+        return 2
+    print(json.dumps({"ok": True, "cache_dir": str(cache.directory), "entries": report}, ensure_ascii=False))
+    return 0
+
+
+def _cmd_ingest_mocopi(args: argparse.Namespace) -> int:
+    config = IWSDKHenshinConfig(hold_to_equip_sec=args.hold_to_equip_sec, trigger_joint=args.trigger_joint)
+    session = MocopiIngestSession(config)
+    session.subscribe(lambda event: print(json.dumps(event, ensure_ascii=False), flush=True))
+    log = Path(args.output).open("w", encoding="utf-8") if args.output else None
+    if log is not None:
+        session.subscribe(lambda record: log.write(json.dumps(record, ensure_ascii=False) + "\n"), frames=True)
+    server = MocopiIngestServer(
+        session,
+        host=args.host,
+        udp_port=args.udp_port if args.transport in {"udp", "both"} else None,
+        ws_port=args.ws_port if args.transport in {"websocket", "both"} else None,
+    )
+    try:
+        server.start()
+    except OSError as exc:
+        print(json.dumps({"ok": False, "error": str(exc)}, ensure_ascii=False))
+        return 2
+    listening: dict[str, Any] = {"ok": True, "message": "Ingesting mocopi frames", "pid": os.getpid()}
+    if server.udp_address:
+        listening["udp"] = "%s:%d" % server.udp_address
+    if server.ws_address:
+        listening["websocket"] = "ws://%s:%d/ingest" % server.ws_address
+        listening["events"] = "ws://%s:%d/events" % server.ws_address
+    print(json.dumps(listening, ensure_ascii=False), flush=True)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        session.end_stream()
+        if log is not None:
+            log.close()
+    print(json.dumps(session.status(), ensure_ascii=False))
+    return 0
+
+
+def _cmd_replay_mocopi(args: argparse.Namespace) -> int:
+    try:
+        payload = load_json(args.input)
+        udp = None
+        if args.udp:
+            host, _, port = args.udp.rpartition(":")
+            udp = (host or "127.0.0.1", int(port))
+        result = replay_mocopi_capture(
+            payload,
+            udp=udp,
+            websocket=args.ws,
+            speed=args.speed,
+            end_stream=not args.keep_stream,
+        )
+    except (ValueError, OSError, json.JSONDecodeError) as exc:
+        print(json.dumps({"ok": False, "error": str(exc)}, ensure_ascii=False))
+        return 2
+    print(json.dumps(result, ensure_ascii=False))
+    return 0
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(prog="henshin", description="SIM-first henshin prototyping CLI")
     sub = parser.add_subparsers(dest="command", required=True)
@@ -654,6 +936,11 @@ def build_parser() -> argparse.ArgumentParser:
     )
     simulate_rightarm.add_argument("--input", required=True, help="Input JSON sequence file")
     simulate_rightarm.add_argument("--output", help="Optional output JSON path")
+    simulate_rightarm.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write NDJSON records (header, equip, frame, end) as frames are simulated",
+    )
     simulate_rightarm.set_defaults(func=_cmd_simulate_rightarm)
 
     simulate_body = sub.add_parser(
@@ -662,8 +949,50 @@ def build_parser() -> argparse.ArgumentParser:
     )
     simulate_body.add_argument("--input", required=True, help="Input JSON sequence file")
     simulate_body.add_argument("--output", help="Optional output JSON path")
+    simulate_body.add_argument(
+        "--engine",
+        choices=["python", "numpy"],
+        default="python",
+        help="numpy runs the vectorized batch engine (requires numpy)",
+    )
+    simulate_body.add_argument(
+        "--format",
+        choices=["json", "binary"],
+        help="Output format; defaults to binary for a .bsim --output and JSON otherwise",
+    )
+    simulate_body.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write NDJSON records (header, equip, frame, end) as frames are simulated",
+    )
     simulate_body.set_defaults(func=_cmd_simulate_body)
 
+    export_body_sim = sub.add_parser(
+        "export-body-sim",
+        help="Convert a columnar .bsim body simulation to body-sim JSON",
+    )
+    export_body_sim.add_argument("--input", required=True, help="Input .bsim file")
+    export_body_sim.add_argument("--output", required=True, help="Output JSON path")
+    export_body_sim.set_defaults(func=_cmd_export_body_sim)
+
+    sweep_fit = sub.add_parser(
+        "sweep-fit",
+        help="Rank dock/smoothing parameter grids by equip and false-trigger rates over captured sequences",
+    )
+    sweep_fit.add_argument("--kind", choices=list(SWEEP_KINDS), default="body", help="Input sequence format")
+    sweep_fit.add_argument("--positive", nargs="+", help="Captures that should equip")
+    sweep_fit.add_argument("--negative", nargs="+", help="Captures that should not equip")
+    grid_help = "Comma-separated values and/or inclusive start:stop:step ranges"
+    sweep_fit.add_argument("--dock-center-x", default="0.55", help=grid_help)
+    sweep_fit.add_argument("--dock-center-y", default="-0.25", help=grid_help)
+    sweep_fit.add_argument("--dock-radius", default="0.18", help=grid_help)
+    sweep_fit.add_argument("--hold-to-equip-sec", default="0.7", help=grid_help)
+    sweep_fit.add_argument("--smooth-gain", default="18", help=grid_help + " (body only)")
+    sweep_fit.add_argument("--workers", type=int, help="Worker processes (default: CPU count; 1 runs inline)")
+    sweep_fit.add_argument("--output", help="Ranked table: .csv, or JSON for any other suffix")
+    sweep_fit.add_argument("--top", type=int, default=5, help="Rows to print in the summary")
+    sweep_fit.set_defaults(func=_cmd_sweep_fit)
+
     serve_viewer = sub.add_parser(
         "serve-viewer",
         help="Serve repository root for browser-based body-fit viewer",
@@ -678,8 +1007,65 @@ def build_parser() -> argparse.ArgumentParser:
     )
     serve_dashboard_cmd.add_argument("--root", default=".")
     serve_dashboard_cmd.add_argument("--port", type=int, default=8010)
+    serve_dashboard_cmd.add_argument(
+        "--warm-validators",
+        action="store_true",
+        help="Compile JSON Schema validators at startup instead of on the first request",
+    )
+    serve_dashboard_cmd.add_argument("--mocopi-udp-port", type=int, help="Also ingest live mocopi frames over UDP")
+    serve_dashboard_cmd.add_argument("--mocopi-ws-port", type=int, help="Also ingest live mocopi frames over WebSocket")
+    serve_dashboard_cmd.add_argument(
+        "--prewarm-tts",
+        action="store_true",
+        help="Cache the explanation TTS in the background at startup",
+    )
     serve_dashboard_cmd.set_defaults(func=_cmd_serve_dashboard)
 
+    reindex_trials = sub.add_parser(
+        "reindex-trials",
+        help="Rebuild the new-route trial/replay summary index from stored sessions",
+    )
+    reindex_trials.add_argument("--root", default=".")
+    reindex_trials.add_argument("--suit-store-root", help="Optional suit store override (trials live next to it)")
+    reindex_trials.add_argument(
+        "--storage-backend",
+        choices=list(STORE_BACKENDS),
+        help="Store to reindex (default: NEW_ROUTE_STORE_BACKEND or local-json)",
+    )
+    reindex_trials.set_defaults(func=_cmd_reindex_trials)
+
+    reindex_manifests = sub.add_parser(
+        "reindex-manifests",
+        help="Rebuild (or check) the new-route manifest_id lookup index",
+    )
+    reindex_manifests.add_argument("--root", default=".")
+    reindex_manifests.add_argument("--suit-store-root", help="Optional suit store override")
+    reindex_manifests.add_argument(
+        "--storage-backend",
+        choices=list(STORE_BACKENDS),
+        help="Store to reindex (default: NEW_ROUTE_STORE_BACKEND or local-json)",
+    )
+    reindex_manifests.add_argument(
+        "--check",
+        action="store_true",
+        help="Only compare the index with the manifest files; exit 1 when they disagree",
+    )
+    reindex_manifests.set_defaults(func=_cmd_reindex_manifests)
+
+    precompress_static = sub.add_parser(
+        "precompress-static",
+        help="Write .gz (and .br when brotli is installed) sidecars for static viewer assets",
+    )
+    precompress_static.add_argument("--root", default=".")
+    precompress_static.add_argument(
+        "--dir",
+        action="append",
+        help="Directory under --root to scan (repeatable, default: viewer)",
+    )
+    precompress_static.add_argument("--min-bytes", type=int, default=PRECOMPRESS_MIN_BYTES)
+    precompress_static.add_argument("--force", action="store_true", help="Rewrite sidecars that are already current")
+    precompress_static.set_defaults(func=_cmd_precompress_static)
+
     fit_regression = sub.add_parser(
         "fit-regression",
         help="Run VRM-first fit regression through the browser fit engine",
@@ -735,6 +1121,29 @@ def build_parser() -> argparse.ArgumentParser:
     iw_henshin.add_argument("--trigger-phrase", help="Voice trigger phrase; defaults to VOICE_TRIGGER_PHRASE or 生成")
     iw_henshin.add_argument("--explanation", help="TTS explanation text played after trigger detection")
     iw_henshin.add_argument("--no-tts", action="store_true", help="Disable Sakura TTS even when a token is configured")
+    iw_henshin.add_argument(
+        "--no-tts-cache",
+        action="store_true",
+        help="Always synthesize instead of reusing audio from <root>/_cache/tts",
+    )
+    iw_henshin.add_argument(
+        "--body-sim-format",
+        choices=["json", "binary"],
+        default="json",
+        help="Write body-sim.json or the columnar body-sim.bsim",
+    )
+    iw_henshin.add_argument(
+        "--tracking-encoding",
+        choices=list(TRACKING_REPLAY_ENCODINGS),
+        default="qdelta",
+        help="Replay tracking frames as quantized deltas (inline or sidecar) or plain JSON",
+    )
+    iw_henshin.add_argument(
+        "--tracking-precision",
+        type=float,
+        default=DEFAULT_PRECISION,
+        help="Quantization step for replay tracking coordinates (normalized xy units)",
+    )
     iw_henshin.add_argument("--sakura-token", help="Sakura AI Engine account token")
     iw_henshin.add_argument("--sakura-base-url", help="Sakura AI Engine API base URL")
     iw_henshin.add_argument("--whisper-model", help="Sakura Whisper model")
@@ -744,6 +1153,46 @@ def build_parser() -> argparse.ArgumentParser:
     iw_henshin.add_argument("--timeout", type=int, default=90)
     iw_henshin.set_defaults(func=_cmd_iw_henshin)
 
+    prewarm_tts = sub.add_parser(
+        "prewarm-tts",
+        help="Synthesize the explanation (and any --text) into the TTS cache ahead of sessions",
+    )
+    prewarm_tts.add_argument("--root", default="sessions", help="Sessions root holding _cache/tts")
+    prewarm_tts.add_argument("--text", action="append", help="Phrase to cache (repeatable; default: the explanation)")
+    prewarm_tts.add_argument("--max-mb", type=float, default=DEFAULT_TTS_CACHE_MAX_BYTES / (1024 * 1024))
+    prewarm_tts.add_argument("--sakura-token", help="Sakura AI Engine account token")
+    prewarm_tts.add_argument("--sakura-base-url", help="Sakura AI Engine API base URL")
+    prewarm_tts.add_argument("--tts-model", help="Sakura TTS model")
+    prewarm_tts.add_argument("--tts-voice", help="Sakura TTS voice")
+    prewarm_tts.add_argument("--tts-format", help="Sakura TTS response format")
+    prewarm_tts.add_argument("--timeout", type=int, default=90)
+    prewarm_tts.set_defaults(func=_cmd_prewarm_tts)
+
+    ingest_mocopi = sub.add_parser(
+        "ingest-mocopi",
+        help="Receive live mocopi frames (UDP/WebSocket) and run the body simulation as they arrive",
+    )
+    ingest_mocopi.add_argument("--host", default="127.0.0.1")
+    ingest_mocopi.add_argument("--transport", choices=["udp", "websocket", "both"], default="both")
+    ingest_mocopi.add_argument("--udp-port", type=int, default=DEFAULT_UDP_PORT)
+    ingest_mocopi.add_argument("--ws-port", type=int, default=DEFAULT_WS_PORT)
+    ingest_mocopi.add_argument("--hold-to-equip-sec", type=float, default=0.6)
+    ingest_mocopi.add_argument("--trigger-joint", default="right_wrist")
+    ingest_mocopi.add_argument("--output", help="Optional NDJSON log of events and simulated frames")
+    ingest_mocopi.set_defaults(func=_cmd_ingest_mocopi)
+
+    replay_mocopi = sub.add_parser(
+        "replay-mocopi",
+        help="Send a recorded mocopi capture to an ingest server at its recorded pace",
+    )
+    replay_mocopi.add_argument("--input", required=True, help="mocopi capture JSON")
+    replay_target = replay_mocopi.add_mutually_exclusive_group(required=True)
+    replay_target.add_argument("--udp", help="HOST:PORT of the UDP ingest listener")
+    replay_target.add_argument("--ws", help="WebSocket ingest URL, e.g. ws://127.0.0.1:9764/ingest")
+    replay_mocopi.add_argument("--speed", type=float, default=1.0, help="Playback speed; 0 sends without pacing")
+    replay_mocopi.add_argument("--keep-stream", action="store_true", help="Do not end the stream after the last frame")
+    replay_mocopi.set_defaults(func=_cmd_replay_mocopi)
+
     return parser
 
 
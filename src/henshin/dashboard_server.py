@@ -4,16 +4,18 @@ from __future__ import annotations
 
 import json
 import os
+import queue
 import threading
 import time
 import base64
 import binascii
+import gzip
+import hashlib
 from dataclasses import asdict, dataclass
 from http import HTTPStatus
-from http.server import SimpleHTTPRequestHandler
 from pathlib import Path
 from socketserver import TCPServer, ThreadingMixIn
-from typing import Any
+from typing import Any, Iterator
 from urllib.parse import parse_qs, urlparse
 
 from .iw_henshin import (
@@ -23,8 +25,40 @@ from .iw_henshin import (
     IWSDKHenshinRequest,
     run_iwsdk_henshin,
 )
+from .mocopi_ingest import MocopiIngestServer, MocopiIngestSession
 from .new_route_api import NewRouteApi
 from .part_generation import DEFAULT_PROVIDER_PROFILE, GenerationRequest, run_generate_parts
+from .sakura_ai_engine import SakuraAIEngineError, resolve_sakura_config
+from .static_files import StaticFileHandler, _coded_etag, _etag_matches
+from .tts_cache import TTSCache, prewarm_tts_cache
+from .validators import warm_schema_validators
+
+
+# Bodies smaller than this are sent uncompressed; gzip overhead would dominate.
+GZIP_MIN_BYTES = 1024
+# NDJSON records are sent in chunks of about this size.
+NDJSON_CHUNK_BYTES = 16 * 1024
+# Unused POST bodies up to this size are drained to keep the connection; larger ones close it.
+MAX_DISCARD_BYTES = 1024 * 1024
+
+
+def _content_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _accepts_gzip(accept_encoding: str | None) -> bool:
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        if coding.strip().lower() not in {"gzip", "*"}:
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
 
 
 def _is_within_root(path: Path, root: Path) -> bool:
@@ -397,10 +431,19 @@ def run_iw_henshin_voice(root: Path, payload: IWHenshinVoicePayload) -> dict[str
     }
 
 
-class DashboardHandler(SimpleHTTPRequestHandler):
-    def __init__(self, *args: Any, directory: str, root: Path, jobs: GenerationJobManager, **kwargs: Any) -> None:
+class DashboardHandler(StaticFileHandler):
+    def __init__(
+        self,
+        *args: Any,
+        directory: str,
+        root: Path,
+        jobs: GenerationJobManager,
+        ingest: MocopiIngestSession | None = None,
+        **kwargs: Any,
+    ) -> None:
         self.repo_root = root
         self.jobs = jobs
+        self.ingest = ingest
         super().__init__(*args, directory=directory, **kwargs)
 
     @staticmethod
@@ -417,14 +460,125 @@ class DashboardHandler(SimpleHTTPRequestHandler):
     ):
         return NewRouteApi(root, suit_store_root=suit_store_root).post(path, payload)
 
-    def _write_json(self, payload: dict[str, Any], status: int = HTTPStatus.OK) -> None:
+    def _write_json(
+        self,
+        payload: dict[str, Any],
+        status: int = HTTPStatus.OK,
+        *,
+        etag: str | None = None,
+        cache_control: str | None = None,
+    ) -> None:
         body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        content_encoding = None
+        if len(body) >= GZIP_MIN_BYTES and _accepts_gzip(self.headers.get("Accept-Encoding")):
+            content_encoding = "gzip"
+        if status == HTTPStatus.OK and self.command == "GET":
+            etag = _coded_etag(etag or _content_etag(body), content_encoding)
+            if _etag_matches(self.headers.get("If-None-Match"), etag):
+                self._write_not_modified(etag, cache_control)
+                return
+        else:
+            etag = None
+        if content_encoding:
+            body = gzip.compress(body, compresslevel=6)
         self.send_response(status)
         self.send_header("Content-Type", "application/json; charset=utf-8")
         self.send_header("Content-Length", str(len(body)))
+        self.send_header("Vary", "Accept-Encoding")
+        if content_encoding:
+            self.send_header("Content-Encoding", content_encoding)
+        if etag:
+            self.send_header("ETag", etag)
+        if cache_control:
+            self.send_header("Cache-Control", cache_control)
         self.end_headers()
         self.wfile.write(body)
 
+    def _write_ndjson(self, records: Iterator[dict[str, Any]], status: int = HTTPStatus.OK) -> None:
+        """Write records as NDJSON with chunked transfer encoding as they are produced."""
+
+        chunked = self.request_version != "HTTP/1.0"
+        self.send_response(status)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.close_connection = True
+        self.end_headers()
+
+        def flush(data: bytes) -> None:
+            if chunked:
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            else:
+                self.wfile.write(data)
+            self.wfile.flush()
+
+        buffer = bytearray()
+        first = True
+        try:
+            for record in records:
+                buffer += json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+                # The header record goes out at once so the first byte is not held back.
+                if first or len(buffer) >= NDJSON_CHUNK_BYTES:
+                    flush(bytes(buffer))
+                    buffer.clear()
+                    first = False
+            if buffer:
+                flush(bytes(buffer))
+            if chunked:
+                self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        except Exception as exc:  # noqa: BLE001 - status is already sent; cut the stream instead
+            # Without the terminating chunk and "end" record the client sees a truncated stream.
+            self.log_error("NDJSON stream failed: %s", exc)
+            self.close_connection = True
+        finally:
+            close = getattr(records, "close", None)
+            if close is not None:
+                close()
+
+    def _write_not_modified(self, etag: str, cache_control: str | None) -> None:
+        self.send_response(HTTPStatus.NOT_MODIFIED)
+        self.send_header("ETag", etag)
+        self.send_header("Vary", "Accept-Encoding")
+        if cache_control:
+            self.send_header("Cache-Control", cache_control)
+        self.end_headers()
+
+    def _discard_request_body(self) -> None:
+        """Consume an unused request body so the keep-alive connection stays in sync."""
+
+        try:
+            content_len = int(self.headers.get("Content-Length", "0"))
+        except ValueError:
+            content_len = -1
+        if content_len < 0 or content_len > MAX_DISCARD_BYTES:
+            self.close_connection = True
+        elif content_len:
+            self.rfile.read(content_len)
+
+    def _read_json_body(self) -> Any:
+        """Read and parse the JSON request body; an empty body is ``{}``.
+
+        When the body cannot be read in full the connection is closed, since
+        the next request on it would start inside this one's leftover bytes.
+        """
+
+        try:
+            content_len = int(self.headers.get("Content-Length", "0"))
+        except ValueError:
+            content_len = -1
+        if content_len < 0:
+            self.close_connection = True
+            raise ValueError("Content-Length must be a non-negative integer")
+        data = self.rfile.read(content_len) if content_len else b""
+        if len(data) < content_len:
+            self.close_connection = True
+            raise ValueError("Request body is shorter than Content-Length")
+        return json.loads(data.decode("utf-8")) if data else {}
+
     def _job_route(self, path: str) -> tuple[str, str | None]:
         suffix = path[len("/api/generation-jobs/") :]
         if not suffix:
@@ -438,7 +592,8 @@ class DashboardHandler(SimpleHTTPRequestHandler):
         self.send_response(HTTPStatus.OK)
         self.send_header("Content-Type", "text/event-stream; charset=utf-8")
         self.send_header("Cache-Control", "no-cache")
-        self.send_header("Connection", "keep-alive")
+        # The stream has no Content-Length, so it ends by closing the connection.
+        self.close_connection = True
         self.end_headers()
         try:
             while True:
@@ -459,15 +614,74 @@ class DashboardHandler(SimpleHTTPRequestHandler):
         except (BrokenPipeError, ConnectionResetError):
             return
 
+    def _stream_ingest_events(self, ingest: MocopiIngestSession) -> None:
+        events: queue.Queue[dict[str, Any]] = queue.Queue(maxsize=1024)
+
+        def enqueue(event: dict[str, Any]) -> None:
+            try:
+                events.put_nowait(event)
+            except queue.Full:
+                pass
+
+        unsubscribe = ingest.subscribe(enqueue)
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.close_connection = True
+        self.end_headers()
+        try:
+            while True:
+                try:
+                    event = events.get(timeout=10)
+                except queue.Empty:
+                    self.wfile.write(b": ping\n\n")
+                    self.wfile.flush()
+                    continue
+                self.wfile.write(f"event: {event['type']}\n".encode("utf-8"))
+                self.wfile.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return
+        finally:
+            unsubscribe()
+
     def do_GET(self) -> None:
         parsed = urlparse(self.path)
-        new_route_response = NewRouteApi(self.repo_root).get(parsed.path)
+        new_route_api = NewRouteApi(self.repo_root)
+        query = parse_qs(parsed.query)
+        cache_control = new_route_api.cache_control(parsed.path) if parsed.path.startswith("/v1/") else None
+        # Polls whose store revision is unchanged are answered before the body is built.
+        revision_etag = new_route_api.revision_etag(parsed.path, query)
+        if revision_etag and _etag_matches(self.headers.get("If-None-Match"), revision_etag):
+            # The body size is not known yet; answer with the variant the client holds.
+            held_gzip = '-gzip"' in (self.headers.get("If-None-Match") or "")
+            coding = "gzip" if held_gzip and _accepts_gzip(self.headers.get("Accept-Encoding")) else None
+            self._write_not_modified(_coded_etag(revision_etag, coding), cache_control)
+            return
+        stream = "application/x-ndjson" in (self.headers.get("Accept") or "")
+        new_route_response = new_route_api.get(parsed.path, query, stream=stream)
+        if new_route_response is not None and new_route_response.records is not None:
+            self._write_ndjson(new_route_response.records, status=new_route_response.status)
+            return
         if new_route_response is not None:
-            self._write_json(new_route_response.body, status=new_route_response.status)
+            self._write_json(
+                new_route_response.body,
+                status=new_route_response.status,
+                etag=revision_etag,
+                cache_control=cache_control,
+            )
             return
         if parsed.path == "/api/health":
             self._write_json({"ok": True})
             return
+        if parsed.path in {"/api/mocopi-ingest", "/api/mocopi-ingest/events"}:
+            if self.ingest is None:
+                self._write_json({"ok": False, "error": "mocopi ingest is not enabled"}, status=HTTPStatus.NOT_FOUND)
+            elif parsed.path.endswith("/events"):
+                self._stream_ingest_events(self.ingest)
+            else:
+                self._write_json(self.ingest.status())
+            return
         if parsed.path == "/api/suitspecs":
             self._write_json({"ok": True, "items": discover_suitspec_paths(self.repo_root)})
             return
@@ -503,6 +717,7 @@ class DashboardHandler(SimpleHTTPRequestHandler):
     def do_POST(self) -> None:
         parsed = urlparse(self.path)
         if parsed.path.startswith("/api/generation-jobs/") and parsed.path.endswith("/cancel"):
+            self._discard_request_body()
             job_id, _ = self._job_route(parsed.path)
             try:
                 job = self.jobs.cancel(job_id)
@@ -514,9 +729,7 @@ class DashboardHandler(SimpleHTTPRequestHandler):
 
         if parsed.path.startswith("/v1/"):
             try:
-                content_len = int(self.headers.get("Content-Length", "0"))
-                raw = self.rfile.read(content_len).decode("utf-8") if content_len > 0 else "{}"
-                payload_dict = json.loads(raw)
+                payload_dict = self._read_json_body()
                 response = NewRouteApi(self.repo_root).post(parsed.path, payload_dict)
             except (ValueError, json.JSONDecodeError) as exc:
                 self._write_json({"ok": False, "error": str(exc)}, status=HTTPStatus.BAD_REQUEST)
@@ -533,13 +746,12 @@ class DashboardHandler(SimpleHTTPRequestHandler):
             "/api/suitspec-save",
             "/api/iw-henshin/voice",
         ):
+            self._discard_request_body()
             self._write_json({"ok": False, "error": "Unknown API endpoint."}, status=HTTPStatus.NOT_FOUND)
             return
 
         try:
-            content_len = int(self.headers.get("Content-Length", "0"))
-            raw = self.rfile.read(content_len).decode("utf-8") if content_len > 0 else "{}"
-            payload_dict = json.loads(raw)
+            payload_dict = self._read_json_body()
             if parsed.path == "/api/iw-henshin/voice":
                 payload = IWHenshinVoicePayload(**payload_dict)
                 result = run_iw_henshin_voice(self.repo_root, payload)
@@ -561,28 +773,76 @@ class DashboardHandler(SimpleHTTPRequestHandler):
         self._write_json(result, status=status)
 
 
-def serve_dashboard(*, root: Path, port: int) -> None:
+def _start_tts_prewarm(root: Path) -> str:
+    """Cache the explanation TTS for voice sessions (``root/sessions``) on a background thread."""
+
+    sakura_config = resolve_sakura_config()
+    if not sakura_config.token:
+        return "skipped_missing_token"
+
+    def prewarm() -> None:
+        try:
+            report = prewarm_tts_cache(TTSCache(root / "sessions"), [DEFAULT_EXPLANATION], sakura_config)
+        except (OSError, SakuraAIEngineError) as exc:
+            print(json.dumps({"ok": False, "tts_prewarm": "failed", "error": str(exc)}, ensure_ascii=False), flush=True)
+            return
+        print(json.dumps({"ok": True, "tts_prewarm": report}, ensure_ascii=False), flush=True)
+
+    threading.Thread(target=prewarm, name="tts-prewarm", daemon=True).start()
+    return "started"
+
+
+def serve_dashboard(
+    *,
+    root: Path,
+    port: int,
+    warm_validators: bool = False,
+    mocopi_udp_port: int | None = None,
+    mocopi_ws_port: int | None = None,
+    prewarm_tts: bool = False,
+) -> None:
+    if warm_validators:
+        warm_schema_validators()
+    prewarm_status = _start_tts_prewarm(root) if prewarm_tts else None
+
     class ReusableThreadingTCPServer(ThreadingMixIn, TCPServer):
         allow_reuse_address = True
         daemon_threads = True
 
     directory = str(root)
     jobs = GenerationJobManager(root)
+    ingest_server: MocopiIngestServer | None = None
+    if mocopi_udp_port is not None or mocopi_ws_port is not None:
+        ingest_server = MocopiIngestServer(
+            MocopiIngestSession(),
+            host="",
+            udp_port=mocopi_udp_port,
+            ws_port=mocopi_ws_port,
+        ).start()
+    ingest = ingest_server.session if ingest_server else None
 
     def factory(*args: Any, **kwargs: Any) -> DashboardHandler:
-        return DashboardHandler(*args, directory=directory, root=root, jobs=jobs, **kwargs)
+        return DashboardHandler(*args, directory=directory, root=root, jobs=jobs, ingest=ingest, **kwargs)
 
     with ReusableThreadingTCPServer(("", port), factory) as httpd:
-        print(
-            json.dumps(
-                {
-                    "ok": True,
-                    "message": "Serving suit dashboard",
-                    "root": str(root),
-                    "pid": os.getpid(),
-                    "url": f"http://localhost:{port}/viewer/suit-dashboard/",
-                },
-                ensure_ascii=False,
-            )
-        )
-        httpd.serve_forever()
+        message: dict[str, Any] = {
+            "ok": True,
+            "message": "Serving suit dashboard",
+            "root": str(root),
+            "pid": os.getpid(),
+            "url": f"http://localhost:{port}/viewer/suit-dashboard/",
+        }
+        if ingest_server is not None:
+            message["mocopi_ingest"] = {
+                "udp_port": ingest_server.udp_address[1] if ingest_server.udp_address else None,
+                "ws_port": ingest_server.ws_address[1] if ingest_server.ws_address else None,
+                "status_url": f"http://localhost:{port}/api/mocopi-ingest",
+            }
+        if prewarm_status is not None:
+            message["tts_prewarm"] = prewarm_status
+        print(json.dumps(message, ensure_ascii=False))
+        try:
+            httpd.serve_forever()
+        finally:
+            if ingest_server is not None:
+                ingest_server.close()
@@ -12,6 +12,8 @@ import tempfile
 from pathlib import Path
 from typing import Iterable
 
+from .static_files import StaticFileHandler
+
 
 DEFAULT_BASELINE_MANIFEST = Path("viewer/assets/vrm/baselines.json")
 DEFAULT_ATTACH_MODE = "vrm"
@@ -69,7 +71,7 @@ class _ThreadingHttpServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
 @contextlib.contextmanager
 def serve_static_root(root: Path):
     directory = root.resolve()
-    class QuietStaticHandler(http.server.SimpleHTTPRequestHandler):
+    class QuietStaticHandler(StaticFileHandler):
         def log_message(self, format: str, *args) -> None:  # noqa: A003 - stdlib signature
             return
 
@@ -9,8 +9,8 @@ from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
-from urllib.error import HTTPError, URLError
-from urllib.request import Request, urlopen
+
+from .http_transport import TransportError, default_transport
 
 
 class GeminiImageError(RuntimeError):
@@ -143,23 +143,21 @@ def generate_image(
         aspect_ratio=aspect_ratio,
         image_size=image_size,
     )
-    request = Request(
-        url=url,
-        data=json.dumps(payload).encode("utf-8"),
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-
     try:
-        with urlopen(request, timeout=timeout_seconds) as response:
-            body = response.read().decode("utf-8")
-    except HTTPError as exc:
-        detail = exc.read().decode("utf-8", errors="replace")
-        raise GeminiImageError(f"Gemini HTTP error: status={exc.code} body={detail}") from exc
-    except URLError as exc:
+        response = default_transport().request(
+            "POST",
+            url,
+            headers={"Content-Type": "application/json"},
+            body=json.dumps(payload).encode("utf-8"),
+            timeout=timeout_seconds,
+        )
+    except TransportError as exc:
         raise GeminiImageError(f"Gemini connection error: {exc}") from exc
+    if response.status >= 400:
+        detail = response.body.decode("utf-8", errors="replace")
+        raise GeminiImageError(f"Gemini HTTP error: status={response.status} body={detail}")
 
-    parsed = json.loads(body)
+    parsed = json.loads(response.body.decode("utf-8"))
     image_bytes, mime_type = _extract_image_part(parsed)
 
     return GeminiImageResult(
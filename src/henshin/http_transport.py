@@ -0,0 +1,385 @@
+"""Pooled keep-alive HTTP transport shared by the provider clients.
+
+``urlopen`` opens a new connection for every call, paying DNS, TCP and TLS
+setup each time, including every fal status poll. ``HTTPTransport`` keeps
+idle ``http.client`` connections per ``scheme://host:port`` and hands them
+back out:
+
+- connect and read timeouts are separate. The connect timeout covers DNS,
+  TCP and the TLS handshake, and the read timeout applies to each socket
+  read after that;
+- a connection goes back to the pool only after its response was read to the
+  end and the server did not ask to close it. Idle connections older than
+  ``idle_timeout`` are dropped;
+- a request that fails on a reused connection because the server closed it
+  while idle is retried once on a new connection. This happens only if the
+  failure came while the request was being written, or if the method is
+  idempotent. A POST whose response never arrived may already have run, so it
+  raises ``TransportError`` instead;
+- redirects are followed like ``urlopen``: 307/308 keep the method and body,
+  and other redirects become a GET without a body;
+- ``stream()`` yields the response before the body is read, for large
+  downloads;
+- ``metrics()`` reports per host the requests, new versus reused
+  connections, the reuse ratio and the handshake time;
+- proxies come from the environment like ``urlopen``: ``getproxies()`` and
+  ``proxy_bypass()``. An https request is tunnelled through the proxy with
+  ``CONNECT``. An http request is sent to the proxy with the absolute URL as
+  its target.
+
+HTTP error statuses are returned, not raised. Callers map them to their own
+error types, as they did with ``HTTPError``. Connection failures raise
+``TransportError``.
+"""
+
+from __future__ import annotations
+
+import base64
+import http.client
+import ssl
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+from urllib.parse import unquote, urljoin, urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 90.0
+DEFAULT_IDLE_TIMEOUT = 30.0
+DEFAULT_MAX_IDLE_PER_HOST = 8
+MAX_REDIRECTS = 5
+STREAM_CHUNK_BYTES = 64 * 1024
+_REDIRECT_STATUSES = frozenset((301, 302, 303, 307, 308))
+# Errors that mean an idle keep-alive connection was closed by the server.
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+_IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"))
+
+
+class TransportError(RuntimeError):
+    """Raised when a request cannot be sent or its response cannot be read."""
+
+
+@dataclass(slots=True)
+class TransportResponse:
+    status: int
+    reason: str
+    headers: http.client.HTTPMessage
+    body: bytes
+    url: str
+
+    def content_type(self, default: str = "application/octet-stream") -> str:
+        if "Content-Type" not in self.headers:
+            return default
+        return self.headers.get_content_type()
+
+
+@dataclass(slots=True)
+class HostMetrics:
+    requests: int = 0
+    connections_opened: int = 0
+    connections_reused: int = 0
+    handshake_ms_total: float = 0.0
+    handshake_ms_max: float = 0.0
+    stale_retries: int = 0
+    errors: int = 0
+    bytes_received: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        opened = self.connections_opened
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "connections_reused": self.connections_reused,
+            "reuse_ratio": round(self.connections_reused / self.requests, 4) if self.requests else 0.0,
+            "handshake_ms_avg": round(self.handshake_ms_total / opened, 3) if opened else 0.0,
+            "handshake_ms_max": round(self.handshake_ms_max, 3),
+            "stale_retries": self.stale_retries,
+            "errors": self.errors,
+            "bytes_received": self.bytes_received,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class _Proxy:
+    host: str
+    port: int
+    authorization: str | None
+
+
+def _proxy_for(scheme: str, host: str) -> _Proxy | None:
+    """The environment proxy for ``scheme://host``, or None for a direct connection."""
+
+    url = getproxies().get(scheme)
+    if not url or proxy_bypass(host):
+        return None
+    parts = urlsplit(url if "://" in url else f"http://{url}")
+    if not parts.hostname:
+        return None
+    authorization = None
+    if parts.username is not None:
+        credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+        authorization = "Basic " + base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+    return _Proxy(parts.hostname, parts.port or 8080, authorization)
+
+
+@dataclass(slots=True)
+class _Lease:
+    key: str
+    connection: http.client.HTTPConnection
+    reused: bool
+    idle_since: float = field(default=0.0)
+
+
+class StreamingResponse:
+    """A response whose body has not been read yet; returned to the pool on close."""
+
+    def __init__(self, transport: HTTPTransport, lease: _Lease, response: http.client.HTTPResponse, url: str) -> None:
+        self._transport = transport
+        self._lease: _Lease | None = lease
+        self._response = response
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.msg
+        self.url = url
+
+    def read(self, amt: int | None = None) -> bytes:
+        try:
+            data = self._response.read(amt)
+        except (OSError, http.client.HTTPException) as exc:
+            self._discard()
+            raise TransportError(f"Read error for {self.url}: {exc}") from exc
+        self._transport._count_bytes(self._lease, len(data))
+        return data
+
+    def iter_chunks(self, chunk_size: int = STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self) -> None:
+        if self._lease is None:
+            return
+        lease, self._lease = self._lease, None
+        if self._response.isclosed() and not self._response.will_close:
+            self._transport._release(lease)
+        else:
+            self._response.close()
+            lease.connection.close()
+
+    def _discard(self) -> None:
+        if self._lease is not None:
+            self._lease.connection.close()
+            self._lease = None
+
+
+class HTTPTransport:
+    def __init__(
+        self,
+        *,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        max_idle_per_host: int = DEFAULT_MAX_IDLE_PER_HOST,
+        ssl_context: ssl.SSLContext | None = None,
+    ) -> None:
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.idle_timeout = idle_timeout
+        self.max_idle_per_host = max_idle_per_host
+        self._ssl_context = ssl_context
+        self._idle: dict[str, list[_Lease]] = {}
+        self._metrics: dict[str, HostMetrics] = {}
+        self._lock = threading.Lock()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: dict[str, str] | None = None,
+        body: bytes | None = None,
+        timeout: float | None = None,
+        connect_timeout: float | None = None,
+    ) -> TransportResponse:
+        options = {"headers": headers, "body": body, "timeout": timeout, "connect_timeout": connect_timeout}
+        with self.stream(method, url, **options) as response:
+            payload = response.read()
+            return TransportResponse(response.status, response.reason, response.headers, payload, response.url)
+
+    @contextmanager
+    def stream(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: dict[str, str] | None = None,
+        body: bytes | None = None,
+        timeout: float | None = None,
+        connect_timeout: float | None = None,
+    ) -> Iterator[StreamingResponse]:
+        read_timeout = self.read_timeout if timeout is None else timeout
+        connect_timeout = min(self.connect_timeout, read_timeout) if connect_timeout is None else connect_timeout
+        response = None
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self._send(method, url, headers or {}, body, read_timeout, connect_timeout)
+            location = response.headers.get("Location")
+            if response.status not in _REDIRECT_STATUSES or not location:
+                break
+            response.read()
+            response.close()
+            url = urljoin(url, location)
+            if response.status not in (307, 308):
+                method, body = "GET", None
+        else:
+            raise TransportError(f"Too many redirects for {url}")
+        try:
+            yield response
+        finally:
+            response.close()
+
+    def metrics(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return {key: metrics.as_dict() for key, metrics in self._metrics.items()}
+
+    def close(self) -> None:
+        with self._lock:
+            leases = [lease for pool in self._idle.values() for lease in pool]
+            self._idle.clear()
+        for lease in leases:
+            lease.connection.close()
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str],
+        body: bytes | None,
+        read_timeout: float,
+        connect_timeout: float,
+    ) -> StreamingResponse:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise TransportError(f"Unsupported URL: {url}")
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        key = f"{parts.scheme}://{parts.hostname}:{port}"
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        proxy = _proxy_for(parts.scheme, parts.hostname)
+        if proxy is not None:
+            # Proxied connections are pooled and counted apart from direct ones.
+            key = f"{key} via {proxy.host}:{proxy.port}"
+        if proxy is not None and parts.scheme == "http":
+            target = f"http://{parts.netloc.rpartition('@')[2]}{target}"
+            if proxy.authorization:
+                headers = {**headers, "Proxy-Authorization": proxy.authorization}
+
+        lease = self._acquire(key, parts.scheme, parts.hostname, port, connect_timeout, proxy)
+        while True:
+            sent = False
+            try:
+                lease.connection.sock.settimeout(read_timeout)
+                lease.connection.request(method, target, body=body, headers=headers)
+                sent = True
+                response = lease.connection.getresponse()
+            except _STALE_CONNECTION_ERRORS as exc:
+                lease.connection.close()
+                # Once the request is written the server may have acted on it,
+                # so only idempotent methods are sent again.
+                if not lease.reused or (sent and method.upper() not in _IDEMPOTENT_METHODS):
+                    self._record_error(key)
+                    raise TransportError(f"Connection error for {url}: {exc}") from exc
+                with self._lock:
+                    self._metrics[key].stale_retries += 1
+                lease = self._connect(key, parts.scheme, parts.hostname, port, connect_timeout, proxy)
+                continue
+            except (OSError, http.client.HTTPException) as exc:
+                lease.connection.close()
+                self._record_error(key)
+                raise TransportError(f"Connection error for {url}: {exc}") from exc
+            return StreamingResponse(self, lease, response, url)
+
+    def _acquire(
+        self, key: str, scheme: str, host: str, port: int, connect_timeout: float, proxy: _Proxy | None
+    ) -> _Lease:
+        now = time.monotonic()
+        with self._lock:
+            metrics = self._metrics.setdefault(key, HostMetrics())
+            metrics.requests += 1
+            pool = self._idle.get(key, [])
+            while pool:
+                lease = pool.pop()
+                if now - lease.idle_since <= self.idle_timeout:
+                    metrics.connections_reused += 1
+                    lease.reused = True
+                    return lease
+                lease.connection.close()
+        return self._connect(key, scheme, host, port, connect_timeout, proxy)
+
+    def _connect(
+        self, key: str, scheme: str, host: str, port: int, connect_timeout: float, proxy: _Proxy | None
+    ) -> _Lease:
+        # Through a proxy the socket goes to the proxy; https then tunnels to
+        # the origin, so the TLS handshake still verifies the origin's name.
+        address = (proxy.host, proxy.port) if proxy is not None else (host, port)
+        if scheme == "https":
+            context = self._ssl_context or ssl.create_default_context()
+            connection: http.client.HTTPConnection = http.client.HTTPSConnection(
+                *address, timeout=connect_timeout, context=context
+            )
+            if proxy is not None:
+                tunnel_headers = {"Proxy-Authorization": proxy.authorization} if proxy.authorization else None
+                connection.set_tunnel(host, port, headers=tunnel_headers)
+        else:
+            connection = http.client.HTTPConnection(*address, timeout=connect_timeout)
+        started = time.perf_counter()
+        try:
+            connection.connect()
+        except OSError as exc:
+            connection.close()
+            self._record_error(key)
+            raise TransportError(f"Connection error for {key}: {exc}") from exc
+        handshake_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            metrics = self._metrics.setdefault(key, HostMetrics())
+            metrics.connections_opened += 1
+            metrics.handshake_ms_total += handshake_ms
+            metrics.handshake_ms_max = max(metrics.handshake_ms_max, handshake_ms)
+        return _Lease(key, connection, reused=False)
+
+    def _release(self, lease: _Lease) -> None:
+        lease.idle_since = time.monotonic()
+        with self._lock:
+            pool = self._idle.setdefault(lease.key, [])
+            if len(pool) < self.max_idle_per_host:
+                pool.append(lease)
+                return
+        lease.connection.close()
+
+    def _record_error(self, key: str) -> None:
+        with self._lock:
+            self._metrics.setdefault(key, HostMetrics()).errors += 1
+
+    def _count_bytes(self, lease: _Lease | None, count: int) -> None:
+        if lease is None or not count:
+            return
+        with self._lock:
+            self._metrics[lease.key].bytes_received += count
+
+
+_DEFAULT_TRANSPORT: HTTPTransport | None = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_transport() -> HTTPTransport:
+    """The process-wide transport used by the image, Gemini and Sakura clients."""
+
+    global _DEFAULT_TRANSPORT
+    with _DEFAULT_LOCK:
+        if _DEFAULT_TRANSPORT is None:
+            _DEFAULT_TRANSPORT = HTTPTransport()
+        return _DEFAULT_TRANSPORT
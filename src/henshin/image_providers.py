@@ -11,8 +11,6 @@ from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Callable
-from urllib.error import HTTPError, URLError
-from urllib.request import Request, urlopen
 
 from .gemini_image import (
     GeminiImageError,
@@ -20,6 +18,7 @@ from .gemini_image import (
     generate_image as generate_gemini_image,
     resolve_api_key as resolve_gemini_api_key,
 )
+from .http_transport import TransportError, default_transport
 
 
 ProgressCallback = Callable[[dict[str, Any]], None]
@@ -104,37 +103,36 @@ def _json_request(
     timeout_seconds: int = 90,
 ) -> dict[str, Any]:
     data = None if payload is None else json.dumps(payload).encode("utf-8")
-    req = Request(
-        url=url,
-        data=data,
-        method=method,
-        headers={"Content-Type": "application/json", **(headers or {})},
-    )
     try:
-        with urlopen(req, timeout=timeout_seconds) as res:
-            body = res.read().decode("utf-8")
-    except HTTPError as exc:
-        detail = exc.read().decode("utf-8", errors="replace")
-        raise ImageProviderError(f"HTTP error from {url}: status={exc.code} body={detail}") from exc
-    except URLError as exc:
+        res = default_transport().request(
+            method,
+            url,
+            headers={"Content-Type": "application/json", **(headers or {})},
+            body=data,
+            timeout=timeout_seconds,
+        )
+    except TransportError as exc:
         raise ImageProviderError(f"Connection error for {url}: {exc}") from exc
+    if res.status >= 400:
+        detail = res.body.decode("utf-8", errors="replace")
+        raise ImageProviderError(f"HTTP error from {url}: status={res.status} body={detail}")
 
+    body = res.body.decode("utf-8")
     if not body.strip():
         return {}
     return json.loads(body)
 
 
 def _binary_request(url: str, *, headers: dict[str, str] | None = None, timeout_seconds: int = 90) -> tuple[bytes, str]:
-    req = Request(url=url, method="GET", headers=headers or {})
     try:
-        with urlopen(req, timeout=timeout_seconds) as res:
-            mime_type = res.headers.get_content_type() or "image/png"
-            return res.read(), mime_type
-    except HTTPError as exc:
-        detail = exc.read().decode("utf-8", errors="replace")
-        raise ImageProviderError(f"HTTP error while downloading {url}: status={exc.code} body={detail}") from exc
-    except URLError as exc:
+        with default_transport().stream("GET", url, headers=headers, timeout=timeout_seconds) as res:
+            data = b"".join(res.iter_chunks())
+    except TransportError as exc:
         raise ImageProviderError(f"Download error for {url}: {exc}") from exc
+    if res.status >= 400:
+        detail = data.decode("utf-8", errors="replace")
+        raise ImageProviderError(f"HTTP error while downloading {url}: status={res.status} body={detail}")
+    return data, res.headers.get_content_type() or "image/png"
 
 
 def _sized_dimensions(aspect_ratio: str | None, image_size: str | None) -> tuple[int, int]:
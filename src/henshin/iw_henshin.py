@@ -9,24 +9,32 @@ from __future__ import annotations
 
 import json
 import re
+import time
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Callable, Iterable
 
 from .archive import ensure_session_dir, write_json
-from .bodyfit import BodyFrame, CoverScale, Vec2, run_body_sequence
+from .body_sim_format import write_body_sim_binary
+from .bodyfit import BodyFrame, BodySequenceStream, CoverScale, Vec2
 from .ids import generate_session_id
 from .sakura_ai_engine import (
     SakuraAIEngineClient,
     SakuraAIEngineConfig,
     SakuraAIEngineError,
+    SpeechResult,
     TranscriptionResult,
     resolve_sakura_config,
     save_speech,
 )
+from .sim_stream import write_sim_json
+from .tracking_codec import DEFAULT_KEYFRAME_INTERVAL, DEFAULT_PRECISION, tracking_replay_block
 from .transform import ProtocolStateMachine
+from .tts_cache import DEFAULT_TTS_CACHE_MAX_BYTES, CachedSpeech, TTSCache
 
 
 DEFAULT_TRIGGER_PHRASE = "生成"
@@ -74,6 +82,14 @@ class IWSDKHenshinConfig:
     hold_to_equip_sec: float = 0.6
     trigger_joint: str = "right_wrist"
     tts_enabled: bool = True
+    body_sim_format: str = "json"
+    # "qdelta" (inline base64), "qdelta-sidecar" or "json" (uncompressed frames).
+    tracking_encoding: str = "qdelta"
+    tracking_precision: float = DEFAULT_PRECISION
+    tracking_keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL
+    # Explanation audio is cached under <root>/_cache/tts and hard-linked into sessions.
+    tts_cache: bool = True
+    tts_cache_max_bytes: int = DEFAULT_TTS_CACHE_MAX_BYTES
 
 
 @dataclass(slots=True)
@@ -171,8 +187,12 @@ def detect_generation_trigger(text: str, trigger_phrase: str = DEFAULT_TRIGGER_P
     return bool(analyze_generation_trigger(text, trigger_phrase).get("detected"))
 
 
+_DT_KEYS = ("dt_sec", "deltaTime", "delta_time", "dt")
+_JOINT_CONTAINER_KEYS = ("joints", "bones", "skeleton", "pose")
+
+
 def _frame_dt(raw: dict[str, Any]) -> float:
-    for key in ("dt_sec", "deltaTime", "delta_time", "dt"):
+    for key in _DT_KEYS:
         if key in raw:
             try:
                 return float(raw[key])
@@ -197,6 +217,16 @@ JOINT_ALIASES: dict[str, tuple[str, ...]] = {
 }
 
 
+def _normalize_xy(xf: float, yf: float) -> tuple[float, float] | None:
+    """Accept normalized xy01 as-is and map [-1.5, 1.5] device coordinates to xy01."""
+
+    if 0.0 <= xf <= 1.0 and 0.0 <= yf <= 1.0:
+        return xf, yf
+    if -1.5 <= xf <= 1.5 and -1.5 <= yf <= 1.5:
+        return (xf + 1.0) * 0.5, (1.0 - yf) * 0.5
+    return None
+
+
 def _extract_xy(value: Any) -> tuple[float, float] | None:
     if isinstance(value, dict):
         x = value.get("x")
@@ -212,42 +242,186 @@ def _extract_xy(value: Any) -> tuple[float, float] | None:
     except (TypeError, ValueError):
         return None
 
-    if 0.0 <= xf <= 1.0 and 0.0 <= yf <= 1.0:
-        return xf, yf
-    if -1.5 <= xf <= 1.5 and -1.5 <= yf <= 1.5:
-        return (xf + 1.0) * 0.5, (1.0 - yf) * 0.5
-    return None
+    return _normalize_xy(xf, yf)
 
 
 def _source_joints(raw: dict[str, Any]) -> dict[str, Any]:
-    for key in ("joints", "bones", "skeleton", "pose"):
+    for key in _JOINT_CONTAINER_KEYS:
         value = raw.get(key)
         if isinstance(value, dict):
             return value
     return raw
 
 
+def _resolve_joints(source: dict[str, Any], aliases: dict[str, tuple[str, ...]]) -> dict[str, tuple[float, float]]:
+    joints: dict[str, tuple[float, float]] = {}
+    for canonical, spellings in aliases.items():
+        for alias in spellings:
+            if alias not in source:
+                continue
+            xy = _extract_xy(source[alias])
+            if xy is not None:
+                joints[canonical] = xy
+                break
+    return joints
+
+
+@dataclass(frozen=True, slots=True)
+class _LayoutPlan:
+    frame_keys: frozenset[str]
+    container: str | None
+    # Container keys that win over ``container`` if they ever hold a dict.
+    shadowed: tuple[str, ...]
+    joint_keys: frozenset[str]
+    canonical: tuple[str, ...]
+    getter: Callable[[dict[str, Any]], tuple[Any, ...]] | None
+    # list/tuple when every point in the layout has that type; dicts and mixed layouts use the generic reader.
+    point_type: type | None
+    dt_key: str | None
+
+
+class MocopiFrameNormalizer:
+    """Raw mocopi frames to ``BodyFrame`` through a plan compiled from the capture layout.
+
+    The plan is sniffed from the first frame: which key holds the joints,
+    which alias spelling each canonical joint uses, whether points are
+    ``[x, y]`` lists or ``{"x", "y"}`` dicts, and which dt key is present.
+    Frames with the same key sets are read through one ``itemgetter`` call
+    instead of probing every alias. The xy01/device-coordinate range check
+    stays per point, as in ``_extract_xy``.
+
+    A frame with a different layout, or one the plan cannot read (a point of
+    another shape, out of range, or not numeric), goes through the per-frame
+    alias walk, so results always match it. After ``relayout_after``
+    consecutive frames in another layout, the plan is recompiled.
+    """
+
+    def __init__(self, aliases: dict[str, tuple[str, ...]] | None = None, *, relayout_after: int = 8) -> None:
+        self.aliases = aliases or JOINT_ALIASES
+        self.relayout_after = relayout_after
+        self.compiles = 0
+        self.fallbacks = 0
+        self._plan: _LayoutPlan | None = None
+        self._misses = 0
+
+    def normalize(self, raw: Any) -> BodyFrame | None:
+        """The ``BodyFrame`` for one raw frame, or None when it has no usable joints."""
+
+        if not isinstance(raw, dict):
+            return None
+        plan = self._plan
+        if plan is None or raw.keys() != plan.frame_keys:
+            plan = self._relayout(raw)
+        else:
+            self._misses = 0
+        if plan is not None and not any(type(raw[key]) is dict for key in plan.shadowed):
+            source = raw[plan.container] if plan.container is not None else raw
+            if type(source) is dict and source.keys() == plan.joint_keys:
+                joints = self._read(plan, source)
+                if joints is not None:
+                    return BodyFrame(dt_sec=self._dt(plan, raw), joints_xy01=joints) if joints else None
+        self.fallbacks += 1
+        joints = _resolve_joints(_source_joints(raw), self.aliases)
+        return BodyFrame(dt_sec=_frame_dt(raw), joints_xy01=joints) if joints else None
+
+    def _relayout(self, raw: dict[str, Any]) -> _LayoutPlan | None:
+        if self._plan is not None:
+            self._misses += 1
+            if self._misses < self.relayout_after:
+                return None
+        self._misses = 0
+        self._plan = self._compile(raw)
+        return self._plan
+
+    def _compile(self, raw: dict[str, Any]) -> _LayoutPlan:
+        self.compiles += 1
+        container = next((key for key in _JOINT_CONTAINER_KEYS if isinstance(raw.get(key), dict)), None)
+        source = raw[container] if container is not None else raw
+        candidates = _JOINT_CONTAINER_KEYS[: _JOINT_CONTAINER_KEYS.index(container)] if container else _JOINT_CONTAINER_KEYS
+        canonical: list[str] = []
+        keys: list[str] = []
+        for name, spellings in self.aliases.items():
+            alias = next((alias for alias in spellings if alias in source), None)
+            if alias is not None:
+                canonical.append(name)
+                keys.append(alias)
+        point_types = {type(source[key]) for key in keys}
+        point_type = point_types.pop() if len(point_types) == 1 else None
+        getter = None
+        if keys:
+            # itemgetter returns a bare value for one key; keep the tuple shape.
+            getter = itemgetter(*keys) if len(keys) > 1 else (lambda source, key=keys[0]: (source[key],))
+        return _LayoutPlan(
+            frame_keys=frozenset(raw),
+            container=container,
+            shadowed=tuple(key for key in candidates if key in raw),
+            joint_keys=frozenset(source),
+            canonical=tuple(canonical),
+            getter=getter,
+            point_type=point_type,
+            dt_key=next((key for key in _DT_KEYS if key in raw), None),
+        )
+
+    @staticmethod
+    def _read(plan: _LayoutPlan, source: dict[str, Any]) -> dict[str, tuple[float, float]] | None:
+        """Joints through the plan, or None to send the frame down the per-frame path.
+
+        None also covers a joint whose point the plan cannot read: another
+        spelling of that joint may still hold a valid point.
+        """
+
+        if plan.getter is None:
+            return {}
+        joints: dict[str, tuple[float, float]] = {}
+        point_type = plan.point_type
+        try:
+            if point_type is list or point_type is tuple:
+                for name, value in zip(plan.canonical, plan.getter(source)):
+                    if type(value) is not point_type:
+                        return None
+                    xf = float(value[0])
+                    yf = float(value[1])
+                    # Inlined _normalize_xy; this loop runs once per joint per frame.
+                    if 0.0 <= xf <= 1.0 and 0.0 <= yf <= 1.0:
+                        joints[name] = (xf, yf)
+                    elif -1.5 <= xf <= 1.5 and -1.5 <= yf <= 1.5:
+                        joints[name] = ((xf + 1.0) * 0.5, (1.0 - yf) * 0.5)
+                    else:
+                        return None
+            else:
+                for name, value in zip(plan.canonical, plan.getter(source)):
+                    if type(value) is dict:
+                        xy = _normalize_xy(float(value["x"]), float(value["y"]))
+                    else:
+                        xy = _extract_xy(value)
+                    if xy is None:
+                        return None
+                    joints[name] = xy
+        except (IndexError, KeyError, TypeError, ValueError):
+            return None
+        return joints
+
+    @staticmethod
+    def _dt(plan: _LayoutPlan, raw: dict[str, Any]) -> float:
+        if plan.dt_key is None:
+            return 0.1
+        try:
+            return float(raw[plan.dt_key])
+        except (TypeError, ValueError):
+            return 0.1
+
+
 def normalize_mocopi_frames(payload: dict[str, Any] | None) -> list[BodyFrame]:
     if not payload:
         return create_demo_body_frames()
 
     raw_frames = payload.get("frames") or payload.get("mocopi_frames") or []
+    normalizer = MocopiFrameNormalizer()
     frames: list[BodyFrame] = []
     for raw in raw_frames:
-        if not isinstance(raw, dict):
-            continue
-        source = _source_joints(raw)
-        joints: dict[str, tuple[float, float]] = {}
-        for canonical, aliases in JOINT_ALIASES.items():
-            for alias in aliases:
-                if alias not in source:
-                    continue
-                xy = _extract_xy(source[alias])
-                if xy is not None:
-                    joints[canonical] = xy
-                    break
-        if joints:
-            frames.append(BodyFrame(dt_sec=_frame_dt(raw), joints_xy01=joints))
+        frame = normalizer.normalize(raw)
+        if frame is not None:
+            frames.append(frame)
 
     return frames or create_demo_body_frames()
 
@@ -301,10 +475,32 @@ def _serialize_body_frames(frames: Iterable[BodyFrame]) -> list[dict[str, Any]]:
     ]
 
 
-def _write_body_sim(path: Path, sim: dict[str, Any]) -> Path:
+TRACKING_REPLAY_ENCODINGS = ("qdelta", "qdelta-sidecar", "json")
+TRACKING_SIDECAR_FILENAME = "iwsdk-tracking.qdt"
+
+
+def _tracking_section(frames: list[BodyFrame], config: IWSDKHenshinConfig, artifacts_dir: Path) -> dict[str, Any]:
+    if config.tracking_encoding == "json":
+        return {"frames": _serialize_body_frames(frames), "frame_count": len(frames)}
+    if config.tracking_encoding not in TRACKING_REPLAY_ENCODINGS:
+        raise ValueError(f"Unsupported tracking encoding: {config.tracking_encoding}")
+    sidecar = artifacts_dir / TRACKING_SIDECAR_FILENAME if config.tracking_encoding == "qdelta-sidecar" else None
+    return tracking_replay_block(
+        frames,
+        sidecar_path=sidecar,
+        precision=config.tracking_precision,
+        keyframe_interval=config.tracking_keyframe_interval,
+    )
+
+
+def _write_body_sim(path: Path, stream: BodySequenceStream) -> dict[str, Any]:
+    """Stream the body simulation into ``path`` (``.bsim`` or JSON) and return its summary."""
+
+    if path.suffix == ".bsim":
+        return write_body_sim_binary(path, stream)
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(sim, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-    return path
+    with path.open("w", encoding="utf-8") as fp:
+        return write_sim_json(fp, stream)
 
 
 def _transcribe(
@@ -324,45 +520,78 @@ def _transcribe(
     return result.text, {"source": "sakura_whisper", "model": result.model, "raw": result.raw}
 
 
-def _maybe_synthesize_tts(
+def _synthesize_tts(
     *,
-    session_dir: Path,
     config: IWSDKHenshinConfig,
     request: IWSDKHenshinRequest,
     client: SakuraAIEngineClient | None,
-) -> dict[str, Any]:
+    use_cache: bool = True,
+) -> tuple[dict[str, Any], CachedSpeech | SpeechResult | None]:
+    """Synthesize the explanation without touching the session; ``_save_tts`` keeps it.
+
+    With the TTS cache enabled, a cached explanation needs neither a network
+    call nor a token. A miss is stored in the cache before it is returned.
+    ``use_cache=False`` skips the cache, for retrying after an eviction.
+    """
+
     if not config.tts_enabled:
-        return {"status": "disabled", "text": config.explanation_text, "audio_path": None}
+        return {"status": "disabled", "text": config.explanation_text, "audio_path": None}, None
     if request.dry_run:
-        return {"status": "dry_run", "text": config.explanation_text, "audio_path": None}
+        return {"status": "dry_run", "text": config.explanation_text, "audio_path": None}, None
 
     resolved_config = request.sakura_config or resolve_sakura_config()
-    if not resolved_config.token:
-        return {"status": "skipped_missing_token", "text": config.explanation_text, "audio_path": None}
-
-    if client is None:
-        client = SakuraAIEngineClient(resolved_config)
-    try:
-        result = client.synthesize_speech(config.explanation_text)
-    except SakuraAIEngineError as exc:
-        return {
-            "status": "failed",
-            "text": config.explanation_text,
-            "audio_path": None,
-            "error": str(exc),
-        }
-    output = save_speech(
-        result,
-        session_dir / "artifacts" / f"generation-explainer.{result.response_format}",
-    )
-    return {
+    cache = TTSCache(request.root, max_bytes=config.tts_cache_max_bytes) if config.tts_cache and use_cache else None
+    speech: CachedSpeech | SpeechResult | None = cache.get(config.explanation_text, resolved_config) if cache else None
+    if speech is None:
+        if not resolved_config.token:
+            return {"status": "skipped_missing_token", "text": config.explanation_text, "audio_path": None}, None
+        if client is None:
+            client = SakuraAIEngineClient(resolved_config)
+        try:
+            result = client.synthesize_speech(config.explanation_text)
+        except SakuraAIEngineError as exc:
+            return {
+                "status": "failed",
+                "text": config.explanation_text,
+                "audio_path": None,
+                "error": str(exc),
+            }, None
+        speech = cache.put(result, resolved_config) if cache else result
+    tts = {
         "status": "generated",
         "text": config.explanation_text,
-        "audio_path": str(output),
-        "model": result.model,
-        "voice": result.voice,
-        "response_format": result.response_format,
+        "audio_path": None,
+        "model": speech.model,
+        "voice": speech.voice,
+        "response_format": speech.response_format,
     }
+    if isinstance(speech, CachedSpeech):
+        tts["cache"] = {"key": speech.key, "hit": speech.hit}
+    return tts, speech
+
+
+def _save_tts(
+    session_dir: Path, tts: dict[str, Any], speech: CachedSpeech | SpeechResult | None
+) -> dict[str, Any] | None:
+    """Keep the explanation audio in the session; ``None`` if the cached entry was evicted meanwhile."""
+
+    if speech is None:
+        return tts
+    output = session_dir / "artifacts" / f"generation-explainer.{speech.response_format}"
+    if isinstance(speech, CachedSpeech):
+        linked = TTSCache.link_into(speech, output)
+        if linked is None:
+            return None
+        output = linked
+    else:
+        output = save_speech(speech, output)
+    return {**tts, "audio_path": str(output)}
+
+
+def _timed(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> tuple[Any, int]:
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, int((time.perf_counter() - started) * 1000)
 
 
 def run_iwsdk_henshin(
@@ -378,13 +607,73 @@ def run_iwsdk_henshin(
         {"type": "iw.session.started", "timestamp": utc_now_iso(), "session_id": session_id}
     ]
 
+    # Transcription and TTS are network calls; the body simulation is CPU work
+    # that does not depend on the transcript. Run the calls on worker threads
+    # while the simulation runs here. A known transcript is checked for the
+    # trigger first, so TTS starts before the simulation. Otherwise TTS for the
+    # static explanation starts speculatively next to the transcription and is
+    # only saved if the trigger is detected.
+    pipeline_started = time.perf_counter()
+    transcript_known = request.transcript is not None or request.dry_run or not request.audio_path
+    pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="iw-henshin")
     try:
-        transcript, transcription_meta = _transcribe(request, client)
-    except SakuraAIEngineError as exc:
-        return {"ok": False, "session_id": session_id, "error": str(exc)}
+        transcribe_future = pool.submit(_timed, _transcribe, request, client)
+        tts_future = None
+        if transcript_known:
+            (transcript, transcription_meta), transcribe_ms = transcribe_future.result()
+            trigger_match = analyze_generation_trigger(transcript, config.trigger_phrase)
+            if trigger_match["detected"]:
+                tts_future = pool.submit(_timed, _synthesize_tts, config=config, request=request, client=client)
+        else:
+            tts_future = pool.submit(_timed, _synthesize_tts, config=config, request=request, client=client)
+
+        body_started = time.perf_counter()
+        frames = normalize_mocopi_frames(request.mocopi_payload)
+        body_sim_path = session_dir / ("body-sim.bsim" if config.body_sim_format == "binary" else "body-sim.json")
+        body_stream = BodySequenceStream(
+            frames,
+            mirror=config.mirror,
+            cover_scale=CoverScale(1.0, 1.0),
+            dock_center=Vec2(config.dock_center_x, config.dock_center_y),
+            dock_radius=config.dock_radius,
+            hold_to_equip_sec=config.hold_to_equip_sec,
+            trigger_joint=config.trigger_joint,
+        )
+        body_sim = _write_body_sim(body_sim_path, body_stream)
+        body_sim_ms = int((time.perf_counter() - body_started) * 1000)
+
+        if not transcript_known:
+            try:
+                (transcript, transcription_meta), transcribe_ms = transcribe_future.result()
+            except SakuraAIEngineError as exc:
+                # Without a transcript there is no replay, so the simulation is not kept either.
+                for leftover in session_dir.glob("body-sim.*"):
+                    leftover.unlink(missing_ok=True)
+                return {"ok": False, "session_id": session_id, "error": str(exc)}
+            trigger_match = analyze_generation_trigger(transcript, config.trigger_phrase)
+
+        triggered = bool(trigger_match["detected"])
+        if triggered:
+            (tts, speech), tts_ms = tts_future.result()
+            saved = _save_tts(session_dir, tts, speech)
+            if saved is None:
+                # Another session evicted the cached explanation after the lookup.
+                (tts, speech), retry_ms = _timed(
+                    _synthesize_tts, config=config, request=request, client=client, use_cache=False
+                )
+                tts_ms += retry_ms
+                saved = _save_tts(session_dir, tts, speech)
+            tts = saved
+        else:
+            tts_ms = None
+            tts = {"status": "not_triggered", "text": config.explanation_text, "audio_path": None}
+            if tts_future is not None:
+                tts_future.cancel()
+                tts["speculative_discarded"] = True
+    finally:
+        # A discarded speculative TTS call may still be in flight; its result is never saved.
+        pool.shutdown(wait=False, cancel_futures=True)
 
-    trigger_match = analyze_generation_trigger(transcript, config.trigger_phrase)
-    triggered = bool(trigger_match["detected"])
     events.append(
         {
             "type": "iw.voice.transcribed",
@@ -397,25 +686,8 @@ def run_iwsdk_henshin(
         }
     )
 
-    frames = normalize_mocopi_frames(request.mocopi_payload)
-    body_sim = run_body_sequence(
-        frames,
-        mirror=config.mirror,
-        cover_scale=CoverScale(1.0, 1.0),
-        dock_center=Vec2(config.dock_center_x, config.dock_center_y),
-        dock_radius=config.dock_radius,
-        hold_to_equip_sec=config.hold_to_equip_sec,
-        trigger_joint=config.trigger_joint,
-    )
-
     if triggered:
         machine = _machine_for_completed_deposition()
-        tts = _maybe_synthesize_tts(
-            session_dir=session_dir,
-            config=config,
-            request=request,
-            client=client,
-        )
         events.extend(
             [
                 {"type": "iw.command.detected", "timestamp": utc_now_iso(), "command": config.trigger_phrase},
@@ -430,9 +702,15 @@ def run_iwsdk_henshin(
         )
     else:
         machine = ProtocolStateMachine()
-        tts = {"status": "not_triggered", "text": config.explanation_text, "audio_path": None}
 
-    body_sim_path = _write_body_sim(session_dir / "body-sim.json", body_sim)
+    timings = {
+        "transcribe_ms": transcribe_ms,
+        "body_sim_ms": body_sim_ms,
+        "tts_ms": tts_ms,
+        "tts_speculative": not transcript_known,
+        "pipeline_ms": int((time.perf_counter() - pipeline_started) * 1000),
+    }
+
     replay = {
         "schema_version": "0.1",
         "session_id": session_id,
@@ -441,6 +719,7 @@ def run_iwsdk_henshin(
             "speech": transcription_meta,
             "tracking": "mocopi",
             "iwsdk_bridge": "event_stream_v0",
+            "timings": timings,
         },
         "trigger": {
             "phrase": config.trigger_phrase,
@@ -453,10 +732,7 @@ def run_iwsdk_henshin(
             "final_state": machine.state,
             "events": [asdict(event) for event in machine.events],
         },
-        "tracking": {
-            "frames": _serialize_body_frames(frames),
-            "frame_count": len(frames),
-        },
+        "tracking": _tracking_section(frames, config, session_dir / "artifacts"),
         "deposition": {
             "completed": bool(triggered and body_sim.get("equipped")),
             "body_sim_path": str(body_sim_path),
@@ -486,4 +762,5 @@ def run_iwsdk_henshin(
         "replay_path": str(replay_path),
         "events_path": str(events_path),
         "tts": tts,
+        "timings": timings,
     }
@@ -6,10 +6,20 @@ contract consumed by cloud, Quest, and replay surfaces.
 
 from __future__ import annotations
 
+import copy
+import json
+import threading
+from collections import OrderedDict
 from datetime import datetime, timezone
 from hashlib import sha1
 from typing import Any
 
+# Projections keyed by (suitspec digest, catalog version, projection_version, status).
+_PROJECTION_CACHE_SIZE = 256
+_PROJECTION_LOCK = threading.Lock()
+_PROJECTIONS: OrderedDict[tuple[str, str, str, str], dict[str, Any]] = OrderedDict()
+_SUITSPEC_PASSTHROUGH = ("approval_id", "morphotype_id", "blueprint", "emblem", "text")
+
 
 def _utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
@@ -32,7 +42,16 @@ def build_manifest_id(suit_id: str, *, date_yyyymmdd: str | None = None, version
     return f"MNF-{yyyymmdd}-{digest}"
 
 
-def _catalog_lookup(part_catalog: dict[str, Any] | None) -> dict[str, str]:
+def suitspec_digest(suitspec: dict[str, Any]) -> str:
+    """Content hash of a SuitSpec, independent of key order."""
+
+    canonical = json.dumps(suitspec, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def catalog_lookup(part_catalog: dict[str, Any] | None) -> dict[str, str]:
+    """Map asset URIs and module names to catalog part ids."""
+
     if not part_catalog:
         return {}
     lookup: dict[str, str] = {}
@@ -55,8 +74,18 @@ def project_suitspec_to_manifest(
     manifest_id: str | None = None,
     status: str = "DRAFT",
     projection_version: str = "0.1",
+    catalog_version: str | None = None,
+    catalog_index: dict[str, str] | None = None,
+    digest: str | None = None,
 ) -> dict[str, Any]:
-    """Project a SuitSpec v0.2 payload into SuitManifest v0.1."""
+    """Project a SuitSpec v0.2 payload into SuitManifest v0.1.
+
+    When ``catalog_version`` identifies ``part_catalog`` (or there is no
+    catalog), the projected body is memoized by (suitspec digest, catalog
+    version, projection_version, status). ``manifest_id`` and the metadata
+    timestamps are still filled in per call. ``catalog_index`` and ``digest``
+    let callers pass a prebuilt ``catalog_lookup`` and ``suitspec_digest``.
+    """
 
     if suitspec.get("schema_version") != "0.2":
         raise ValueError("SuitSpec.schema_version must be '0.2'")
@@ -66,8 +95,44 @@ def project_suitspec_to_manifest(
 
     created_at = suitspec.get("metadata", {}).get("created_at")
     mid = manifest_id or build_manifest_id(suit_id, date_yyyymmdd=_yyyymmdd_from_iso(created_at))
-    catalog_lookup = _catalog_lookup(part_catalog)
+    if part_catalog is None:
+        catalog_version = "none"
+    if catalog_version is None:
+        lookup = catalog_index if catalog_index is not None else catalog_lookup(part_catalog)
+        body = _project_body(suitspec, lookup, status, projection_version)
+    else:
+        key = (digest or suitspec_digest(suitspec), catalog_version, projection_version, status)
+        with _PROJECTION_LOCK:
+            cached = _PROJECTIONS.get(key)
+            if cached is not None:
+                _PROJECTIONS.move_to_end(key)
+        if cached is None:
+            lookup = catalog_index if catalog_index is not None else catalog_lookup(part_catalog)
+            # Stored as a private copy so later edits to the suitspec cannot leak into it.
+            cached = copy.deepcopy(_project_body(suitspec, lookup, status, projection_version))
+            with _PROJECTION_LOCK:
+                _PROJECTIONS[key] = cached
+                while len(_PROJECTIONS) > _PROJECTION_CACHE_SIZE:
+                    _PROJECTIONS.popitem(last=False)
+        body = copy.deepcopy(cached)
+
+    extras = {key: body.pop(key) for key in _SUITSPEC_PASSTHROUGH if key in body}
+    manifest: dict[str, Any] = {"schema_version": "0.1", "manifest_id": mid, **body}
+    manifest["metadata"] = {
+        "created_at": created_at or _utc_now_iso(),
+        "updated_at": _utc_now_iso(),
+    }
+    manifest.update(extras)
+    return manifest
 
+
+def _project_body(
+    suitspec: dict[str, Any],
+    lookup: dict[str, str],
+    status: str,
+    projection_version: str,
+) -> dict[str, Any]:
+    suit_id = suitspec["suit_id"]
     parts: dict[str, Any] = {}
     for module_name, module in suitspec.get("modules", {}).items():
         if not isinstance(module, dict):
@@ -79,14 +144,12 @@ def project_suitspec_to_manifest(
         for key in ("material_ref", "texture_path", "attachment_slot", "fit", "vrm_anchor"):
             if key in module:
                 part[key] = module[key]
-        catalog_part_id = catalog_lookup.get(str(module.get("asset_ref", ""))) or catalog_lookup.get(module_name)
+        catalog_part_id = lookup.get(str(module.get("asset_ref", ""))) or lookup.get(module_name)
         if catalog_part_id:
             part["catalog_part_id"] = catalog_part_id
         parts[module_name] = part
 
-    manifest: dict[str, Any] = {
-        "schema_version": "0.1",
-        "manifest_id": mid,
+    body: dict[str, Any] = {
         "suit_id": suit_id,
         "source": {
             "type": "suitspec_projection",
@@ -99,14 +162,8 @@ def project_suitspec_to_manifest(
         "parts": parts,
         "palette": suitspec.get("palette", {}),
         "effects": suitspec.get("effects", {}),
-        "metadata": {
-            "created_at": created_at or _utc_now_iso(),
-            "updated_at": _utc_now_iso(),
-        },
     }
-
-    for key in ("approval_id", "morphotype_id", "blueprint", "emblem", "text"):
+    for key in _SUITSPEC_PASSTHROUGH:
         if key in suitspec:
-            manifest[key] = suitspec[key]
-
-    return manifest
+            body[key] = suitspec[key]
+    return body
@@ -0,0 +1,87 @@
+"""Persistent manifest_id lookup index for the local new-route suit store.
+
+Manifests live under ``<suit_store_root>/<suit_id>/manifests/<manifest_id>.json``.
+``GET /v1/manifests/<id>`` and trial creation resolve a manifest by id alone, so
+this index maps each id to its suit and file instead of globbing every suit
+directory per lookup.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+from typing import Any
+
+INDEX_FILENAME = "manifest-index.json"
+INDEX_SCHEMA_VERSION = "0.1"
+
+_WRITE_LOCK = threading.Lock()
+_CACHE_LOCK = threading.Lock()
+_CACHE: dict[Path, tuple[tuple[int, int], dict[str, Any]]] = {}
+
+
+def _empty_index() -> dict[str, Any]:
+    return {"schema_version": INDEX_SCHEMA_VERSION, "revision": 0, "manifests": {}}
+
+
+class ManifestIndex:
+    """``manifest_id -> {suit_id, path, version, updated_at}``; paths are relative to the suit store."""
+
+    def __init__(self, suit_store_root: Path) -> None:
+        self.suit_store_root = suit_store_root
+        self.path = suit_store_root / INDEX_FILENAME
+
+    def load(self) -> dict[str, Any] | None:
+        """Return the parsed index, or None when it is missing or unreadable."""
+
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with _CACHE_LOCK:
+            cached = _CACHE.get(self.path)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or not isinstance(data.get("manifests"), dict):
+            return None
+        with _CACHE_LOCK:
+            _CACHE[self.path] = (stamp, data)
+        return data
+
+    def entries(self) -> dict[str, dict[str, Any]]:
+        return dict((self.load() or _empty_index())["manifests"])
+
+    def lookup(self, manifest_id: str) -> dict[str, Any] | None:
+        return (self.load() or _empty_index())["manifests"].get(manifest_id)
+
+    def upsert(self, manifest_id: str, entry: dict[str, Any]) -> None:
+        with _WRITE_LOCK:
+            data = self.load() or _empty_index()
+            data = {**data, "manifests": {**data["manifests"], manifest_id: entry}}
+            self._write(data)
+
+    def rebuild(self, entries: dict[str, dict[str, Any]]) -> dict[str, Any]:
+        with _WRITE_LOCK:
+            previous = self.load() or _empty_index()
+            data = _empty_index()
+            data["revision"] = int(previous.get("revision") or 0)
+            data["manifests"] = dict(sorted(entries.items()))
+            self._write(data)
+        return data
+
+    def _write(self, data: dict[str, Any]) -> None:
+        data["revision"] = int(data.get("revision") or 0) + 1
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        text = json.dumps(data, ensure_ascii=False, indent=2) + "\n"
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(text, encoding="utf-8")
+        tmp_path.replace(self.path)
+        stat = self.path.stat()
+        with _CACHE_LOCK:
+            _CACHE[self.path] = ((stat.st_mtime_ns, stat.st_size), data)
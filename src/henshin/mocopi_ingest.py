@@ -0,0 +1,697 @@
+"""Live mocopi ingest: UDP/WebSocket frames into the streaming body simulation.
+
+``normalize_mocopi_frames`` needs a complete capture. This module accepts
+frames as they arrive instead:
+
+- ``MocopiIngestSession`` parses each message (one frame object, or a payload
+  with ``frames``), resolves joints through a ``MocopiFrameNormalizer`` whose
+  alias plan is compiled once per stream layout, steps a
+  ``BodySequenceStream`` and publishes ``iw.*`` events to subscribers.
+- Per-stage latency (``transport``, ``parse``, ``simulate``, ``publish``,
+  ``end_to_end``) is kept in a bounded window and reported as percentiles.
+- ``MocopiIngestServer`` listens on UDP (one JSON message per datagram) and
+  WebSocket (``/ingest`` to send frames, ``/events`` to subscribe).
+- ``replay_mocopi_capture`` sends a recorded capture to either transport at
+  its recorded pace, as a local stand-in for a mocopi device.
+
+A message ``{"command": "end"}`` ends the current stream; the next frame
+starts a new one.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import math
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import BaseRequestHandler, UDPServer
+from typing import Any, BinaryIO, Callable
+from urllib.parse import parse_qs, urlparse
+
+from .bodyfit import BodyFrame, BodySequenceStream, CoverScale, Vec2
+from .iw_henshin import IWSDKHenshinConfig, MocopiFrameNormalizer, _frame_dt, utc_now_iso
+
+DEFAULT_UDP_PORT = 9763
+DEFAULT_WS_PORT = 9764
+LATENCY_STAGES = ("transport", "parse", "simulate", "publish", "end_to_end")
+# Segments count as settled once no channel moves more than this between frames.
+SETTLE_EPSILON = 1e-3
+MAX_WS_MESSAGE_BYTES = 1024 * 1024
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_WS_TEXT = 0x1
+_WS_BINARY = 0x2
+_WS_CLOSE = 0x8
+_WS_PING = 0x9
+_WS_PONG = 0xA
+
+
+class LatencyStats:
+    """Rolling per-stage latency samples (seconds) with percentile snapshots."""
+
+    def __init__(self, window: int = 4096) -> None:
+        self._lock = threading.Lock()
+        self._samples: dict[str, deque[float]] = {stage: deque(maxlen=window) for stage in LATENCY_STAGES}
+        self._counts = dict.fromkeys(LATENCY_STAGES, 0)
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._samples[stage].append(max(0.0, seconds))
+            self._counts[stage] += 1
+
+    def snapshot(self) -> dict[str, dict[str, float | int]]:
+        with self._lock:
+            samples = {stage: sorted(values) for stage, values in self._samples.items()}
+            counts = dict(self._counts)
+        report: dict[str, dict[str, float | int]] = {}
+        for stage, values in samples.items():
+            if not values:
+                continue
+            report[stage] = {
+                "count": counts[stage],
+                "p50_ms": round(_percentile(values, 50) * 1000, 3),
+                "p95_ms": round(_percentile(values, 95) * 1000, 3),
+                "p99_ms": round(_percentile(values, 99) * 1000, 3),
+                "max_ms": round(values[-1] * 1000, 3),
+            }
+        return report
+
+
+def _percentile(ordered: list[float], percent: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+Subscriber = Callable[[dict[str, Any]], None]
+
+
+class MocopiIngestSession:
+    """One live tracking stream feeding ``BodySequenceStream``.
+
+    Subscribers receive event records (``iw.mocopi.stream.started``,
+    ``iw.armor.equipped``, ``iw.armor.deposition.completed``,
+    ``iw.mocopi.stream.ended``) and, if they ask for them, ``iw.body.frame``
+    records. Callbacks run on the ingest thread and should only enqueue.
+    """
+
+    def __init__(
+        self,
+        config: IWSDKHenshinConfig | None = None,
+        *,
+        settle_epsilon: float = SETTLE_EPSILON,
+        latency_window: int = 4096,
+    ) -> None:
+        self.config = config or IWSDKHenshinConfig()
+        self.settle_epsilon = settle_epsilon
+        self.latency = LatencyStats(latency_window)
+        self.normalizer = MocopiFrameNormalizer()
+        self.dropped_messages = 0
+        self.streams_completed = 0
+        self._lock = threading.Lock()
+        self._subscribers: list[tuple[Subscriber, bool]] = []
+        self._new_stream()
+
+    def _new_stream(self) -> None:
+        config = self.config
+        self.stream = BodySequenceStream(
+            [],
+            mirror=config.mirror,
+            cover_scale=CoverScale(1.0, 1.0),
+            dock_center=Vec2(config.dock_center_x, config.dock_center_y),
+            dock_radius=config.dock_radius,
+            hold_to_equip_sec=config.hold_to_equip_sec,
+            trigger_joint=config.trigger_joint,
+        )
+        self.deposition_completed = False
+        self._previous_segments: dict[str, dict[str, float]] | None = None
+
+    def subscribe(self, callback: Subscriber, *, frames: bool = False) -> Callable[[], None]:
+        """Register ``callback``; returns a function that unsubscribes it."""
+
+        entry = (callback, frames)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+
+        return unsubscribe
+
+    def ingest(self, message: bytes | str | dict[str, Any], *, received_at: float | None = None) -> int:
+        """Simulate every frame in ``message`` and return how many were accepted.
+
+        ``received_at`` is the wall-clock receive time (``time.time()``).
+        Raises ValueError for messages that are not JSON objects.
+        """
+
+        received_at = time.time() if received_at is None else received_at
+        started = time.perf_counter()
+        payload = json.loads(message) if isinstance(message, (bytes, str)) else message
+        if not isinstance(payload, dict):
+            raise ValueError("mocopi message must be a JSON object")
+        if payload.get("command") == "end":
+            self.end_stream()
+            return 0
+        raw_frames = payload.get("frames") or payload.get("mocopi_frames")
+        if not isinstance(raw_frames, list):
+            raw_frames = [payload]
+
+        accepted = 0
+        with self._lock:
+            parsed: list[tuple[BodyFrame, float | None]] = []
+            for raw in raw_frames:
+                frame = self.normalizer.normalize(raw)
+                if frame is None:
+                    self.dropped_messages += 1
+                    continue
+                parsed.append((frame, _sent_at(raw)))
+            parse_done = time.perf_counter()
+            if parsed:
+                self.latency.record("parse", (parse_done - started) / len(parsed))
+            for frame, sent_at in parsed:
+                origin = received_at
+                if sent_at is not None:
+                    self.latency.record("transport", received_at - sent_at)
+                    origin = sent_at
+                sim_start = time.perf_counter()
+                result = self.stream.push(frame)
+                sim_done = time.perf_counter()
+                self._publish_frame(result)
+                publish_done = time.perf_counter()
+                self.latency.record("simulate", sim_done - sim_start)
+                self.latency.record("publish", publish_done - sim_done)
+                # Wall-clock origin plus the in-process time spent since the message arrived.
+                self.latency.record("end_to_end", (received_at - origin) + (publish_done - started))
+                accepted += 1
+        return accepted
+
+    def end_stream(self) -> dict[str, Any]:
+        """Publish ``iw.mocopi.stream.ended`` and start a fresh stream."""
+
+        with self._lock:
+            event = {
+                "type": "iw.mocopi.stream.ended",
+                "timestamp": utc_now_iso(),
+                "frame_count": self.stream.frame_count,
+                "equipped": self.stream.equipped,
+                "equip_frame": self.stream.equip_frame,
+                "deposition_completed": self.deposition_completed,
+                "dropped_messages": self.dropped_messages,
+                "latency": self.latency.snapshot(),
+            }
+            if self.stream.frame_count:
+                self._emit(event)
+                self.streams_completed += 1
+            self._new_stream()
+        return event
+
+    def count_dropped(self) -> None:
+        """Count a message a transport could not hand to ``ingest``."""
+
+        with self._lock:
+            self.dropped_messages += 1
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "ok": True,
+                "frame_count": self.stream.frame_count,
+                "equipped": self.stream.equipped,
+                "equip_frame": self.stream.equip_frame,
+                "deposition_completed": self.deposition_completed,
+                "dropped_messages": self.dropped_messages,
+                "streams_completed": self.streams_completed,
+                "layout_compiles": self.normalizer.compiles,
+                "layout_fallbacks": self.normalizer.fallbacks,
+                "subscribers": len(self._subscribers),
+                "latency": self.latency.snapshot(),
+            }
+
+    def _publish_frame(self, result: dict[str, Any]) -> None:
+        index = result["index"]
+        if index == 0:
+            self._emit(
+                {
+                    "type": "iw.mocopi.stream.started",
+                    "timestamp": utc_now_iso(),
+                    "trigger_joint": self.stream.trigger_joint,
+                    "segments": self.stream.segments,
+                }
+            )
+        if index == self.stream.equip_frame:
+            self._emit({"type": "iw.armor.equipped", "timestamp": utc_now_iso(), "frame_index": index})
+        elif self.stream.equipped and not self.deposition_completed and self._settled(result["segments"]):
+            self.deposition_completed = True
+            self._emit(
+                {
+                    "type": "iw.armor.deposition.completed",
+                    "timestamp": utc_now_iso(),
+                    "frame_index": index,
+                    "equip_frame": self.stream.equip_frame,
+                }
+            )
+        self._previous_segments = result["segments"]
+        record = {"type": "iw.body.frame", "frame": result}
+        for callback, frames in list(self._subscribers):
+            if frames:
+                callback(record)
+
+    def _settled(self, segments: dict[str, dict[str, float]]) -> bool:
+        previous = self._previous_segments
+        if previous is None:
+            return False
+        for name, transform in segments.items():
+            before = previous[name]
+            for channel, value in transform.items():
+                if abs(value - before[channel]) > self.settle_epsilon:
+                    return False
+        return True
+
+    def _emit(self, event: dict[str, Any]) -> None:
+        for callback, _ in list(self._subscribers):
+            callback(event)
+
+
+def _sent_at(raw: dict[str, Any]) -> float | None:
+    value = raw.get("sent_at")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return None
+
+
+# --- WebSocket (RFC 6455) framing; just enough for local ingest and events.
+
+
+def websocket_accept_key(key: str) -> str:
+    digest = hashlib.sha1((key + _WS_GUID).encode("ascii")).digest()
+    return base64.b64encode(digest).decode("ascii")
+
+
+def _read_exact(rfile: BinaryIO, size: int) -> bytes | None:
+    data = rfile.read(size)
+    if data is None or len(data) < size:
+        return None
+    return data
+
+
+def read_websocket_frame(rfile: BinaryIO) -> tuple[bool, int, bytes] | None:
+    """Read one frame as ``(fin, opcode, payload)``; None when the peer is gone."""
+
+    head = _read_exact(rfile, 2)
+    if head is None:
+        return None
+    fin = bool(head[0] & 0x80)
+    opcode = head[0] & 0x0F
+    masked = bool(head[1] & 0x80)
+    length = head[1] & 0x7F
+    if length == 126:
+        extended = _read_exact(rfile, 2)
+        if extended is None:
+            return None
+        length = struct.unpack("!H", extended)[0]
+    elif length == 127:
+        extended = _read_exact(rfile, 8)
+        if extended is None:
+            return None
+        length = struct.unpack("!Q", extended)[0]
+    if length > MAX_WS_MESSAGE_BYTES:
+        raise ValueError(f"WebSocket frame too large: {length} bytes")
+    mask = _read_exact(rfile, 4) if masked else b""
+    if mask is None:
+        return None
+    payload = _read_exact(rfile, length) if length else b""
+    if payload is None:
+        return None
+    if masked:
+        payload = bytes(byte ^ mask[index % 4] for index, byte in enumerate(payload))
+    return fin, opcode, payload
+
+
+def _next_opcode(rfile: BinaryIO) -> int | None:
+    """Opcode of the next frame, or None when the connection is gone."""
+
+    try:
+        frame = read_websocket_frame(rfile)
+    except (OSError, ValueError):
+        return None
+    return None if frame is None else frame[1]
+
+
+def read_websocket_message(rfile: BinaryIO, wfile: BinaryIO | None = None) -> bytes | None:
+    """Read one complete data message, answering pings. None on close or EOF."""
+
+    parts: list[bytes] = []
+    while True:
+        frame = read_websocket_frame(rfile)
+        if frame is None:
+            return None
+        fin, opcode, payload = frame
+        if opcode == _WS_CLOSE:
+            if wfile is not None:
+                _write_close(wfile)
+            return None
+        if opcode == _WS_PING:
+            if wfile is not None:
+                write_websocket_frame(wfile, payload, opcode=_WS_PONG)
+            continue
+        if opcode == _WS_PONG:
+            continue
+        parts.append(payload)
+        if sum(len(part) for part in parts) > MAX_WS_MESSAGE_BYTES:
+            raise ValueError("WebSocket message too large")
+        if fin:
+            return b"".join(parts)
+
+
+def write_websocket_frame(wfile: BinaryIO, payload: bytes, *, opcode: int = _WS_TEXT, mask: bool = False) -> None:
+    """Write one final frame. Clients must mask (``mask=True``); servers must not."""
+
+    header = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    if len(payload) < 126:
+        header.append(mask_bit | len(payload))
+    elif len(payload) < 1 << 16:
+        header.append(mask_bit | 126)
+        header += struct.pack("!H", len(payload))
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack("!Q", len(payload))
+    if mask:
+        key = os.urandom(4)
+        header += key
+        payload = bytes(byte ^ key[index % 4] for index, byte in enumerate(payload))
+    wfile.write(bytes(header) + payload)
+    wfile.flush()
+
+
+def _write_close(wfile: BinaryIO, *, mask: bool = False) -> None:
+    try:
+        write_websocket_frame(wfile, b"", opcode=_WS_CLOSE, mask=mask)
+    except OSError:
+        pass
+
+
+class WebSocketClient:
+    """Minimal blocking WebSocket client (``ws://`` only) for the replayer and tests."""
+
+    def __init__(self, url: str, *, timeout: float = 10.0) -> None:
+        parsed = urlparse(url)
+        if parsed.scheme != "ws" or not parsed.hostname:
+            raise ValueError(f"Unsupported WebSocket URL: {url}")
+        port = parsed.port or 80
+        path = parsed.path or "/"
+        if parsed.query:
+            path += "?" + parsed.query
+        self.sock = socket.create_connection((parsed.hostname, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.rfile = self.sock.makefile("rb")
+        self.wfile = self.sock.makefile("wb")
+        key = base64.b64encode(os.urandom(16)).decode("ascii")
+        request = (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {parsed.hostname}:{port}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n\r\n"
+        )
+        self.wfile.write(request.encode("ascii"))
+        self.wfile.flush()
+        status = self.rfile.readline().decode("latin-1")
+        headers: dict[str, str] = {}
+        while True:
+            line = self.rfile.readline().decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if " 101 " not in status or headers.get("sec-websocket-accept") != websocket_accept_key(key):
+            self.close()
+            raise ValueError(f"WebSocket handshake failed: {status.strip()}")
+
+    def send_text(self, text: str) -> None:
+        write_websocket_frame(self.wfile, text.encode("utf-8"), mask=True)
+
+    def receive_json(self) -> dict[str, Any] | None:
+        message = read_websocket_message(self.rfile)
+        return None if message is None else json.loads(message)
+
+    def close(self) -> None:
+        _write_close(self.wfile, mask=True)
+        for stream in (self.rfile, self.wfile):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        self.sock.close()
+
+    def __enter__(self) -> "WebSocketClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+# --- Servers
+
+
+class _UDPIngestHandler(BaseRequestHandler):
+    server: "_IngestUDPServer"
+
+    def handle(self) -> None:
+        data = self.request[0]
+        try:
+            self.server.session.ingest(data, received_at=time.time())
+        except ValueError:
+            self.server.session.count_dropped()
+
+
+class _IngestUDPServer(UDPServer):
+    allow_reuse_address = True
+    max_packet_size = 65507
+
+    def __init__(self, address: tuple[str, int], session: MocopiIngestSession) -> None:
+        self.session = session
+        super().__init__(address, _UDPIngestHandler)
+
+
+class _WebSocketHandler(BaseHTTPRequestHandler):
+    server: "_IngestWebSocketServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        return
+
+    def do_GET(self) -> None:
+        parsed = urlparse(self.path)
+        if parsed.path not in {"/ingest", "/events"}:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        key = self.headers.get("Sec-WebSocket-Key")
+        if (self.headers.get("Upgrade") or "").lower() != "websocket" or not key:
+            self.send_error(HTTPStatus.UPGRADE_REQUIRED, "WebSocket upgrade required")
+            return
+        self.send_response(HTTPStatus.SWITCHING_PROTOCOLS)
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", websocket_accept_key(key))
+        self.end_headers()
+        self.wfile.flush()
+        self.close_connection = True
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            if parsed.path == "/ingest":
+                self._ingest()
+            else:
+                frames = (parse_qs(parsed.query).get("frames") or ["0"])[0] in {"1", "true"}
+                self._events(frames=frames)
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def _ingest(self) -> None:
+        session = self.server.session
+        while True:
+            try:
+                message = read_websocket_message(self.rfile, self.wfile)
+            except ValueError:
+                _write_close(self.wfile)
+                return
+            if message is None:
+                return
+            try:
+                session.ingest(message, received_at=time.time())
+            except ValueError:
+                session.count_dropped()
+
+    def _events(self, *, frames: bool) -> None:
+        pending: queue.Queue[dict[str, Any]] = queue.Queue(maxsize=1024)
+
+        def enqueue(record: dict[str, Any]) -> None:
+            try:
+                pending.put_nowait(record)
+            except queue.Full:
+                pass  # a slow subscriber loses records instead of stalling ingest
+
+        unsubscribe = self.server.session.subscribe(enqueue, frames=frames)
+        closed = threading.Event()
+
+        def watch_close() -> None:
+            # Subscribers only send close/ping frames; anything else is ignored.
+            while _next_opcode(self.rfile) not in {None, _WS_CLOSE}:
+                pass
+            closed.set()
+
+        threading.Thread(target=watch_close, daemon=True).start()
+        try:
+            while not closed.is_set() and not self.server.closing.is_set():
+                try:
+                    record = pending.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                write_websocket_frame(self.wfile, json.dumps(record, ensure_ascii=False).encode("utf-8"))
+        finally:
+            unsubscribe()
+            _write_close(self.wfile)
+
+
+class _IngestWebSocketServer(ThreadingHTTPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], session: MocopiIngestSession) -> None:
+        self.session = session
+        self.closing = threading.Event()
+        super().__init__(address, _WebSocketHandler)
+
+
+class MocopiIngestServer:
+    """UDP and/or WebSocket listeners feeding one ``MocopiIngestSession``.
+
+    Port 0 binds an ephemeral port; ``udp_address`` and ``ws_address`` report
+    the bound addresses after ``start()``.
+    """
+
+    def __init__(
+        self,
+        session: MocopiIngestSession,
+        *,
+        host: str = "127.0.0.1",
+        udp_port: int | None = DEFAULT_UDP_PORT,
+        ws_port: int | None = DEFAULT_WS_PORT,
+    ) -> None:
+        self.session = session
+        self.host = host
+        self.udp_port = udp_port
+        self.ws_port = ws_port
+        self._udp: _IngestUDPServer | None = None
+        self._ws: _IngestWebSocketServer | None = None
+        self._threads: list[threading.Thread] = []
+
+    @property
+    def udp_address(self) -> tuple[str, int] | None:
+        return self._udp.server_address[:2] if self._udp else None
+
+    @property
+    def ws_address(self) -> tuple[str, int] | None:
+        return self._ws.server_address[:2] if self._ws else None
+
+    def start(self) -> "MocopiIngestServer":
+        if self.udp_port is not None:
+            self._udp = _IngestUDPServer((self.host, self.udp_port), self.session)
+            self._serve(self._udp)
+        if self.ws_port is not None:
+            self._ws = _IngestWebSocketServer((self.host, self.ws_port), self.session)
+            self._serve(self._ws)
+        return self
+
+    def _serve(self, server: UDPServer) -> None:
+        thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.2}, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def close(self) -> None:
+        if self._ws is not None:
+            self._ws.closing.set()
+        for server in (self._udp, self._ws):
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads.clear()
+
+    def __enter__(self) -> "MocopiIngestServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+# --- Replayer
+
+
+def replay_mocopi_capture(
+    payload: dict[str, Any],
+    *,
+    udp: tuple[str, int] | None = None,
+    websocket: str | None = None,
+    speed: float = 1.0,
+    end_stream: bool = True,
+) -> dict[str, Any]:
+    """Send a recorded capture frame by frame, paced by its ``dt_sec``.
+
+    ``speed`` scales playback (2.0 is twice as fast); 0 sends without pacing.
+    Each message carries ``sent_at`` so the server can measure transport
+    latency. ``end_stream`` sends ``{"command": "end"}`` after the last frame.
+    """
+
+    if (udp is None) == (websocket is None):
+        raise ValueError("Choose exactly one of udp or websocket")
+    raw_frames = [raw for raw in payload.get("frames") or payload.get("mocopi_frames") or [] if isinstance(raw, dict)]
+
+    if udp is not None:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        transport = "udp"
+
+        def send(text: str) -> None:
+            sock.sendto(text.encode("utf-8"), udp)
+
+        close = sock.close
+    else:
+        client = WebSocketClient(websocket)
+        transport = "websocket"
+        send, close = client.send_text, client.close
+
+    started = time.perf_counter()
+    due = 0.0
+    try:
+        for raw in raw_frames:
+            if speed > 0:
+                delay = started + due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                due += _frame_dt(raw) / speed
+            send(json.dumps({**raw, "sent_at": time.time()}, ensure_ascii=False, separators=(",", ":")))
+        if end_stream:
+            send(json.dumps({"command": "end"}))
+    finally:
+        close()
+    return {
+        "ok": True,
+        "transport": transport,
+        "frames_sent": len(raw_frames),
+        "elapsed_sec": round(time.perf_counter() - started, 4),
+    }
@@ -6,18 +6,36 @@ handler so the same contract can later be mirrored by a Cloud Run/Hono service.
 
 from __future__ import annotations
 
+import base64
+import binascii
 import json
+import math
+import os
 import re
+import threading
 import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from hashlib import sha1
 from http import HTTPStatus
 from pathlib import Path
-from typing import Any
-
-from .manifest import project_suitspec_to_manifest
-from .validators import validate_against_schema, validate_suitspec
+from typing import Any, Callable, Iterator
+
+from .manifest import project_suitspec_to_manifest, suitspec_digest
+from .new_route_store import NewRouteStore, create_store
+from .part_catalog import load_part_catalog
+from .replay_timeline import DEFAULT_REPLAY_TOLERANCE, SEGMENT_DURATION_SEC, compact_timeline, load_replay_index
+from .session_log import DEFAULT_COMPACT_EVERY, SessionHead, apply_session_event
+from .tracking_frames import MAX_FRAMES_PER_READ, TRACKING_ENCODINGS, TrackingFrameStore, frames_are_encodable
+from .trial_index import SummaryQuery
+from .validators import (
+    validate_against_schema,
+    validate_replay_script_header,
+    validate_suitspec,
+    validate_transform_event,
+)
 
 _SUIT_ID_RE = re.compile(r"^VDA-[A-Z0-9]+-[A-Z0-9]+-[0-9]{2}-[0-9]{4}$")
 _MANIFEST_ID_RE = re.compile(r"^MNF-[0-9]{8}-[A-Z0-9]{4}$")
@@ -57,6 +75,41 @@ _TRANSFORM_STATE_ORDER = [
     "REFUSED",
 ]
 _TRANSFORM_STATE_RANK = {state: index for index, state in enumerate(_TRANSFORM_STATE_ORDER)}
+_TRIAL_STORAGE_MODES = {"document", "event-log"}
+_MAX_EVENT_BATCH = 512
+_MAX_LIST_LIMIT = 500
+_MAX_REPLAY_SAMPLES = 1000
+_PART_CATALOG_PATH = "examples/partcatalog.seed.json"
+# Digests of stored SuitSpecs that already passed validate_suitspec.
+_VALIDATED_SUITSPEC_LIMIT = 1024
+_VALIDATED_SUITSPECS_LOCK = threading.Lock()
+_VALIDATED_SUITSPECS: OrderedDict[str, None] = OrderedDict()
+_SUMMARY_ROUTES = {"/v1/trials", "/v1/trials/latest", "/v1/replays", "/v1/replays/latest"}
+_TRIAL_SUMMARY_FIELDS = (
+    "session_id",
+    "suit_id",
+    "manifest_id",
+    "state",
+    "event_count",
+    "last_event_type",
+    "replay_script_path",
+    "updated_at",
+)
+_REPLAY_SUMMARY_FIELDS = (
+    "replay_id",
+    "session_id",
+    "suit_id",
+    "manifest_id",
+    "state",
+    "duration_sec",
+    "segment_count",
+    "source_event_count",
+    "event_count",
+    "last_event_type",
+    "replay_script_path",
+    "generated_at",
+    "updated_at",
+)
 _TRANSFORM_EVENT_TYPES = {
     "SESSION_CREATED",
     "TRIGGER_DETECTED",
@@ -77,17 +130,70 @@ _TRANSFORM_EVENT_TYPES = {
 }
 
 
+
+def _utc_timestamp(value: Any) -> Any:
+    """ISO-8601 ``value`` converted to UTC (``+00:00``); unparseable values are returned as is.
+
+    Summary ``updated_at`` values are compared as strings, so they are stored in
+    one offset regardless of the offset the client sent in ``occurred_at``.
+    """
+
+    if not isinstance(value, str) or not value:
+        return value
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return value
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
 @dataclass(frozen=True, slots=True)
 class ApiResponse:
     status: int
     body: dict[str, Any]
+    # Set by streaming routes: NDJSON records produced lazily while the response is written.
+    records: Iterator[dict[str, Any]] | None = None
 
 
 class NewRouteApi:
-    def __init__(self, repo_root: Path, *, suit_store_root: Path | None = None) -> None:
+    def __init__(
+        self,
+        repo_root: Path,
+        *,
+        suit_store_root: Path | None = None,
+        trial_storage: str | None = None,
+        event_log_compact_every: int = DEFAULT_COMPACT_EVERY,
+        storage_backend: str | None = None,
+        store: NewRouteStore | None = None,
+        replay_tolerance: float | None = None,
+        tracking_encoding: str | None = None,
+    ) -> None:
         self.repo_root = repo_root.resolve()
         self.suit_store_root = (suit_store_root or self.repo_root / "sessions" / "new-route" / "suits").resolve()
         self.trial_store_root = self.suit_store_root.parent / "trials"
+        self.trial_storage = trial_storage or os.getenv("NEW_ROUTE_TRIAL_STORAGE") or "document"
+        if self.trial_storage not in _TRIAL_STORAGE_MODES:
+            raise ValueError(f"trial_storage must be one of {sorted(_TRIAL_STORAGE_MODES)}")
+        self.event_log_compact_every = event_log_compact_every
+        if replay_tolerance is None:
+            replay_tolerance = float(os.getenv("NEW_ROUTE_REPLAY_TOLERANCE") or DEFAULT_REPLAY_TOLERANCE)
+        if replay_tolerance < 0:
+            raise ValueError("replay_tolerance must be >= 0")
+        self.replay_tolerance = replay_tolerance
+        # "inline" keeps TRACKING_FRAME_BATCH frames in the event payload; the
+        # other encodings move them to the trial's binary frame sidecar.
+        self.tracking_encoding = tracking_encoding or os.getenv("NEW_ROUTE_TRACKING_ENCODING") or "f32"
+        if self.tracking_encoding not in (*TRACKING_ENCODINGS, "inline"):
+            raise ValueError(f"tracking_encoding must be one of {[*TRACKING_ENCODINGS, 'inline']}")
+        self.store = store or create_store(
+            self.repo_root,
+            self.suit_store_root,
+            backend=storage_backend,
+            trial_storage=self.trial_storage,
+            compact_every=event_log_compact_every,
+        )
 
     def health(self) -> ApiResponse:
         return ApiResponse(
@@ -114,10 +220,8 @@ class NewRouteApi:
             return self._bad_request(str(exc))
 
         suit_id = str(suitspec["suit_id"])
-        suit_path = self._suit_path(suit_id)
-        suitspec_path = self._suitspec_path(suit_id)
         overwrite = bool(payload.get("overwrite", False))
-        if suitspec_path.exists() and not overwrite:
+        if self.store.read_suitspec(suit_id) is not None and not overwrite:
             return ApiResponse(status=HTTPStatus.CONFLICT, body={"ok": False, "error": f"Suit already exists: {suit_id}"})
 
         now = self._utc_now()
@@ -132,21 +236,22 @@ class NewRouteApi:
         except ValueError as exc:
             return self._bad_request(str(exc))
 
-        previous_suit = self._read_json(suit_path) if suit_path.exists() else {}
+        previous_suit = self.store.read_suit(suit_id) or {}
+        suitspec_locator = self.store.save_suitspec(suit_id, saved_suitspec)
         suit = {
             "schema_version": "0.1",
             "suit_id": suit_id,
+            "version": int(previous_suit.get("version") or 0) + 1,
             "suitspec_schema_version": saved_suitspec["schema_version"],
             "status": previous_suit.get("status", "DRAFT"),
             "manifest_id": previous_suit.get("manifest_id"),
             "artifacts": {
                 **previous_suit.get("artifacts", {}),
-                "suitspec_path": self._relative_path(suitspec_path),
+                "suitspec_path": suitspec_locator,
             },
             "metadata": {"created_at": now, "updated_at": now},
         }
-        self._write_json(suitspec_path, saved_suitspec)
-        self._write_json(suit_path, suit)
+        self.store.save_suit(suit)
         return ApiResponse(
             status=HTTPStatus.CREATED,
             body={
@@ -154,33 +259,29 @@ class NewRouteApi:
                 "suit_id": suit_id,
                 "schema_version": saved_suitspec["schema_version"],
                 "status": suit["status"],
-                "suitspec_path": self._relative_path(suitspec_path),
+                "suitspec_path": suitspec_locator,
                 "links": {"manifest": f"/v1/suits/{suit_id}/manifest"},
                 "suit": suit,
                 "suitspec": saved_suitspec,
-                "storage": self._storage_info(suitspec_path),
+                "storage": self.store.storage_info(suitspec_locator),
             },
         )
 
     def get_suit(self, suit_id: str) -> ApiResponse:
         if not _SUIT_ID_RE.fullmatch(suit_id):
             return self._bad_request("suit_id format is invalid")
-        suit_path = self._suit_path(suit_id)
-        suitspec_path = self._suitspec_path(suit_id)
-        if not suit_path.exists() or not suitspec_path.exists():
+        suit = self.store.read_suit(suit_id)
+        suitspec = self.store.read_suitspec(suit_id)
+        if suit is None or suitspec is None:
             return ApiResponse(status=HTTPStatus.NOT_FOUND, body={"ok": False, "error": f"Unknown suit: {suit_id}"})
-        return ApiResponse(
-            status=HTTPStatus.OK,
-            body={"ok": True, "suit": self._read_json(suit_path), "suitspec": self._read_json(suitspec_path)},
-        )
+        return ApiResponse(status=HTTPStatus.OK, body={"ok": True, "suit": suit, "suitspec": suitspec})
 
     def get_latest_suit_manifest(self, suit_id: str) -> ApiResponse:
         if not _SUIT_ID_RE.fullmatch(suit_id):
             return self._bad_request("suit_id format is invalid")
-        suit_path = self._suit_path(suit_id)
-        if not suit_path.exists():
+        suit = self.store.read_suit(suit_id)
+        if suit is None:
             return ApiResponse(status=HTTPStatus.NOT_FOUND, body={"ok": False, "error": f"Unknown suit: {suit_id}"})
-        suit = self._read_json(suit_path)
         manifest_id = suit.get("manifest_id")
         if not isinstance(manifest_id, str):
             return ApiResponse(status=HTTPStatus.NOT_FOUND, body={"ok": False, "error": f"No manifest for suit: {suit_id}"})
@@ -189,15 +290,15 @@ class NewRouteApi:
     def attach_manifest(self, suit_id: str, payload: dict[str, Any]) -> ApiResponse:
         if not _SUIT_ID_RE.fullmatch(suit_id):
             return self._bad_request("suit_id format is invalid")
-        suit_path = self._suit_path(suit_id)
-        suitspec_path = self._suitspec_path(suit_id)
-        if not suit_path.exists() or not suitspec_path.exists():
+        suit = self.store.read_suit(suit_id)
+        suitspec = self.store.read_suitspec(suit_id)
+        if suit is None or suitspec is None:
             return ApiResponse(status=HTTPStatus.NOT_FOUND, body={"ok": False, "error": f"Unknown suit: {suit_id}"})
         if not isinstance(payload, dict):
             return self._bad_request("request body must be a JSON object")
 
         try:
-            manifest = self._manifest_from_payload(suit_id, payload, suitspec_path)
+            manifest = self._manifest_from_payload(suit_id, payload, suitspec)
         except ValueError as exc:
             return self._bad_request(str(exc))
         try:
@@ -208,15 +309,13 @@ class NewRouteApi:
             return self._bad_request("manifest.suit_id must match the URL suit_id")
 
         manifest_id = str(manifest["manifest_id"])
-        manifest_path = self._manifest_path(suit_id, manifest_id)
-        self._write_json(manifest_path, manifest)
+        manifest_locator = self.store.save_manifest(suit_id, manifest)
 
-        suit = self._read_json(suit_path)
         suit["manifest_id"] = manifest_id
         suit["status"] = manifest.get("status", suit.get("status", "DRAFT"))
-        suit.setdefault("artifacts", {})["manifest_path"] = self._relative_path(manifest_path)
+        suit.setdefault("artifacts", {})["manifest_path"] = manifest_locator
         suit.setdefault("metadata", {})["updated_at"] = self._utc_now()
-        self._write_json(suit_path, suit)
+        self.store.save_suit(suit)
 
         return ApiResponse(
             status=HTTPStatus.CREATED,
@@ -224,10 +323,10 @@ class NewRouteApi:
                 "ok": True,
                 "suit_id": suit_id,
                 "manifest_id": manifest_id,
-                "manifest_path": self._relative_path(manifest_path),
+                "manifest_path": manifest_locator,
                 "suit": suit,
                 "manifest": manifest,
-                "storage": self._storage_info(manifest_path),
+                "storage": self.store.storage_info(manifest_locator),
             },
         )
 
@@ -244,10 +343,9 @@ class NewRouteApi:
         if suit_id:
             if not _SUIT_ID_RE.fullmatch(suit_id):
                 return self._bad_request("suit_id format is invalid")
-            suit_path = self._suit_path(suit_id)
-            if not suit_path.exists():
+            suit = self.store.read_suit(suit_id)
+            if suit is None:
                 return ApiResponse(status=HTTPStatus.NOT_FOUND, body={"ok": False, "error": f"Unknown suit: {suit_id}"})
-            suit = self._read_json(suit_path)
             manifest_id = manifest_id or suit.get("manifest_id")
             if not isinstance(manifest_id, str):
                 return ApiResponse(status=HTTPStatus.CONFLICT, body={"ok": False, "error": f"No manifest for suit: {suit_id}"})
@@ -266,8 +364,7 @@ class NewRouteApi:
         session_id = str(payload.get("session_id") or self._generate_session_id())
         if not _SESSION_ID_RE.fullmatch(session_id):
             return self._bad_request("session_id format is invalid")
-        session_path = self._trial_path(session_id)
-        if session_path.exists():
+        if self.store.trial_exists(session_id):
             return ApiResponse(status=HTTPStatus.CONFLICT, body={"ok": False, "error": f"Trial already exists: {session_id}"})
 
         state = str(payload.get("state") or "POSTED")
@@ -305,7 +402,8 @@ class NewRouteApi:
             validate_against_schema(session, "transform-session")
         except ValueError as exc:
             return self._bad_request(str(exc))
-        self._write_json(session_path, session)
+        trial_locator = self.store.save_trial(session)
+        self._index_trial(session)
         return ApiResponse(
             status=HTTPStatus.CREATED,
             body={
@@ -314,40 +412,54 @@ class NewRouteApi:
                 "session_id": session_id,
                 "session": session,
                 "trial": session,
-                "trial_path": self._relative_path(session_path),
+                "trial_path": trial_locator,
                 "links": {
                     "events": f"/v1/trials/{session_id}/events",
                     "replay": f"/v1/trials/{session_id}/replay",
                 },
-                "storage": self._storage_info(session_path),
+                "storage": self.store.storage_info(trial_locator),
             },
         )
 
     def get_trial(self, session_id: str) -> ApiResponse:
         if not _SESSION_ID_RE.fullmatch(session_id):
             return self._bad_request("session_id format is invalid")
-        session_path = self._trial_path(session_id)
-        if not session_path.exists():
+        if not self.store.trial_exists(session_id):
             return ApiResponse(status=HTTPStatus.NOT_FOUND, body={"ok": False, "error": f"Unknown trial: {session_id}"})
-        return ApiResponse(status=HTTPStatus.OK, body={"ok": True, "trial": self._read_json(session_path)})
+        return ApiResponse(status=HTTPStatus.OK, body={"ok": True, "trial": self.store.read_trial(session_id)})
 
-    def list_trials(self) -> ApiResponse:
-        trials = self._all_trials()
+    def stream_trial(self, session_id: str) -> ApiResponse:
+        """Stream a session as NDJSON: a header record with the session shell, then one record per event."""
+
+        if not _SESSION_ID_RE.fullmatch(session_id):
+            return self._bad_request("session_id format is invalid")
+        if not self.store.trial_exists(session_id):
+            return ApiResponse(status=HTTPStatus.NOT_FOUND, body={"ok": False, "error": f"Unknown trial: {session_id}"})
+        shell, events = self.store.stream_trial(session_id)
+        header = {"type": "header", "trial_id": session_id, "session": shell}
         return ApiResponse(
             status=HTTPStatus.OK,
-            body={
-                "ok": True,
-                "count": len(trials),
-                "latest": self._trial_summary(trials[0]) if trials else None,
-                "trials": [self._trial_summary(trial) for trial in trials],
-            },
+            body={"ok": True, "trial_id": session_id},
+            records=self._ndjson_records(header, "event", events),
         )
 
+    def list_trials(self, query: dict[str, list[str]] | None = None) -> ApiResponse:
+        """List trial summaries, newest first.
+
+        Optional query parameters: ``limit``, ``cursor`` (from ``next_cursor``),
+        ``suit_id``, ``state``, ``since``/``until`` and ``fields``.
+        """
+
+        return self._list_summaries("trials", query, _TRIAL_SUMMARY_FIELDS, self.store.query_trial_summaries)
+
     def get_latest_trial(self) -> ApiResponse:
-        trials = self._all_trials()
-        if not trials:
+        latest: dict[str, Any] | None = None
+        for summary in self._indexed_trial_summaries():
+            if self.store.trial_exists(str(summary.get("session_id"))):
+                latest = self.store.read_trial(str(summary.get("session_id")))
+                break
+        if latest is None:
             return ApiResponse(status=HTTPStatus.NOT_FOUND, body={"ok": False, "error": "No trials have been recorded"})
-        latest = trials[0]
         session_id = str(latest["session_id"])
         return ApiResponse(
             status=HTTPStatus.OK,
@@ -363,24 +475,13 @@ class NewRouteApi:
             },
         )
 
-    def list_replays(self) -> ApiResponse:
-        records = self._all_replay_records()
-        summaries = [record["summary"] for record in records]
-        return ApiResponse(
-            status=HTTPStatus.OK,
-            body={
-                "ok": True,
-                "count": len(summaries),
-                "latest": summaries[0] if summaries else None,
-                "replays": summaries,
-            },
-        )
+    def list_replays(self, query: dict[str, list[str]] | None = None) -> ApiResponse:
+        return self._list_summaries("replays", query, _REPLAY_SUMMARY_FIELDS, self.store.query_replay_summaries)
 
     def get_latest_replay(self) -> ApiResponse:
-        records = self._all_replay_records()
-        if not records:
+        latest = self._latest_replay_record()
+        if latest is None:
             return ApiResponse(status=HTTPStatus.NOT_FOUND, body={"ok": False, "error": "No replay scripts have been recorded"})
-        latest = records[0]
         summary = latest["summary"]
         session_id = str(summary["session_id"])
         return ApiResponse(
@@ -403,115 +504,255 @@ class NewRouteApi:
     def get_trial_replay(self, session_id: str) -> ApiResponse:
         if not _SESSION_ID_RE.fullmatch(session_id):
             return self._bad_request("session_id format is invalid")
-        session_path = self._trial_path(session_id)
-        if not session_path.exists():
+        if not self.store.trial_exists(session_id):
             return ApiResponse(status=HTTPStatus.NOT_FOUND, body={"ok": False, "error": f"Unknown trial: {session_id}"})
 
-        session = self._read_json(session_path)
-        events = session.get("events", [])
-        if not events:
-            return ApiResponse(status=HTTPStatus.CONFLICT, body={"ok": False, "error": "Replay requires at least one event"})
+        with self.store.lock_trial(session_id):
+            return self._write_trial_replay(session_id)
+
+    def stream_trial_replay(self, session_id: str) -> ApiResponse:
+        """Stream the (refreshed) replay script as NDJSON: a header record, then one record per segment."""
+
+        if not _SESSION_ID_RE.fullmatch(session_id):
+            return self._bad_request("session_id format is invalid")
+        if not self.store.trial_exists(session_id):
+            return ApiResponse(status=HTTPStatus.NOT_FOUND, body={"ok": False, "error": f"Unknown trial: {session_id}"})
+        with self.store.lock_trial(session_id):
+            refreshed = self._refresh_trial_replay(session_id)
+        if isinstance(refreshed, ApiResponse):
+            return refreshed
+        replay, replay_cache, _ = refreshed
+        return ApiResponse(
+            status=HTTPStatus.OK,
+            body={"ok": True, "trial_id": session_id, "replay_id": replay["replay_id"]},
+            records=self._replay_records(session_id, replay, replay_cache),
+        )
 
-        replay = self._build_replay_script(session)
+    def _replay_records(self, session_id: str, replay: dict[str, Any], replay_cache: str) -> Iterator[dict[str, Any]]:
+        # Segments are yielded straight from the stored (or just extended)
+        # timeline; no response document is built around them.
+        replay_rel_path = self._relative_path(self.store.replay_path(session_id))
+        header = {
+            "type": "header",
+            "trial_id": session_id,
+            "replay_id": replay["replay_id"],
+            "replay_path": replay_rel_path,
+            "replay_cache": replay_cache,
+            "storage": self.store.storage_info(replay_rel_path),
+            "replay": {key: value for key, value in replay.items() if key != "timeline"},
+        }
+        yield from self._ndjson_records(header, "segment", iter(replay["timeline"]))
+
+    def _ndjson_records(
+        self,
+        header: dict[str, Any],
+        kind: str,
+        items: Iterator[dict[str, Any]],
+    ) -> Iterator[dict[str, Any]]:
+        # The trailing "end" record lets clients tell a complete stream from a cut one.
+        yield header
+        count = 0
+        for item in items:
+            yield {"type": kind, kind: item}
+            count += 1
+        yield {"type": "end", "count": count}
+
+    def sample_trial_replay(self, session_id: str, query: dict[str, list[str]]) -> ApiResponse:
+        """Replay state and active actions at ``t``, or at ``from``..``to`` every ``step`` seconds."""
+
+        if not _SESSION_ID_RE.fullmatch(session_id):
+            return self._bad_request("session_id format is invalid")
+        if not self.store.trial_exists(session_id):
+            return ApiResponse(status=HTTPStatus.NOT_FOUND, body={"ok": False, "error": f"Unknown trial: {session_id}"})
+        # The watermark check extends or rebuilds a script that missed new
+        # events; an unchanged script keeps its stamp, so the index stays cached.
+        with self.store.lock_trial(session_id):
+            refreshed = self._refresh_trial_replay(session_id)
+        if isinstance(refreshed, ApiResponse):
+            return refreshed
+        index = load_replay_index(self.store.replay_path(session_id))
+        if index is None:
+            return ApiResponse(status=HTTPStatus.CONFLICT, body={"ok": False, "error": "Replay script is unreadable"})
         try:
-            validate_against_schema(replay, "replay-script")
+            times = self._sample_times(query, index.duration_sec)
+            t = self._float_param(query, "t") if times is None else 0.0
         except ValueError as exc:
             return self._bad_request(str(exc))
-        replay_path = self._replay_path(session_id)
-        self._write_json(replay_path, replay)
+        body: dict[str, Any] = {
+            "ok": True,
+            "trial_id": session_id,
+            "replay_id": index.replay_id,
+            "duration_sec": index.duration_sec,
+            "source_event_count": index.source_event_count,
+        }
+        if times is None:
+            body["sample"] = index.sample(t)
+        else:
+            body["samples"] = [index.sample(t) for t in times]
+        return ApiResponse(status=HTTPStatus.OK, body=body)
+
+    def get_trial_frames(self, session_id: str, query: dict[str, list[str]]) -> ApiResponse:
+        """Tracking frames ``from`` (inclusive) to ``to`` (exclusive), decoded from the frame sidecar."""
 
-        session.setdefault("artifacts", {})["replay_script_path"] = self._relative_path(replay_path)
-        session.setdefault("metadata", {})["updated_at"] = self._utc_now()
+        if not _SESSION_ID_RE.fullmatch(session_id):
+            return self._bad_request("session_id format is invalid")
+        if not self.store.trial_exists(session_id):
+            return ApiResponse(status=HTTPStatus.NOT_FOUND, body={"ok": False, "error": f"Unknown trial: {session_id}"})
+        sidecar = TrackingFrameStore(self.store.trial_dir(session_id))
+        total = sidecar.frame_count
         try:
-            validate_against_schema(session, "transform-session")
+            start = self._int_param(query, "from", 0)
+            end = min(self._int_param(query, "to", total), total)
+            if end - start > MAX_FRAMES_PER_READ:
+                raise ValueError(f"at most {MAX_FRAMES_PER_READ} frames per request")
         except ValueError as exc:
             return self._bad_request(str(exc))
-        self._write_json(session_path, session)
-
+        try:
+            frames = sidecar.read_frames(start, end) if end > start else []
+        except ValueError as exc:
+            return ApiResponse(status=HTTPStatus.CONFLICT, body={"ok": False, "error": str(exc)})
         return ApiResponse(
             status=HTTPStatus.OK,
-            body={
-                "ok": True,
-                "trial_id": session_id,
-                "replay_id": replay["replay_id"],
-                "replay": replay,
-                "replay_path": self._relative_path(replay_path),
-                "session": session,
-                "storage": self._storage_info(replay_path),
-            },
+            body={"ok": True, "trial_id": session_id, "frame_count": total, "from": start, "to": max(end, start), "frames": frames},
         )
 
+    def _int_param(self, query: dict[str, list[str]], name: str, default: int) -> int:
+        if name not in query:
+            return default
+        raw = (query.get(name) or [""])[0]
+        try:
+            value = int(raw)
+        except ValueError as exc:
+            raise ValueError(f"{name} must be an integer") from exc
+        if value < 0:
+            raise ValueError(f"{name} must be >= 0")
+        return value
+
+    def _sample_times(self, query: dict[str, list[str]], duration_sec: float) -> list[float] | None:
+        if "t" in query:
+            if any(name in query for name in ("from", "to", "step")):
+                raise ValueError("use either t or from/to/step")
+            return None
+        if "step" not in query:
+            raise ValueError("t or step is required")
+        step = self._float_param(query, "step")
+        if step <= 0:
+            raise ValueError("step must be > 0")
+        start = self._float_param(query, "from") if "from" in query else 0.0
+        end = self._float_param(query, "to") if "to" in query else duration_sec
+        if end < start:
+            raise ValueError("to must be >= from")
+        count = int((end - start) / step + 1e-9) + 1
+        if count > _MAX_REPLAY_SAMPLES:
+            raise ValueError(f"at most {_MAX_REPLAY_SAMPLES} samples per request")
+        return [round(start + step * index, 6) for index in range(count)]
+
+    def _float_param(self, query: dict[str, list[str]], name: str) -> float:
+        raw = (query.get(name) or [""])[0]
+        try:
+            value = float(raw)
+        except ValueError as exc:
+            raise ValueError(f"{name} must be a number") from exc
+        if not math.isfinite(value) or value < 0:
+            raise ValueError(f"{name} must be a finite number >= 0")
+        return value
+
     def append_trial_event(self, session_id: str, payload: dict[str, Any]) -> ApiResponse:
+        """Append one event.
+
+        Both storage modes answer with ``trial_id``, ``event``, ``summary`` and
+        ``storage``. Document stores also echo the whole session as ``session``
+        and ``trial``; append-only stores do not, since that would materialize
+        every event on every append.
+        """
+
         if not _SESSION_ID_RE.fullmatch(session_id):
             return self._bad_request("session_id format is invalid")
-        session_path = self._trial_path(session_id)
-        if not session_path.exists():
+        if not self.store.trial_exists(session_id):
             return ApiResponse(status=HTTPStatus.NOT_FOUND, body={"ok": False, "error": f"Unknown trial: {session_id}"})
         if not isinstance(payload, dict):
             return self._bad_request("request body must be a JSON object")
+        with self.store.lock_trial(session_id):
+            if self.store.append_only:
+                return self._append_trial_event_to_log(session_id, payload)
+            return self._append_trial_event_to_document(session_id, payload)
 
-        session = self._read_json(session_path)
-        events = session.setdefault("events", [])
-        idempotency_key = payload.get("idempotency_key")
-        if isinstance(idempotency_key, str):
-            for event in events:
-                if event.get("idempotency_key") == idempotency_key:
-                    return ApiResponse(status=HTTPStatus.OK, body={"ok": True, "event": event, "trial": session})
-
-        now = str(payload.get("occurred_at") or self._utc_now())
-        event_id = str(payload.get("event_id") or self._generate_event_id(now))
-        if not _EVENT_ID_RE.fullmatch(event_id):
-            return self._bad_request("event_id format is invalid")
-        event_type = str(payload.get("event_type") or "STATE_TRANSITION")
-        if event_type not in _TRANSFORM_EVENT_TYPES:
-            return self._bad_request(f"event_type must be one of {sorted(_TRANSFORM_EVENT_TYPES)}")
-
-        state_before = str(session["state"])
-        requested_state_after = str(payload.get("state_after") or state_before)
-        if requested_state_after not in _TRANSFORM_STATES:
-            return self._bad_request(f"state_after must be one of {sorted(_TRANSFORM_STATES)}")
-        state_after = self._non_regressive_state_after(state_before, requested_state_after)
-
-        actor = payload.get("actor") or {"type": "system"}
-        if not isinstance(actor, dict):
-            return self._bad_request("actor must be a JSON object")
-        event_payload = payload.get("payload") if isinstance(payload.get("payload"), dict) else {}
-        event_payload = self._clone_json(event_payload)
-        if state_after != requested_state_after:
-            event_payload.setdefault("requested_state_after", requested_state_after)
-            event_payload.setdefault("state_transition_note", "ignored_regressive_state_after")
-        event = {
-            "event_id": event_id,
-            "session_id": session_id,
-            "sequence": len(events),
-            "event_type": event_type,
-            "occurred_at": now,
-            "actor": actor,
-            "state_before": state_before,
-            "state_after": state_after,
-            "payload": event_payload,
-        }
-        if isinstance(idempotency_key, str):
-            event["idempotency_key"] = idempotency_key
+    def append_trial_events(self, session_id: str, payload: dict[str, Any] | list[Any]) -> ApiResponse:
+        """Append an ordered batch of events with one validation and one write."""
 
-        events.append(event)
-        session["state"] = state_after
-        if state_after in {"ACTIVE", "ARCHIVED", "REFUSED"}:
-            session["completed_at"] = now
-        session.setdefault("metadata", {})["updated_at"] = now
-        try:
-            validate_against_schema(session, "transform-session")
-        except ValueError as exc:
-            return self._bad_request(str(exc))
-        self._write_json(session_path, session)
+        if not _SESSION_ID_RE.fullmatch(session_id):
+            return self._bad_request("session_id format is invalid")
+        if not self.store.trial_exists(session_id):
+            return ApiResponse(status=HTTPStatus.NOT_FOUND, body={"ok": False, "error": f"Unknown trial: {session_id}"})
+        items = payload.get("events") if isinstance(payload, dict) else payload
+        if not isinstance(items, list):
+            return self._bad_request("request body must be a JSON array of events or an object with an events array")
+        if len(items) > _MAX_EVENT_BATCH:
+            return self._bad_request(f"event batch must not exceed {_MAX_EVENT_BATCH} events")
+
+        with self.store.lock_trial(session_id):
+            if self.store.append_only:
+                head = self.store.trial_head(session_id)
+                results, new_events = self._prepare_event_batch(
+                    session_id,
+                    str(head.shell["state"]),
+                    head.event_count,
+                    self._stored_idempotent_events(session_id, items),
+                    items,
+                )
+                try:
+                    with self._offloaded_tracking_frames(session_id, new_events):
+                        head = self.store.append_events(session_id, new_events)
+                except ValueError as exc:
+                    return self._bad_request(str(exc))
+                summary = self._head_summary(head)
+                storage = self.store.storage_info(self.store.events_locator(session_id))
+            else:
+                session = self.store.read_trial(session_id)
+                events = session.setdefault("events", [])
+                idempotency = {
+                    str(event["idempotency_key"]): event
+                    for event in events
+                    if isinstance(event.get("idempotency_key"), str)
+                }
+                results, new_events = self._prepare_event_batch(
+                    session_id, str(session["state"]), len(events), idempotency, items
+                )
+                for event in new_events:
+                    apply_session_event(session, event)
+                if new_events:
+                    try:
+                        validate_against_schema(session, "transform-session")
+                    except ValueError as exc:
+                        return self._bad_request(str(exc))
+                    with self._offloaded_tracking_frames(session_id, new_events):
+                        self.store.save_trial(session)
+                summary = self._trial_summary(session)
+                storage = self.store.storage_info(self.store.trial_locator(session_id))
+            if new_events:
+                self._ensure_trial_index()
+                self.store.upsert_trial_summary(summary)
+
+        error_count = sum(1 for result in results if result["status"] == HTTPStatus.BAD_REQUEST)
+        status = HTTPStatus.CREATED if new_events else HTTPStatus.OK
+        if error_count and error_count == len(results):
+            status = HTTPStatus.BAD_REQUEST
         return ApiResponse(
-            status=HTTPStatus.CREATED,
-            body={"ok": True, "trial_id": session_id, "event": event, "session": session, "trial": session},
+            status=status,
+            body={
+                "ok": error_count == 0,
+                "trial_id": session_id,
+                "created_count": len(new_events),
+                "duplicate_count": sum(1 for result in results if result["status"] == HTTPStatus.OK),
+                "error_count": error_count,
+                "results": results,
+                "summary": summary,
+                "storage": storage,
+            },
         )
 
     def get_part_catalog(self) -> ApiResponse:
-        catalog = self._load_json("examples/partcatalog.seed.json")
-        validate_against_schema(catalog, "partcatalog")
+        catalog = load_part_catalog(self.repo_root / _PART_CATALOG_PATH).catalog
         return ApiResponse(
             status=HTTPStatus.OK,
             body={
@@ -531,9 +772,8 @@ class NewRouteApi:
         if not _MANIFEST_ID_RE.fullmatch(manifest_id):
             return self._bad_request("manifest_id format is invalid")
 
-        local_manifest_path = self._find_manifest_path(manifest_id)
-        if local_manifest_path is not None:
-            manifest = self._read_json(local_manifest_path)
+        manifest = self.store.find_manifest(manifest_id)
+        if manifest is not None:
             validate_against_schema(manifest, "suitmanifest")
             return ApiResponse(status=HTTPStatus.OK, body={"ok": True, "manifest": manifest})
 
@@ -546,18 +786,21 @@ class NewRouteApi:
             )
         return ApiResponse(status=HTTPStatus.OK, body={"ok": True, "manifest": manifest})
 
-    def get(self, path: str) -> ApiResponse | None:
+    def get(self, path: str, query: dict[str, list[str]] | None = None, *, stream: bool = False) -> ApiResponse | None:
+        """Route a GET. ``stream`` (or ``?stream=1``) selects the NDJSON variants of trial and replay reads."""
+
         normalized = "/" + path.strip("/")
+        stream = stream or (query or {}).get("stream", [""])[0] in ("1", "true")
         if normalized == "/health":
             return self.health()
         if normalized == "/v1/catalog/parts":
             return self.get_part_catalog()
         if normalized == "/v1/trials":
-            return self.list_trials()
+            return self.list_trials(query)
         if normalized == "/v1/trials/latest":
             return self.get_latest_trial()
         if normalized == "/v1/replays":
-            return self.list_replays()
+            return self.list_replays(query)
         if normalized == "/v1/replays/latest":
             return self.get_latest_replay()
         prefix = "/v1/manifests/"
@@ -572,12 +815,17 @@ class NewRouteApi:
         trial_prefix = "/v1/trials/"
         if normalized.startswith(trial_prefix):
             suffix = normalized[len(trial_prefix) :]
+            if suffix.endswith("/frames"):
+                return self.get_trial_frames(suffix[: -len("/frames")], query or {})
+            if suffix.endswith("/replay/sample"):
+                return self.sample_trial_replay(suffix[: -len("/replay/sample")], query or {})
             if suffix.endswith("/replay"):
-                return self.get_trial_replay(suffix[: -len("/replay")])
-            return self.get_trial(suffix)
+                session_id = suffix[: -len("/replay")]
+                return self.stream_trial_replay(session_id) if stream else self.get_trial_replay(session_id)
+            return self.stream_trial(suffix) if stream else self.get_trial(suffix)
         return None
 
-    def post(self, path: str, payload: dict[str, Any]) -> ApiResponse | None:
+    def post(self, path: str, payload: dict[str, Any] | list[Any]) -> ApiResponse | None:
         normalized = "/" + path.strip("/")
         if normalized == "/v1/suits":
             return self.create_suit(payload)
@@ -590,11 +838,468 @@ class NewRouteApi:
             return self.attach_manifest(suit_id, payload)
         trial_prefix = "/v1/trials/"
         trial_suffix = normalized[len(trial_prefix) :] if normalized.startswith(trial_prefix) else ""
+        if trial_suffix.endswith("/events:batch"):
+            session_id = trial_suffix[: -len("/events:batch")]
+            return self.append_trial_events(session_id, payload)
         if trial_suffix.endswith("/events"):
             session_id = trial_suffix[: -len("/events")]
             return self.append_trial_event(session_id, payload)
         return None
 
+    def revision_etag(self, path: str, query: dict[str, list[str]] | None = None) -> str | None:
+        """Strong ETag for polled read endpoints, derived without building the body.
+
+        Listing and latest endpoints change only when a summary is written, so
+        their tag is the store's summary version; the part catalog follows its
+        seed file. Other endpoints return None and are tagged by content hash.
+        """
+
+        normalized = "/" + path.strip("/")
+        if normalized in _SUMMARY_ROUTES:
+            version = self.store.summary_version()
+            if version is None:
+                return None
+            token = f"{self.store.backend}:{version}"
+        elif normalized == "/v1/catalog/parts":
+            try:
+                stat = (self.repo_root / _PART_CATALOG_PATH).stat()
+            except OSError:
+                return None
+            token = f"catalog:{stat.st_mtime_ns}:{stat.st_size}"
+        else:
+            return None
+        params = "&".join(f"{key}={value}" for key, values in sorted((query or {}).items()) for value in values)
+        resource = f"{normalized}?{params}"
+        digest = sha1(f"{token}|{resource}".encode("utf-8")).hexdigest()[:20]
+        return f'"{digest}"'
+
+    def cache_control(self, path: str) -> str:
+        normalized = "/" + path.strip("/")
+        if normalized == "/v1/catalog/parts":
+            return "public, max-age=300"
+        # Polled state: clients may keep a copy but must revalidate it.
+        return "no-cache"
+
+    def _list_summaries(
+        self,
+        key: str,
+        query: dict[str, list[str]] | None,
+        allowed_fields: tuple[str, ...],
+        select: Callable[[SummaryQuery], tuple[list[dict[str, Any]], bool]],
+    ) -> ApiResponse:
+        try:
+            summary_query, fields = self._summary_query(query or {}, allowed_fields)
+        except ValueError as exc:
+            return self._bad_request(str(exc))
+        self._ensure_trial_index()
+        summaries, has_more = select(summary_query)
+        next_cursor = self._encode_cursor(summaries[-1]) if has_more and summaries else None
+        if fields is not None:
+            summaries = [{field: summary.get(field) for field in fields} for summary in summaries]
+        return ApiResponse(
+            status=HTTPStatus.OK,
+            body={
+                "ok": True,
+                "count": len(summaries),
+                "latest": summaries[0] if summaries else None,
+                key: summaries,
+                "next_cursor": next_cursor,
+            },
+        )
+
+    def _summary_query(
+        self, query: dict[str, list[str]], allowed_fields: tuple[str, ...]
+    ) -> tuple[SummaryQuery, list[str] | None]:
+        def param(name: str) -> str | None:
+            values = query.get(name) or []
+            return values[0] if values and values[0] != "" else None
+
+        limit: int | None = None
+        raw_limit = param("limit")
+        if raw_limit is not None:
+            try:
+                limit = int(raw_limit)
+            except ValueError as exc:
+                raise ValueError("limit must be an integer") from exc
+            if not 1 <= limit <= _MAX_LIST_LIMIT:
+                raise ValueError(f"limit must be between 1 and {_MAX_LIST_LIMIT}")
+        suit_id = param("suit_id")
+        if suit_id is not None and not _SUIT_ID_RE.fullmatch(suit_id):
+            raise ValueError("suit_id format is invalid")
+        state = param("state")
+        if state is not None and state not in _TRANSFORM_STATES:
+            raise ValueError(f"state must be one of {sorted(_TRANSFORM_STATES)}")
+        fields: list[str] | None = None
+        raw_fields = param("fields")
+        if raw_fields is not None:
+            fields = [field.strip() for field in raw_fields.split(",") if field.strip()]
+            unknown = sorted(set(fields) - set(allowed_fields))
+            if unknown:
+                raise ValueError(f"unknown fields: {', '.join(unknown)}")
+            # Keys needed to resume from a cursor are always returned.
+            fields = list(dict.fromkeys(["session_id", *fields, "updated_at"]))
+        cursor = param("cursor")
+        return (
+            SummaryQuery(
+                limit=limit,
+                after=self._decode_cursor(cursor) if cursor is not None else None,
+                suit_id=suit_id,
+                state=state,
+                since=self._normalize_timestamp("since", param("since")),
+                until=self._normalize_timestamp("until", param("until")),
+            ),
+            fields,
+        )
+
+    def _encode_cursor(self, summary: dict[str, Any]) -> str:
+        key = [str(summary.get("updated_at") or ""), str(summary.get("session_id") or "")]
+        raw = json.dumps(key, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    def _decode_cursor(self, cursor: str) -> tuple[str, str]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            key = json.loads(raw.decode("utf-8"))
+        except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+            raise ValueError("cursor is invalid") from exc
+        if not isinstance(key, list) or len(key) != 2 or not all(isinstance(item, str) for item in key):
+            raise ValueError("cursor is invalid")
+        return key[0], key[1]
+
+    def _normalize_timestamp(self, name: str, value: str | None) -> str | None:
+        if value is None:
+            return None
+        try:
+            datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError as exc:
+            raise ValueError(f"{name} must be an ISO-8601 timestamp") from exc
+        return _utc_timestamp(value)
+
+    def _write_trial_replay(self, session_id: str) -> ApiResponse:
+        refreshed = self._refresh_trial_replay(session_id)
+        if isinstance(refreshed, ApiResponse):
+            return refreshed
+        replay, replay_cache, session = refreshed
+        replay_rel_path = self._relative_path(self.store.replay_path(session_id))
+        return ApiResponse(
+            status=HTTPStatus.OK,
+            body={
+                "ok": True,
+                "trial_id": session_id,
+                "replay_id": replay["replay_id"],
+                "replay": replay,
+                "replay_path": replay_rel_path,
+                "replay_cache": replay_cache,
+                "session": session,
+                "storage": self.store.storage_info(replay_rel_path),
+            },
+        )
+
+    def _refresh_trial_replay(self, session_id: str) -> tuple[dict[str, Any], str, dict[str, Any]] | ApiResponse:
+        """Bring the stored replay up to the session's events; callers hold the trial lock.
+
+        Returns ``(replay, replay_cache, session)``, or an error response.
+        """
+
+        session = self.store.read_trial(session_id)
+        events = session.get("events", [])
+        if not events:
+            return ApiResponse(status=HTTPStatus.CONFLICT, body={"ok": False, "error": "Replay requires at least one event"})
+
+        # The stored script's source_events.event_ids is its watermark: an
+        # unchanged watermark is served as stored, and a prefix of the current
+        # events is extended with segments for the new events only.
+        replay_path = self.store.replay_path(session_id)
+        replay_rel_path = self._relative_path(replay_path)
+        stored = self._stored_replay(session)
+        covered = self._replay_covered_events(stored, events) if stored is not None else 0
+        try:
+            if stored is not None and covered == len(events):
+                replay, replay_cache = stored, "hit"
+            elif stored is not None and covered and (extension := self._extend_replay_script(stored, session, covered)):
+                replay, new_segments = extension
+                # Segments already on disk were validated when they were written.
+                validate_against_schema({**replay, "timeline": new_segments}, "replay-script")
+                replay_cache = "extended"
+            else:
+                replay = self._build_replay_script(session)
+                validate_against_schema(replay, "replay-script")
+                replay_cache = "rebuilt"
+        except ValueError as exc:
+            return self._bad_request(str(exc))
+        if replay_cache != "hit":
+            self.store.save_replay(session_id, replay)
+
+        artifacts = session.setdefault("artifacts", {})
+        if artifacts.get("replay_script_path") != replay_rel_path:
+            artifacts["replay_script_path"] = replay_rel_path
+            session.setdefault("metadata", {})["updated_at"] = self._utc_now()
+            try:
+                validate_against_schema(session, "transform-session")
+            except ValueError as exc:
+                return self._bad_request(str(exc))
+            self.store.save_trial(session)
+            self._index_trial(session)
+        if replay_cache != "hit":
+            self.store.upsert_replay_summary(self._replay_summary(session, replay, replay_path))
+        return replay, replay_cache, session
+
+    def _stored_replay(self, session: dict[str, Any]) -> dict[str, Any] | None:
+        replay = self.store.read_replay(str(session["session_id"]))
+        if replay is None:
+            return None
+        try:
+            validate_replay_script_header(replay)
+        except ValueError:
+            return None
+        if replay["session_id"] != session["session_id"] or replay["manifest_id"] != session["manifest_id"]:
+            return None
+        return replay
+
+    def _replay_covered_events(self, replay: dict[str, Any], events: list[dict[str, Any]]) -> int:
+        """Number of leading events the stored replay was built from, or 0 when it diverged."""
+
+        event_ids = replay["source_events"]["event_ids"]
+        if len(event_ids) > len(events):
+            return 0
+        if any(event_id != event.get("event_id") for event_id, event in zip(event_ids, events)):
+            return 0
+        return len(event_ids)
+
+    def _extend_replay_script(
+        self,
+        replay: dict[str, Any],
+        session: dict[str, Any],
+        covered: int,
+    ) -> tuple[dict[str, Any], list[dict[str, Any]]] | None:
+        """Append segments for ``events[covered:]``; None when the stored tail cannot be reopened."""
+
+        events = session["events"]
+        timeline = replay["timeline"]
+        # The last stored segment may be a compacted run the new events continue,
+        # so it is rebuilt together with them.
+        reopened = (timeline[-1].get("source_event_ids") or []) if timeline else []
+        tail_start = covered - len(reopened)
+        if tail_start < 0 or reopened != [event["event_id"] for event in events[tail_start:covered]]:
+            return None
+        new_segments = compact_timeline(self._replay_segments(events, tail_start), tolerance=self.replay_tolerance)
+        timeline = [*timeline[: len(timeline) - (1 if reopened else 0)], *new_segments]
+        extended = {
+            **replay,
+            "source_events": {
+                **replay["source_events"],
+                "event_ids": [*replay["source_events"]["event_ids"], *(event["event_id"] for event in events[covered:])],
+            },
+            "duration_sec": max((segment["start_time_sec"] + segment["duration_sec"] for segment in timeline), default=0),
+            "timeline": timeline,
+            "metadata": {**(replay.get("metadata") or {}), "created_at": self._utc_now(), "generator": "new-route-api"},
+        }
+        return extended, new_segments
+
+    def _append_trial_event_to_document(self, session_id: str, payload: dict[str, Any]) -> ApiResponse:
+        session = self.store.read_trial(session_id)
+        events = session.setdefault("events", [])
+        idempotency_key = payload.get("idempotency_key")
+        if isinstance(idempotency_key, str):
+            for event in events:
+                if event.get("idempotency_key") == idempotency_key:
+                    return ApiResponse(
+                        status=HTTPStatus.OK,
+                        body={
+                            "ok": True,
+                            "trial_id": session_id,
+                            "event": event,
+                            "summary": self._trial_summary(session),
+                            "storage": self.store.storage_info(self.store.trial_locator(session_id)),
+                            "session": session,
+                            "trial": session,
+                        },
+                    )
+
+        try:
+            event = self._build_trial_event(session_id, str(session["state"]), len(events), payload)
+        except ValueError as exc:
+            return self._bad_request(str(exc))
+        apply_session_event(session, event)
+        try:
+            validate_against_schema(session, "transform-session")
+        except ValueError as exc:
+            return self._bad_request(str(exc))
+        with self._offloaded_tracking_frames(session_id, [event]):
+            self.store.save_trial(session)
+        summary = self._trial_summary(session)
+        self._ensure_trial_index()
+        self.store.upsert_trial_summary(summary)
+        return ApiResponse(
+            status=HTTPStatus.CREATED,
+            body={
+                "ok": True,
+                "trial_id": session_id,
+                "event": event,
+                "summary": summary,
+                "storage": self.store.storage_info(self.store.trial_locator(session_id)),
+                "session": session,
+                "trial": session,
+            },
+        )
+
+    def _append_trial_event_to_log(self, session_id: str, payload: dict[str, Any]) -> ApiResponse:
+        # Append-only stores validate and record only the new event; the full
+        # session document is materialized by readers, not echoed back here.
+        head = self.store.trial_head(session_id)
+        idempotency_key = payload.get("idempotency_key")
+        if isinstance(idempotency_key, str):
+            existing = self.store.find_event_by_idempotency_key(session_id, idempotency_key)
+            if existing is not None:
+                return ApiResponse(
+                    status=HTTPStatus.OK,
+                    body={
+                        "ok": True,
+                        "trial_id": session_id,
+                        "event": existing,
+                        "summary": self._head_summary(head),
+                        "storage": self.store.storage_info(self.store.events_locator(session_id)),
+                    },
+                )
+
+        try:
+            event = self._build_trial_event(session_id, str(head.shell["state"]), head.event_count, payload)
+            validate_transform_event(event)
+            with self._offloaded_tracking_frames(session_id, [event]):
+                head = self.store.append_events(session_id, [event])
+        except ValueError as exc:
+            return self._bad_request(str(exc))
+        summary = self._head_summary(head)
+        self._ensure_trial_index()
+        self.store.upsert_trial_summary(summary)
+        return ApiResponse(
+            status=HTTPStatus.CREATED,
+            body={
+                "ok": True,
+                "trial_id": session_id,
+                "event": event,
+                "summary": summary,
+                "storage": self.store.storage_info(self.store.events_locator(session_id)),
+            },
+        )
+
+    def _stored_idempotent_events(self, session_id: str, items: list[Any]) -> dict[str, dict[str, Any]]:
+        found: dict[str, dict[str, Any]] = {}
+        for item in items:
+            key = item.get("idempotency_key") if isinstance(item, dict) else None
+            if isinstance(key, str) and key not in found:
+                event = self.store.find_event_by_idempotency_key(session_id, key)
+                if event is not None:
+                    found[key] = event
+        return found
+
+    def _prepare_event_batch(
+        self,
+        session_id: str,
+        state: str,
+        sequence: int,
+        idempotency: dict[str, dict[str, Any]],
+        items: list[Any],
+    ) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+        results: list[dict[str, Any]] = []
+        new_events: list[dict[str, Any]] = []
+        batch_keys: dict[str, dict[str, Any]] = {}
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results.append({"index": index, "status": HTTPStatus.BAD_REQUEST, "error": "event must be a JSON object"})
+                continue
+            idempotency_key = item.get("idempotency_key")
+            if isinstance(idempotency_key, str):
+                existing = batch_keys.get(idempotency_key) or idempotency.get(idempotency_key)
+                if existing is not None:
+                    results.append({"index": index, "status": HTTPStatus.OK, "event": existing})
+                    continue
+            try:
+                event = self._build_trial_event(session_id, state, sequence, item)
+                validate_transform_event(event)
+            except ValueError as exc:
+                results.append({"index": index, "status": HTTPStatus.BAD_REQUEST, "error": str(exc)})
+                continue
+            new_events.append(event)
+            results.append({"index": index, "status": HTTPStatus.CREATED, "event": event})
+            state = str(event["state_after"])
+            sequence += 1
+            if isinstance(idempotency_key, str):
+                batch_keys[idempotency_key] = event
+        return results, new_events
+
+    def _build_trial_event(
+        self,
+        session_id: str,
+        state_before: str,
+        sequence: int,
+        payload: dict[str, Any],
+    ) -> dict[str, Any]:
+        now = str(payload.get("occurred_at") or self._utc_now())
+        event_id = str(payload.get("event_id") or self._generate_event_id(now))
+        if not _EVENT_ID_RE.fullmatch(event_id):
+            raise ValueError("event_id format is invalid")
+        event_type = str(payload.get("event_type") or "STATE_TRANSITION")
+        if event_type not in _TRANSFORM_EVENT_TYPES:
+            raise ValueError(f"event_type must be one of {sorted(_TRANSFORM_EVENT_TYPES)}")
+
+        requested_state_after = str(payload.get("state_after") or state_before)
+        if requested_state_after not in _TRANSFORM_STATES:
+            raise ValueError(f"state_after must be one of {sorted(_TRANSFORM_STATES)}")
+        state_after = self._non_regressive_state_after(state_before, requested_state_after)
+
+        actor = payload.get("actor") or {"type": "system"}
+        if not isinstance(actor, dict):
+            raise ValueError("actor must be a JSON object")
+        event_payload = payload.get("payload") if isinstance(payload.get("payload"), dict) else {}
+        event_payload = self._clone_json(event_payload)
+        if state_after != requested_state_after:
+            event_payload.setdefault("requested_state_after", requested_state_after)
+            event_payload.setdefault("state_transition_note", "ignored_regressive_state_after")
+        event = {
+            "event_id": event_id,
+            "session_id": session_id,
+            "sequence": sequence,
+            "event_type": event_type,
+            "occurred_at": now,
+            "actor": actor,
+            "state_before": state_before,
+            "state_after": state_after,
+            "payload": event_payload,
+        }
+        idempotency_key = payload.get("idempotency_key")
+        if isinstance(idempotency_key, str):
+            event["idempotency_key"] = idempotency_key
+        return event
+
+    @contextmanager
+    def _offloaded_tracking_frames(self, session_id: str, events: list[dict[str, Any]]) -> Iterator[None]:
+        # Entered only for validated events, right around the write that
+        # persists them, under the trial lock held by every append path, so
+        # sidecar offsets and frame numbers follow event order. A failed write
+        # truncates the sidecar back so no orphan blocks shift later batches.
+        if self.tracking_encoding == "inline":
+            yield
+            return
+        sidecar = TrackingFrameStore(self.store.trial_dir(session_id))
+        size = sidecar.size()
+        try:
+            for event in events:
+                if event.get("event_type") == "TRACKING_FRAME_BATCH":
+                    self._offload_tracking_frames(sidecar, event["payload"])
+            yield
+        except BaseException:
+            sidecar.truncate(size)
+            raise
+
+    def _offload_tracking_frames(self, sidecar: TrackingFrameStore, event_payload: dict[str, Any]) -> None:
+        frames = event_payload.get("frames")
+        if not frames_are_encodable(frames):
+            return
+        ref = sidecar.append(frames, encoding=self.tracking_encoding)
+        del event_payload["frames"]
+        event_payload["frames_ref"] = {"path": self._relative_path(sidecar.path), **ref}
+
     def _load_json(self, rel_path: str) -> dict[str, Any]:
         target = (self.repo_root / rel_path).resolve()
         try:
@@ -606,50 +1311,78 @@ class NewRouteApi:
     def _read_json(self, path: Path) -> dict[str, Any]:
         return json.loads(path.read_text(encoding="utf-8"))
 
-    def _write_json(self, path: Path, payload: dict[str, Any]) -> None:
-        path.parent.mkdir(parents=True, exist_ok=True)
-        text = json.dumps(payload, ensure_ascii=False, indent=2) + "\n"
-        tmp_path = path.with_suffix(path.suffix + ".tmp")
-        tmp_path.write_text(text, encoding="utf-8")
-        tmp_path.replace(path)
+    def rebuild_trial_index(self) -> dict[str, Any]:
+        """Rebuild the trial/replay summaries from the stored session documents."""
 
-    def _suit_path(self, suit_id: str) -> Path:
-        return self.suit_store_root / suit_id / "suit.json"
+        trials = self._all_trials()
+        records = self._all_replay_records(trials)
+        data = self.store.replace_summaries(
+            [self._trial_summary(trial) for trial in trials],
+            [record["summary"] for record in records],
+        )
+        return {
+            "ok": True,
+            "backend": self.store.backend,
+            "index_path": data["locator"],
+            "revision": data["revision"],
+            "trial_count": len(data["trials"]),
+            "replay_count": len(data["replays"]),
+        }
 
-    def _suitspec_path(self, suit_id: str) -> Path:
-        return self.suit_store_root / suit_id / "suitspec.json"
+    def rebuild_manifest_index(self) -> dict[str, Any]:
+        """Rebuild the manifest_id lookup index from the manifest artifacts."""
 
-    def _manifest_path(self, suit_id: str, manifest_id: str) -> Path:
-        return self.suit_store_root / suit_id / "manifests" / f"{manifest_id}.json"
+        return self.store.rebuild_manifest_index()
 
-    def _trial_path(self, session_id: str) -> Path:
-        return self.trial_store_root / session_id / "transform-session.json"
+    def check_manifest_index(self) -> dict[str, Any]:
+        return self.store.check_manifest_index()
 
-    def _replay_path(self, session_id: str) -> Path:
-        return self.trial_store_root / session_id / "replay-script.json"
+    def _index_trial(self, session: dict[str, Any]) -> None:
+        self._ensure_trial_index()
+        self.store.upsert_trial_summary(self._trial_summary(session))
 
-    def _find_manifest_path(self, manifest_id: str) -> Path | None:
-        if not self.suit_store_root.exists():
-            return None
-        for path in self.suit_store_root.glob(f"*/manifests/{manifest_id}.json"):
-            return path
+    def _ensure_trial_index(self) -> None:
+        # Stores written before the index existed (or with a damaged index) are
+        # recovered by a one-off full scan.
+        if not self.store.has_summaries():
+            self.rebuild_trial_index()
+
+    def _indexed_trial_summaries(self) -> list[dict[str, Any]]:
+        self._ensure_trial_index()
+        return self.store.trial_summaries()
+
+    def _indexed_replay_summaries(self) -> list[dict[str, Any]]:
+        self._ensure_trial_index()
+        return self.store.replay_summaries()
+
+    def _latest_replay_record(self) -> dict[str, Any] | None:
+        for summary in self._indexed_replay_summaries():
+            if not self.store.trial_exists(str(summary.get("session_id"))):
+                continue
+            try:
+                trial = self.store.read_trial(str(summary.get("session_id")))
+                replay_path = self._replay_path_for_trial(trial)
+                if replay_path is None or not replay_path.is_file():
+                    continue
+                replay = self._read_json(replay_path)
+            except (OSError, json.JSONDecodeError):
+                continue
+            return {"trial": trial, "replay": replay, "summary": summary}
         return None
 
     def _all_trials(self) -> list[dict[str, Any]]:
-        if not self.trial_store_root.exists():
-            return []
-        trials = [self._read_json(path) for path in self.trial_store_root.glob("*/transform-session.json")]
+        trials = list(self.store.iter_trials())
         return sorted(trials, key=self._trial_sort_key, reverse=True)
 
-    def _all_replay_records(self) -> list[dict[str, Any]]:
+    def _all_replay_records(self, trials: list[dict[str, Any]] | None = None) -> list[dict[str, Any]]:
         records: list[dict[str, Any]] = []
-        for trial in self._all_trials():
+        for trial in self._all_trials() if trials is None else trials:
             replay_path = self._replay_path_for_trial(trial)
             if replay_path is None or not replay_path.is_file():
                 continue
             try:
                 replay = self._read_json(replay_path)
-                validate_against_schema(replay, "replay-script")
+                validate_replay_script_header(replay)
             except (OSError, ValueError, json.JSONDecodeError):
                 continue
             records.append(
@@ -673,7 +1406,7 @@ class NewRouteApi:
             if not self._is_readable_artifact_path(candidate):
                 return None
             return candidate
-        return self._replay_path(session_id)
+        return self.store.replay_path(session_id)
 
     def _is_readable_artifact_path(self, path: Path) -> bool:
         for root in (self.repo_root, self.trial_store_root):
@@ -686,9 +1419,12 @@ class NewRouteApi:
 
     def _trial_sort_key(self, trial: dict[str, Any]) -> str:
         metadata = trial.get("metadata") if isinstance(trial.get("metadata"), dict) else {}
-        return str(metadata.get("updated_at") or trial.get("completed_at") or trial.get("started_at") or "")
+        return str(_utc_timestamp(metadata.get("updated_at") or trial.get("completed_at") or trial.get("started_at")) or "")
 
-    def _trial_summary(self, trial: dict[str, Any]) -> dict[str, Any]:
+    def _head_summary(self, head: SessionHead) -> dict[str, Any]:
+        return self._trial_summary({**head.shell, "events": [head.last_event] if head.last_event else []}, event_count=head.event_count)
+
+    def _trial_summary(self, trial: dict[str, Any], *, event_count: int | None = None) -> dict[str, Any]:
         events = trial.get("events") if isinstance(trial.get("events"), list) else []
         artifacts = trial.get("artifacts") if isinstance(trial.get("artifacts"), dict) else {}
         metadata = trial.get("metadata") if isinstance(trial.get("metadata"), dict) else {}
@@ -698,10 +1434,10 @@ class NewRouteApi:
             "suit_id": trial.get("suit_id"),
             "manifest_id": trial.get("manifest_id"),
             "state": trial.get("state"),
-            "event_count": len(events),
+            "event_count": len(events) if event_count is None else event_count,
             "last_event_type": last_event.get("event_type"),
             "replay_script_path": artifacts.get("replay_script_path"),
-            "updated_at": metadata.get("updated_at") or trial.get("completed_at") or trial.get("started_at"),
+            "updated_at": _utc_timestamp(metadata.get("updated_at") or trial.get("completed_at") or trial.get("started_at")),
         }
 
     def _replay_summary(self, trial: dict[str, Any], replay: dict[str, Any], replay_path: Path) -> dict[str, Any]:
@@ -725,7 +1461,7 @@ class NewRouteApi:
             "last_event_type": last_event.get("event_type"),
             "replay_script_path": self._relative_path(replay_path),
             "generated_at": generated_at,
-            "updated_at": generated_at or self._trial_sort_key(trial),
+            "updated_at": _utc_timestamp(generated_at or self._trial_sort_key(trial)),
         }
 
     def _non_regressive_state_after(self, state_before: str, requested_state_after: str) -> str:
@@ -736,14 +1472,7 @@ class NewRouteApi:
         return requested_state_after
 
     def _relative_path(self, path: Path) -> str:
-        resolved = path.resolve()
-        try:
-            return resolved.relative_to(self.repo_root).as_posix()
-        except ValueError:
-            return resolved.as_posix()
-
-    def _storage_info(self, path: Path) -> dict[str, str]:
-        return {"backend": "local-json", "path": self._relative_path(path)}
+        return self.store.relative_path(path)
 
     def _bad_request(self, message: str) -> ApiResponse:
         return ApiResponse(status=HTTPStatus.BAD_REQUEST, body={"ok": False, "error": message})
@@ -764,17 +1493,7 @@ class NewRouteApi:
 
     def _build_replay_script(self, session: dict[str, Any]) -> dict[str, Any]:
         events = session["events"]
-        starts = [self._event_offset_seconds(events[0], event) for event in events]
-        timeline = [
-            {
-                "segment_id": f"SEG-{idx:04d}",
-                "start_time_sec": starts[idx],
-                "duration_sec": 0.5,
-                "source_event_ids": [event["event_id"]],
-                "actions": [self._replay_action_for_event(event, starts[idx])],
-            }
-            for idx, event in enumerate(events)
-        ]
+        timeline = compact_timeline(self._replay_segments(events, 0), tolerance=self.replay_tolerance)
         duration_sec = max((segment["start_time_sec"] + segment["duration_sec"] for segment in timeline), default=0)
         replay_id = self._build_replay_id(str(session["session_id"]), str(events[0]["occurred_at"]))
         return {
@@ -791,6 +1510,24 @@ class NewRouteApi:
             "metadata": {"created_at": self._utc_now(), "generator": "new-route-api"},
         }
 
+    def _replay_segments(self, events: list[dict[str, Any]], start: int) -> list[dict[str, Any]]:
+        """One segment per event from ``events[start:]``, timed from the first event (before compaction)."""
+
+        segments = []
+        for idx in range(start, len(events)):
+            event = events[idx]
+            start_time_sec = self._event_offset_seconds(events[0], event)
+            segments.append(
+                {
+                    "segment_id": f"SEG-{idx:04d}",
+                    "start_time_sec": start_time_sec,
+                    "duration_sec": SEGMENT_DURATION_SEC,
+                    "source_event_ids": [event["event_id"]],
+                    "actions": [self._replay_action_for_event(event, start_time_sec)],
+                }
+            )
+        return segments
+
     def _event_offset_seconds(self, first_event: dict[str, Any], event: dict[str, Any]) -> float:
         try:
             first = datetime.fromisoformat(str(first_event["occurred_at"]).replace("Z", "+00:00"))
@@ -834,7 +1571,7 @@ class NewRouteApi:
     def _strip_none(self, payload: dict[str, Any]) -> dict[str, Any]:
         return {key: value for key, value in payload.items() if value is not None}
 
-    def _manifest_from_payload(self, suit_id: str, payload: dict[str, Any], suitspec_path: Path) -> dict[str, Any]:
+    def _manifest_from_payload(self, suit_id: str, payload: dict[str, Any], suitspec: dict[str, Any]) -> dict[str, Any]:
         supplied_manifest = payload.get("manifest")
         if supplied_manifest is not None:
             if not isinstance(supplied_manifest, dict):
@@ -848,16 +1585,29 @@ class NewRouteApi:
         if manifest_id is not None and not isinstance(manifest_id, str):
             raise ValueError("manifest_id must be a string")
         projection_version = str(payload.get("projection_version") or "0.1")
-        part_catalog = self._load_json("examples/partcatalog.seed.json")
-        validate_against_schema(part_catalog, "partcatalog")
-        suitspec = self._read_json(suitspec_path)
+        part_catalog = load_part_catalog(self.repo_root / _PART_CATALOG_PATH)
         if suitspec.get("suit_id") != suit_id:
             raise ValueError("stored suitspec.suit_id must match the URL suit_id")
-        validate_suitspec(suitspec)
+        digest = suitspec_digest(suitspec)
+        self._validate_suitspec_once(suitspec, digest)
         return project_suitspec_to_manifest(
             suitspec,
-            part_catalog=part_catalog,
+            part_catalog=part_catalog.catalog,
             manifest_id=manifest_id,
             status=status,
             projection_version=projection_version,
+            catalog_version=part_catalog.version,
+            catalog_index=part_catalog.lookup,
+            digest=digest,
         )
+
+    def _validate_suitspec_once(self, suitspec: dict[str, Any], digest: str) -> None:
+        with _VALIDATED_SUITSPECS_LOCK:
+            if digest in _VALIDATED_SUITSPECS:
+                _VALIDATED_SUITSPECS.move_to_end(digest)
+                return
+        validate_suitspec(suitspec)
+        with _VALIDATED_SUITSPECS_LOCK:
+            _VALIDATED_SUITSPECS[digest] = None
+            while len(_VALIDATED_SUITSPECS) > _VALIDATED_SUITSPEC_LIMIT:
+                _VALIDATED_SUITSPECS.popitem(last=False)
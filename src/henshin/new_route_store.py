@@ -0,0 +1,1185 @@
+"""Storage backends behind the new-route API.
+
+``NewRouteApi`` talks to a ``NewRouteStore`` instead of file paths:
+
+- ``LocalJsonStore`` keeps the original layout under ``sessions/new-route``
+  (suit/suitspec/manifest JSON files, one directory per trial, the summary
+  index and the optional append-only event log).
+- ``SqliteStore`` keeps suits, suit versions, trials and events in tables that
+  mirror ``infra/gcp/cloudsql/schema.sql``. As in the Cloud SQL split, manifests
+  and replay scripts stay JSON artifacts on disk and the rows point at them.
+
+The SQL store only uses portable statements (``insert ... on conflict``,
+parameter placeholders rewritten per driver), so a Postgres connection pool can
+take the same code path later.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+from .manifest_index import ManifestIndex
+from .session_log import (
+    DEFAULT_COMPACT_EVERY,
+    SessionHead,
+    TransformEventLog,
+    trial_lock,
+)
+from .trial_index import REPLAY_TRIAL_FIELDS, SummaryQuery, TrialIndex, select_summaries, summary_sort_key
+
+STORE_BACKENDS = ("local-json", "sqlite")
+DEFAULT_SQLITE_FILENAME = "new-route.sqlite3"
+_STREAM_FETCH_ROWS = 256
+_EVENT_COLUMNS = (
+    "event_id, session_id, sequence, event_type, occurred_at, actor_json, "
+    "state_before, state_after, payload_json, idempotency_key"
+)
+
+
+class NewRouteStore(ABC):
+    """Suits, manifests, trials, events and their summaries for one store root.
+
+    Manifests and replay scripts are JSON artifacts in every backend; only the
+    source rows move between backends.
+    """
+
+    backend = "abstract"
+    # True when appends record only the new events instead of rewriting the session.
+    append_only = False
+
+    def __init__(self, repo_root: Path, suit_store_root: Path) -> None:
+        self.repo_root = repo_root.resolve()
+        self.suit_store_root = suit_store_root.resolve()
+        self.trial_store_root = self.suit_store_root.parent / "trials"
+
+    # Suits -----------------------------------------------------------------
+
+    @abstractmethod
+    def read_suit(self, suit_id: str) -> dict[str, Any] | None: ...
+
+    @abstractmethod
+    def read_suitspec(self, suit_id: str) -> dict[str, Any] | None: ...
+
+    @abstractmethod
+    def save_suitspec(self, suit_id: str, suitspec: dict[str, Any]) -> str:
+        """Store a new suitspec version and return its locator."""
+
+    @abstractmethod
+    def save_suit(self, suit: dict[str, Any]) -> None: ...
+
+    def save_manifest(self, suit_id: str, manifest: dict[str, Any]) -> str:
+        """Write the manifest artifact and return its repo-relative path."""
+
+        path = self.manifest_path(suit_id, str(manifest["manifest_id"]))
+        write_json_file(path, manifest)
+        return self.relative_path(path)
+
+    @abstractmethod
+    def find_manifest(self, manifest_id: str) -> dict[str, Any] | None: ...
+
+    @abstractmethod
+    def manifest_index_entries(self) -> dict[str, dict[str, Any]]:
+        """Indexed manifests keyed by id; ``path`` is a repo-relative artifact path."""
+
+    @abstractmethod
+    def rebuild_manifest_index(self) -> dict[str, Any]: ...
+
+    def check_manifest_index(self) -> dict[str, Any]:
+        """Compare the manifest index with the manifest artifacts on disk."""
+
+        indexed = self.manifest_index_entries()
+        on_disk, unreadable = self.scan_manifest_artifacts()
+        mismatched = [
+            manifest_id
+            for manifest_id, entry in indexed.items()
+            if manifest_id in on_disk
+            and (entry.get("suit_id"), entry.get("path")) != (on_disk[manifest_id]["suit_id"], on_disk[manifest_id]["path"])
+        ]
+        report = {
+            "missing": sorted(manifest_id for manifest_id in indexed if manifest_id not in on_disk),
+            "unindexed": sorted(manifest_id for manifest_id in on_disk if manifest_id not in indexed),
+            "mismatched": sorted(mismatched),
+            "unreadable": unreadable,
+        }
+        return {
+            "ok": not any(report.values()),
+            "backend": self.backend,
+            "manifest_count": len(indexed),
+            **report,
+        }
+
+    def scan_manifest_artifacts(self) -> tuple[dict[str, dict[str, Any]], list[str]]:
+        """Walk every suit's manifest directory; the slow path the index replaces."""
+
+        found: dict[str, dict[str, Any]] = {}
+        unreadable: list[str] = []
+        if not self.suit_store_root.exists():
+            return found, unreadable
+        for path in sorted(self.suit_store_root.glob("*/manifests/*.json")):
+            try:
+                manifest = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                unreadable.append(self.relative_path(path))
+                continue
+            if not isinstance(manifest, dict) or manifest.get("manifest_id") != path.stem:
+                unreadable.append(self.relative_path(path))
+                continue
+            found[path.stem] = {
+                "suit_id": path.parent.parent.name,
+                "path": self.relative_path(path),
+                "updated_at": _manifest_updated_at(manifest),
+            }
+        return found, unreadable
+
+    # Trials ----------------------------------------------------------------
+
+    @abstractmethod
+    def trial_exists(self, session_id: str) -> bool: ...
+
+    @abstractmethod
+    def read_trial(self, session_id: str) -> dict[str, Any]: ...
+
+    @abstractmethod
+    def iter_trials(self) -> Iterator[dict[str, Any]]: ...
+
+    def stream_trial(self, session_id: str) -> tuple[dict[str, Any], Iterator[dict[str, Any]]]:
+        """Return the session without ``events`` and an iterator that reads its events lazily."""
+
+        session = self.read_trial(session_id)
+        events = session.pop("events", None) or []
+        return session, iter(events)
+
+    @abstractmethod
+    def save_trial(self, session: dict[str, Any]) -> str:
+        """Store a complete session document and return its locator."""
+
+    @abstractmethod
+    def trial_locator(self, session_id: str) -> str: ...
+
+    @abstractmethod
+    def trial_head(self, session_id: str) -> SessionHead: ...
+
+    @abstractmethod
+    def find_event_by_idempotency_key(self, session_id: str, idempotency_key: str) -> dict[str, Any] | None: ...
+
+    @abstractmethod
+    def append_events(self, session_id: str, events: list[dict[str, Any]]) -> SessionHead:
+        """Record already-validated events. Callers hold ``lock_trial``."""
+
+    @abstractmethod
+    def events_locator(self, session_id: str) -> str: ...
+
+    def lock_trial(self, session_id: str) -> Any:
+        return trial_lock(self.trial_dir(session_id).resolve())
+
+    def read_replay(self, session_id: str) -> dict[str, Any] | None:
+        """Return the stored replay script, or None when it is missing or unreadable."""
+
+        try:
+            replay = read_json_file(self.replay_path(session_id))
+        except (OSError, ValueError):
+            return None
+        return replay if isinstance(replay, dict) else None
+
+    def save_replay(self, session_id: str, replay: dict[str, Any]) -> Path:
+        path = self.replay_path(session_id)
+        write_json_file(path, replay)
+        return path
+
+    # Summaries -------------------------------------------------------------
+
+    @abstractmethod
+    def has_summaries(self) -> bool:
+        """False when the summaries are missing and must be rebuilt from the trials."""
+
+    @abstractmethod
+    def summary_version(self) -> str | None:
+        """A token that changes whenever any trial or replay summary changes."""
+
+    @abstractmethod
+    def trial_summaries(self) -> list[dict[str, Any]]: ...
+
+    @abstractmethod
+    def replay_summaries(self) -> list[dict[str, Any]]: ...
+
+    def query_trial_summaries(self, query: SummaryQuery) -> tuple[list[dict[str, Any]], bool]:
+        """Return one page of trial summaries and whether more follow."""
+
+        return select_summaries(self.trial_summaries(), query)
+
+    def query_replay_summaries(self, query: SummaryQuery) -> tuple[list[dict[str, Any]], bool]:
+        return select_summaries(self.replay_summaries(), query)
+
+    @abstractmethod
+    def upsert_trial_summary(self, summary: dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    def upsert_replay_summary(self, summary: dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    def replace_summaries(
+        self, trial_summaries: list[dict[str, Any]], replay_summaries: list[dict[str, Any]]
+    ) -> dict[str, Any]:
+        """Replace every summary; returns ``{"locator", "revision", "trials", "replays"}``."""
+
+    # Paths -----------------------------------------------------------------
+
+    def trial_dir(self, session_id: str) -> Path:
+        return self.trial_store_root / session_id
+
+    def manifest_path(self, suit_id: str, manifest_id: str) -> Path:
+        return self.suit_store_root / suit_id / "manifests" / f"{manifest_id}.json"
+
+    def replay_path(self, session_id: str) -> Path:
+        return self.trial_dir(session_id) / "replay-script.json"
+
+    def relative_path(self, path: Path) -> str:
+        resolved = path.resolve()
+        try:
+            return resolved.relative_to(self.repo_root).as_posix()
+        except ValueError:
+            return resolved.as_posix()
+
+    def storage_info(self, locator: str) -> dict[str, str]:
+        return {"backend": self.backend, "path": locator}
+
+
+class LocalJsonStore(NewRouteStore):
+    """The original JSON file layout, optionally with an append-only event log."""
+
+    backend = "local-json"
+
+    def __init__(
+        self,
+        repo_root: Path,
+        suit_store_root: Path,
+        *,
+        event_log: bool = False,
+        compact_every: int = DEFAULT_COMPACT_EVERY,
+    ) -> None:
+        super().__init__(repo_root, suit_store_root)
+        self.append_only = event_log
+        self.compact_every = compact_every
+        self.trial_index = TrialIndex(self.trial_store_root)
+        self.manifest_index = ManifestIndex(self.suit_store_root)
+
+    def read_suit(self, suit_id: str) -> dict[str, Any] | None:
+        return read_json_file(self._suit_path(suit_id))
+
+    def read_suitspec(self, suit_id: str) -> dict[str, Any] | None:
+        return read_json_file(self._suitspec_path(suit_id))
+
+    def save_suitspec(self, suit_id: str, suitspec: dict[str, Any]) -> str:
+        # Make sure a store predating the manifest index gets one before it grows.
+        self._ensure_manifest_index()
+        path = self._suitspec_path(suit_id)
+        write_json_file(path, suitspec)
+        return self.relative_path(path)
+
+    def save_suit(self, suit: dict[str, Any]) -> None:
+        write_json_file(self._suit_path(str(suit["suit_id"])), suit)
+
+    def save_manifest(self, suit_id: str, manifest: dict[str, Any]) -> str:
+        self._ensure_manifest_index()
+        locator = super().save_manifest(suit_id, manifest)
+        suit = self.read_suit(suit_id) or {}
+        self.manifest_index.upsert(
+            str(manifest["manifest_id"]),
+            self._manifest_entry(suit_id, str(manifest["manifest_id"]), int(suit.get("version") or 1), manifest),
+        )
+        return locator
+
+    def find_manifest(self, manifest_id: str) -> dict[str, Any] | None:
+        self._ensure_manifest_index()
+        entry = self.manifest_index.lookup(manifest_id)
+        if entry is None:
+            return None
+        return read_json_file(self.suit_store_root / str(entry["path"]))
+
+    def manifest_index_entries(self) -> dict[str, dict[str, Any]]:
+        return {
+            manifest_id: {**entry, "path": self.relative_path(self.suit_store_root / str(entry["path"]))}
+            for manifest_id, entry in self.manifest_index.entries().items()
+        }
+
+    def rebuild_manifest_index(self) -> dict[str, Any]:
+        on_disk, unreadable = self.scan_manifest_artifacts()
+        entries: dict[str, dict[str, Any]] = {}
+        for manifest_id, found in on_disk.items():
+            suit = self.read_suit(found["suit_id"]) or {}
+            entries[manifest_id] = {
+                "suit_id": found["suit_id"],
+                "path": f"{found['suit_id']}/manifests/{manifest_id}.json",
+                "version": int(suit.get("version") or 1),
+                "updated_at": found["updated_at"],
+            }
+        data = self.manifest_index.rebuild(entries)
+        return {
+            "ok": True,
+            "backend": self.backend,
+            "index_path": self.relative_path(self.manifest_index.path),
+            "revision": data["revision"],
+            "manifest_count": len(entries),
+            "unreadable": unreadable,
+        }
+
+    def trial_exists(self, session_id: str) -> bool:
+        return self._event_log(session_id).exists()
+
+    def read_trial(self, session_id: str) -> dict[str, Any]:
+        # Both trial storage modes read through the log so a pending segment is
+        # never hidden, whichever mode wrote it.
+        return self._event_log(session_id).materialize()
+
+    def stream_trial(self, session_id: str) -> tuple[dict[str, Any], Iterator[dict[str, Any]]]:
+        log = self._event_log(session_id)
+        shell = json.loads(json.dumps(log.head().shell, ensure_ascii=False))
+        return shell, log.iter_events()
+
+    def iter_trials(self) -> Iterator[dict[str, Any]]:
+        if not self.trial_store_root.exists():
+            return
+        for path in self.trial_store_root.glob("*/transform-session.json"):
+            yield TransformEventLog(path.parent).materialize()
+
+    def save_trial(self, session: dict[str, Any]) -> str:
+        session_id = str(session["session_id"])
+        self._event_log(session_id).write_snapshot(session)
+        return self.trial_locator(session_id)
+
+    def trial_locator(self, session_id: str) -> str:
+        return self.relative_path(self._event_log(session_id).snapshot_path)
+
+    def trial_head(self, session_id: str) -> SessionHead:
+        return self._event_log(session_id).head()
+
+    def find_event_by_idempotency_key(self, session_id: str, idempotency_key: str) -> dict[str, Any] | None:
+        return self.trial_head(session_id).idempotency.get(idempotency_key)
+
+    def append_events(self, session_id: str, events: list[dict[str, Any]]) -> SessionHead:
+        return self._event_log(session_id).append_many(events)
+
+    def events_locator(self, session_id: str) -> str:
+        return self.relative_path(self._event_log(session_id).segment_path)
+
+    def storage_info(self, locator: str) -> dict[str, str]:
+        if locator.endswith(".jsonl"):
+            return {"backend": "local-event-log", "path": locator}
+        return super().storage_info(locator)
+
+    def has_summaries(self) -> bool:
+        return self.trial_index.load() is not None or not self.trial_store_root.exists()
+
+    def summary_version(self) -> str | None:
+        return self.trial_index.version()
+
+    def trial_summaries(self) -> list[dict[str, Any]]:
+        return self.trial_index.trials()
+
+    def replay_summaries(self) -> list[dict[str, Any]]:
+        return self.trial_index.replays()
+
+    def upsert_trial_summary(self, summary: dict[str, Any]) -> None:
+        self.trial_index.upsert_trial(summary)
+
+    def upsert_replay_summary(self, summary: dict[str, Any]) -> None:
+        self.trial_index.upsert_replay(summary)
+
+    def replace_summaries(
+        self, trial_summaries: list[dict[str, Any]], replay_summaries: list[dict[str, Any]]
+    ) -> dict[str, Any]:
+        data = self.trial_index.rebuild(trial_summaries, replay_summaries)
+        return {
+            "locator": self.relative_path(self.trial_index.path),
+            "revision": data["revision"],
+            "trials": data["trials"],
+            "replays": data["replays"],
+        }
+
+    def _ensure_manifest_index(self) -> None:
+        if self.manifest_index.load() is None and self.suit_store_root.exists():
+            self.rebuild_manifest_index()
+
+    def _manifest_entry(self, suit_id: str, manifest_id: str, version: int, manifest: dict[str, Any]) -> dict[str, Any]:
+        return {
+            "suit_id": suit_id,
+            "path": f"{suit_id}/manifests/{manifest_id}.json",
+            "version": version,
+            "updated_at": _manifest_updated_at(manifest),
+        }
+
+    def _suit_path(self, suit_id: str) -> Path:
+        return self.suit_store_root / suit_id / "suit.json"
+
+    def _suitspec_path(self, suit_id: str) -> Path:
+        return self.suit_store_root / suit_id / "suitspec.json"
+
+    def _event_log(self, session_id: str) -> TransformEventLog:
+        return TransformEventLog(self.trial_dir(session_id), compact_every=self.compact_every)
+
+
+SQLITE_SCHEMA = """
+create table if not exists suits (
+  suit_id text primary key,
+  project_id text,
+  status text not null default 'DRAFT',
+  canonical_version integer not null default 1,
+  latest_manifest_id text,
+  created_at text not null,
+  updated_at text not null
+);
+
+create table if not exists suit_versions (
+  suit_id text not null references suits(suit_id),
+  version integer not null,
+  suitspec_schema_version text not null,
+  suitspec_json text not null,
+  suitspec_gcs_uri text,
+  manifest_id text,
+  manifest_gcs_uri text,
+  created_by text,
+  created_at text not null,
+  primary key (suit_id, version)
+);
+
+create table if not exists transform_sessions (
+  session_id text primary key,
+  suit_id text references suits(suit_id),
+  manifest_id text not null,
+  operator_id text,
+  device_id text,
+  tracking_source text,
+  state text not null,
+  started_at text not null,
+  completed_at text,
+  session_json text not null,
+  replay_script_gcs_uri text,
+  created_at text not null,
+  updated_at text not null
+);
+
+create table if not exists transform_events (
+  event_id text not null,
+  session_id text not null references transform_sessions(session_id) on delete cascade,
+  sequence integer not null,
+  event_type text not null,
+  occurred_at text not null,
+  actor_json text,
+  state_before text,
+  state_after text,
+  payload_json text not null default '{}',
+  idempotency_key text,
+  created_at text not null default current_timestamp,
+  primary key (session_id, event_id),
+  unique (session_id, sequence),
+  unique (session_id, idempotency_key)
+);
+
+-- Local additions: every manifest ever attached (suit_versions keeps only the
+-- latest per version), the listing summaries served by /v1/trials and
+-- /v1/replays, and the revision counter behind their ETags.
+create table if not exists suit_manifests (
+  manifest_id text primary key,
+  suit_id text not null references suits(suit_id),
+  version integer not null,
+  manifest_uri text not null,
+  updated_at text not null
+);
+
+create table if not exists trial_summaries (
+  session_id text primary key,
+  suit_id text,
+  state text,
+  updated_at text not null,
+  summary_json text not null
+);
+
+create table if not exists replay_summaries (
+  session_id text primary key,
+  suit_id text,
+  state text,
+  updated_at text not null,
+  summary_json text not null
+);
+
+create table if not exists store_revisions (
+  name text primary key,
+  revision integer not null
+);
+
+create index if not exists idx_suit_versions_manifest_id on suit_versions(manifest_id);
+create index if not exists idx_transform_sessions_suit_id on transform_sessions(suit_id);
+create index if not exists idx_transform_events_session_sequence on transform_events(session_id, sequence);
+create index if not exists idx_trial_summaries_updated on trial_summaries(updated_at desc, session_id desc);
+create index if not exists idx_replay_summaries_updated on replay_summaries(updated_at desc, session_id desc);
+create index if not exists idx_trial_summaries_suit on trial_summaries(suit_id, updated_at desc, session_id desc);
+create index if not exists idx_trial_summaries_state on trial_summaries(state, updated_at desc, session_id desc);
+create index if not exists idx_replay_summaries_suit on replay_summaries(suit_id, updated_at desc, session_id desc);
+"""
+
+
+class SqliteConnectionPool:
+    """A small LIFO pool of WAL-mode connections shared by every API instance."""
+
+    def __init__(self, path: Path, *, size: int = 8, timeout: float = 30.0) -> None:
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue(maxsize=size)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode: writes open explicit transactions. The statement
+        # cache keeps the store's fixed SQL prepared per connection.
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=256,
+        )
+        conn.execute("pragma journal_mode=wal")
+        conn.execute("pragma synchronous=normal")
+        conn.execute("pragma foreign_keys=on")
+        conn.execute(f"pragma busy_timeout={int(self.timeout * 1000)}")
+        # Idempotent DDL; runs once per pooled connection, not per request.
+        conn.executescript(SQLITE_SCHEMA)
+        _rekey_transform_events(conn)
+        return conn
+
+
+def _rekey_transform_events(conn: sqlite3.Connection) -> None:
+    """Rebuild a transform_events table still keyed by event_id alone.
+
+    Event ids are unique per trial, as in LocalJsonStore; databases created
+    before the key became ``(session_id, event_id)`` are copied over once.
+    """
+
+    row = conn.execute("select sql from sqlite_master where type = 'table' and name = 'transform_events'").fetchone()
+    if row is None or "event_id text primary key" not in row[0]:
+        return
+    create = SQLITE_SCHEMA[SQLITE_SCHEMA.index("create table if not exists transform_events") :]
+    create = create[: create.index(");") + 2].replace("transform_events", "transform_events_rekeyed", 1)
+    conn.execute("begin immediate")
+    try:
+        # Re-check under the write lock: another pooled connection may have won.
+        row = conn.execute("select sql from sqlite_master where type = 'table' and name = 'transform_events'").fetchone()
+        if "event_id text primary key" in row[0]:
+            conn.execute(create)
+            conn.execute(
+                f"insert into transform_events_rekeyed ({_EVENT_COLUMNS}, created_at) "
+                f"select {_EVENT_COLUMNS}, created_at from transform_events"
+            )
+            conn.execute("drop table transform_events")
+            conn.execute("alter table transform_events_rekeyed rename to transform_events")
+            conn.execute(
+                "create index if not exists idx_transform_events_session_sequence "
+                "on transform_events(session_id, sequence)"
+            )
+        conn.execute("commit")
+    except BaseException:
+        conn.execute("rollback")
+        raise
+
+
+_POOLS_LOCK = threading.Lock()
+_POOLS: dict[Path, SqliteConnectionPool] = {}
+
+
+def sqlite_pool(path: Path) -> SqliteConnectionPool:
+    """Return the process-wide pool for a database file."""
+
+    key = path.resolve()
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = _POOLS[key] = SqliteConnectionPool(key)
+        return pool
+
+
+class SqliteStore(NewRouteStore):
+    """Cloud SQL-shaped tables in a local SQLite database.
+
+    Statements are written with ``?`` placeholders and translated by ``_sql``;
+    a Postgres subclass only needs a pool of DB-API connections, ``paramstyle =
+    "format"`` and ``begin_write = "begin"``.
+    """
+
+    backend = "sqlite"
+    append_only = True
+    paramstyle = "qmark"
+    begin_write = "begin immediate"
+
+    def __init__(self, repo_root: Path, suit_store_root: Path, *, db_path: Path | None = None) -> None:
+        super().__init__(repo_root, suit_store_root)
+        self.db_path = (db_path or self.suit_store_root.parent / DEFAULT_SQLITE_FILENAME).resolve()
+        self.pool = sqlite_pool(self.db_path)
+
+    # Suits -----------------------------------------------------------------
+
+    def read_suit(self, suit_id: str) -> dict[str, Any] | None:
+        with self._connection() as conn:
+            row = self._fetchone(
+                conn,
+                "select s.status, s.latest_manifest_id, s.canonical_version, s.created_at, s.updated_at, "
+                "v.suitspec_schema_version, m.manifest_uri "
+                "from suits s "
+                "join suit_versions v on v.suit_id = s.suit_id and v.version = s.canonical_version "
+                "left join suit_manifests m on m.manifest_id = s.latest_manifest_id "
+                "where s.suit_id = ?",
+                (suit_id,),
+            )
+        if row is None:
+            return None
+        status, manifest_id, version, created_at, updated_at, schema_version, manifest_uri = row
+        artifacts = {"suitspec_path": self._locator("suit_versions", suit_id, str(version))}
+        if manifest_uri:
+            artifacts["manifest_path"] = manifest_uri
+        return {
+            "schema_version": "0.1",
+            "suit_id": suit_id,
+            "version": int(version),
+            "suitspec_schema_version": schema_version,
+            "status": status,
+            "manifest_id": manifest_id,
+            "artifacts": artifacts,
+            "metadata": {"created_at": created_at, "updated_at": updated_at},
+        }
+
+    def read_suitspec(self, suit_id: str) -> dict[str, Any] | None:
+        with self._connection() as conn:
+            row = self._fetchone(
+                conn,
+                "select v.suitspec_json from suits s "
+                "join suit_versions v on v.suit_id = s.suit_id and v.version = s.canonical_version "
+                "where s.suit_id = ?",
+                (suit_id,),
+            )
+        return json.loads(row[0]) if row else None
+
+    def save_suitspec(self, suit_id: str, suitspec: dict[str, Any]) -> str:
+        metadata = suitspec.get("metadata") if isinstance(suitspec.get("metadata"), dict) else {}
+        now = str(metadata.get("updated_at") or "")
+        with self._transaction() as conn:
+            self._execute(
+                conn,
+                "insert into suits (suit_id, status, canonical_version, created_at, updated_at) "
+                "values (?, 'DRAFT', 1, ?, ?) on conflict (suit_id) do nothing",
+                (suit_id, now, now),
+            )
+            row = self._fetchone(
+                conn, "select coalesce(max(version), 0) + 1 from suit_versions where suit_id = ?", (suit_id,)
+            )
+            version = int(row[0])
+            self._execute(
+                conn,
+                "insert into suit_versions (suit_id, version, suitspec_schema_version, suitspec_json, created_at) "
+                "values (?, ?, ?, ?, ?)",
+                (suit_id, version, str(suitspec.get("schema_version") or ""), _dumps(suitspec), now),
+            )
+            self._execute(
+                conn,
+                "update suits set canonical_version = ?, updated_at = ? where suit_id = ?",
+                (version, now, suit_id),
+            )
+        return self._locator("suit_versions", suit_id, str(version))
+
+    def save_suit(self, suit: dict[str, Any]) -> None:
+        metadata = suit.get("metadata") if isinstance(suit.get("metadata"), dict) else {}
+        updated_at = str(metadata.get("updated_at") or "")
+        with self._transaction() as conn:
+            self._execute(
+                conn,
+                "insert into suits (suit_id, status, latest_manifest_id, created_at, updated_at) "
+                "values (?, ?, ?, ?, ?) "
+                "on conflict (suit_id) do update set status = excluded.status, "
+                "latest_manifest_id = excluded.latest_manifest_id, updated_at = excluded.updated_at",
+                (
+                    suit["suit_id"],
+                    suit.get("status") or "DRAFT",
+                    suit.get("manifest_id"),
+                    str(metadata.get("created_at") or updated_at),
+                    updated_at,
+                ),
+            )
+
+    def save_manifest(self, suit_id: str, manifest: dict[str, Any]) -> str:
+        locator = super().save_manifest(suit_id, manifest)
+        manifest_id = str(manifest["manifest_id"])
+        updated_at = _manifest_updated_at(manifest) or ""
+        with self._transaction() as conn:
+            row = self._fetchone(conn, "select canonical_version from suits where suit_id = ?", (suit_id,))
+            version = int(row[0]) if row else 1
+            self._execute(
+                conn,
+                "insert into suit_manifests (manifest_id, suit_id, version, manifest_uri, updated_at) "
+                "values (?, ?, ?, ?, ?) "
+                "on conflict (manifest_id) do update set suit_id = excluded.suit_id, version = excluded.version, "
+                "manifest_uri = excluded.manifest_uri, updated_at = excluded.updated_at",
+                (manifest_id, suit_id, version, locator, updated_at),
+            )
+            self._execute(
+                conn,
+                "update suit_versions set manifest_id = ?, manifest_gcs_uri = ? where suit_id = ? and version = ?",
+                (manifest_id, locator, suit_id, version),
+            )
+        return locator
+
+    def find_manifest(self, manifest_id: str) -> dict[str, Any] | None:
+        with self._connection() as conn:
+            row = self._fetchone(conn, "select manifest_uri from suit_manifests where manifest_id = ?", (manifest_id,))
+        if row is None:
+            return None
+        return read_json_file(self.repo_root / row[0])
+
+    def manifest_index_entries(self) -> dict[str, dict[str, Any]]:
+        with self._connection() as conn:
+            rows = self._fetchall(
+                conn, "select manifest_id, suit_id, version, manifest_uri, updated_at from suit_manifests", ()
+            )
+        return {
+            manifest_id: {"suit_id": suit_id, "path": uri, "version": int(version), "updated_at": updated_at}
+            for manifest_id, suit_id, version, uri, updated_at in rows
+        }
+
+    def rebuild_manifest_index(self) -> dict[str, Any]:
+        on_disk, unreadable = self.scan_manifest_artifacts()
+        skipped: list[str] = []
+        with self._transaction() as conn:
+            versions = dict(self._fetchall(conn, "select suit_id, canonical_version from suits", ()))
+            self._execute(conn, "delete from suit_manifests", ())
+            for manifest_id, found in on_disk.items():
+                if found["suit_id"] not in versions:
+                    # suit_manifests rows must reference a stored suit.
+                    skipped.append(manifest_id)
+                    continue
+                self._execute(
+                    conn,
+                    "insert into suit_manifests (manifest_id, suit_id, version, manifest_uri, updated_at) "
+                    "values (?, ?, ?, ?, ?)",
+                    (manifest_id, found["suit_id"], versions[found["suit_id"]], found["path"], found["updated_at"] or ""),
+                )
+        return {
+            "ok": True,
+            "backend": self.backend,
+            "index_path": self._locator("suit_manifests"),
+            "revision": None,
+            "manifest_count": len(on_disk) - len(skipped),
+            "skipped": skipped,
+            "unreadable": unreadable,
+        }
+
+    # Trials ----------------------------------------------------------------
+
+    def trial_exists(self, session_id: str) -> bool:
+        with self._connection() as conn:
+            return self._fetchone(conn, "select 1 from transform_sessions where session_id = ?", (session_id,)) is not None
+
+    def read_trial(self, session_id: str) -> dict[str, Any]:
+        with self._connection() as conn:
+            row = self._fetchone(conn, "select session_json from transform_sessions where session_id = ?", (session_id,))
+            if row is None:
+                raise FileNotFoundError(self._locator("transform_sessions", session_id))
+            session = json.loads(row[0])
+            rows = self._fetchall(
+                conn,
+                f"select {_EVENT_COLUMNS} from transform_events where session_id = ? order by sequence",
+                (session_id,),
+            )
+        session["events"] = [_event_from_row(item) for item in rows]
+        return session
+
+    def stream_trial(self, session_id: str) -> tuple[dict[str, Any], Iterator[dict[str, Any]]]:
+        with self._connection() as conn:
+            row = self._fetchone(conn, "select session_json from transform_sessions where session_id = ?", (session_id,))
+        if row is None:
+            raise FileNotFoundError(self._locator("transform_sessions", session_id))
+        return json.loads(row[0]), self._iter_events(session_id)
+
+    def _iter_events(self, session_id: str) -> Iterator[dict[str, Any]]:
+        # The pooled connection is held until the caller exhausts or closes the iterator.
+        with self._connection() as conn:
+            cursor = self._execute(
+                conn,
+                f"select {_EVENT_COLUMNS} from transform_events where session_id = ? order by sequence",
+                (session_id,),
+            )
+            while rows := cursor.fetchmany(_STREAM_FETCH_ROWS):
+                for row in rows:
+                    yield _event_from_row(row)
+
+    def iter_trials(self) -> Iterator[dict[str, Any]]:
+        with self._connection() as conn:
+            session_ids = [row[0] for row in self._fetchall(conn, "select session_id from transform_sessions", ())]
+        for session_id in session_ids:
+            yield self.read_trial(session_id)
+
+    def save_trial(self, session: dict[str, Any]) -> str:
+        session_id = str(session["session_id"])
+        events = session.get("events") if isinstance(session.get("events"), list) else []
+        shell = {key: value for key, value in session.items() if key != "events"}
+        with self._transaction() as conn:
+            self._upsert_session(conn, shell)
+            row = self._fetchone(
+                conn, "select coalesce(max(sequence), -1) from transform_events where session_id = ?", (session_id,)
+            )
+            stored = int(row[0])
+            self._insert_events(conn, [event for event in events if int(event.get("sequence", -1)) > stored])
+        return self.trial_locator(session_id)
+
+    def trial_locator(self, session_id: str) -> str:
+        return self._locator("transform_sessions", session_id)
+
+    def trial_head(self, session_id: str) -> SessionHead:
+        with self._connection() as conn:
+            return self._head(conn, session_id)
+
+    def find_event_by_idempotency_key(self, session_id: str, idempotency_key: str) -> dict[str, Any] | None:
+        with self._connection() as conn:
+            row = self._fetchone(
+                conn,
+                f"select {_EVENT_COLUMNS} from transform_events where session_id = ? and idempotency_key = ?",
+                (session_id, idempotency_key),
+            )
+        return _event_from_row(row) if row else None
+
+    def append_events(self, session_id: str, events: list[dict[str, Any]]) -> SessionHead:
+        with self._transaction() as conn:
+            head = self._head(conn, session_id)
+            if not events:
+                return head
+            for event in events:
+                head.apply(event)
+            try:
+                self._insert_events(conn, events)
+            except sqlite3.IntegrityError as exc:
+                raise ValueError(f"event conflicts with a stored event: {exc}") from exc
+            self._upsert_session(conn, head.shell)
+        return head
+
+    def events_locator(self, session_id: str) -> str:
+        return self._locator("transform_events", session_id)
+
+    def save_replay(self, session_id: str, replay: dict[str, Any]) -> Path:
+        path = super().save_replay(session_id, replay)
+        with self._transaction() as conn:
+            self._execute(
+                conn,
+                "update transform_sessions set replay_script_gcs_uri = ? where session_id = ?",
+                (self.relative_path(path), session_id),
+            )
+        return path
+
+    def lock_trial(self, session_id: str) -> Any:
+        return trial_lock((self.db_path, session_id))
+
+    # Summaries -------------------------------------------------------------
+
+    def has_summaries(self) -> bool:
+        # Summaries are written in the same database as the rows they describe.
+        return True
+
+    def summary_version(self) -> str | None:
+        with self._connection() as conn:
+            row = self._fetchone(conn, "select revision from store_revisions where name = 'summaries'", ())
+        return str(row[0]) if row else "0"
+
+    def trial_summaries(self) -> list[dict[str, Any]]:
+        return self._summaries("trial_summaries")
+
+    def replay_summaries(self) -> list[dict[str, Any]]:
+        return self._summaries("replay_summaries")
+
+    def query_trial_summaries(self, query: SummaryQuery) -> tuple[list[dict[str, Any]], bool]:
+        return self._query_summaries("trial_summaries", query)
+
+    def query_replay_summaries(self, query: SummaryQuery) -> tuple[list[dict[str, Any]], bool]:
+        return self._query_summaries("replay_summaries", query)
+
+    def upsert_trial_summary(self, summary: dict[str, Any]) -> None:
+        with self._transaction() as conn:
+            self._upsert_summary(conn, "trial_summaries", summary)
+            row = self._fetchone(
+                conn, "select summary_json from replay_summaries where session_id = ?", (summary.get("session_id"),)
+            )
+            if row is not None:
+                replay = json.loads(row[0])
+                for key in REPLAY_TRIAL_FIELDS:
+                    replay[key] = summary.get(key)
+                self._upsert_summary(conn, "replay_summaries", replay)
+
+    def upsert_replay_summary(self, summary: dict[str, Any]) -> None:
+        with self._transaction() as conn:
+            self._upsert_summary(conn, "replay_summaries", summary)
+
+    def replace_summaries(
+        self, trial_summaries: list[dict[str, Any]], replay_summaries: list[dict[str, Any]]
+    ) -> dict[str, Any]:
+        with self._transaction() as conn:
+            self._execute(conn, "delete from trial_summaries", ())
+            self._execute(conn, "delete from replay_summaries", ())
+            for summary in trial_summaries:
+                self._upsert_summary(conn, "trial_summaries", summary)
+            for summary in replay_summaries:
+                self._upsert_summary(conn, "replay_summaries", summary)
+        return {
+            "locator": self._locator("trial_summaries"),
+            "revision": None,
+            "trials": sorted(trial_summaries, key=summary_sort_key, reverse=True),
+            "replays": sorted(replay_summaries, key=summary_sort_key, reverse=True),
+        }
+
+    # SQL helpers -----------------------------------------------------------
+
+    def _sql(self, statement: str) -> str:
+        return statement.replace("?", "%s") if self.paramstyle == "format" else statement
+
+    def _execute(self, conn: Any, statement: str, params: tuple[Any, ...]) -> Any:
+        return conn.execute(self._sql(statement), params)
+
+    def _fetchone(self, conn: Any, statement: str, params: tuple[Any, ...]) -> tuple[Any, ...] | None:
+        return self._execute(conn, statement, params).fetchone()
+
+    def _fetchall(self, conn: Any, statement: str, params: tuple[Any, ...]) -> list[tuple[Any, ...]]:
+        return self._execute(conn, statement, params).fetchall()
+
+    def _connection(self) -> Any:
+        return self.pool.connection()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[Any]:
+        with self._connection() as conn:
+            conn.execute(self.begin_write)
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("rollback")
+                raise
+            conn.execute("commit")
+
+    def _locator(self, table: str, *keys: str) -> str:
+        suffix = "/".join((table, *keys))
+        return f"sqlite:{self.relative_path(self.db_path)}#{suffix}"
+
+    def _head(self, conn: Any, session_id: str) -> SessionHead:
+        row = self._fetchone(conn, "select session_json from transform_sessions where session_id = ?", (session_id,))
+        if row is None:
+            raise FileNotFoundError(self._locator("transform_sessions", session_id))
+        last = self._fetchone(
+            conn,
+            f"select {_EVENT_COLUMNS} from transform_events where session_id = ? order by sequence desc limit 1",
+            (session_id,),
+        )
+        last_event = _event_from_row(last) if last else None
+        return SessionHead(
+            shell=json.loads(row[0]),
+            event_count=int(last_event["sequence"]) + 1 if last_event else 0,
+            last_event=last_event,
+        )
+
+    def _upsert_session(self, conn: Any, shell: dict[str, Any]) -> None:
+        metadata = shell.get("metadata") if isinstance(shell.get("metadata"), dict) else {}
+        started_at = str(shell.get("started_at") or "")
+        self._execute(
+            conn,
+            "insert into transform_sessions (session_id, suit_id, manifest_id, operator_id, device_id, "
+            "tracking_source, state, started_at, completed_at, session_json, created_at, updated_at) "
+            "values (?, (select suit_id from suits where suit_id = ?), ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "on conflict (session_id) do update set state = excluded.state, "
+            "completed_at = excluded.completed_at, session_json = excluded.session_json, "
+            "updated_at = excluded.updated_at",
+            (
+                shell["session_id"],
+                # Trials against the bundled sample manifest have no suit row.
+                shell.get("suit_id") or None,
+                shell.get("manifest_id"),
+                shell.get("operator_id"),
+                shell.get("device_id"),
+                shell.get("tracking_source"),
+                shell.get("state"),
+                started_at,
+                shell.get("completed_at"),
+                _dumps(shell),
+                str(metadata.get("created_at") or started_at),
+                str(metadata.get("updated_at") or started_at),
+            ),
+        )
+
+    def _insert_events(self, conn: Any, events: list[dict[str, Any]]) -> None:
+        if not events:
+            return
+        conn.executemany(
+            self._sql(f"insert into transform_events ({_EVENT_COLUMNS}) values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"),
+            [
+                (
+                    event["event_id"],
+                    event["session_id"],
+                    int(event["sequence"]),
+                    event["event_type"],
+                    event["occurred_at"],
+                    _dumps(event["actor"]) if "actor" in event else None,
+                    event.get("state_before"),
+                    event.get("state_after"),
+                    _dumps(event.get("payload", {})),
+                    event.get("idempotency_key"),
+                )
+                for event in events
+            ],
+        )
+
+    def _summaries(self, table: str) -> list[dict[str, Any]]:
+        with self._connection() as conn:
+            rows = self._fetchall(
+                conn, f"select summary_json from {table} order by updated_at desc, session_id desc", ()
+            )
+        return [json.loads(row[0]) for row in rows]
+
+    def _query_summaries(self, table: str, query: SummaryQuery) -> tuple[list[dict[str, Any]], bool]:
+        clauses: list[str] = []
+        params: list[Any] = []
+        for column, value in (("suit_id", query.suit_id), ("state", query.state)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if query.since is not None:
+            clauses.append("updated_at >= ?")
+            params.append(query.since)
+        if query.until is not None:
+            clauses.append("updated_at < ?")
+            params.append(query.until)
+        if query.after is not None:
+            clauses.append("(updated_at < ? or (updated_at = ? and session_id < ?))")
+            params.extend((query.after[0], query.after[0], query.after[1]))
+        statement = f"select summary_json from {table}"
+        if clauses:
+            statement += " where " + " and ".join(clauses)
+        statement += " order by updated_at desc, session_id desc"
+        if query.limit is not None:
+            statement += " limit ?"
+            params.append(query.limit + 1)
+        with self._connection() as conn:
+            rows = self._fetchall(conn, statement, tuple(params))
+        page = [json.loads(row[0]) for row in rows]
+        if query.limit is not None and len(page) > query.limit:
+            return page[: query.limit], True
+        return page, False
+
+    def _upsert_summary(self, conn: Any, table: str, summary: dict[str, Any]) -> None:
+        self._execute(
+            conn,
+            "insert into store_revisions (name, revision) values ('summaries', 1) "
+            "on conflict (name) do update set revision = store_revisions.revision + 1",
+            (),
+        )
+        self._execute(
+            conn,
+            f"insert into {table} (session_id, suit_id, state, updated_at, summary_json) values (?, ?, ?, ?, ?) "
+            "on conflict (session_id) do update set suit_id = excluded.suit_id, state = excluded.state, "
+            "updated_at = excluded.updated_at, summary_json = excluded.summary_json",
+            (
+                summary.get("session_id"),
+                summary.get("suit_id"),
+                summary.get("state"),
+                str(summary.get("updated_at") or ""),
+                _dumps(summary),
+            ),
+        )
+
+
+def create_store(
+    repo_root: Path,
+    suit_store_root: Path,
+    *,
+    backend: str | None = None,
+    trial_storage: str = "document",
+    compact_every: int = DEFAULT_COMPACT_EVERY,
+    sqlite_path: Path | None = None,
+) -> NewRouteStore:
+    """Build the store selected by ``backend`` or ``NEW_ROUTE_STORE_BACKEND``."""
+
+    backend = backend or os.getenv("NEW_ROUTE_STORE_BACKEND") or "local-json"
+    if backend == "local-json":
+        return LocalJsonStore(
+            repo_root, suit_store_root, event_log=trial_storage == "event-log", compact_every=compact_every
+        )
+    if backend == "sqlite":
+        env_path = os.getenv("NEW_ROUTE_SQLITE_PATH")
+        return SqliteStore(repo_root, suit_store_root, db_path=sqlite_path or (Path(env_path) if env_path else None))
+    raise ValueError(f"storage backend must be one of {list(STORE_BACKENDS)}")
+
+
+def read_json_file(path: Path) -> dict[str, Any] | None:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+
+def write_json_file(path: Path, payload: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    text = json.dumps(payload, ensure_ascii=False, indent=2) + "\n"
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    tmp_path.replace(path)
+
+
+def _manifest_updated_at(manifest: dict[str, Any]) -> str | None:
+    metadata = manifest.get("metadata") if isinstance(manifest.get("metadata"), dict) else {}
+    value = metadata.get("updated_at") or metadata.get("created_at")
+    return str(value) if value else None
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _event_from_row(row: tuple[Any, ...]) -> dict[str, Any]:
+    event_id, session_id, sequence, event_type, occurred_at, actor, state_before, state_after, payload, key = row
+    event: dict[str, Any] = {
+        "event_id": event_id,
+        "session_id": session_id,
+        "sequence": int(sequence),
+        "event_type": event_type,
+        "occurred_at": occurred_at,
+    }
+    if actor is not None:
+        event["actor"] = json.loads(actor)
+    if state_before is not None:
+        event["state_before"] = state_before
+    if state_after is not None:
+        event["state_after"] = state_after
+    event["payload"] = json.loads(payload)
+    if key is not None:
+        event["idempotency_key"] = key
+    return event
@@ -0,0 +1,57 @@
+"""Part catalog service.
+
+The seed PartCatalog is read, schema-validated and indexed once per file
+version (mtime and size). Catalog GETs and manifest projections share the
+loaded copy instead of parsing the file on every request.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from .manifest import catalog_lookup
+from .validators import load_json, validate_against_schema
+
+
+@dataclass(frozen=True)
+class LoadedPartCatalog:
+    """A validated catalog and its lookup index. Treat ``catalog`` as read-only."""
+
+    path: Path
+    version: str
+    catalog: dict[str, Any]
+    lookup: dict[str, str]
+
+
+_CATALOG_LOCK = threading.Lock()
+_CATALOGS: dict[Path, tuple[tuple[int, int], LoadedPartCatalog]] = {}
+
+
+def load_part_catalog(path: Path) -> LoadedPartCatalog:
+    """Return the validated catalog at ``path``, reloading only when the file changes.
+
+    Raises ValueError when the catalog does not match the PartCatalog schema;
+    invalid versions are not cached.
+    """
+
+    resolved = path.resolve()
+    stat = resolved.stat()
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _CATALOG_LOCK:
+        cached = _CATALOGS.get(resolved)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    catalog = load_json(resolved)
+    validate_against_schema(catalog, "partcatalog")
+    loaded = LoadedPartCatalog(
+        path=resolved,
+        version=f"{catalog.get('catalog_id')}:{stamp[0]:x}-{stamp[1]:x}",
+        catalog=catalog,
+        lookup=catalog_lookup(catalog),
+    )
+    with _CATALOG_LOCK:
+        _CATALOGS[resolved] = (stamp, loaded)
+    return loaded
@@ -0,0 +1,267 @@
+"""ReplayScript timeline compaction.
+
+The new-route API derives one 0.5s segment per TransformSession event. Long
+depositions emit hundreds of ``DEPOSITION_PROGRESS`` events, so
+``compact_timeline`` rewrites the per-event segments into fewer segments:
+
+- A run of consecutive progress segments becomes one ranged segment whose
+  ``deposition_progress`` action carries ``keyframes`` and an ``interpolation``
+  hint. Keyframes that linear interpolation reproduces within ``tolerance``
+  (in progress units) are dropped.
+- Consecutive state markers that repeat the same event without a state
+  transition or payload change collapse into one segment with ``event_count``.
+
+Every merged segment keeps all of its ``source_event_ids`` and takes the
+segment id of its first event, so compacting a prefix and re-compacting only
+its last segment with later events gives the same timeline as compacting the
+whole event list.
+
+``ReplayIndex`` answers "what is happening at time t" over a stored timeline
+for the replay sampling endpoint.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from bisect import bisect_right
+from pathlib import Path
+from typing import Any
+
+DEFAULT_REPLAY_TOLERANCE = 0.01
+SEGMENT_DURATION_SEC = 0.5
+
+
+def compact_timeline(segments: list[dict[str, Any]], *, tolerance: float = DEFAULT_REPLAY_TOLERANCE) -> list[dict[str, Any]]:
+    """Merge progress runs and repeated state markers in per-event (uncompacted) segments."""
+
+    compacted: list[dict[str, Any]] = []
+    run: list[dict[str, Any]] = []
+    run_kind: tuple[Any, ...] | None = None
+    for segment in segments:
+        kind = _merge_kind(segment)
+        if run and kind is not None and kind == run_kind:
+            run.append(segment)
+            continue
+        if run:
+            compacted.append(_merge_run(run, run_kind, tolerance))
+        run, run_kind = [segment], kind
+    if run:
+        compacted.append(_merge_run(run, run_kind, tolerance))
+    return compacted
+
+
+def _single_action(segment: dict[str, Any]) -> dict[str, Any] | None:
+    actions = segment.get("actions")
+    if not isinstance(actions, list) or len(actions) != 1 or not isinstance(actions[0], dict):
+        return None
+    return actions[0]
+
+
+def _merge_kind(segment: dict[str, Any]) -> tuple[Any, ...] | None:
+    """Segments with equal, non-None kinds may be merged into one."""
+
+    action = _single_action(segment)
+    if action is None:
+        return None
+    params = action.get("params") if isinstance(action.get("params"), dict) else {}
+    if action.get("action_type") == "deposition_progress":
+        return ("progress",)
+    if action.get("action_type") == "state_marker" and params.get("state_before") == params.get("state_after"):
+        return ("marker", params.get("event_type"), params.get("state_after"), _freeze(params.get("payload")))
+    return None
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _merge_run(run: list[dict[str, Any]], kind: tuple[Any, ...] | None, tolerance: float) -> dict[str, Any]:
+    if len(run) == 1 or kind is None:
+        return run[0]
+    first, last = run[0], run[-1]
+    start = float(first["start_time_sec"])
+    end = max(float(segment["start_time_sec"]) + float(segment["duration_sec"]) for segment in run)
+    first_params = _single_action(first)["params"]  # type: ignore[index]
+    last_params = _single_action(last)["params"]  # type: ignore[index]
+    params: dict[str, Any] = {
+        "event_type": first_params.get("event_type"),
+        "state_before": first_params.get("state_before"),
+        "state_after": last_params.get("state_after"),
+        "payload": last_params.get("payload", {}),
+        "event_count": len(run),
+    }
+    if kind[0] == "progress":
+        params["keyframes"] = _simplify_keyframes(
+            [keyframe for segment in run for keyframe in _progress_keyframes(segment)],
+            tolerance,
+        )
+        params["interpolation"] = "linear"
+        action_type = "deposition_progress"
+    else:
+        params["until_sec"] = float(last["start_time_sec"])
+        action_type = "state_marker"
+    return {
+        "segment_id": first["segment_id"],
+        "start_time_sec": start,
+        "duration_sec": round(end - start, 3),
+        "source_event_ids": [event_id for segment in run for event_id in segment.get("source_event_ids", [])],
+        "actions": [{"action_type": action_type, "at_time_sec": start, "params": params}],
+    }
+
+
+def _progress_keyframes(segment: dict[str, Any]) -> list[dict[str, Any]]:
+    params = _single_action(segment)["params"]  # type: ignore[index]
+    payload = params.get("payload") if isinstance(params.get("payload"), dict) else {}
+    progress = payload.get("progress")
+    if not isinstance(progress, (int, float)) or isinstance(progress, bool):
+        return []
+    return [{"t": float(segment["start_time_sec"]), "progress": float(progress)}]
+
+
+def _simplify_keyframes(keyframes: list[dict[str, Any]], tolerance: float) -> list[dict[str, Any]]:
+    """Drop keyframes that linear interpolation reproduces within ``tolerance`` (Ramer-Douglas-Peucker)."""
+
+    if len(keyframes) <= 2:
+        return keyframes
+    keep = [False] * len(keyframes)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(keyframes) - 1)]
+    while stack:
+        lo, hi = stack.pop()
+        worst_index, worst_error = -1, tolerance
+        for index in range(lo + 1, hi):
+            error = abs(keyframes[index]["progress"] - _interpolate(keyframes[lo], keyframes[hi], keyframes[index]["t"]))
+            if error > worst_error:
+                worst_index, worst_error = index, error
+        if worst_index >= 0:
+            keep[worst_index] = True
+            stack.extend(((lo, worst_index), (worst_index, hi)))
+    return [keyframe for keyframe, kept in zip(keyframes, keep) if kept]
+
+
+def _interpolate(left: dict[str, Any], right: dict[str, Any], t: float) -> float:
+    span = right["t"] - left["t"]
+    if span <= 0:
+        return float(left["progress"])
+    return left["progress"] + (right["progress"] - left["progress"]) * (t - left["t"]) / span
+
+
+class ReplayIndex:
+    """Time lookups over a ReplayScript timeline without scanning it.
+
+    Segments are sorted by start time. Each position also records the state
+    after every segment up to it, the latest end time up to it and the latest
+    progress segment up to it, so ``sample(t)`` is a binary search plus the
+    segments that are active at ``t``.
+    """
+
+    def __init__(self, replay: dict[str, Any]) -> None:
+        self.replay_id = replay.get("replay_id")
+        self.duration_sec = float(replay.get("duration_sec") or 0)
+        self.source_event_count = len((replay.get("source_events") or {}).get("event_ids") or [])
+        order = sorted(range(len(replay["timeline"])), key=lambda index: float(replay["timeline"][index]["start_time_sec"]))
+        self.segments = [replay["timeline"][index] for index in order]
+        self.starts = [float(segment["start_time_sec"]) for segment in self.segments]
+        self.states: list[str | None] = []
+        self.max_ends: list[float] = []
+        self.progress_positions: list[int] = []
+        state: str | None = None
+        max_end = 0.0
+        progress_position = -1
+        for position, segment in enumerate(self.segments):
+            action = _single_action(segment) or {}
+            params = action.get("params") if isinstance(action.get("params"), dict) else {}
+            state = params.get("state_after") or state
+            max_end = max(max_end, self.starts[position] + float(segment["duration_sec"]))
+            if action.get("action_type") == "deposition_progress" and _segment_keyframes(segment):
+                progress_position = position
+            self.states.append(state)
+            self.max_ends.append(max_end)
+            self.progress_positions.append(progress_position)
+
+    def sample(self, t: float) -> dict[str, Any]:
+        position = bisect_right(self.starts, t) - 1
+        active = []
+        # Walk back only while an earlier segment can still cover t.
+        cursor = position
+        while cursor >= 0 and self.max_ends[cursor] > t:
+            segment = self.segments[cursor]
+            if self.starts[cursor] + float(segment["duration_sec"]) > t:
+                active.append(self._active_segment(segment, t))
+            cursor -= 1
+        active.reverse()
+        progress = None
+        if position >= 0 and self.progress_positions[position] >= 0:
+            progress = _progress_at(_segment_keyframes(self.segments[self.progress_positions[position]]), t)
+        return {
+            "t": t,
+            "state": self.states[position] if position >= 0 else None,
+            "deposition_progress": progress,
+            "active": active,
+        }
+
+    def _active_segment(self, segment: dict[str, Any], t: float) -> dict[str, Any]:
+        active = {
+            "segment_id": segment["segment_id"],
+            "start_time_sec": segment["start_time_sec"],
+            "duration_sec": segment["duration_sec"],
+            "source_event_ids": segment.get("source_event_ids", []),
+            "actions": segment.get("actions", []),
+        }
+        keyframes = _segment_keyframes(segment)
+        if keyframes:
+            active["progress"] = _progress_at(keyframes, t)
+        return active
+
+
+def _segment_keyframes(segment: dict[str, Any]) -> list[dict[str, Any]]:
+    action = _single_action(segment)
+    if action is None or action.get("action_type") != "deposition_progress":
+        return []
+    params = action.get("params") if isinstance(action.get("params"), dict) else {}
+    keyframes = params.get("keyframes")
+    if isinstance(keyframes, list):
+        return keyframes
+    return _progress_keyframes(segment)
+
+
+def _progress_at(keyframes: list[dict[str, Any]], t: float) -> float:
+    """Linear interpolation between keyframes, held at the ends."""
+
+    position = bisect_right(keyframes, t, key=lambda keyframe: keyframe["t"])
+    if position == 0:
+        return float(keyframes[0]["progress"])
+    if position == len(keyframes):
+        return float(keyframes[-1]["progress"])
+    return round(_interpolate(keyframes[position - 1], keyframes[position], t), 6)
+
+
+_INDEX_LOCK = threading.Lock()
+_INDEX_CACHE: dict[Path, tuple[tuple[int, int], ReplayIndex]] = {}
+
+
+def load_replay_index(path: Path) -> ReplayIndex | None:
+    """Return the index for a stored replay script, rebuilt only when the file changes."""
+
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _INDEX_LOCK:
+        cached = _INDEX_CACHE.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    try:
+        replay = json.loads(path.read_text(encoding="utf-8"))
+        index = ReplayIndex(replay)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    with _INDEX_LOCK:
+        _INDEX_CACHE[path] = (stamp, index)
+    return index
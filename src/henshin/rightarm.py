@@ -7,7 +7,7 @@ from __future__ import annotations
 
 import math
 from dataclasses import dataclass
-from typing import Iterable
+from typing import Iterable, Iterator
 
 
 def clamp(value: float, low: float, high: float) -> float:
@@ -154,73 +154,107 @@ class RightArmFrame:
     right_wrist_xy01: tuple[float, float]
 
 
-def run_rightarm_sequence(
-    frames: Iterable[RightArmFrame],
-    *,
-    mirror: bool = True,
-    cover_scale: CoverScale | None = None,
-    dock_center: Vec2 | None = None,
-    dock_radius: float = 0.18,
-    hold_to_equip_sec: float = 0.7,
-) -> dict:
-    scale = cover_scale or CoverScale(1.0, 1.0)
-    center = dock_center or Vec2(0.55, -0.25)
-    dock = DockCharger(center=center, radius=dock_radius, hold_to_equip_sec=hold_to_equip_sec)
-    follower = ArmFollower()
-    follower.set_dock_pose(center)
-
-    equipped = False
-    equip_frame = -1
-    output_frames = []
+class RightArmSequenceStream:
+    """Right-arm simulation that yields one frame at a time (see ``bodyfit.BodySequenceStream``)."""
 
-    for index, frame in enumerate(frames):
+    def __init__(
+        self,
+        frames: Iterable[RightArmFrame],
+        *,
+        mirror: bool = True,
+        cover_scale: CoverScale | None = None,
+        dock_center: Vec2 | None = None,
+        dock_radius: float = 0.18,
+        hold_to_equip_sec: float = 0.7,
+    ) -> None:
+        self._frames = frames
+        self.mirror = mirror
+        self.cover_scale = cover_scale or CoverScale(1.0, 1.0)
+        self.dock_center = dock_center or Vec2(0.55, -0.25)
+        self.dock = DockCharger(center=self.dock_center, radius=dock_radius, hold_to_equip_sec=hold_to_equip_sec)
+        self.follower = ArmFollower()
+        self.follower.set_dock_pose(self.dock_center)
+        self.equipped = False
+        self.equip_frame = -1
+        self.frame_count = 0
+
+    def summary(self) -> dict:
+        return {"equipped": self.equipped, "equip_frame": self.equip_frame}
+
+    def __iter__(self) -> Iterator[dict]:
+        for index, frame in enumerate(self._frames):
+            yield self._step(index, frame)
+
+    def records(self) -> Iterator[dict]:
+        yield {"type": "header"}
+        for frame in self:
+            if frame["index"] == self.equip_frame:
+                yield {"type": "equip", "index": self.equip_frame, "dt_sec": frame["dt_sec"]}
+            yield {"type": "frame", "frame": frame}
+        yield {"type": "end", "frame_count": self.frame_count, "equipped": self.equipped, "equip_frame": self.equip_frame}
+
+    def _step(self, index: int, frame: RightArmFrame) -> dict:
         elbow = norm_to_world(
             frame.right_elbow_xy01[0],
             frame.right_elbow_xy01[1],
-            mirror=mirror,
-            cover_scale=scale,
+            mirror=self.mirror,
+            cover_scale=self.cover_scale,
         )
         wrist = norm_to_world(
             frame.right_wrist_xy01[0],
             frame.right_wrist_xy01[1],
-            mirror=mirror,
-            cover_scale=scale,
+            mirror=self.mirror,
+            cover_scale=self.cover_scale,
         )
 
-        equip_now = dock.tick(dt_sec=frame.dt_sec, wrist=wrist, already_equipped=equipped)
-        if equip_now and not equipped:
-            equipped = True
-            equip_frame = index
+        equip_now = self.dock.tick(dt_sec=frame.dt_sec, wrist=wrist, already_equipped=self.equipped)
+        if equip_now and not self.equipped:
+            self.equipped = True
+            self.equip_frame = index
 
-        if equipped:
-            follower.follow_forearm(elbow=elbow, wrist=wrist, dt_sec=frame.dt_sec)
+        if self.equipped:
+            self.follower.follow_forearm(elbow=elbow, wrist=wrist, dt_sec=frame.dt_sec)
         else:
-            follower.set_dock_pose(center)
-
-        t = follower.transform
-        output_frames.append(
-            {
-                "index": index,
-                "dt_sec": frame.dt_sec,
-                "equipped": equipped,
-                "hold_sec": round(dock.hold_sec, 4),
-                "transform": {
-                    "position_x": t.position_x,
-                    "position_y": t.position_y,
-                    "position_z": t.position_z,
-                    "rotation_z": t.rotation_z,
-                    "scale_x": t.scale_x,
-                    "scale_y": t.scale_y,
-                    "scale_z": t.scale_z,
-                },
-            }
-        )
+            self.follower.set_dock_pose(self.dock_center)
+
+        t = self.follower.transform
+        self.frame_count = index + 1
+        return {
+            "index": index,
+            "dt_sec": frame.dt_sec,
+            "equipped": self.equipped,
+            "hold_sec": round(self.dock.hold_sec, 4),
+            "transform": {
+                "position_x": t.position_x,
+                "position_y": t.position_y,
+                "position_z": t.position_z,
+                "rotation_z": t.rotation_z,
+                "scale_x": t.scale_x,
+                "scale_y": t.scale_y,
+                "scale_z": t.scale_z,
+            },
+        }
+
 
-    return {
-        "equipped": equipped,
-        "equip_frame": equip_frame,
-        "frames": output_frames,
-    }
+def run_rightarm_sequence(
+    frames: Iterable[RightArmFrame],
+    *,
+    mirror: bool = True,
+    cover_scale: CoverScale | None = None,
+    dock_center: Vec2 | None = None,
+    dock_radius: float = 0.18,
+    hold_to_equip_sec: float = 0.7,
+) -> dict:
+    stream = RightArmSequenceStream(
+        frames,
+        mirror=mirror,
+        cover_scale=cover_scale,
+        dock_center=dock_center,
+        dock_radius=dock_radius,
+        hold_to_equip_sec=hold_to_equip_sec,
+    )
+    output_frames = list(stream)
+    return {**stream.summary(), "frames": output_frames}
 
 
 def _lerp(a: float, b: float, t: float) -> float:
@@ -14,10 +14,9 @@ import uuid
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
-from urllib.error import HTTPError, URLError
-from urllib.request import Request, urlopen
 
 from .gemini_image import _load_dotenv
+from .http_transport import TransportError, default_transport
 
 
 DEFAULT_BASE_URL = "https://api.ai.sakura.ad.jp/v1"
@@ -191,17 +190,15 @@ class SakuraAIEngineClient:
             fields={"model": self.config.whisper_model},
             files={"file": path},
         )
-        request = Request(
-            url=f"{self.config.base_url}/audio/transcriptions",
-            data=body,
+        parsed = self._json_request(
+            f"{self.config.base_url}/audio/transcriptions",
+            body=body,
             headers={
                 "Accept": "application/json",
                 "Authorization": f"Bearer {token}",
                 "Content-Type": f"multipart/form-data; boundary={boundary}",
             },
-            method="POST",
         )
-        parsed = self._json_request(request)
         text = str(parsed.get("text") or "")
         model = str(parsed.get("model") or self.config.whisper_model)
         return TranscriptionResult(text=text, model=model, raw=parsed)
@@ -214,17 +211,15 @@ class SakuraAIEngineClient:
             "voice": self.config.tts_voice,
             "response_format": self.config.tts_format,
         }
-        request = Request(
-            url=f"{self.config.base_url}/audio/speech",
-            data=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+        audio_bytes = self._bytes_request(
+            f"{self.config.base_url}/audio/speech",
+            body=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
             headers={
                 "Accept": f"audio/{self.config.tts_format}",
                 "Authorization": f"Bearer {token}",
                 "Content-Type": "application/json",
             },
-            method="POST",
         )
-        audio_bytes = self._bytes_request(request)
         return SpeechResult(
             audio_bytes=audio_bytes,
             model=self.config.tts_model,
@@ -233,22 +228,29 @@ class SakuraAIEngineClient:
             input_text=input_text,
         )
 
-    def _json_request(self, request: Request) -> dict[str, Any]:
-        body = self._bytes_request(request)
+    def _json_request(self, url: str, *, body: bytes, headers: dict[str, str]) -> dict[str, Any]:
+        response_body = self._bytes_request(url, body=body, headers=headers)
         try:
-            return json.loads(body.decode("utf-8"))
+            return json.loads(response_body.decode("utf-8"))
         except json.JSONDecodeError as exc:
             raise SakuraAIEngineError("Sakura AI Engine returned invalid JSON.") from exc
 
-    def _bytes_request(self, request: Request) -> bytes:
+    def _bytes_request(self, url: str, *, body: bytes, headers: dict[str, str]) -> bytes:
         try:
-            with urlopen(request, timeout=self.config.timeout_seconds) as response:
-                return response.read()
-        except HTTPError as exc:
-            detail = exc.read().decode("utf-8", errors="replace")
-            raise SakuraAIEngineError(f"Sakura AI Engine HTTP error: status={exc.code} body={detail}") from exc
-        except URLError as exc:
+            with default_transport().stream(
+                "POST",
+                url,
+                headers=headers,
+                body=body,
+                timeout=self.config.timeout_seconds,
+            ) as response:
+                data = b"".join(response.iter_chunks())
+        except TransportError as exc:
             raise SakuraAIEngineError(f"Sakura AI Engine connection error: {exc}") from exc
+        if response.status >= 400:
+            detail = data.decode("utf-8", errors="replace")
+            raise SakuraAIEngineError(f"Sakura AI Engine HTTP error: status={response.status} body={detail}")
+        return data
 
 
 def save_speech(result: SpeechResult, output_path: str | Path) -> Path:
@@ -0,0 +1,288 @@
+"""Append-only event log storage for new-route TransformSessions.
+
+A trial directory holds two files:
+
+- ``transform-session.json``: the compacted snapshot, in the regular
+  TransformSession document format.
+- ``events.jsonl``: the append-only segment of events recorded after the
+  snapshot was last compacted, one JSON event per line.
+
+Readers fold the segment into the snapshot. Writers in event-log mode only
+append one line per event and compact the segment into the snapshot every
+``compact_every`` events, so an append no longer rewrites the whole session.
+
+Compaction replaces the snapshot first and then replaces the segment with an
+empty file. Readers do not take the trial lock. They read the snapshot, open
+the segment, and read both again if the snapshot was replaced in between. An
+open segment keeps its events after it is replaced, so a reader always sees a
+snapshot with the segment that was current when it was written.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Hashable, Iterator
+
+SNAPSHOT_FILENAME = "transform-session.json"
+SEGMENT_FILENAME = "events.jsonl"
+DEFAULT_COMPACT_EVERY = 64
+TERMINAL_STATES = frozenset({"ACTIVE", "ARCHIVED", "REFUSED"})
+
+_REGISTRY_LOCK = threading.Lock()
+_LOCKS: dict[Hashable, threading.RLock] = {}
+_HEADS: dict[Path, "SessionHead"] = {}
+
+
+@contextmanager
+def trial_lock(key: Hashable) -> Iterator[None]:
+    """Serialize read-modify-append cycles on one trial within this process."""
+
+    with _REGISTRY_LOCK:
+        lock = _LOCKS.setdefault(key, threading.RLock())
+    with lock:
+        yield
+
+
+def apply_session_event(session: dict[str, Any], event: dict[str, Any], *, append: bool = True) -> None:
+    """Fold one event into a TransformSession document (or its event-less shell)."""
+
+    if append:
+        session.setdefault("events", []).append(event)
+    state_after = str(event.get("state_after") or session.get("state"))
+    occurred_at = event.get("occurred_at")
+    session["state"] = state_after
+    if state_after in TERMINAL_STATES and occurred_at:
+        session["completed_at"] = occurred_at
+    if occurred_at:
+        session.setdefault("metadata", {})["updated_at"] = occurred_at
+
+
+@dataclass(slots=True)
+class SessionHead:
+    """What an append needs to know about a session without loading its events."""
+
+    shell: dict[str, Any]
+    event_count: int
+    last_event: dict[str, Any] | None
+    idempotency: dict[str, dict[str, Any]] = field(default_factory=dict)
+    tail_count: int = 0
+    snapshot_stamp: tuple[int, int] = (0, 0)
+    segment_offset: int = 0
+
+    def apply(self, event: dict[str, Any]) -> None:
+        apply_session_event(self.shell, event, append=False)
+        self.event_count += 1
+        self.tail_count += 1
+        self.last_event = event
+        key = event.get("idempotency_key")
+        if isinstance(key, str):
+            self.idempotency[key] = event
+
+
+def _stamp(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _identity(path: Path) -> tuple[int, int, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _parse_segment(data: bytes) -> tuple[list[dict[str, Any]], int]:
+    """Parse complete lines; a torn trailing line is left for the next read."""
+
+    end = data.rfind(b"\n") + 1
+    events: list[dict[str, Any]] = []
+    for line in data[:end].splitlines():
+        if not line.strip():
+            continue
+        event = json.loads(line.decode("utf-8"))
+        if isinstance(event, dict):
+            events.append(event)
+    return events, end
+
+
+class TransformEventLog:
+    def __init__(self, trial_dir: Path, *, compact_every: int = DEFAULT_COMPACT_EVERY) -> None:
+        self.trial_dir = trial_dir
+        self.snapshot_path = trial_dir / SNAPSHOT_FILENAME
+        self.segment_path = trial_dir / SEGMENT_FILENAME
+        self.compact_every = max(1, int(compact_every))
+
+    def exists(self) -> bool:
+        return self.snapshot_path.is_file()
+
+    def locked(self) -> Any:
+        return trial_lock(self.trial_dir.resolve())
+
+    def head(self) -> SessionHead:
+        """Return the cached head, reading only the bytes appended since the last call."""
+
+        key = self.trial_dir.resolve()
+        snapshot_stamp = _stamp(self.snapshot_path)
+        if snapshot_stamp is None:
+            raise FileNotFoundError(self.snapshot_path)
+        segment_size = (_stamp(self.segment_path) or (0, 0))[1]
+        with _REGISTRY_LOCK:
+            head = _HEADS.get(key)
+        if head is None or head.snapshot_stamp != snapshot_stamp or segment_size < head.segment_offset:
+            head = self._load_head(snapshot_stamp)
+        elif segment_size > head.segment_offset:
+            self._read_tail(head)
+        with _REGISTRY_LOCK:
+            _HEADS[key] = head
+        return head
+
+    def append(self, event: dict[str, Any]) -> SessionHead:
+        """Append one already-validated event. Callers hold ``locked()``."""
+
+        return self.append_many([event])
+
+    def append_many(self, events: list[dict[str, Any]]) -> SessionHead:
+        """Append already-validated events with a single write. Callers hold ``locked()``."""
+
+        head = self.head()
+        if not events:
+            return head
+        data = "".join(json.dumps(event, ensure_ascii=False) + "\n" for event in events).encode("utf-8")
+        with self.segment_path.open("ab") as fp:
+            fp.write(data)
+        head.segment_offset += len(data)
+        for event in events:
+            head.apply(event)
+        if head.tail_count >= self.compact_every:
+            self.compact()
+            head = self.head()
+        return head
+
+    def segment_events(self) -> list[dict[str, Any]]:
+        try:
+            data = self.segment_path.read_bytes()
+        except FileNotFoundError:
+            return []
+        return _parse_segment(data)[0]
+
+    def _open_consistent(self) -> tuple[dict[str, Any], BinaryIO | None]:
+        """Read the snapshot and open the segment that goes with it."""
+
+        while True:
+            identity = _identity(self.snapshot_path)
+            if identity is None:
+                raise FileNotFoundError(self.snapshot_path)
+            session = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+            try:
+                fp: BinaryIO | None = self.segment_path.open("rb")
+            except FileNotFoundError:
+                fp = None
+            if _identity(self.snapshot_path) == identity:
+                return session, fp
+            if fp is not None:
+                fp.close()
+
+    def iter_events(self) -> Iterator[dict[str, Any]]:
+        """Yield snapshot events, then segment events read line by line."""
+
+        session, fp = self._open_consistent()
+        if fp is None:
+            yield from session.get("events") or []
+            return
+        with fp:
+            events = session.get("events") or []
+            yield from events
+            count = len(events)
+            for line in fp:
+                if not line.endswith(b"\n"):
+                    break
+                if not line.strip():
+                    continue
+                event = json.loads(line.decode("utf-8"))
+                if isinstance(event, dict) and int(event.get("sequence", -1)) >= count:
+                    count += 1
+                    yield event
+
+    def materialize(self) -> dict[str, Any]:
+        """Return the full TransformSession document (snapshot plus segment)."""
+
+        session, fp = self._open_consistent()
+        events = session.setdefault("events", [])
+        if fp is None:
+            return session
+        with fp:
+            segment = _parse_segment(fp.read())[0]
+        for event in segment:
+            if int(event.get("sequence", -1)) >= len(events):
+                apply_session_event(session, event)
+        return session
+
+    def compact(self) -> dict[str, Any]:
+        """Fold the segment into the snapshot and truncate the segment."""
+
+        with self.locked():
+            session = self.materialize()
+            self.write_snapshot(session)
+        return session
+
+    def write_snapshot(self, session: dict[str, Any]) -> None:
+        """Replace the snapshot with a complete session and drop the folded segment."""
+
+        self.trial_dir.mkdir(parents=True, exist_ok=True)
+        text = json.dumps(session, ensure_ascii=False, indent=2) + "\n"
+        tmp_path = self.snapshot_path.with_suffix(self.snapshot_path.suffix + ".tmp")
+        tmp_path.write_text(text, encoding="utf-8")
+        tmp_path.replace(self.snapshot_path)
+        # A crash between these two steps is harmless: readers skip segment
+        # events whose sequence is already present in the snapshot. The segment
+        # is replaced, not truncated, so readers that already opened it keep
+        # its events.
+        if self.segment_path.exists():
+            tmp_segment = self.segment_path.with_suffix(self.segment_path.suffix + ".tmp")
+            tmp_segment.write_bytes(b"")
+            tmp_segment.replace(self.segment_path)
+        with _REGISTRY_LOCK:
+            _HEADS.pop(self.trial_dir.resolve(), None)
+
+    def _load_head(self, snapshot_stamp: tuple[int, int]) -> SessionHead:
+        session, fp = self._open_consistent()
+        events = session.pop("events", None) or []
+        head = SessionHead(
+            shell=session,
+            event_count=len(events),
+            last_event=events[-1] if events else None,
+            idempotency={
+                str(event["idempotency_key"]): event
+                for event in events
+                if isinstance(event, dict) and isinstance(event.get("idempotency_key"), str)
+            },
+            snapshot_stamp=snapshot_stamp,
+        )
+        if fp is not None:
+            with fp:
+                self._apply_tail(head, fp.read())
+        return head
+
+    def _read_tail(self, head: SessionHead) -> None:
+        try:
+            with self.segment_path.open("rb") as fp:
+                fp.seek(head.segment_offset)
+                data = fp.read()
+        except FileNotFoundError:
+            return
+        self._apply_tail(head, data)
+
+    def _apply_tail(self, head: SessionHead, data: bytes) -> None:
+        events, consumed = _parse_segment(data)
+        head.segment_offset += consumed
+        for event in events:
+            if int(event.get("sequence", -1)) >= head.event_count:
+                head.apply(event)
@@ -0,0 +1,49 @@
+"""Constant-memory writers for streamed simulations.
+
+``BodySequenceStream`` and ``RightArmSequenceStream`` yield frames one at a
+time; these writers put each frame on disk as soon as it is produced.
+``write_ndjson`` writes the stream's header/equip/frame/end records, one JSON
+object per line, and flushes on the equip record so live readers see the
+equip without waiting for the rest. ``write_sim_json`` writes the classic
+``body-sim.json`` document (summary plus ``frames``) incrementally, one frame
+per line.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Iterable, Iterator, Protocol, TextIO
+
+
+class SimulationStream(Protocol):
+    def __iter__(self) -> Iterator[dict[str, Any]]: ...
+
+    def summary(self) -> dict[str, Any]: ...
+
+
+def write_ndjson(fp: TextIO, records: Iterable[dict[str, Any]]) -> int:
+    """Write one JSON record per line and return the number of records."""
+
+    count = 0
+    for record in records:
+        fp.write(json.dumps(record, ensure_ascii=False) + "\n")
+        count += 1
+        if record.get("type") in ("equip", "end"):
+            fp.flush()
+    return count
+
+
+def write_sim_json(fp: TextIO, stream: SimulationStream) -> dict[str, Any]:
+    """Write ``{"frames": [...], **summary}`` without holding the frames; returns the summary."""
+
+    fp.write('{\n  "frames": [')
+    separator = "\n    "
+    for frame in stream:
+        fp.write(separator + json.dumps(frame, ensure_ascii=False))
+        separator = ",\n    "
+    fp.write("\n  ]" if separator != "\n    " else "]")
+    summary = stream.summary()
+    for key, value in summary.items():
+        fp.write(f",\n  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)}")
+    fp.write("\n}\n")
+    return summary
@@ -0,0 +1,353 @@
+"""Static file serving for the viewer, dashboard and fit-regression servers.
+
+``StaticFileHandler`` replaces the stock ``SimpleHTTPRequestHandler`` file path:
+
+- HTTP/1.1 keep-alive (every response carries a Content-Length).
+- Strong ETags from the file size and mtime, ``If-None-Match`` -> 304.
+- Single byte ``Range`` requests (206/416) with ``If-Range``.
+- ``os.sendfile`` for large bodies on plain sockets.
+- Precompressed ``<file>.br`` / ``<file>.gz`` sidecars, chosen from
+  ``Accept-Encoding``. Sidecars are built ahead of time by
+  ``precompress_static_tree`` (``henshin precompress-static``) and are only
+  served while their mtime matches the source file.
+"""
+
+from __future__ import annotations
+
+import email.utils
+import gzip
+import os
+import socket
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable
+
+# Brotli is optional; without it only .gz sidecars are built.
+try:  # pragma: no cover - depends on the environment
+    import brotli  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+SENDFILE_MIN_BYTES = 64 * 1024
+PRECOMPRESS_MIN_BYTES = 1024
+PRECOMPRESS_SUFFIXES = (
+    ".json",
+    ".js",
+    ".mjs",
+    ".css",
+    ".html",
+    ".svg",
+    ".txt",
+    ".wasm",
+    ".vrm",
+    ".glb",
+    ".gltf",
+)
+DEFAULT_PRECOMPRESS_DIRS = ("viewer",)
+# Sidecar suffix per content coding, in server preference order.
+_SIDECARS = (("br", ".br"), ("gzip", ".gz"))
+_COPY_CHUNK = 256 * 1024
+
+
+def _accepted_codings(accept_encoding: str | None) -> set[str]:
+    accepted: set[str] = set()
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding)
+    if "*" in accepted:
+        accepted.update(coding for coding, _ in _SIDECARS)
+    return accepted
+
+
+def _parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """Return an inclusive ``(start, end)`` for one satisfiable byte range.
+
+    Returns None for headers this server does not honour (the full body is
+    sent instead) and raises ValueError for an unsatisfiable range.
+    """
+
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        if first == "":
+            length = int(last)
+            if length <= 0:
+                raise ValueError("empty suffix range")
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        raise ValueError(f"invalid range: {header}") from None
+    if start >= size or end < start:
+        raise ValueError(f"unsatisfiable range: {header}")
+    return start, min(end, size - 1)
+
+
+def _coded_etag(etag: str, coding: str | None) -> str:
+    """The ETag of a content-coded body: the coding is appended inside the quotes."""
+
+    return etag if coding is None else f'{etag[:-1]}-{coding}"'
+
+
+def _etag_base(etag: str) -> str:
+    etag = etag.removeprefix("W/")
+    for coding, _ in _SIDECARS:
+        if etag.endswith(f'-{coding}"'):
+            return etag[: -len(coding) - 2] + '"'
+    return etag
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match uses weak comparison, so a W/ prefix on either side is ignored.
+
+    The content-coded and identity variants of one representation all match.
+    Shared with ``dashboard_server`` so both servers revalidate alike.
+    """
+
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or _etag_base(etag) in {_etag_base(candidate) for candidate in candidates}
+
+
+class StaticFileHandler(SimpleHTTPRequestHandler):
+    """Static files over HTTP/1.1 with validators, ranges and precompressed sidecars."""
+
+    protocol_version = "HTTP/1.1"
+    # Idle keep-alive connections are closed after this many seconds.
+    timeout = 60
+    static_cache_control = "no-cache"
+
+    def do_GET(self) -> None:
+        self._serve_static(send_body=True)
+
+    def do_HEAD(self) -> None:
+        self._serve_static(send_body=False)
+
+    def end_headers(self) -> None:
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        super().end_headers()
+
+    def _serve_static(self, *, send_body: bool) -> None:
+        path = Path(self.translate_path(self.path))
+        if path.is_dir():
+            # Directory redirects, index.html and listings keep the stdlib behaviour.
+            index = next((path / name for name in ("index.html", "index.htm") if (path / name).is_file()), None)
+            if index is None or not self.path.split("?", 1)[0].endswith("/"):
+                self._serve_stdlib(send_body=send_body)
+                return
+            path = index
+        elif self.path.split("?", 1)[0].endswith("/") or not path.is_file():
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+        try:
+            stat = path.stat()
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+
+        etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+        byte_range: tuple[int, int] | None = None
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if range_header and (if_range is None or if_range.strip() == etag):
+            try:
+                byte_range = _parse_range(range_header, stat.st_size)
+            except ValueError:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{stat.st_size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+        # Ranges address the identity bytes, so a sidecar is only used for whole-file responses.
+        coding, served_path = (None, path) if byte_range is not None else self._select_variant(path, stat)
+        variant_etag = _coded_etag(etag, coding)
+
+        if _etag_matches(self.headers.get("If-None-Match"), variant_etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._send_validators(variant_etag, stat.st_mtime)
+            self.end_headers()
+            return
+
+        try:
+            fp = served_path.open("rb")
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+        with fp:
+            size = os.fstat(fp.fileno()).st_size
+            start, end = byte_range if byte_range is not None else (0, size - 1)
+            length = max(0, end - start + 1)
+            self.send_response(HTTPStatus.PARTIAL_CONTENT if byte_range is not None else HTTPStatus.OK)
+            self.send_header("Content-Type", self.guess_type(str(path)))
+            self.send_header("Content-Length", str(length))
+            if byte_range is not None:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            if coding is not None:
+                self.send_header("Content-Encoding", coding)
+            self._send_validators(variant_etag, stat.st_mtime)
+            self.end_headers()
+            if send_body and length:
+                self._send_file_body(fp, start, length)
+
+    def _serve_stdlib(self, *, send_body: bool) -> None:
+        if send_body:
+            super().do_GET()
+        else:
+            super().do_HEAD()
+
+    def _send_validators(self, etag: str, mtime: float) -> None:
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", email.utils.formatdate(mtime, usegmt=True))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Vary", "Accept-Encoding")
+        if self.static_cache_control:
+            self.send_header("Cache-Control", self.static_cache_control)
+
+    def _select_variant(self, path: Path, stat: os.stat_result) -> tuple[str | None, Path]:
+        accepted = _accepted_codings(self.headers.get("Accept-Encoding"))
+        for coding, suffix in _SIDECARS:
+            if coding not in accepted:
+                continue
+            sidecar = path.with_name(path.name + suffix)
+            try:
+                if sidecar.stat().st_mtime_ns == stat.st_mtime_ns:
+                    return coding, sidecar
+            except OSError:
+                continue
+        return None, path
+
+    def _send_file_body(self, fp: BinaryIO, start: int, length: int) -> None:
+        connection = self.connection
+        if (
+            length >= SENDFILE_MIN_BYTES
+            and hasattr(os, "sendfile")
+            and type(connection) is socket.socket
+        ):
+            self.wfile.flush()
+            offset = start
+            remaining = length
+            while remaining > 0:
+                sent = os.sendfile(connection.fileno(), fp.fileno(), offset, remaining)
+                if sent == 0:
+                    break
+                offset += sent
+                remaining -= sent
+            return
+        fp.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = fp.read(min(_COPY_CHUNK, remaining))
+            if not chunk:
+                break
+            self.wfile.write(chunk)
+            remaining -= len(chunk)
+
+
+@dataclass(slots=True)
+class PrecompressResult:
+    scanned: int = 0
+    written: int = 0
+    up_to_date: int = 0
+    skipped_small: int = 0
+    source_bytes: int = 0
+    gzip_bytes: int = 0
+    brotli_bytes: int = 0
+
+
+def precompress_static_tree(
+    root: Path,
+    directories: Iterable[str] = DEFAULT_PRECOMPRESS_DIRS,
+    *,
+    min_bytes: int = PRECOMPRESS_MIN_BYTES,
+    suffixes: Iterable[str] = PRECOMPRESS_SUFFIXES,
+    force: bool = False,
+) -> dict[str, Any]:
+    """Write ``.gz`` (and ``.br`` when brotli is installed) sidecars next to static assets.
+
+    Sidecars take the source file's mtime so the server can tell when one is stale.
+    """
+
+    root = root.resolve()
+    suffix_set = {suffix.lower() for suffix in suffixes}
+    result = PrecompressResult()
+    for directory in directories:
+        base = (root / directory).resolve()
+        if not base.is_dir():
+            continue
+        for path in sorted(base.rglob("*")):
+            if not path.is_file() or path.suffix.lower() not in suffix_set:
+                continue
+            result.scanned += 1
+            stat = path.stat()
+            if stat.st_size < min_bytes:
+                result.skipped_small += 1
+                continue
+            targets = [(".gz", _gzip_bytes)]
+            if brotli is not None:
+                targets.append((".br", _brotli_bytes))
+            pending = [
+                (suffix, encode)
+                for suffix, encode in targets
+                if force or not _sidecar_is_fresh(path.with_name(path.name + suffix), stat)
+            ]
+            if not pending:
+                result.up_to_date += 1
+                continue
+            data = path.read_bytes()
+            result.source_bytes += len(data)
+            for suffix, encode in pending:
+                sidecar = path.with_name(path.name + suffix)
+                encoded = encode(data)
+                _write_sidecar(sidecar, encoded, stat)
+                if suffix == ".gz":
+                    result.gzip_bytes += len(encoded)
+                else:
+                    result.brotli_bytes += len(encoded)
+            result.written += 1
+    return {"ok": True, "root": str(root), "brotli": brotli is not None, **_asdict(result)}
+
+
+def _sidecar_is_fresh(sidecar: Path, source: os.stat_result) -> bool:
+    try:
+        return sidecar.stat().st_mtime_ns == source.st_mtime_ns
+    except OSError:
+        return False
+
+
+def _write_sidecar(sidecar: Path, data: bytes, source: os.stat_result) -> None:
+    tmp_path = sidecar.with_name(sidecar.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.utime(tmp_path, ns=(source.st_atime_ns, source.st_mtime_ns))
+    tmp_path.replace(sidecar)
+
+
+def _gzip_bytes(data: bytes) -> bytes:
+    # mtime=0 keeps the output reproducible for identical inputs.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _brotli_bytes(data: bytes) -> bytes:
+    return brotli.compress(data, quality=11)
+
+
+def _asdict(result: PrecompressResult) -> dict[str, int]:
+    return {name: getattr(result, name) for name in PrecompressResult.__slots__}
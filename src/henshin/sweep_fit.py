@@ -0,0 +1,347 @@
+"""Dock and smoothing parameter sweeps (``henshin sweep-fit``).
+
+Each capture is reduced once to its forearm track (elbow and wrist in world
+coordinates, plus ``dt``). Everything that decides equip runs on that track:
+
+- For each dock center, the wrist distance is computed per frame
+  (``math.hypot``, as ``DockCharger.contains`` does). The hold accumulator is
+  then advanced for every radius at once, frame by frame, as NumPy vectors.
+- Equip fires at the first frame where the hold reaches
+  ``hold_to_equip_sec``. The hold trace does not depend on that threshold, so
+  one trace answers every threshold through a running maximum and
+  ``searchsorted``. Equip frames are identical to ``run_body_sequence`` and
+  ``run_rightarm_sequence``.
+- ``smooth_gain`` only changes how the armor follows after equip. It is
+  scored on the forearm midpoint over the whole capture: ``lag`` is the
+  mean distance to the unsmoothed target, ``jitter`` the mean per-frame
+  movement.
+
+Captures are evaluated in parallel, one per process-pool task. Positive
+captures should equip and negative captures should not, which gives equip
+rates, equip-time distributions and false-trigger rates per combination.
+Rows are ranked by false-trigger rate, miss rate, p90 equip time, then
+``lag + jitter``.
+
+NumPy is optional (``pip install gavai-henshin[fast]``).
+"""
+
+from __future__ import annotations
+
+import csv
+import itertools
+import json
+import math
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields
+from functools import partial
+from pathlib import Path
+from typing import Any, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+from .bodyfit import DEFAULT_SEGMENT_SPECS, CoverScale, norm_to_world
+
+SWEEP_KINDS = ("body", "rightarm")
+SWEEP_COLUMNS = (
+    "rank",
+    "dock_center_x",
+    "dock_center_y",
+    "dock_radius",
+    "hold_to_equip_sec",
+    "smooth_gain",
+    "equip_rate",
+    "miss_rate",
+    "false_trigger_rate",
+    "equip_sec_p50",
+    "equip_sec_p90",
+    "equip_sec_max",
+    "equip_frame_p50",
+    "lag",
+    "jitter",
+)
+# ArmFollower always follows with this gain.
+RIGHTARM_SMOOTH_GAIN = 18.0
+DECAY_RATE = 2.2
+# Frames of hold trace kept in memory at once.
+CHUNK_FRAMES = 1024
+
+
+def _require_numpy() -> Any:
+    if np is None:
+        raise ValueError("numpy is required for sweep-fit (pip install gavai-henshin[fast])")
+    return np
+
+
+def parse_grid_values(text: str) -> tuple[float, ...]:
+    """Parse ``0.1,0.2,0.4`` or an inclusive range ``start:stop:step`` (both may be mixed)."""
+
+    values: list[float] = []
+    for part in (item.strip() for item in text.split(",")):
+        if not part:
+            continue
+        if ":" not in part:
+            values.append(float(part))
+            continue
+        bounds = part.split(":")
+        if len(bounds) != 3:
+            raise ValueError(f"grid range must be start:stop:step: {part}")
+        start, stop, step = (float(bound) for bound in bounds)
+        if step <= 0 or stop < start:
+            raise ValueError(f"grid range needs step > 0 and stop >= start: {part}")
+        count = int(math.floor((stop - start) / step + 1e-9)) + 1
+        values.extend(round(start + step * index, 10) for index in range(count))
+    if not values:
+        raise ValueError(f"grid has no values: {text!r}")
+    return tuple(dict.fromkeys(values))
+
+
+@dataclass(frozen=True)
+class SweepGrid:
+    dock_center_x: tuple[float, ...] = (0.55,)
+    dock_center_y: tuple[float, ...] = (-0.25,)
+    dock_radius: tuple[float, ...] = (0.18,)
+    hold_to_equip_sec: tuple[float, ...] = (0.7,)
+    smooth_gain: tuple[float, ...] = (18.0,)
+
+    def __post_init__(self) -> None:
+        for field in fields(self):
+            values = getattr(self, field.name)
+            if not values:
+                raise ValueError(f"{field.name} needs at least one value")
+        if min(self.dock_radius) < 0:
+            raise ValueError("dock_radius values must be non-negative")
+        if min(self.hold_to_equip_sec) <= 0:
+            raise ValueError("hold_to_equip_sec values must be positive")
+
+    @property
+    def size(self) -> int:
+        return math.prod(len(getattr(self, field.name)) for field in fields(self))
+
+
+@dataclass(frozen=True)
+class SweepSequence:
+    """A capture reduced to what the sweep needs: ``dt`` and the forearm in world coordinates."""
+
+    name: str
+    expect_equip: bool
+    dt: tuple[float, ...]
+    elbow: tuple[tuple[float, float] | None, ...]
+    wrist: tuple[tuple[float, float] | None, ...]
+
+
+def _world(xy: Any, *, mirror: bool, cover: CoverScale) -> tuple[float, float] | None:
+    if xy is None:
+        return None
+    point = norm_to_world(float(xy[0]), float(xy[1]), mirror=mirror, cover_scale=cover)
+    return point.x, point.y
+
+
+def load_sweep_sequence(path: Path, *, kind: str, expect_equip: bool) -> SweepSequence:
+    """Read a ``simulate-body`` or ``simulate-rightarm`` input file.
+
+    The file's ``mirror``, ``cover_scale`` and trigger joint are kept; its
+    ``dock`` values are replaced by the sweep grid.
+    """
+
+    if kind not in SWEEP_KINDS:
+        raise ValueError(f"kind must be one of {', '.join(SWEEP_KINDS)}")
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    mirror = bool(payload.get("mirror", True))
+    cover_raw = payload.get("cover_scale", {"x": 1.0, "y": 1.0})
+    cover = CoverScale(float(cover_raw["x"]), float(cover_raw["y"]))
+    frames = payload.get("frames", [])
+    if kind == "body":
+        trigger = str(payload.get("dock", {}).get("trigger_joint", "right_wrist"))
+        elbow_joint = next((spec.start_joint for spec in DEFAULT_SEGMENT_SPECS if spec.end_joint == trigger), trigger)
+        elbows = [item.get("joints", {}).get(elbow_joint) for item in frames]
+        wrists = [item.get("joints", {}).get(trigger) for item in frames]
+    else:
+        elbows = [item["right_elbow_xy01"] for item in frames]
+        wrists = [item["right_wrist_xy01"] for item in frames]
+    return SweepSequence(
+        name=str(path),
+        expect_equip=expect_equip,
+        dt=tuple(float(item["dt_sec"]) for item in frames),
+        elbow=tuple(_world(xy, mirror=mirror, cover=cover) for xy in elbows),
+        wrist=tuple(_world(xy, mirror=mirror, cover=cover) for xy in wrists),
+    )
+
+
+def sweep_sequence(sequence: SweepSequence, grid: SweepGrid) -> dict[str, Any]:
+    """Evaluate the whole grid on one capture.
+
+    Returns ``equip_frame`` and ``equip_sec`` shaped
+    ``(center_x, center_y, radius, hold)`` (-1 / inf when the capture never
+    equips), and ``lag`` / ``jitter`` shaped ``(smooth_gain,)``.
+    """
+
+    numpy = _require_numpy()
+    dt = numpy.array(sequence.dt, dtype=float)
+    frame_count = len(dt)
+    radii = numpy.array(grid.dock_radius, dtype=float)
+    holds = numpy.array(grid.hold_to_equip_sec, dtype=float)
+    elapsed = numpy.cumsum(dt)
+    shape = (len(grid.dock_center_x), len(grid.dock_center_y), len(radii), len(holds))
+
+    # Wrist distance to each center, with the same math.hypot DockCharger uses: (centers, frames).
+    centers = [(x, y) for x in grid.dock_center_x for y in grid.dock_center_y]
+    distance = numpy.array(
+        [[math.inf if point is None else math.hypot(point[0] - x, point[1] - y) for point in sequence.wrist] for x, y in centers]
+    ).reshape(len(centers), frame_count)
+    steps = dt.tolist()
+    decays = (dt * DECAY_RATE).tolist()
+    lanes = len(centers) * len(radii)
+    hold = numpy.zeros(lanes)
+    peak = numpy.zeros(lanes)
+    first = numpy.full((len(holds), lanes), -1, dtype=numpy.int64)
+    trace = numpy.empty((min(frame_count, CHUNK_FRAMES), lanes))
+    for chunk_start in range(0, frame_count, CHUNK_FRAMES):
+        chunk_stop = min(frame_count, chunk_start + CHUNK_FRAMES)
+        inside = (distance[:, chunk_start:chunk_stop].T[:, :, None] <= radii).reshape(chunk_stop - chunk_start, lanes)
+        for offset, index in enumerate(range(chunk_start, chunk_stop)):
+            # Same float operations as DockCharger.tick, for every (center, radius) lane at once.
+            hold = numpy.where(inside[offset], hold + steps[index], numpy.maximum(hold - decays[index], 0.0))
+            trace[offset] = hold
+        block = numpy.maximum.accumulate(trace[: chunk_stop - chunk_start], axis=0)
+        numpy.maximum(block, peak, out=block)
+        for ih, threshold in enumerate(holds):
+            # hold / h >= 1.0 is exactly hold >= h for positive h, and the first
+            # crossing of the hold is the first crossing of its running peak.
+            hit = (first[ih] < 0) & (block[-1] >= threshold)
+            if hit.any():
+                first[ih, hit] = chunk_start + numpy.argmax(block[:, hit] >= threshold, axis=0)
+        peak = block[-1]
+
+    equip_frame = first.T.reshape(shape)
+    fired = equip_frame >= 0
+    equip_sec = numpy.where(fired, elapsed[numpy.where(fired, equip_frame, 0)] if frame_count else 0.0, numpy.inf)
+
+    lag, jitter = _smoothing_scores(sequence, grid.smooth_gain)
+    return {"equip_frame": equip_frame, "equip_sec": equip_sec, "lag": lag, "jitter": jitter}
+
+
+def _smoothing_scores(sequence: SweepSequence, gains: Sequence[float]) -> tuple[Any, Any]:
+    numpy = np
+    gain = numpy.array(gains, dtype=float)
+    position: Any = None
+    lag_total = numpy.zeros(len(gain))
+    jitter_total = numpy.zeros(len(gain))
+    samples = 0
+    for dt_sec, elbow, wrist in zip(sequence.dt, sequence.elbow, sequence.wrist):
+        if elbow is None or wrist is None:
+            continue
+        target = numpy.array([(elbow[0] + wrist[0]) * 0.5, (elbow[1] + wrist[1]) * 0.5])
+        if position is None:
+            position = numpy.tile(target, (len(gain), 1))
+            continue
+        rate = numpy.clip(dt_sec * gain, 0.0, 1.0)[:, None]
+        moved = position + (target - position) * rate
+        jitter_total += numpy.hypot(*(moved - position).T)
+        lag_total += numpy.hypot(*(target - moved).T)
+        position = moved
+        samples += 1
+    if not samples:
+        return numpy.zeros(len(gain)), numpy.zeros(len(gain))
+    return lag_total / samples, jitter_total / samples
+
+
+def _nearest_rank(ordered: Any, counts: Any, percent: float) -> Any:
+    """Nearest-rank percentile down axis 0 of an ascending array; NaN where ``counts`` is 0."""
+
+    numpy = np
+    rank = numpy.maximum(numpy.ceil(percent / 100 * counts).astype(numpy.int64), 1) - 1
+    values = numpy.take_along_axis(ordered, rank[None, ...], axis=0)[0]
+    return numpy.where(counts > 0, values, numpy.nan)
+
+
+def run_sweep(
+    sequences: Sequence[SweepSequence],
+    grid: SweepGrid,
+    *,
+    workers: int = 1,
+) -> list[dict[str, Any]]:
+    """Evaluate ``grid`` over ``sequences`` and return ranked rows (see ``SWEEP_COLUMNS``)."""
+
+    numpy = _require_numpy()
+    if not sequences:
+        raise ValueError("sweep-fit needs at least one capture")
+    evaluate = partial(sweep_sequence, grid=grid)
+    if workers > 1 and len(sequences) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(sequences))) as pool:
+            results = list(pool.map(evaluate, sequences))
+    else:
+        results = [evaluate(sequence) for sequence in sequences]
+
+    positive = [result for sequence, result in zip(sequences, results) if sequence.expect_equip]
+    negative = [result for sequence, result in zip(sequences, results) if not sequence.expect_equip]
+    dock_shape = results[0]["equip_frame"].shape
+    if positive:
+        frames = numpy.stack([result["equip_frame"] for result in positive])
+        seconds = numpy.sort(numpy.stack([result["equip_sec"] for result in positive]), axis=0)
+        equipped = (frames >= 0).sum(axis=0)
+        equip_rate = equipped / len(positive)
+        ordered_frames = numpy.sort(numpy.where(frames >= 0, frames, numpy.iinfo(numpy.int64).max), axis=0)
+        sec_p50 = _nearest_rank(seconds, equipped, 50)
+        sec_p90 = _nearest_rank(seconds, equipped, 90)
+        sec_max = _nearest_rank(seconds, equipped, 100)
+        frame_p50 = _nearest_rank(ordered_frames, equipped, 50)
+    else:
+        equip_rate = numpy.zeros(dock_shape)
+        sec_p50 = sec_p90 = sec_max = frame_p50 = numpy.full(dock_shape, numpy.nan)
+    if negative:
+        false_trigger = numpy.mean(numpy.stack([result["equip_frame"] >= 0 for result in negative]), axis=0)
+    else:
+        false_trigger = numpy.zeros(dock_shape)
+    lag = numpy.mean([result["lag"] for result in results], axis=0)
+    jitter = numpy.mean([result["jitter"] for result in results], axis=0)
+
+    rows = []
+    for dock_index in itertools.product(*(range(size) for size in dock_shape)):
+        ix, iy, ir, ih = dock_index
+        for ig, gain in enumerate(grid.smooth_gain):
+            rows.append(
+                {
+                    "dock_center_x": grid.dock_center_x[ix],
+                    "dock_center_y": grid.dock_center_y[iy],
+                    "dock_radius": grid.dock_radius[ir],
+                    "hold_to_equip_sec": grid.hold_to_equip_sec[ih],
+                    "smooth_gain": gain,
+                    "equip_rate": round(float(equip_rate[dock_index]), 6),
+                    "miss_rate": round(1.0 - float(equip_rate[dock_index]), 6) if positive else 0.0,
+                    "false_trigger_rate": round(float(false_trigger[dock_index]), 6),
+                    "equip_sec_p50": _optional(sec_p50[dock_index]),
+                    "equip_sec_p90": _optional(sec_p90[dock_index]),
+                    "equip_sec_max": _optional(sec_max[dock_index]),
+                    "equip_frame_p50": None if math.isnan(frame_p50[dock_index]) else int(frame_p50[dock_index]),
+                    "lag": round(float(lag[ig]), 6),
+                    "jitter": round(float(jitter[ig]), 6),
+                }
+            )
+    rows.sort(
+        key=lambda row: (
+            row["false_trigger_rate"],
+            row["miss_rate"],
+            math.inf if row["equip_sec_p90"] is None else row["equip_sec_p90"],
+            row["lag"] + row["jitter"],
+        )
+    )
+    for rank, row in enumerate(rows, start=1):
+        row["rank"] = rank
+    return [{column: row[column] for column in SWEEP_COLUMNS} for row in rows]
+
+
+def _optional(value: Any) -> float | None:
+    value = float(value)
+    return None if math.isnan(value) else round(value, 6)
+
+
+def write_sweep_csv(path: Path, rows: Sequence[dict[str, Any]]) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8", newline="") as fp:
+        writer = csv.DictWriter(fp, fieldnames=SWEEP_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
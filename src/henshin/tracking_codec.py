@@ -0,0 +1,240 @@
+"""Compact tracking encoding for iwsdk deposition replays (``qdelta-v1``).
+
+Replays used to embed every joint of every frame as JSON floats. ``qdelta-v1``
+stores the same frames as:
+
+- fixed-point integers: ``round(value / precision)`` for xy01 coordinates and
+  ``round(dt / dt_precision)`` for frame durations, so every decoded value is
+  within half a step of the original;
+- groups of ``keyframe_interval`` frames. The first frame of a group is
+  absolute; the others store per-joint deltas from the previous frame (a
+  joint missing in the previous frame is stored absolute);
+- per frame: zigzag varint dt, a joint presence bitmap (LSB first), then
+  zigzag varint x and y for each present joint in ``joints`` order.
+
+Each group is zlib-compressed on its own and listed in ``groups`` as
+``[offset, length]``, so a reader can decode any frame range starting from
+the group that contains it. The bytes are stored inline as base64 (``data``)
+or in a sidecar file next to the replay (``sidecar``).
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import zlib
+from pathlib import Path
+from typing import Any, Sequence
+
+from .bodyfit import BodyFrame
+
+QDELTA_ENCODING = "qdelta-v1"
+DEFAULT_PRECISION = 1e-4
+DEFAULT_DT_PRECISION = 1e-5
+DEFAULT_KEYFRAME_INTERVAL = 30
+
+
+def _zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    value = _zigzag(value)
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, position: int) -> tuple[int, int]:
+    result = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return _unzigzag(result), position
+        shift += 7
+
+
+def encode_tracking(
+    frames: Sequence[BodyFrame],
+    *,
+    precision: float = DEFAULT_PRECISION,
+    dt_precision: float = DEFAULT_DT_PRECISION,
+    keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+) -> tuple[dict[str, Any], bytes]:
+    """Encode ``frames`` and return ``(meta, data)``; ``meta`` holds everything but the bytes."""
+
+    if precision <= 0 or dt_precision <= 0:
+        raise ValueError("precision and dt_precision must be positive")
+    if keyframe_interval < 1:
+        raise ValueError("keyframe_interval must be at least 1")
+    joints = sorted({name for frame in frames for name in frame.joints_xy01})
+    mask_bytes = (len(joints) + 7) // 8
+    scale = 1.0 / precision
+    dt_scale = 1.0 / dt_precision
+
+    data = bytearray()
+    groups: list[list[int]] = []
+    for group_start in range(0, len(frames), keyframe_interval):
+        chunk = bytearray()
+        previous: dict[str, tuple[int, int]] = {}
+        previous_dt = 0
+        for frame in frames[group_start : group_start + keyframe_interval]:
+            dt = round(float(frame.dt_sec) * dt_scale)
+            _write_varint(chunk, dt - previous_dt)
+            previous_dt = dt
+            mask = 0
+            values = []
+            current: dict[str, tuple[int, int]] = {}
+            for bit, name in enumerate(joints):
+                xy = frame.joints_xy01.get(name)
+                if xy is None:
+                    continue
+                mask |= 1 << bit
+                qx, qy = round(float(xy[0]) * scale), round(float(xy[1]) * scale)
+                current[name] = (qx, qy)
+                px, py = previous.get(name, (0, 0))
+                values.append((qx - px, qy - py))
+            chunk += mask.to_bytes(mask_bytes, "little")
+            for dx, dy in values:
+                _write_varint(chunk, dx)
+                _write_varint(chunk, dy)
+            previous = current
+        compressed = zlib.compress(bytes(chunk), 9)
+        groups.append([len(data), len(compressed)])
+        data += compressed
+
+    meta = {
+        "encoding": QDELTA_ENCODING,
+        "frame_count": len(frames),
+        "joints": joints,
+        "precision": precision,
+        "dt_precision": dt_precision,
+        "keyframe_interval": keyframe_interval,
+        "compression": "zlib",
+        "groups": groups,
+    }
+    return meta, bytes(data)
+
+
+def decode_tracking(meta: dict[str, Any], data: bytes, *, start: int = 0, end: int | None = None) -> list[BodyFrame]:
+    """Decode frames ``[start, end)``, reading only the groups that hold them."""
+
+    if meta.get("encoding") != QDELTA_ENCODING:
+        raise ValueError(f"Unsupported tracking encoding: {meta.get('encoding')}")
+    frame_count = int(meta["frame_count"])
+    end = frame_count if end is None else min(end, frame_count)
+    if start < 0 or start > end:
+        raise ValueError("frame range must satisfy 0 <= start <= end")
+    joints = list(meta["joints"])
+    mask_bytes = (len(joints) + 7) // 8
+    precision = float(meta["precision"])
+    dt_precision = float(meta["dt_precision"])
+    interval = int(meta["keyframe_interval"])
+
+    frames: list[BodyFrame] = []
+    for group in range(start // interval, (end + interval - 1) // interval):
+        offset, length = meta["groups"][group]
+        chunk = zlib.decompress(data[offset : offset + length])
+        position = 0
+        previous: dict[str, tuple[int, int]] = {}
+        dt = 0
+        for index in range(group * interval, min((group + 1) * interval, frame_count)):
+            delta, position = _read_varint(chunk, position)
+            dt += delta
+            mask = int.from_bytes(chunk[position : position + mask_bytes], "little")
+            position += mask_bytes
+            current: dict[str, tuple[int, int]] = {}
+            for bit, name in enumerate(joints):
+                if not mask >> bit & 1:
+                    continue
+                dx, position = _read_varint(chunk, position)
+                dy, position = _read_varint(chunk, position)
+                px, py = previous.get(name, (0, 0))
+                current[name] = (px + dx, py + dy)
+            previous = current
+            if index < start:
+                continue
+            if index >= end:
+                break
+            frames.append(
+                BodyFrame(
+                    dt_sec=dt * dt_precision,
+                    joints_xy01={name: (qx * precision, qy * precision) for name, (qx, qy) in current.items()},
+                )
+            )
+    return frames
+
+
+def tracking_replay_block(
+    frames: Sequence[BodyFrame],
+    *,
+    sidecar_path: Path | None = None,
+    precision: float = DEFAULT_PRECISION,
+    dt_precision: float = DEFAULT_DT_PRECISION,
+    keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+) -> dict[str, Any]:
+    """The replay ``tracking`` section: inline base64, or a sidecar when ``sidecar_path`` is given.
+
+    ``sidecar.path`` is recorded relative to the sidecar's directory (the
+    replay is written next to it).
+    """
+
+    meta, data = encode_tracking(
+        frames,
+        precision=precision,
+        dt_precision=dt_precision,
+        keyframe_interval=keyframe_interval,
+    )
+    if sidecar_path is None:
+        return {**meta, "data": base64.b64encode(data).decode("ascii")}
+    sidecar_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = sidecar_path.with_suffix(sidecar_path.suffix + ".tmp")
+    tmp_path.write_bytes(data)
+    tmp_path.replace(sidecar_path)
+    return {
+        **meta,
+        "sidecar": {
+            "path": sidecar_path.name,
+            "bytes": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+        },
+    }
+
+
+def decode_tracking_block(
+    block: dict[str, Any],
+    *,
+    base_dir: Path | None = None,
+    start: int = 0,
+    end: int | None = None,
+) -> list[BodyFrame]:
+    """Frames from a replay ``tracking`` section in any supported layout.
+
+    Plain JSON sections (``frames``) are returned as-is. Sidecar sections are
+    read from ``base_dir`` (the replay's directory) and checked against their
+    SHA-256; a mismatch raises ValueError.
+    """
+
+    if "encoding" not in block:
+        raw = block.get("frames") or []
+        return [BodyFrame(dt_sec=float(item["dt_sec"]), joints_xy01=_joint_tuples(item["joints"])) for item in raw][start:end]
+    if "data" in block:
+        data = base64.b64decode(block["data"])
+    else:
+        sidecar = block["sidecar"]
+        data = ((base_dir or Path(".")) / sidecar["path"]).read_bytes()
+        if hashlib.sha256(data).hexdigest() != sidecar.get("sha256"):
+            raise ValueError(f"Tracking sidecar checksum mismatch: {sidecar['path']}")
+    return decode_tracking(block, data, start=start, end=end)
+
+
+def _joint_tuples(joints: dict[str, Sequence[float]]) -> dict[str, tuple[float, float]]:
+    return {name: (float(xy[0]), float(xy[1])) for name, xy in joints.items()}
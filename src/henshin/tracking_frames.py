@@ -0,0 +1,342 @@
+"""Binary sidecar for ``TRACKING_FRAME_BATCH`` frames.
+
+Tracking batches use the body-sequence frame shape
+(``{"dt_sec": 0.033, "joints": {"left_wrist": [x, y], ...}}``). Instead of
+keeping them inline in the TransformSession document, the new-route API appends
+each batch to ``<trial_dir>/tracking-frames.bin`` and the event payload keeps a
+``frames_ref`` (offset, length, frame range, encoding and CRC-32).
+
+Each batch is one self-describing block (little-endian)::
+
+    b"HTF1" | encoding u8 | dims u8 | joint_count u16 | frame_count u32
+    | names_len u32 | frame_start u64 | crc32 u32
+    | joint names (UTF-8, newline separated, padded to 4 bytes)
+    | q16 only: lo float32[dims], hi float32[dims]
+    | dt float32[frame_count]
+    | values float32 or int16 [frame_count][joint_count][dims] (padded to 4 bytes)
+
+A block has one ``dims`` for all joints, so a batch that mixes 2D and 3D joints
+is not encodable and stays inline. Missing joints are NaN (float32) or -32768 (q16). ``q16`` stores each value as
+int16 scaled to the batch's per-axis range, halving the size at roughly
+range/65534 precision. Reads map the file and slice frame ranges out of it
+with ``memoryview`` instead of parsing the session document.
+"""
+
+from __future__ import annotations
+
+import math
+import mmap
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+SIDECAR_FILENAME = "tracking-frames.bin"
+TRACKING_ENCODINGS = ("f32", "q16")
+MAX_FRAMES_PER_READ = 5000
+
+_MAGIC = b"HTF1"
+_HEADER = struct.Struct("<4sBBHIIQI")
+_ENCODING_CODES = {"f32": 0, "q16": 1}
+_ENCODING_NAMES = {code: name for name, code in _ENCODING_CODES.items()}
+_Q16_MISSING = -32768
+_Q16_SPAN = 65534
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+_SCAN_LOCK = threading.Lock()
+_SCAN_CACHE: dict[Path, tuple[int, list["FrameBlock"]]] = {}
+
+
+@dataclass(frozen=True, slots=True)
+class FrameBlock:
+    offset: int
+    length: int
+    encoding: str
+    dims: int
+    joints: tuple[str, ...]
+    frame_start: int
+    frame_count: int
+    crc32: int
+    bounds_offset: int
+    dt_offset: int
+    values_offset: int
+
+
+def frames_are_encodable(frames: Any) -> bool:
+    """True for a non-empty list of ``{"dt_sec", "joints": {name: [x, y(, z)]}}`` frames.
+
+    Every joint in the batch must have the same number of coordinates.
+    """
+
+    if not isinstance(frames, list) or not frames:
+        return False
+    dims: set[int] = set()
+    for frame in frames:
+        if not isinstance(frame, dict) or not isinstance(frame.get("joints"), dict):
+            return False
+        if not _is_number(frame.get("dt_sec", 0.0)):
+            return False
+        for xy in frame["joints"].values():
+            if not isinstance(xy, list) or not 2 <= len(xy) <= 3 or not all(_is_number(value) for value in xy):
+                return False
+            dims.add(len(xy))
+    return len(dims) <= 1
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _pad4(size: int) -> int:
+    return (4 - size % 4) % 4
+
+
+def _le_bytes(values: array) -> bytes:
+    if not _LITTLE_ENDIAN:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def encode_frame_block(frames: list[dict[str, Any]], *, frame_start: int, encoding: str = "f32") -> bytes:
+    if encoding not in _ENCODING_CODES:
+        raise ValueError(f"tracking encoding must be one of {list(TRACKING_ENCODINGS)}")
+    joints = sorted({name for frame in frames for name in frame["joints"]})
+    all_dims = {len(xy) for frame in frames for xy in frame["joints"].values()}
+    if len(all_dims) > 1:
+        raise ValueError("tracking frames must not mix 2D and 3D joints in one batch")
+    dims = all_dims.pop() if all_dims else 2
+    values = array("f")
+    for frame in frames:
+        for name in joints:
+            xy = frame["joints"].get(name)
+            if xy is None:
+                values.extend([math.nan] * dims)
+            else:
+                values.extend(float(value) for value in xy)
+    dt = array("f", [float(frame.get("dt_sec", 0.0)) for frame in frames])
+    names = "\n".join(joints).encode("utf-8")
+
+    body = bytearray(names + b"\0" * _pad4(len(names)))
+    if encoding == "q16":
+        lo, hi = _axis_bounds(values, dims)
+        body += _le_bytes(array("f", lo + hi))
+        body += _le_bytes(dt)
+        body += _le_bytes(_quantize(values, dims, lo, hi))
+    else:
+        body += _le_bytes(dt)
+        body += _le_bytes(values)
+    body += b"\0" * _pad4(len(body))
+    header = _HEADER.pack(
+        _MAGIC,
+        _ENCODING_CODES[encoding],
+        dims,
+        len(joints),
+        len(frames),
+        len(names),
+        frame_start,
+        zlib.crc32(body),
+    )
+    return header + bytes(body)
+
+
+def _axis_bounds(values: array, dims: int) -> tuple[list[float], list[float]]:
+    lo = [math.inf] * dims
+    hi = [-math.inf] * dims
+    for index, value in enumerate(values):
+        if value == value:
+            axis = index % dims
+            lo[axis] = min(lo[axis], value)
+            hi[axis] = max(hi[axis], value)
+    return [0.0 if math.isinf(v) else v for v in lo], [0.0 if math.isinf(v) else v for v in hi]
+
+
+def _quantize(values: array, dims: int, lo: list[float], hi: list[float]) -> array:
+    quantized = array("h")
+    for index, value in enumerate(values):
+        if value != value:
+            quantized.append(_Q16_MISSING)
+            continue
+        axis = index % dims
+        span = hi[axis] - lo[axis]
+        scaled = (value - lo[axis]) / span if span > 0 else 0.0
+        quantized.append(int(round(scaled * _Q16_SPAN)) - _Q16_SPAN // 2)
+    return quantized
+
+
+class TrackingFrameStore:
+    """Append-only frame sidecar for one trial."""
+
+    def __init__(self, trial_dir: Path) -> None:
+        self.path = trial_dir / SIDECAR_FILENAME
+
+    def append(self, frames: list[dict[str, Any]], *, encoding: str = "f32") -> dict[str, Any]:
+        """Append one batch and return its reference. Callers hold the trial lock."""
+
+        blocks = self.blocks()
+        frame_start = blocks[-1].frame_start + blocks[-1].frame_count if blocks else 0
+        block = encode_frame_block(frames, frame_start=frame_start, encoding=encoding)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("ab") as fp:
+            offset = fp.tell()
+            fp.write(block)
+        return {
+            "offset": offset,
+            "length": len(block),
+            "frame_start": frame_start,
+            "frame_count": len(frames),
+            "encoding": encoding,
+            "crc32": f"{_HEADER.unpack_from(block)[7]:08x}",
+        }
+
+    def size(self) -> int:
+        try:
+            return self.path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def truncate(self, size: int) -> None:
+        """Drop everything appended after ``size`` bytes. Callers hold the trial lock."""
+
+        if self.size() <= size:
+            return
+        with self.path.open("r+b") as fp:
+            fp.truncate(size)
+        with _SCAN_LOCK:
+            _SCAN_CACHE.pop(self.path.resolve(), None)
+
+    def blocks(self) -> list[FrameBlock]:
+        """Block headers, scanned once and then only past the last known size."""
+
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return []
+        key = self.path.resolve()
+        with _SCAN_LOCK:
+            cached_size, blocks = _SCAN_CACHE.get(key, (0, []))
+        if cached_size > size:
+            cached_size, blocks = 0, []
+        if cached_size < size:
+            blocks = list(blocks)
+            with self.path.open("rb") as fp:
+                fp.seek(cached_size)
+                data = fp.read(size - cached_size)
+            position = 0
+            while position + _HEADER.size <= len(data):
+                block = _parse_block_header(data, position, cached_size + position)
+                if block is None or position + block.length > len(data):
+                    break
+                blocks.append(block)
+                position += block.length
+            with _SCAN_LOCK:
+                _SCAN_CACHE[key] = (cached_size + position, blocks)
+        return blocks
+
+    @property
+    def frame_count(self) -> int:
+        blocks = self.blocks()
+        return blocks[-1].frame_start + blocks[-1].frame_count if blocks else 0
+
+    def read_frames(self, start: int, end: int) -> list[dict[str, Any]]:
+        """Frames ``start`` (inclusive) to ``end`` (exclusive) across batches.
+
+        Each block touched is checked against its CRC-32 before decoding.
+        """
+
+        selected = [block for block in self.blocks() if block.frame_start < end and block.frame_start + block.frame_count > start]
+        if not selected:
+            return []
+        frames: list[dict[str, Any]] = []
+        with self.path.open("rb") as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for block in selected:
+                    body = view[block.offset + _HEADER.size : block.offset + block.length]
+                    intact = zlib.crc32(body) == block.crc32
+                    body.release()
+                    if not intact:
+                        raise ValueError(f"tracking frame block at offset {block.offset} failed its checksum")
+                    first = max(start, block.frame_start) - block.frame_start
+                    last = min(end, block.frame_start + block.frame_count) - block.frame_start
+                    frames.extend(_decode_frames(view, block, first, last))
+            finally:
+                view.release()
+        return frames
+
+
+def _parse_block_header(data: bytes, position: int, offset: int) -> FrameBlock | None:
+    magic, encoding, dims, joint_count, frame_count, names_len, frame_start, crc32 = _HEADER.unpack_from(data, position)
+    if magic != _MAGIC or encoding not in _ENCODING_NAMES:
+        return None
+    names_start = position + _HEADER.size
+    joints = tuple(data[names_start : names_start + names_len].decode("utf-8").split("\n")) if joint_count else ()
+    relative = _HEADER.size + names_len + _pad4(names_len)
+    bounds_offset = relative
+    if _ENCODING_NAMES[encoding] == "q16":
+        relative += 8 * dims
+    dt_offset = relative
+    relative += 4 * frame_count
+    relative += (2 if _ENCODING_NAMES[encoding] == "q16" else 4) * frame_count * joint_count * dims
+    relative += _pad4(relative)
+    return FrameBlock(
+        offset=offset,
+        length=relative,
+        encoding=_ENCODING_NAMES[encoding],
+        dims=dims,
+        joints=joints,
+        frame_start=frame_start,
+        frame_count=frame_count,
+        crc32=crc32,
+        bounds_offset=bounds_offset,
+        dt_offset=dt_offset,
+        values_offset=dt_offset + 4 * frame_count,
+    )
+
+
+def _typed(view: memoryview, start: int, count: int, typecode: str) -> list[Any]:
+    width = 2 if typecode == "h" else 4
+    chunk = view[start : start + count * width]
+    try:
+        if _LITTLE_ENDIAN:
+            typed = chunk.cast(typecode)
+            values = typed.tolist()
+            typed.release()
+            return values
+        swapped = array(typecode, chunk.tobytes())
+        swapped.byteswap()
+        return swapped.tolist()
+    finally:
+        chunk.release()
+
+
+def _decode_frames(view: memoryview, block: FrameBlock, first: int, last: int) -> list[dict[str, Any]]:
+    stride = len(block.joints) * block.dims
+    base = block.offset
+    dt = _typed(view, base + block.dt_offset + 4 * first, last - first, "f")
+    if block.encoding == "q16":
+        bounds = _typed(view, base + block.bounds_offset, 2 * block.dims, "f")
+        lo, hi = bounds[: block.dims], bounds[block.dims :]
+        raw = _typed(view, base + block.values_offset + 2 * first * stride, (last - first) * stride, "h")
+        values = [
+            math.nan
+            if value == _Q16_MISSING
+            else lo[index % block.dims] + (value + _Q16_SPAN // 2) / _Q16_SPAN * (hi[index % block.dims] - lo[index % block.dims])
+            for index, value in enumerate(raw)
+        ]
+    else:
+        values = _typed(view, base + block.values_offset + 4 * first * stride, (last - first) * stride, "f")
+    frames = []
+    for frame_index in range(last - first):
+        joints: dict[str, list[float]] = {}
+        for joint_index, name in enumerate(block.joints):
+            start = frame_index * stride + joint_index * block.dims
+            xy = values[start : start + block.dims]
+            if xy[0] == xy[0]:
+                joints[name] = [round(value, 6) for value in xy]
+        frames.append({"frame_index": block.frame_start + first + frame_index, "dt_sec": round(dt[frame_index], 6), "joints": joints})
+    return frames
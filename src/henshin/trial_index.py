@@ -0,0 +1,282 @@
+"""Persistent summary index for new-route trials and replays.
+
+The trial store keeps one directory per TransformSession. Listing endpoints and
+the Quest "latest" polls only need summaries, so they read this index instead of
+parsing every session document on each request.
+
+Summaries live in ``index.json`` (the snapshot) plus ``index.log``, an append
+log of summary upserts. An event append writes one compact log line instead of
+rewriting the snapshot, and readers fold new log lines into the cached index.
+Every ``COMPACT_EVERY`` lines the log is folded into a new snapshot. Each line
+carries the snapshot generation it applies to, so lines already folded into a
+newer snapshot are ignored.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+INDEX_FILENAME = "index.json"
+LOG_FILENAME = "index.log"
+INDEX_SCHEMA_VERSION = "0.1"
+COMPACT_EVERY = 256
+
+# Trial-derived fields copied onto an existing replay summary when the trial moves on.
+REPLAY_TRIAL_FIELDS = ("suit_id", "state", "event_count", "last_event_type")
+
+_WRITE_LOCK = threading.Lock()
+_CACHE_LOCK = threading.Lock()
+_CACHE: dict[Path, "_Folded"] = {}
+
+
+def summary_sort_key(summary: dict[str, Any]) -> tuple[str, str]:
+    return (str(summary.get("updated_at") or ""), str(summary.get("session_id") or ""))
+
+
+@dataclass(frozen=True, slots=True)
+class SummaryQuery:
+    """Filters and keyset position for a summary listing (newest first).
+
+    ``after`` is the ``(updated_at, session_id)`` key of the last summary on the
+    previous page. ``since`` is inclusive and ``until`` exclusive; both compare
+    against ``updated_at`` as UTC ISO-8601 strings.
+    """
+
+    limit: int | None = None
+    after: tuple[str, str] | None = None
+    suit_id: str | None = None
+    state: str | None = None
+    since: str | None = None
+    until: str | None = None
+
+
+def select_summaries(summaries: list[dict[str, Any]], query: SummaryQuery) -> tuple[list[dict[str, Any]], bool]:
+    """Return one page from summaries already sorted by ``summary_sort_key`` descending.
+
+    The start position is found by bisection, so the cost depends on the page
+    and the filters, not on how many newer summaries precede the cursor.
+    """
+
+    start = 0
+    if query.after is not None:
+        after = query.after
+        start = bisect_left(summaries, True, key=lambda summary: summary_sort_key(summary) < after)
+    if query.until is not None:
+        until = query.until
+        start = max(start, bisect_left(summaries, True, key=lambda summary: summary_sort_key(summary)[0] < until))
+    page: list[dict[str, Any]] = []
+    for summary in summaries[start:]:
+        if query.since is not None and summary_sort_key(summary)[0] < query.since:
+            break
+        if query.suit_id is not None and summary.get("suit_id") != query.suit_id:
+            continue
+        if query.state is not None and summary.get("state") != query.state:
+            continue
+        if query.limit is not None and len(page) == query.limit:
+            return page, True
+        page.append(summary)
+    return page, False
+
+
+def _empty_index() -> dict[str, Any]:
+    return {"schema_version": INDEX_SCHEMA_VERSION, "revision": 0, "generation": 0, "trials": [], "replays": []}
+
+
+def _sorted_summaries(summaries: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return sorted(summaries, key=summary_sort_key, reverse=True)
+
+
+def _upsert(summaries: list[dict[str, Any]], summary: dict[str, Any]) -> None:
+    """Replace or insert ``summary`` in place, keeping the newest-first order."""
+
+    session_id = summary.get("session_id")
+    key = summary_sort_key(summary)
+    for position, item in enumerate(summaries):
+        if item.get("session_id") == session_id:
+            if summary_sort_key(item) == key:
+                summaries[position] = summary
+                return
+            del summaries[position]
+            break
+    summaries.insert(bisect_left(summaries, True, key=lambda item: summary_sort_key(item) <= key), summary)
+
+
+def _apply(data: dict[str, Any], record: dict[str, Any]) -> None:
+    summary = record["summary"]
+    if record["kind"] == "replay":
+        _upsert(data["replays"], summary)
+    else:
+        _upsert(data["trials"], summary)
+        session_id = summary.get("session_id")
+        data["replays"] = [
+            {**replay, **{key: summary.get(key) for key in REPLAY_TRIAL_FIELDS}}
+            if replay.get("session_id") == session_id
+            else replay
+            for replay in data["replays"]
+        ]
+    data["revision"] = int(data.get("revision") or 0) + 1
+
+
+def _stamp(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+@dataclass(slots=True)
+class _Folded:
+    """A snapshot with the log folded in up to ``log_offset`` bytes."""
+
+    snapshot_stamp: tuple[int, int]
+    log_stamp: tuple[int, int] | None
+    log_offset: int
+    log_entries: int
+    data: dict[str, Any]
+
+
+class TrialIndex:
+    """Trial and replay summaries ordered by ``updated_at`` (newest first)."""
+
+    def __init__(self, trial_store_root: Path, *, compact_every: int = COMPACT_EVERY) -> None:
+        self.trial_store_root = trial_store_root
+        self.path = trial_store_root / INDEX_FILENAME
+        self.log_path = trial_store_root / LOG_FILENAME
+        self.compact_every = compact_every
+
+    def exists(self) -> bool:
+        return self.path.is_file()
+
+    def load(self) -> dict[str, Any] | None:
+        """Return the folded index, or None when the snapshot is missing or unreadable."""
+
+        folded = self._fold()
+        return folded.data if folded is not None else None
+
+    def version(self) -> str | None:
+        """A token that changes on every index write, or None without an index."""
+
+        folded = self._fold()
+        if folded is None:
+            return None
+        mtime_ns = max(folded.snapshot_stamp[0], folded.log_stamp[0] if folded.log_stamp else 0)
+        return f"{int(folded.data.get('revision') or 0)}-{mtime_ns:x}"
+
+    def trials(self) -> list[dict[str, Any]]:
+        data = self.load() or _empty_index()
+        return list(data["trials"])
+
+    def replays(self) -> list[dict[str, Any]]:
+        data = self.load() or _empty_index()
+        return list(data["replays"])
+
+    def upsert_trial(self, summary: dict[str, Any]) -> None:
+        self._append({"kind": "trial", "summary": summary})
+
+    def upsert_replay(self, summary: dict[str, Any]) -> None:
+        self._append({"kind": "replay", "summary": summary})
+
+    def rebuild(self, trial_summaries: list[dict[str, Any]], replay_summaries: list[dict[str, Any]]) -> dict[str, Any]:
+        with _WRITE_LOCK:
+            folded = self._fold()
+            previous = folded.data if folded is not None else _empty_index()
+            data = _empty_index()
+            data["revision"] = int(previous.get("revision") or 0) + 1
+            data["generation"] = int(previous.get("generation") or 0)
+            data["trials"] = _sorted_summaries(trial_summaries)
+            data["replays"] = _sorted_summaries(replay_summaries)
+            self._write_snapshot(data)
+        return data
+
+    def _append(self, record: dict[str, Any]) -> None:
+        with _WRITE_LOCK:
+            folded = self._fold()
+            if folded is None or folded.log_entries + 1 >= self.compact_every:
+                data = self._copy(folded.data if folded is not None else _empty_index())
+                _apply(data, record)
+                self._write_snapshot(data)
+                return
+            line = {"generation": int(folded.data.get("generation") or 0), **record}
+            with self.log_path.open("a", encoding="utf-8") as fp:
+                fp.write(json.dumps(line, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def _fold(self) -> _Folded | None:
+        # A compaction replaces the snapshot before truncating the log; if the
+        # snapshot changes while the log is read, read both again.
+        for _ in range(3):
+            snapshot_stamp = _stamp(self.path)
+            if snapshot_stamp is None:
+                return None
+            log_stamp = _stamp(self.log_path)
+            with _CACHE_LOCK:
+                cached = _CACHE.get(self.path)
+            if cached is not None and cached.snapshot_stamp == snapshot_stamp and cached.log_stamp == log_stamp:
+                return cached
+            if cached is None or cached.snapshot_stamp != snapshot_stamp or (log_stamp or (0, 0))[1] < cached.log_offset:
+                data = self._read_snapshot()
+                if data is None:
+                    return None
+                cached = _Folded(snapshot_stamp, None, 0, 0, data)
+            folded = self._fold_log(cached, log_stamp)
+            if _stamp(self.path) != snapshot_stamp:
+                continue
+            with _CACHE_LOCK:
+                _CACHE[self.path] = folded
+            return folded
+        return None
+
+    def _read_snapshot(self) -> dict[str, Any] | None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or not isinstance(data.get("trials"), list) or not isinstance(data.get("replays"), list):
+            return None
+        return data
+
+    def _fold_log(self, base: _Folded, log_stamp: tuple[int, int] | None) -> _Folded:
+        try:
+            with self.log_path.open("rb") as fp:
+                fp.seek(base.log_offset)
+                chunk = fp.read()
+        except OSError:
+            chunk = b""
+        # Only complete lines are folded; a line still being written is read next time.
+        complete = chunk[: chunk.rfind(b"\n") + 1]
+        data = self._copy(base.data)
+        generation = int(data.get("generation") or 0)
+        entries = base.log_entries
+        for raw in complete.splitlines():
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                continue
+            if not isinstance(record, dict) or record.get("generation") != generation:
+                continue
+            if record.get("kind") in ("trial", "replay") and isinstance(record.get("summary"), dict):
+                _apply(data, record)
+                entries += 1
+        return _Folded(base.snapshot_stamp, log_stamp, base.log_offset + len(complete), entries, data)
+
+    @staticmethod
+    def _copy(data: dict[str, Any]) -> dict[str, Any]:
+        return {**data, "trials": list(data["trials"]), "replays": list(data["replays"])}
+
+    def _write_snapshot(self, data: dict[str, Any]) -> None:
+        data["generation"] = int(data.get("generation") or 0) + 1
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n"
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(text, encoding="utf-8")
+        tmp_path.replace(self.path)
+        self.log_path.unlink(missing_ok=True)
+        snapshot_stamp = _stamp(self.path)
+        if snapshot_stamp is not None:
+            with _CACHE_LOCK:
+                _CACHE[self.path] = _Folded(snapshot_stamp, None, 0, 0, data)
@@ -0,0 +1,166 @@
+"""Content-addressed cache for Sakura TTS audio.
+
+Speech is keyed by a SHA-256 of everything that changes the audio: the text,
+``tts_model``, ``tts_voice``, ``tts_format`` and ``base_url``. Entries live
+under ``<sessions root>/_cache/tts`` as ``<key>.<format>`` plus a ``<key>.json``
+sidecar. Sessions get a hard link to the cached file (a copy when the
+filesystem cannot link), so evicting an entry never breaks a session that
+already uses it. An entry evicted between ``get`` and ``link_into`` is a miss.
+
+The cache is bounded by ``max_bytes``. Entries are evicted oldest first by
+mtime, and a hit refreshes the mtime.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+from .sakura_ai_engine import SakuraAIEngineClient, SakuraAIEngineConfig, SpeechResult
+
+DEFAULT_TTS_CACHE_MAX_BYTES = 256 * 1024 * 1024
+TTS_CACHE_DIRNAME = "tts"
+# Shared by every TTSCache so concurrent sessions do not evict under each other.
+_CACHE_LOCK = threading.Lock()
+
+
+def tts_cache_key(text: str, config: SakuraAIEngineConfig) -> str:
+    material = [text, config.tts_model, config.tts_voice, config.tts_format, config.base_url.rstrip("/")]
+    return hashlib.sha256(json.dumps(material, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+@dataclass(slots=True)
+class CachedSpeech:
+    key: str
+    path: Path
+    hit: bool
+    model: str
+    voice: str
+    response_format: str
+
+
+class TTSCache:
+    def __init__(self, root: str | Path, *, max_bytes: int = DEFAULT_TTS_CACHE_MAX_BYTES) -> None:
+        if max_bytes < 0:
+            raise ValueError("max_bytes must be non-negative")
+        self.directory = Path(root) / "_cache" / TTS_CACHE_DIRNAME
+        self.max_bytes = max_bytes
+
+    def get(self, text: str, config: SakuraAIEngineConfig) -> CachedSpeech | None:
+        key = tts_cache_key(text, config)
+        path = self.directory / f"{key}.{config.tts_format}"
+        with _CACHE_LOCK:
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                return None
+        return CachedSpeech(key, path, True, config.tts_model, config.tts_voice, config.tts_format)
+
+    def put(self, result: SpeechResult, config: SakuraAIEngineConfig) -> CachedSpeech:
+        key = tts_cache_key(result.input_text, config)
+        path = self.directory / f"{key}.{result.response_format}"
+        meta = {
+            "key": key,
+            "text": result.input_text,
+            "model": result.model,
+            "voice": result.voice,
+            "response_format": result.response_format,
+            "base_url": config.base_url,
+            "bytes": len(result.audio_bytes),
+        }
+        with _CACHE_LOCK:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(path.name + ".tmp")
+            tmp_path.write_bytes(result.audio_bytes)
+            tmp_path.replace(path)
+            meta_text = json.dumps(meta, ensure_ascii=False, indent=2) + "\n"
+            path.with_suffix(".json").write_text(meta_text, encoding="utf-8")
+            self._evict(keep=path)
+        return CachedSpeech(key, path, False, result.model, result.voice, result.response_format)
+
+    def synthesize(
+        self,
+        text: str,
+        config: SakuraAIEngineConfig,
+        client: SakuraAIEngineClient | None = None,
+    ) -> CachedSpeech:
+        """Return cached speech for ``text``, calling Sakura only on a miss."""
+
+        cached = self.get(text, config)
+        if cached is not None:
+            return cached
+        if client is None:
+            client = SakuraAIEngineClient(config)
+        return self.put(client.synthesize_speech(text), config)
+
+    @staticmethod
+    def link_into(cached: CachedSpeech, destination: str | Path) -> Path | None:
+        """Hard-link ``cached`` to ``destination``, copying when linking is not possible.
+
+        Returns ``None`` when the entry was evicted after ``get``; callers treat
+        that as a miss.
+        """
+
+        target = Path(destination)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.unlink(missing_ok=True)
+        with _CACHE_LOCK:
+            # Eviction also runs under the lock, so the entry cannot vanish past this check.
+            if not cached.path.is_file():
+                return None
+            try:
+                os.link(cached.path, target)
+            except OSError:
+                shutil.copy2(cached.path, target)
+        return target
+
+    def entries(self) -> list[Path]:
+        if not self.directory.is_dir():
+            return []
+        return [path for path in self.directory.iterdir() if path.suffix not in (".json", ".tmp") and path.is_file()]
+
+    def total_bytes(self) -> int:
+        return sum(path.stat().st_size for path in self.entries())
+
+    def _evict(self, *, keep: Path) -> list[str]:
+        entries = []
+        for path in self.entries():
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        evicted = []
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            path.with_suffix(".json").unlink(missing_ok=True)
+            total -= size
+            evicted.append(path.stem)
+        return evicted
+
+
+def prewarm_tts_cache(
+    cache: TTSCache,
+    texts: Iterable[str],
+    config: SakuraAIEngineConfig,
+    *,
+    client: SakuraAIEngineClient | None = None,
+) -> list[dict[str, Any]]:
+    """Synthesize every text that is not cached yet; one report entry per text."""
+
+    client = client or SakuraAIEngineClient(config)
+    report = []
+    for text in dict.fromkeys(texts):
+        cached = cache.synthesize(text, config, client)
+        report.append(
+            {"key": cached.key, "hit": cached.hit, "path": str(cached.path), "bytes": cached.path.stat().st_size}
+        )
+    return report
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import json
 import re
+import threading
 from pathlib import Path
 from typing import Any
 
@@ -36,6 +37,11 @@ _SCHEMA_KIND_TO_FILE = {
     "replay-script": "replay-script.v0.1.schema.json",
 }
 
+# Kinds validated against a single definition of a parent schema.
+_SCHEMA_KIND_TO_DEF = {
+    "transform-event": ("transform-session", "transformEvent"),
+}
+
 
 def load_json(path: str | Path) -> dict[str, Any]:
     p = Path(path)
@@ -154,26 +160,211 @@ def _schema_dir() -> Path:
     return Path(__file__).resolve().parents[2] / "schemas"
 
 
-def validate_against_schema(payload: dict[str, Any], kind: str) -> None:
-    schema_file = _SCHEMA_KIND_TO_FILE.get(kind)
+_REGISTRY_LOCK = threading.Lock()
+_COMPILED_VALIDATORS: dict[str, tuple[tuple[int, int], Any]] = {}
+_FAST_PATH_SPECS: dict[str, tuple[tuple[int, int], dict[str, Any]]] = {}
+_JSONSCHEMA: tuple[Any, Any] | None = None
+
+
+def _jsonschema() -> tuple[Any, Any]:
+    global _JSONSCHEMA
+    if _JSONSCHEMA is None:
+        try:
+            from jsonschema import Draft202012Validator
+            from jsonschema.exceptions import ValidationError
+        except ImportError as exc:
+            raise ValueError("jsonschema is required for runtime schema validation") from exc
+        _JSONSCHEMA = (Draft202012Validator, ValidationError)
+    return _JSONSCHEMA
+
+
+def _schema_source(kind: str) -> tuple[Path, str | None]:
+    parent_kind, definition = _SCHEMA_KIND_TO_DEF.get(kind, (kind, None))
+    schema_file = _SCHEMA_KIND_TO_FILE.get(parent_kind)
     if not schema_file:
         raise ValueError(f"Unsupported schema kind: {kind}")
-    try:
-        from jsonschema import Draft202012Validator
-        from jsonschema.exceptions import ValidationError
-    except ImportError as exc:
-        raise ValueError("jsonschema is required for runtime schema validation") from exc
+    return _schema_dir() / schema_file, definition
+
+
+def _file_stamp(path: Path) -> tuple[int, int]:
+    stat = path.stat()
+    return (stat.st_mtime_ns, stat.st_size)
+
 
-    schema = load_json(_schema_dir() / schema_file)
-    validator = Draft202012Validator(schema)
+def schema_validator(kind: str) -> Any:
+    """Return the compiled validator for ``kind``, recompiling when the schema file changes."""
+
+    path, definition = _schema_source(kind)
+    stamp = _file_stamp(path)
+    with _REGISTRY_LOCK:
+        cached = _COMPILED_VALIDATORS.get(kind)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    validator_cls, _ = _jsonschema()
+    schema = load_json(path)
+    if definition is not None:
+        schema = {"$defs": schema.get("$defs", {}), "$ref": f"#/$defs/{definition}"}
+    validator = validator_cls(schema)
+    with _REGISTRY_LOCK:
+        _COMPILED_VALIDATORS[kind] = (stamp, validator)
+    return validator
+
+
+def warm_schema_validators(kinds: list[str] | None = None) -> list[str]:
+    """Import jsonschema and compile validators up front (e.g. at server start)."""
+
+    selected = kinds or [*_SCHEMA_KIND_TO_FILE, *_SCHEMA_KIND_TO_DEF]
+    for kind in selected:
+        schema_validator(kind)
+    return list(selected)
+
+
+def validate_against_schema(payload: dict[str, Any], kind: str) -> None:
+    validator = schema_validator(kind)
+    _, validation_error = _jsonschema()
     try:
         validator.validate(payload)
-    except ValidationError as exc:
+    except validation_error as exc:
         path = ".".join(str(p) for p in exc.absolute_path)
         label = f"{kind}.{path}" if path else kind
         raise ValueError(f"{label}: {exc.message}") from exc
 
 
+def _fast_path_spec(kind: str, build: Any) -> dict[str, Any]:
+    path, _ = _schema_source(kind)
+    stamp = _file_stamp(path)
+    with _REGISTRY_LOCK:
+        cached = _FAST_PATH_SPECS.get(kind)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    spec = build(load_json(path))
+    with _REGISTRY_LOCK:
+        _FAST_PATH_SPECS[kind] = (stamp, spec)
+    return spec
+
+
+def _build_transform_event_spec(schema: dict[str, Any]) -> dict[str, Any]:
+    defs = schema["$defs"]
+    event = defs["transformEvent"]
+    actor = defs["actor"]
+    return {
+        "properties": set(event["properties"]),
+        "required": tuple(event["required"]),
+        "event_id": re.compile(defs["eventId"]["pattern"]),
+        "session_id": re.compile(defs["sessionId"]["pattern"]),
+        "event_types": set(defs["transformEventType"]["enum"]),
+        "states": set(defs["transformState"]["enum"]),
+        "actor_properties": set(actor["properties"]),
+        "actor_types": set(actor["properties"]["type"]["enum"]),
+        "actor_id_max": actor["properties"]["id"]["maxLength"],
+        "idempotency_key_max": event["properties"]["idempotency_key"]["maxLength"],
+    }
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_member(value: Any, allowed: set[str]) -> bool:
+    # Client JSON may put a list or object where an enum string belongs.
+    return isinstance(value, str) and value in allowed
+
+
+def _transform_event_is_valid(event: Any, spec: dict[str, Any]) -> bool:
+    if not isinstance(event, dict) or not spec["properties"].issuperset(event):
+        return False
+    if any(key not in event for key in spec["required"]):
+        return False
+    if not isinstance(event["event_id"], str) or not spec["event_id"].search(event["event_id"]):
+        return False
+    if not isinstance(event["session_id"], str) or not spec["session_id"].search(event["session_id"]):
+        return False
+    if not _is_int(event["sequence"]) or event["sequence"] < 0:
+        return False
+    if not _is_member(event["event_type"], spec["event_types"]) or not isinstance(event["occurred_at"], str):
+        return False
+    for key in ("state_before", "state_after"):
+        if key in event and not _is_member(event[key], spec["states"]):
+            return False
+    if "payload" in event and not isinstance(event["payload"], dict):
+        return False
+    if "idempotency_key" in event:
+        key = event["idempotency_key"]
+        if not isinstance(key, str) or not 1 <= len(key) <= spec["idempotency_key_max"]:
+            return False
+    if "actor" in event:
+        actor = event["actor"]
+        if not isinstance(actor, dict) or not spec["actor_properties"].issuperset(actor):
+            return False
+        if not _is_member(actor.get("type"), spec["actor_types"]):
+            return False
+        if "id" in actor and (not isinstance(actor["id"], str) or not 1 <= len(actor["id"]) <= spec["actor_id_max"]):
+            return False
+    return True
+
+
+def validate_transform_event(event: dict[str, Any]) -> None:
+    """Fast path for a single TransformEvent; falls back to jsonschema for the error message."""
+
+    if _transform_event_is_valid(event, _fast_path_spec("transform-event", _build_transform_event_spec)):
+        return
+    validate_against_schema(event, "transform-event")
+
+
+def _build_replay_header_spec(schema: dict[str, Any]) -> dict[str, Any]:
+    defs = schema["$defs"]
+    source_events = schema["properties"]["source_events"]
+    return {
+        "properties": set(schema["properties"]),
+        "required": tuple(schema["required"]),
+        "schema_version": schema["properties"]["schema_version"]["const"],
+        "replay_id": re.compile(defs["replayId"]["pattern"]),
+        "session_id": re.compile(defs["sessionId"]["pattern"]),
+        "manifest_id": re.compile(defs["manifestId"]["pattern"]),
+        "event_id": re.compile(defs["eventId"]["pattern"]),
+        "source_properties": set(source_events["properties"]),
+        "source_version": source_events["properties"]["transform_session_schema_version"]["const"],
+    }
+
+
+def validate_replay_script_header(replay: dict[str, Any]) -> None:
+    """Check the top-level ReplayScript fields without walking the timeline.
+
+    Replay scripts are fully validated when they are written; listing and index
+    rebuilds only need to know a stored file is a replay for the right session.
+    """
+
+    spec = _fast_path_spec("replay-script", _build_replay_header_spec)
+    if not isinstance(replay, dict) or not spec["properties"].issuperset(replay):
+        raise ValueError("replay-script: unexpected top-level properties")
+    missing = [key for key in spec["required"] if key not in replay]
+    if missing:
+        raise ValueError(f"replay-script missing required fields: {missing}")
+    if replay["schema_version"] != spec["schema_version"]:
+        raise ValueError(f"replay-script.schema_version must be '{spec['schema_version']}'")
+    for key in ("replay_id", "session_id", "manifest_id"):
+        if not isinstance(replay[key], str) or not spec[key].search(replay[key]):
+            raise ValueError(f"replay-script.{key} format is invalid")
+    source_events = replay["source_events"]
+    if not isinstance(source_events, dict) or not spec["source_properties"].issuperset(source_events):
+        raise ValueError("replay-script.source_events must be an object")
+    if source_events.get("transform_session_schema_version") != spec["source_version"]:
+        raise ValueError("replay-script.source_events.transform_session_schema_version is invalid")
+    event_ids = source_events.get("event_ids")
+    if not isinstance(event_ids, list) or not event_ids:
+        raise ValueError("replay-script.source_events.event_ids must be a non-empty array")
+    if not all(isinstance(event_id, str) and spec["event_id"].search(event_id) for event_id in event_ids):
+        raise ValueError("replay-script.source_events.event_ids format is invalid")
+    if not _is_number(replay["duration_sec"]) or replay["duration_sec"] < 0:
+        raise ValueError("replay-script.duration_sec must be a non-negative number")
+    if not isinstance(replay["timeline"], list):
+        raise ValueError("replay-script.timeline must be an array")
+
+
 def validate_file(path: str | Path, kind: str) -> None:
     payload = load_json(path)
     if kind == "suitspec":
@@ -182,7 +373,7 @@ def validate_file(path: str | Path, kind: str) -> None:
     if kind == "morphotype":
         validate_morphotype(payload)
         return
-    if kind in _SCHEMA_KIND_TO_FILE:
+    if kind in _SCHEMA_KIND_TO_FILE or kind in _SCHEMA_KIND_TO_DEF:
         validate_against_schema(payload, kind)
         return
     raise ValueError(f"Unsupported kind: {kind}")
@@ -0,0 +1,54 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from henshin.body_sim_format import TRANSFORM_CHANNELS, read_body_sim, write_body_sim_binary
+from henshin.bodyfit import BodyFrame, BodySequenceStream, run_body_sequence
+
+_POSE = {
+    "left_shoulder": (0.62, 0.38),
+    "right_shoulder": (0.38, 0.38),
+    "left_elbow": (0.67, 0.48),
+    "right_elbow": (0.33, 0.48),
+    "left_wrist": (0.70, 0.61),
+    "right_wrist": (0.225, 0.625),
+    "left_hip": (0.57, 0.58),
+    "right_hip": (0.43, 0.58),
+}
+
+
+class TestBodySimFormat(unittest.TestCase):
+    def test_binary_round_trips_body_sequence_at_float32_precision(self) -> None:
+        frames = [BodyFrame(dt_sec=1 / 30, joints_xy01=_POSE) for _ in range(20)]
+        expected = run_body_sequence(frames, hold_to_equip_sec=0.3)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "body-sim.bsim"
+            summary = write_body_sim_binary(path, BodySequenceStream(iter(frames), hold_to_equip_sec=0.3))
+            body_sim = read_body_sim(path)
+            size = path.stat().st_size
+        exported = body_sim.to_json()
+
+        self.assertEqual(summary["equip_frame"], expected["equip_frame"])
+        self.assertEqual((body_sim.frame_count, body_sim.segments), (20, expected["segments"]))
+        self.assertEqual(len(body_sim.channels["position_x"]), 20 * len(expected["segments"]))
+        self.assertLess(size, len(json.dumps(expected)) / 4)
+        self.assertEqual({key: exported[key] for key in ("equipped", "equip_frame", "trigger_joint", "segments")},
+                         {key: expected[key] for key in ("equipped", "equip_frame", "trigger_joint", "segments")})
+        for want, got in zip(expected["frames"], exported["frames"]):
+            self.assertEqual((got["index"], got["equipped"], got["hold_sec"]), (want["index"], want["equipped"], want["hold_sec"]))
+            for segment, transform in want["segments"].items():
+                for channel in TRANSFORM_CHANNELS:
+                    self.assertAlmostEqual(got["segments"][segment][channel], transform[channel], places=6)
+
+    def test_rejects_files_that_are_not_body_sims(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "body-sim.bsim"
+            path.write_bytes(b'{"frames": []}')
+
+            with self.assertRaises(ValueError):
+                read_body_sim(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,18 @@
+import io
+import json
 import unittest
 
-from henshin.bodyfit import BodyFrame, CoverScale, Vec2, norm_to_world, run_body_sequence
+from henshin.bodyfit import BodyFrame, BodySequenceStream, CoverScale, Vec2, norm_to_world, run_body_sequence
+from henshin.sim_stream import write_ndjson, write_sim_json
+
+_POSE = {
+    "left_shoulder": (0.62, 0.38),
+    "right_shoulder": (0.38, 0.38),
+    "left_elbow": (0.67, 0.48),
+    "right_elbow": (0.33, 0.48),
+    "left_wrist": (0.70, 0.61),
+    "right_wrist": (0.225, 0.625),
+}
 
 
 class TestBodyFit(unittest.TestCase):
@@ -44,6 +56,47 @@ class TestBodyFit(unittest.TestCase):
         self.assertGreaterEqual(out["equip_frame"], 0)
         self.assertIn("right_forearm", out["segments"])
 
+    def test_stream_reports_equip_before_later_frames_are_read(self) -> None:
+        pulled = []
+
+        def frames():
+            for index in range(10):
+                pulled.append(index)
+                yield BodyFrame(dt_sec=0.1, joints_xy01=_POSE)
+
+        records = BodySequenceStream(frames(), hold_to_equip_sec=0.3).records()
+        seen = []
+        for record in records:
+            seen.append(record["type"])
+            if record["type"] == "equip":
+                break
+
+        self.assertEqual(seen, ["header", "frame", "frame", "equip"])
+        self.assertEqual(record["index"], 2)
+        self.assertEqual(pulled, [0, 1, 2])
+
+    def test_stream_writers_match_run_body_sequence(self) -> None:
+        frames = [BodyFrame(dt_sec=0.1, joints_xy01=_POSE) for _ in range(6)]
+        expected = run_body_sequence(frames, hold_to_equip_sec=0.3)
+
+        document = io.StringIO()
+        summary = write_sim_json(document, BodySequenceStream(iter(frames), hold_to_equip_sec=0.3))
+        lines = io.StringIO()
+        count = write_ndjson(lines, BodySequenceStream(iter(frames), hold_to_equip_sec=0.3).records())
+        records = [json.loads(line) for line in lines.getvalue().splitlines()]
+
+        self.assertEqual(json.loads(document.getvalue()), expected)
+        self.assertEqual(summary["equip_frame"], expected["equip_frame"])
+        self.assertEqual(count, len(records))
+        self.assertEqual([record["frame"] for record in records if record["type"] == "frame"], expected["frames"])
+        self.assertEqual(records[-1], {"type": "end", "frame_count": 6, "equipped": True, "equip_frame": 2})
+
+    def test_empty_stream_writes_valid_document(self) -> None:
+        document = io.StringIO()
+        write_sim_json(document, BodySequenceStream([]))
+
+        self.assertEqual(json.loads(document.getvalue()), run_body_sequence([]))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,85 @@
+import math
+import random
+import unittest
+
+from henshin.bodyfit import BodyFrame, CoverScale, Vec2, run_body_sequence
+from henshin.bodyfit_batch import body_frames_to_arrays, columns_to_frames, numpy_available, run_body_sequence_batch
+
+_POSE = {
+    "left_shoulder": (0.62, 0.38),
+    "right_shoulder": (0.38, 0.38),
+    "left_elbow": (0.67, 0.48),
+    "right_elbow": (0.33, 0.48),
+    "left_wrist": (0.70, 0.61),
+    "right_wrist": (0.225, 0.625),
+    "left_hip": (0.57, 0.58),
+    "right_hip": (0.43, 0.58),
+    "left_knee": (0.57, 0.76),
+    "right_knee": (0.43, 0.76),
+    "left_ankle": (0.57, 0.92),
+    "right_ankle": (0.43, 0.92),
+}
+
+
+def _capture(frame_count: int, seed: int = 7) -> list[BodyFrame]:
+    rng = random.Random(seed)
+    frames = []
+    for index in range(frame_count):
+        joints = {}
+        for name, (x, y) in _POSE.items():
+            # Drop joints now and then so followers fall back to the dock pose mid-capture.
+            if name == "left_knee" and 40 <= index < 45:
+                continue
+            wobble = 0.03 * math.sin(index / 9 + len(name))
+            joints[name] = (x + wobble + rng.uniform(-0.01, 0.01), y - wobble + rng.uniform(-0.01, 0.01))
+        if index < 3:
+            joints["right_wrist"] = (0.9, 0.1)
+        frames.append(BodyFrame(dt_sec=rng.choice([1 / 60, 1 / 30, 0.05]), joints_xy01=joints))
+    return frames
+
+
+@unittest.skipUnless(numpy_available(), "numpy is not installed")
+class TestBodyFitBatch(unittest.TestCase):
+    def test_batch_engine_matches_frame_engine(self) -> None:
+        frames = _capture(240)
+        options = {
+            "mirror": True,
+            "cover_scale": CoverScale(1.2, 0.9),
+            "dock_center": Vec2(0.55, -0.25),
+            "hold_to_equip_sec": 0.3,
+            "trigger_joint": "right_wrist",
+        }
+        expected = run_body_sequence(frames, **options)
+        xy, dt, joint_names = body_frames_to_arrays(frames)
+        result = run_body_sequence_batch(xy, dt, joint_names, **options)
+        actual = columns_to_frames(result)
+
+        self.assertTrue(expected["equipped"])
+        self.assertEqual((result["equipped"], result["equip_frame"]), (expected["equipped"], expected["equip_frame"]))
+        self.assertEqual(result["segments"], expected["segments"])
+        self.assertEqual(result["transforms"].shape, (240, len(expected["segments"]), 7))
+        for want, got in zip(expected["frames"], actual):
+            self.assertEqual((got["index"], got["equipped"], got["hold_sec"]), (want["index"], want["equipped"], want["hold_sec"]))
+            self.assertAlmostEqual(got["dt_sec"], want["dt_sec"], places=12)
+            for name, transform in want["segments"].items():
+                for field, value in transform.items():
+                    self.assertAlmostEqual(got["segments"][name][field], value, places=9, msg=f"{got['index']} {name}.{field}")
+
+    def test_missing_trigger_joint_never_equips(self) -> None:
+        frames = _capture(20)
+        xy, dt, joint_names = body_frames_to_arrays(frames)
+
+        result = run_body_sequence_batch(xy, dt, joint_names, trigger_joint="tail")
+
+        self.assertEqual((result["equipped"], result["equip_frame"]), (False, -1))
+        self.assertEqual(columns_to_frames(result), run_body_sequence(frames, trigger_joint="tail")["frames"])
+
+    def test_shape_mismatch_is_rejected(self) -> None:
+        xy, dt, joint_names = body_frames_to_arrays(_capture(5))
+
+        with self.assertRaises(ValueError):
+            run_body_sequence_batch(xy[:, :3], dt, joint_names)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,20 @@
 import base64
+import gzip
+import http.client
 import json
+import socket
 import tempfile
+import threading
 import unittest
+from unittest import mock
+from http.server import ThreadingHTTPServer
 from pathlib import Path
 
 from henshin.dashboard_server import (
     DashboardHandler,
     GeneratePartsPayload,
     GenerationJob,
+    GenerationJobManager,
     IWHenshinVoicePayload,
     run_iw_henshin_voice,
 )
@@ -91,6 +98,127 @@ class TestDashboardServer(unittest.TestCase):
         self.assertEqual(response.body["trial_id"], "S-TRIAL-DASH-0001")
         self.assertTrue(response.body["summary"]["replay_script_path"].endswith("replay-script.json"))
 
+    def test_v1_json_supports_gzip_and_conditional_get(self) -> None:
+        root = Path(".").resolve()
+        jobs = GenerationJobManager(root)
+        server = ThreadingHTTPServer(
+            ("127.0.0.1", 0),
+            lambda *args, **kwargs: DashboardHandler(*args, directory=str(root), root=root, jobs=jobs, **kwargs),
+        )
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        def fetch(path: str, headers: dict[str, str]) -> tuple[http.client.HTTPResponse, bytes]:
+            conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            body = response.read()
+            conn.close()
+            return response, body
+
+        try:
+            first, first_body = fetch("/v1/catalog/parts", {"Accept-Encoding": "gzip"})
+            etag = first.getheader("ETag")
+            revalidated, revalidated_body = fetch(
+                "/v1/catalog/parts", {"If-None-Match": str(etag), "Accept-Encoding": "gzip"}
+            )
+            plain, _ = fetch("/v1/catalog/parts", {})
+            plain_revalidated, _ = fetch("/v1/catalog/parts", {"If-None-Match": str(etag)})
+            manifest, _ = fetch("/v1/manifests/MNF-20260424-SAMP", {})
+            manifest_again, _ = fetch("/v1/manifests/MNF-20260424-SAMP", {"If-None-Match": str(manifest.getheader("ETag"))})
+            missing, _ = fetch("/v1/manifests/MNF-20260424-NONE", {"If-None-Match": "*"})
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(first.status, 200)
+        self.assertEqual(first.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(first.getheader("Cache-Control"), "public, max-age=300")
+        self.assertEqual(json.loads(gzip.decompress(first_body))["catalog_id"], "PCAT-VIEWER-SEED-0001")
+        self.assertEqual(revalidated.status, 304)
+        self.assertEqual(revalidated_body, b"")
+        self.assertEqual(revalidated.getheader("ETag"), etag)
+        self.assertTrue(str(etag).endswith('-gzip"'))
+        self.assertEqual(plain.getheader("Content-Encoding"), None)
+        self.assertEqual(plain.getheader("ETag"), str(etag).removesuffix('-gzip"') + '"')
+        self.assertEqual(plain_revalidated.status, 304)
+        self.assertEqual(plain_revalidated.getheader("ETag"), plain.getheader("ETag"))
+        self.assertEqual(manifest.getheader("Cache-Control"), "no-cache")
+        self.assertEqual(manifest_again.status, 304)
+        self.assertEqual(missing.status, 404)
+
+    def test_invalid_post_content_length_closes_the_connection(self) -> None:
+        root = Path(".").resolve()
+        jobs = GenerationJobManager(root)
+        server = ThreadingHTTPServer(
+            ("127.0.0.1", 0),
+            lambda *args, **kwargs: DashboardHandler(*args, directory=str(root), root=root, jobs=jobs, **kwargs),
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            replies = []
+            for content_length in ("abc", "-1"):
+                with socket.create_connection(server.server_address, timeout=5) as conn:
+                    conn.sendall(
+                        b"POST /v1/trials HTTP/1.1\r\nHost: test\r\n"
+                        + f"Content-Length: {content_length}\r\n\r\n".encode("ascii")
+                        + b'{"suit_id": "x"}'
+                    )
+                    data = b""
+                    # The server must close the connection, so this ends at EOF instead of timing out.
+                    while chunk := conn.recv(4096):
+                        data += chunk
+                replies.append(data)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        for data in replies:
+            self.assertTrue(data.startswith(b"HTTP/1.0 400") or data.startswith(b"HTTP/1.1 400"))
+            self.assertIn(b"Content-Length must be a non-negative integer", data)
+
+    def test_trial_stream_uses_chunked_ndjson(self) -> None:
+        root = Path(".").resolve()
+        jobs = GenerationJobManager(root)
+        with tempfile.TemporaryDirectory() as tmp:
+            suit_store_root = Path(tmp) / "suits"
+            api = NewRouteApi(root, suit_store_root=suit_store_root)
+            api.post("/v1/suits", {"suitspec": json.loads(Path("examples/suitspec.sample.json").read_text(encoding="utf-8"))})
+            api.post("/v1/suits/VDA-AXIS-OP-00-0001/manifest", {"manifest_id": "MNF-20260424-ABCD"})
+            api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0001"})
+
+            class Handler(DashboardHandler):
+                def do_GET(self) -> None:
+                    with mock.patch("henshin.dashboard_server.NewRouteApi", lambda repo_root: NewRouteApi(repo_root, suit_store_root=suit_store_root)):
+                        super().do_GET()
+
+            server = ThreadingHTTPServer(
+                ("127.0.0.1", 0),
+                lambda *args, **kwargs: Handler(*args, directory=str(root), root=root, jobs=jobs, **kwargs),
+            )
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+            try:
+                conn.request("GET", "/v1/trials/S-TRIAL-UNIT-0001", headers={"Accept": "application/x-ndjson"})
+                response = conn.getresponse()
+                lines = response.read().decode("utf-8").splitlines()
+                conn.request("GET", "/v1/trials/S-TRIAL-UNIT-0001/replay?stream=1")
+                replay = conn.getresponse()
+                replay_lines = replay.read().decode("utf-8").splitlines()
+            finally:
+                conn.close()
+                server.shutdown()
+                server.server_close()
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("Transfer-Encoding"), "chunked")
+        self.assertTrue(response.getheader("Content-Type").startswith("application/x-ndjson"))
+        records = [json.loads(line) for line in lines]
+        self.assertEqual([record["type"] for record in records], ["header", "event", "end"])
+        self.assertEqual(records[1]["event"]["event_type"], "SESSION_CREATED")
+        self.assertEqual(json.loads(replay_lines[-1])["type"], "end")
+
     def test_generation_job_snapshot_tracks_progress(self) -> None:
         job = GenerationJob("job-1", GeneratePartsPayload(suitspec="examples/suitspec.sample.json"))
         job.emit({"type": "job_started", "stage": "scan", "status": "started", "requested_count": 2})
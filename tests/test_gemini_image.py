@@ -1,25 +1,38 @@
 import base64
 import json
 import os
+import threading
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from unittest.mock import patch
 
 from henshin.gemini_image import GeminiImageError, generate_image, resolve_api_key
 
 
-class _FakeHttpResponse:
-    def __init__(self, payload: dict):
-        self._payload = payload
+class _GeminiStub(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    payload: dict = {}
+    status = 200
 
-    def read(self) -> bytes:
-        return json.dumps(self._payload).encode("utf-8")
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", "0")))
+        body = json.dumps(self.payload).encode("utf-8")
+        self.send_response(self.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
 
-    def __enter__(self):
-        return self
+    def log_message(self, format: str, *args: object) -> None:
+        pass
 
-    def __exit__(self, exc_type, exc, tb):
-        return False
+
+def _serve(handler: type[BaseHTTPRequestHandler]) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
 
 
 class TestGeminiImage(unittest.TestCase):
@@ -63,11 +76,23 @@ class TestGeminiImage(unittest.TestCase):
             ],
         }
 
-        with patch("henshin.gemini_image.urlopen", return_value=_FakeHttpResponse(payload)):
-            result = generate_image(prompt="x", model_id="gemini-3-pro-image-preview", api_key="k")
-        self.assertEqual(result.mime_type, "image/png")
-        self.assertEqual(result.image_bytes, raw)
-        self.assertEqual(result.response_id, "resp-1")
+        handler = type("Handler", (_GeminiStub,), {"payload": payload})
+        server = _serve(handler)
+        try:
+            endpoint = "http://127.0.0.1:%d/v1beta" % server.server_address[1]
+            result = generate_image(
+                prompt="x", model_id="gemini-3-pro-image-preview", api_key="k", endpoint_base=endpoint
+            )
+            self.assertEqual(result.mime_type, "image/png")
+            self.assertEqual(result.image_bytes, raw)
+            self.assertEqual(result.response_id, "resp-1")
+
+            handler.status = 429
+            with self.assertRaisesRegex(GeminiImageError, "status=429"):
+                generate_image(prompt="x", model_id="gemini-3-pro-image-preview", api_key="k", endpoint_base=endpoint)
+        finally:
+            server.shutdown()
+            server.server_close()
 
 
 if __name__ == "__main__":
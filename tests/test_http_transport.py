@@ -0,0 +1,207 @@
+import json
+import os
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from henshin.http_transport import HTTPTransport, TransportError, default_transport
+from henshin.image_providers import _binary_request, _json_request
+from henshin.sakura_ai_engine import SakuraAIEngineClient, SakuraAIEngineConfig
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self) -> None:
+        if self.path == "/redirect":
+            self._reply(302, b"", extra={"Location": "/image.png"})
+        elif self.path == "/close":
+            self._reply(200, b"bye", extra={"Connection": "close"})
+        elif self.path == "/drop":
+            # Keep-alive response, then the connection is dropped as if it idled out.
+            self._reply(200, b"{}")
+            self.close_connection = True
+        elif self.path == "/image.png":
+            self._reply(200, b"\x89PNG" + b"x" * 200_000, content_type="image/png")
+        else:
+            self._reply(200, json.dumps({"path": self.path}).encode("utf-8"))
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length", "0")))
+        if self.path.endswith("/audio/speech"):
+            self._reply(200, b"RIFF" + body[:8], content_type="audio/wav")
+        elif self.path == "/fail":
+            self._reply(500, b"boom")
+        elif self.path == "/post-drop":
+            # The request is handled, but the connection drops before the response.
+            with self.server.lock:
+                self.server.posts += 1
+            self.close_connection = True
+        else:
+            self._reply(200, json.dumps({"echo": json.loads(body or b"null")}).encode("utf-8"))
+
+    def _reply(
+        self,
+        status: int,
+        body: bytes,
+        *,
+        content_type: str = "application/json",
+        extra: dict | None = None,
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (extra or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        if (extra or {}).get("Connection") == "close":
+            self.close_connection = True
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    """Records what it is asked to forward; CONNECT tunnels are refused."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self.server.seen.append(("GET", self.path, self.headers.get("Host"), self.headers.get("Proxy-Authorization")))
+        body = b"via proxy"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_CONNECT(self) -> None:
+        self.server.seen.append(("CONNECT", self.path, self.headers.get("Proxy-Authorization")))
+        self.send_response(502)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        self.close_connection = True
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+class TestHTTPTransport(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.connections = 0
+        self.server.posts = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = self.key = "http://127.0.0.1:%d" % self.server.server_address[1]
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_requests_reuse_one_connection(self) -> None:
+        transport = HTTPTransport()
+        for index in range(5):
+            response = transport.request("GET", f"{self.base}/status/{index}")
+            self.assertEqual(json.loads(response.body), {"path": f"/status/{index}"})
+        with transport.stream("GET", f"{self.base}/image.png") as response:
+            self.assertEqual(sum(len(chunk) for chunk in response.iter_chunks(16 * 1024)), 200_004)
+        failed = transport.request("POST", f"{self.base}/fail", body=b"{}")
+        self.assertEqual((failed.status, failed.body), (500, b"boom"))
+        self.assertEqual(transport.request("GET", f"{self.base}/redirect").content_type(), "image/png")
+
+        self.assertEqual(self.server.connections, 1)
+        metrics = transport.metrics()[self.key]
+        self.assertEqual(metrics["requests"], 9)
+        self.assertEqual(metrics["connections_opened"], 1)
+        self.assertEqual(metrics["connections_reused"], 8)
+        self.assertAlmostEqual(metrics["reuse_ratio"], 8 / 9, places=3)
+        self.assertGreater(metrics["handshake_ms_avg"], 0.0)
+        transport.close()
+
+    def test_closed_connections_are_replaced(self) -> None:
+        transport = HTTPTransport()
+        self.assertEqual(transport.request("GET", f"{self.base}/close").body, b"bye")
+        self.assertEqual(transport.request("GET", f"{self.base}/after").status, 200)
+        self.assertEqual(self.server.connections, 2)
+
+        # A pooled connection the server dropped while idle is retried on a fresh one.
+        transport.request("GET", f"{self.base}/drop")
+        time.sleep(0.05)
+        self.assertEqual(transport.request("GET", f"{self.base}/again").status, 200)
+        metrics = transport.metrics()[self.key]
+        self.assertEqual((metrics["stale_retries"], metrics["errors"]), (1, 0))
+        self.assertEqual(self.server.connections, 3)
+
+        with self.assertRaises(TransportError):
+            HTTPTransport(connect_timeout=1).request("GET", "http://127.0.0.1:1/")
+        transport.close()
+
+    def test_non_idempotent_requests_are_not_retried_after_being_sent(self) -> None:
+        transport = HTTPTransport()
+        transport.request("GET", f"{self.base}/warm")
+
+        with self.assertRaises(TransportError):
+            transport.request("POST", f"{self.base}/post-drop", body=b"{}")
+
+        self.assertEqual(self.server.posts, 1)
+        metrics = transport.metrics()[self.key]
+        self.assertEqual((metrics["stale_retries"], metrics["errors"]), (0, 1))
+        transport.close()
+
+    def test_environment_proxies_are_used_unless_bypassed(self) -> None:
+        proxy = ThreadingHTTPServer(("127.0.0.1", 0), _ProxyHandler)
+        proxy.daemon_threads = True
+        proxy.seen = []
+        threading.Thread(target=proxy.serve_forever, daemon=True).start()
+        proxy_url = "http://user:pw@127.0.0.1:%d" % proxy.server_address[1]
+        env = {"http_proxy": proxy_url, "https_proxy": proxy_url, "no_proxy": "127.0.0.1"}
+        try:
+            with mock.patch.dict(os.environ, env):
+                transport = HTTPTransport()
+                proxied = transport.request("GET", "http://origin.test/status?x=1")
+                with self.assertRaises(TransportError):
+                    transport.request("GET", "https://origin.test/secure")
+                direct = transport.request("GET", f"{self.base}/direct")
+                transport.close()
+        finally:
+            proxy.shutdown()
+            proxy.server_close()
+
+        authorization = "Basic dXNlcjpwdw=="
+        self.assertEqual(proxied.body, b"via proxy")
+        self.assertEqual(
+            proxy.seen,
+            [
+                ("GET", "http://origin.test/status?x=1", "origin.test", authorization),
+                ("CONNECT", "origin.test:443", authorization),
+            ],
+        )
+        self.assertEqual(json.loads(direct.body), {"path": "/direct"})
+        self.assertEqual(self.server.connections, 1)
+
+    def test_clients_share_the_default_transport(self) -> None:
+        before = default_transport().metrics().get(self.key, {}).get("requests", 0)
+
+        self.assertEqual(_json_request(f"{self.base}/json", payload={"a": 1}), {"echo": {"a": 1}})
+        image, mime_type = _binary_request(f"{self.base}/image.png")
+        self.assertEqual((len(image), mime_type), (200_004, "image/png"))
+        speech = SakuraAIEngineClient(SakuraAIEngineConfig(token="t", base_url=self.base)).synthesize_speech("hi")
+        self.assertTrue(speech.audio_bytes.startswith(b"RIFF"))
+
+        self.assertEqual(self.server.connections, 1)
+        metrics = default_transport().metrics()[self.key]
+        self.assertEqual(metrics["requests"] - before, 3)
+        self.assertEqual(metrics["connections_opened"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,18 +1,47 @@
 import json
 import tempfile
+import threading
+import time
 import unittest
 from pathlib import Path
+from unittest import mock
 
+from henshin import iw_henshin
 from henshin.iw_henshin import (
     DEFAULT_EXPLANATION,
     DEFAULT_TRIGGER_PHRASE,
     IWSDKHenshinConfig,
     IWSDKHenshinRequest,
+    JOINT_ALIASES,
+    MocopiFrameNormalizer,
+    _frame_dt,
+    _resolve_joints,
+    _source_joints,
     analyze_generation_trigger,
     detect_generation_trigger,
     normalize_mocopi_frames,
     run_iwsdk_henshin,
 )
+from henshin.sakura_ai_engine import SakuraAIEngineConfig, SakuraAIEngineError, SpeechResult, TranscriptionResult
+from henshin.tracking_codec import decode_tracking_block
+
+
+class _SlowSakuraClient:
+    """Stands in for the network: each call takes ``delay`` seconds."""
+
+    def __init__(self, text: str, delay: float = 0.3) -> None:
+        self.text = text
+        self.delay = delay
+        self.tts_started = threading.Event()
+
+    def transcribe_file(self, audio_path: object) -> TranscriptionResult:
+        time.sleep(self.delay)
+        return TranscriptionResult(text=self.text, model="whisper-test", raw={})
+
+    def synthesize_speech(self, input_text: str) -> SpeechResult:
+        self.tts_started.set()
+        time.sleep(self.delay)
+        return SpeechResult(b"RIFF", "tts-test", "voice", "wav", input_text)
 
 
 class TestIWHenshin(unittest.TestCase):
@@ -68,6 +97,36 @@ class TestIWHenshin(unittest.TestCase):
         self.assertEqual(len(frames), 1)
         self.assertIn("right_wrist", frames[0].joints_xy01)
 
+    def test_frame_normalizer_matches_per_frame_alias_walk(self) -> None:
+        steady = {"dt_sec": 0.05, "bones": {"RightHand": [0.2, 0.6], "RightLowerArm": [0.3, 0.5], "Hips": [0.5, 0.5]}}
+        raw_frames = [steady] * 10 + [
+            {"dt_sec": 0.05, "bones": {"RightHand": "bad", "RightLowerArm": [0.3, 0.5], "Hips": [0.5, 0.5]}},
+            {"dt_sec": 0.05, "bones": {"RightHand": [0.2, 0.6], "RightLowerArm": [0.3, 0.5], "right_wrist": [-0.5, 0.5]}},
+            {"dt_sec": "x", "bones": {"RightHand": [9.0, 0.6], "RightLowerArm": [0.3, 0.5], "Hips": [0.5, 0.5]}},
+            {"dt_sec": 0.05, "bones": {"RightHand": {"x": 0.2, "y": 0.6}, "RightLowerArm": [0.3, 0.5], "Hips": []}},
+            {"dt_sec": 0.05, "joints": {"left_wrist": [0.7, 0.6]}, "bones": steady["bones"]},
+            {"deltaTime": 0.02, "joints": None, "bones": steady["bones"]},
+            {"deltaTime": 0.02, "joints": {"right_wrist": [0.1, 0.1]}, "bones": steady["bones"]},
+        ] * 3 + [{"dt": 0.03, "RightHand": [0.5, 0.5], "r_elbow": {"x": 0.4}}, "not a frame", {"dt": 0.03}]
+
+        normalizer = MocopiFrameNormalizer(relayout_after=3)
+        normalized = [normalizer.normalize(raw) for raw in raw_frames]
+
+        for raw, frame in zip(raw_frames, normalized):
+            joints = _resolve_joints(_source_joints(raw), JOINT_ALIASES) if isinstance(raw, dict) else {}
+            if not joints:
+                self.assertIsNone(frame)
+                continue
+            self.assertEqual(frame.joints_xy01, joints)
+            self.assertEqual(frame.dt_sec, _frame_dt(raw))
+        self.assertGreater(normalizer.fallbacks, 0)
+        self.assertGreater(normalizer.compiles, 1)
+
+        steady_normalizer = MocopiFrameNormalizer()
+        for _ in range(100):
+            steady_normalizer.normalize(steady)
+        self.assertEqual((steady_normalizer.compiles, steady_normalizer.fallbacks), (1, 0))
+
     def test_run_iwsdk_henshin_writes_replay(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             result = run_iwsdk_henshin(
@@ -93,6 +152,96 @@ class TestIWHenshin(unittest.TestCase):
             self.assertTrue(replay["deposition"]["completed"])
             self.assertEqual(replay["trigger"]["phrase"], "\u751f\u6210")
             self.assertEqual(replay["trigger"]["match"]["mode"], "exact")
+            self.assertEqual(replay["tracking"]["encoding"], "qdelta-v1")
+            tracking = decode_tracking_block(replay["tracking"])
+            self.assertEqual(len(tracking), replay["tracking"]["frame_count"])
+            self.assertAlmostEqual(tracking[0].joints_xy01["right_wrist"][0], 0.225, delta=5e-5)
+
+    def test_audio_pipeline_overlaps_transcription_and_speculative_tts(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            audio = Path(tmp) / "voice.wav"
+            audio.write_bytes(b"RIFF")
+            for text, triggered in (("\u751f\u6210", True), ("\u5f85\u6a5f\u3057\u307e\u3059", False)):
+                client = _SlowSakuraClient(text)
+                started = time.perf_counter()
+                result = run_iwsdk_henshin(
+                    IWSDKHenshinRequest(
+                        audio_path=audio,
+                        root=tmp,
+                        session_id=f"S-IWTEST-PIPE-{int(triggered)}",
+                        config=IWSDKHenshinConfig(tts_cache=False),
+                        sakura_config=SakuraAIEngineConfig(token="test"),
+                    ),
+                    client=client,
+                )
+                elapsed = time.perf_counter() - started
+
+                self.assertEqual(result["triggered"], triggered)
+                self.assertTrue(client.tts_started.is_set())
+                timings = result["timings"]
+                self.assertTrue(timings["tts_speculative"])
+                self.assertGreaterEqual(timings["transcribe_ms"], 300)
+                replay = json.loads(Path(result["replay_path"]).read_text(encoding="utf-8"))
+                self.assertEqual(replay["source"]["timings"], timings)
+                explainer = Path(tmp) / f"S-IWTEST-PIPE-{int(triggered)}" / "artifacts" / "generation-explainer.wav"
+                if triggered:
+                    # Both 0.3 s calls ran side by side.
+                    self.assertLess(elapsed, 0.55)
+                    self.assertEqual(result["tts"]["status"], "generated")
+                    self.assertEqual(result["tts"]["audio_path"], str(explainer))
+                    self.assertTrue(explainer.exists())
+                else:
+                    self.assertEqual(result["tts"]["status"], "not_triggered")
+                    self.assertTrue(result["tts"]["speculative_discarded"])
+                    self.assertIsNone(timings["tts_ms"])
+                    self.assertFalse(explainer.exists())
+
+    def test_known_transcript_starts_tts_before_the_body_simulation(self) -> None:
+        client = _SlowSakuraClient("\u751f\u6210", delay=0.05)
+        started_before_sim: list[bool] = []
+        write_body_sim = iw_henshin._write_body_sim
+
+        def observed_write_body_sim(*args: object) -> dict:
+            started_before_sim.append(client.tts_started.wait(1.0))
+            return write_body_sim(*args)
+
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(iw_henshin, "_write_body_sim", observed_write_body_sim):
+            result = run_iwsdk_henshin(
+                IWSDKHenshinRequest(
+                    transcript="\u751f\u6210",
+                    root=tmp,
+                    session_id="S-IWTEST-KNOWN",
+                    config=IWSDKHenshinConfig(tts_cache=False),
+                    sakura_config=SakuraAIEngineConfig(token="test"),
+                ),
+                client=client,
+            )
+
+        self.assertEqual(started_before_sim, [True])
+        self.assertEqual(result["tts"]["status"], "generated")
+        self.assertFalse(result["timings"]["tts_speculative"])
+
+    def test_transcription_failure_removes_the_body_simulation(self) -> None:
+        class FailingClient(_SlowSakuraClient):
+            def transcribe_file(self, audio_path: object) -> TranscriptionResult:
+                raise SakuraAIEngineError("whisper unavailable")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            audio = Path(tmp) / "voice.wav"
+            audio.write_bytes(b"RIFF")
+            result = run_iwsdk_henshin(
+                IWSDKHenshinRequest(
+                    audio_path=audio,
+                    root=tmp,
+                    session_id="S-IWTEST-FAIL",
+                    config=IWSDKHenshinConfig(tts_cache=False),
+                    sakura_config=SakuraAIEngineConfig(token="test"),
+                ),
+                client=FailingClient("", delay=0.0),
+            )
+
+            self.assertEqual(result, {"ok": False, "session_id": "S-IWTEST-FAIL", "error": "whisper unavailable"})
+            self.assertEqual(list((Path(tmp) / "S-IWTEST-FAIL").glob("body-sim.*")), [])
 
     def test_run_iwsdk_henshin_accepts_near_miss_transcript(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
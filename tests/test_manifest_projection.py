@@ -1,7 +1,9 @@
 import json
 import unittest
 from pathlib import Path
+from unittest import mock
 
+from henshin import manifest as manifest_module
 from henshin.manifest import build_manifest_id, project_suitspec_to_manifest
 
 
@@ -36,6 +38,23 @@ class TestManifestProjection(unittest.TestCase):
         self.assertEqual(manifest["parts"]["right_hand"]["fit"]["source"], "right_hand")
         self.assertEqual(manifest["runtime_targets"], ["web_preview", "quest", "replay"])
 
+    def test_projection_is_memoized_per_catalog_version_and_status(self) -> None:
+        with mock.patch.object(manifest_module, "_project_body", wraps=manifest_module._project_body) as project_body:
+            first = project_suitspec_to_manifest(self.suitspec, part_catalog=self.part_catalog, catalog_version="memo-test")
+            first["parts"]["helmet"]["enabled"] = "mutated"
+            second = project_suitspec_to_manifest(self.suitspec, part_catalog=self.part_catalog, catalog_version="memo-test")
+            ready = project_suitspec_to_manifest(
+                self.suitspec, part_catalog=self.part_catalog, catalog_version="memo-test", status="READY"
+            )
+            bumped = project_suitspec_to_manifest(self.suitspec, part_catalog=self.part_catalog, catalog_version="memo-test-2")
+
+        self.assertEqual(project_body.call_count, 3)
+        self.assertEqual(second["parts"]["helmet"]["enabled"], self.suitspec["modules"]["helmet"]["enabled"])
+        self.assertEqual(ready["status"], "READY")
+        self.assertEqual(bumped["parts"], second["parts"])
+        self.assertEqual(list(second)[:3], ["schema_version", "manifest_id", "suit_id"])
+        self.assertEqual(second, project_suitspec_to_manifest(self.suitspec, part_catalog=self.part_catalog) | {"metadata": second["metadata"]})
+
 
 if __name__ == "__main__":
     unittest.main()
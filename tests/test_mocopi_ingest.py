@@ -0,0 +1,96 @@
+import json
+import time
+import unittest
+from pathlib import Path
+
+from henshin.bodyfit import CoverScale, Vec2, run_body_sequence
+from henshin.iw_henshin import IWSDKHenshinConfig, normalize_mocopi_frames
+from henshin.mocopi_ingest import (
+    MocopiIngestServer,
+    MocopiIngestSession,
+    WebSocketClient,
+    replay_mocopi_capture,
+)
+
+ROOT = Path(__file__).resolve().parents[1]
+SAMPLE = json.loads((ROOT / "examples" / "mocopi_sequence.sample.json").read_text(encoding="utf-8"))
+
+
+def _expected_body_sim() -> dict:
+    config = IWSDKHenshinConfig()
+    return run_body_sequence(
+        normalize_mocopi_frames(SAMPLE),
+        mirror=config.mirror,
+        cover_scale=CoverScale(1.0, 1.0),
+        dock_center=Vec2(config.dock_center_x, config.dock_center_y),
+        dock_radius=config.dock_radius,
+        hold_to_equip_sec=config.hold_to_equip_sec,
+        trigger_joint=config.trigger_joint,
+    )
+
+
+class TestMocopiIngestSession(unittest.TestCase):
+    def test_frames_drive_simulation_and_publish_events(self) -> None:
+        session = MocopiIngestSession()
+        events = []
+        frames = []
+        session.subscribe(events.append)
+        session.subscribe(frames.append, frames=True)
+
+        for raw in SAMPLE["frames"]:
+            session.ingest(json.dumps(raw).encode("utf-8"))
+        with self.assertRaises(ValueError):
+            session.ingest(b"[1, 2]")
+        ended = session.end_stream()
+
+        expected = _expected_body_sim()
+        self.assertEqual([record["frame"] for record in frames if record["type"] == "iw.body.frame"], expected["frames"])
+        self.assertEqual(
+            [event["type"] for event in events],
+            [
+                "iw.mocopi.stream.started",
+                "iw.armor.equipped",
+                "iw.armor.deposition.completed",
+                "iw.mocopi.stream.ended",
+            ],
+        )
+        self.assertEqual(events[1]["frame_index"], expected["equip_frame"])
+        self.assertEqual(ended["frame_count"], len(SAMPLE["frames"]))
+        self.assertTrue(ended["deposition_completed"])
+        for stage in ("parse", "simulate", "publish", "end_to_end"):
+            self.assertEqual(ended["latency"][stage]["count"], len(SAMPLE["frames"]))
+            self.assertLessEqual(ended["latency"][stage]["p50_ms"], ended["latency"][stage]["p99_ms"])
+        self.assertEqual(session.status()["frame_count"], 0)
+
+
+class TestMocopiIngestServer(unittest.TestCase):
+    def _wait_for_subscribers(self, session: MocopiIngestSession, count: int) -> None:
+        deadline = time.time() + 5
+        while session.status()["subscribers"] != count:
+            self.assertLess(time.time(), deadline)
+            time.sleep(0.01)
+
+    def test_replayer_feeds_udp_and_websocket_and_events_reach_subscribers(self) -> None:
+        session = MocopiIngestSession()
+        with MocopiIngestServer(session, udp_port=0, ws_port=0) as server:
+            events_url = "ws://%s:%d/events" % server.ws_address
+            for target in ({"udp": server.udp_address}, {"websocket": "ws://%s:%d/ingest" % server.ws_address}):
+                with WebSocketClient(events_url, timeout=5) as subscriber:
+                    self._wait_for_subscribers(session, 1)
+                    result = replay_mocopi_capture(SAMPLE, speed=0, **target)
+                    received = []
+                    while not received or received[-1]["type"] != "iw.mocopi.stream.ended":
+                        received.append(subscriber.receive_json())
+                self._wait_for_subscribers(session, 0)
+
+                self.assertEqual(result["frames_sent"], len(SAMPLE["frames"]))
+                self.assertEqual(received[1]["type"], "iw.armor.equipped")
+                self.assertEqual(received[-1]["frame_count"], len(SAMPLE["frames"]))
+                self.assertIn("transport", received[-1]["latency"])
+
+        self.assertEqual(session.streams_completed, 2)
+        self.assertEqual(session.dropped_messages, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
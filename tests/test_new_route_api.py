@@ -1,9 +1,16 @@
 import json
+import sqlite3
 import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 
 from henshin.new_route_api import NewRouteApi
+from henshin.new_route_store import SQLITE_SCHEMA
+from henshin.session_log import TransformEventLog
+from henshin.tracking_frames import TrackingFrameStore
+from henshin.trial_index import TrialIndex
+from henshin.validators import validate_against_schema
 
 
 class TestNewRouteApi(unittest.TestCase):
@@ -273,11 +280,689 @@ class TestNewRouteApi(unittest.TestCase):
             self.assertEqual(response.body["trial"]["state"], "ACTIVE")
             self.assertTrue(response.body["links"]["script"].endswith("/replay-script.json"))
 
+    def test_trial_index_tracks_latest_trial_and_replay(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            api = self._api_with_manifest(Path(tmp) / "suits")
+            api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0001"})
+            api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0002"})
+            api.get("/v1/trials/S-TRIAL-UNIT-0001/replay")
+            api.post(
+                "/v1/trials/S-TRIAL-UNIT-0001/events",
+                {"event_type": "DEPOSITION_COMPLETED", "state_after": "ACTIVE"},
+            )
+
+            index = api.store.trial_index.load()
+            replays = api.get("/v1/replays")
+
+            self.assertEqual([item["session_id"] for item in index["trials"]], ["S-TRIAL-UNIT-0001", "S-TRIAL-UNIT-0002"])
+            self.assertEqual(index["trials"][0]["event_count"], 2)
+            self.assertEqual(len(index["replays"]), 1)
+            assert replays is not None
+            self.assertEqual(replays.body["latest"]["state"], "ACTIVE")
+            self.assertEqual(replays.body["latest"]["event_count"], 2)
+            self.assertEqual(replays.body["latest"]["source_event_count"], 1)
+
+    def test_trial_index_appends_upserts_and_compacts_the_log(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            index = TrialIndex(Path(tmp), compact_every=4)
+            index.rebuild([], [])
+            snapshot = index.path.read_bytes()
+            index.upsert_trial({"session_id": "S-1", "updated_at": "2026-01-01T00:00:00Z", "state": "POSTED"})
+            index.upsert_replay({"session_id": "S-1", "updated_at": "2026-01-01T00:00:01Z", "state": "POSTED"})
+            index.upsert_trial({"session_id": "S-2", "updated_at": "2026-01-01T00:00:02Z", "state": "POSTED"})
+
+            self.assertEqual(index.path.read_bytes(), snapshot)
+            self.assertEqual(len(index.log_path.read_text(encoding="utf-8").splitlines()), 3)
+            self.assertEqual([item["session_id"] for item in TrialIndex(Path(tmp)).trials()], ["S-2", "S-1"])
+
+            index.upsert_trial({"session_id": "S-1", "updated_at": "2026-01-01T00:00:03Z", "state": "ACTIVE"})
+
+            self.assertFalse(index.log_path.exists())
+            reloaded = json.loads(index.path.read_text(encoding="utf-8"))
+            self.assertEqual([item["session_id"] for item in reloaded["trials"]], ["S-1", "S-2"])
+            self.assertEqual(reloaded["replays"][0]["state"], "ACTIVE")
+            self.assertEqual(reloaded["revision"], 5)
+
+    def test_trial_index_is_rebuilt_when_missing_or_corrupt(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            api = self._api_with_manifest(Path(tmp) / "suits")
+            api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0001"})
+            api.get("/v1/trials/S-TRIAL-UNIT-0001/replay")
+
+            api.store.trial_index.path.unlink()
+            listed = api.get("/v1/trials")
+            api.store.trial_index.path.write_text("{not json", encoding="utf-8")
+            latest_replay = api.get("/v1/replays/latest")
+            api.store.trial_index.path.unlink()
+            rebuilt = api.rebuild_trial_index()
+
+            assert listed is not None and latest_replay is not None
+            self.assertEqual(listed.body["count"], 1)
+            self.assertEqual(latest_replay.status, 200)
+            self.assertEqual(latest_replay.body["trial_id"], "S-TRIAL-UNIT-0001")
+            self.assertEqual(rebuilt["trial_count"], 1)
+            self.assertEqual(rebuilt["replay_count"], 1)
+            self.assertTrue(api.store.trial_index.path.is_file())
+
+    def test_event_log_mode_appends_without_rewriting_snapshot(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            suit_store_root = Path(tmp) / "suits"
+            self._api_with_manifest(suit_store_root)
+            api = NewRouteApi(Path("."), suit_store_root=suit_store_root, trial_storage="event-log", event_log_compact_every=3)
+            api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0001"})
+            trial_dir = api.trial_store_root / "S-TRIAL-UNIT-0001"
+            snapshot_before = (trial_dir / "transform-session.json").read_text(encoding="utf-8")
+
+            first = api.post(
+                "/v1/trials/S-TRIAL-UNIT-0001/events",
+                {"event_type": "DEPOSITION_STARTED", "state_after": "DEPOSITION", "idempotency_key": "dep-start"},
+            )
+            repeated = api.post(
+                "/v1/trials/S-TRIAL-UNIT-0001/events",
+                {"event_type": "DEPOSITION_STARTED", "state_after": "DEPOSITION", "idempotency_key": "dep-start"},
+            )
+            regressive = api.post(
+                "/v1/trials/S-TRIAL-UNIT-0001/events",
+                {"event_type": "VOICE_CAPTURED", "state_after": "POSTED"},
+            )
+            fetched = api.get("/v1/trials/S-TRIAL-UNIT-0001")
+
+            assert first is not None and repeated is not None and regressive is not None and fetched is not None
+            self.assertEqual(first.status, 201)
+            self.assertEqual(first.body["event"]["sequence"], 1)
+            self.assertEqual(first.body["summary"]["state"], "DEPOSITION")
+            self.assertEqual(repeated.status, 200)
+            self.assertEqual(repeated.body["event"]["event_id"], first.body["event"]["event_id"])
+            self.assertEqual(regressive.body["event"]["state_after"], "DEPOSITION")
+            self.assertEqual((trial_dir / "transform-session.json").read_text(encoding="utf-8"), snapshot_before)
+            self.assertEqual(len((trial_dir / "events.jsonl").read_text(encoding="utf-8").splitlines()), 2)
+            self.assertEqual([event["sequence"] for event in fetched.body["trial"]["events"]], [0, 1, 2])
+            self.assertEqual(fetched.body["trial"]["state"], "DEPOSITION")
+
+    def test_event_append_responses_share_keys_across_storage_modes(self) -> None:
+        shared = {"ok", "trial_id", "event", "summary", "storage"}
+        for trial_storage in ("document", "event-log"):
+            with self.subTest(trial_storage=trial_storage), tempfile.TemporaryDirectory() as tmp:
+                suit_store_root = Path(tmp) / "suits"
+                self._api_with_manifest(suit_store_root)
+                api = NewRouteApi(Path("."), suit_store_root=suit_store_root, trial_storage=trial_storage)
+                api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0001"})
+                event = {"event_type": "DEPOSITION_STARTED", "state_after": "DEPOSITION", "idempotency_key": "dep-start"}
+                created = api.post("/v1/trials/S-TRIAL-UNIT-0001/events", event)
+                repeated = api.post("/v1/trials/S-TRIAL-UNIT-0001/events", event)
+
+                assert created is not None and repeated is not None
+                for response in (created, repeated):
+                    self.assertTrue(shared <= response.body.keys())
+                    self.assertEqual(response.body["summary"]["state"], "DEPOSITION")
+                    self.assertEqual("trial" in response.body, trial_storage == "document")
+
+    def test_event_log_readers_keep_segment_events_across_compaction(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            suit_store_root = Path(tmp) / "suits"
+            self._api_with_manifest(suit_store_root)
+            api = NewRouteApi(Path("."), suit_store_root=suit_store_root, trial_storage="event-log")
+            api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0001"})
+            for _ in range(3):
+                api.post("/v1/trials/S-TRIAL-UNIT-0001/events", {"event_type": "DEPOSITION_PROGRESS", "state_after": "DEPOSITION"})
+            log = TransformEventLog(api.trial_store_root / "S-TRIAL-UNIT-0001")
+
+            reader = log.iter_events()
+            first = next(reader)
+            log.compact()
+
+            self.assertEqual([first["sequence"], *(event["sequence"] for event in reader)], [0, 1, 2, 3])
+            self.assertEqual(len(log.materialize()["events"]), 4)
+
+    def test_event_log_mode_compacts_segment_into_snapshot(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            suit_store_root = Path(tmp) / "suits"
+            self._api_with_manifest(suit_store_root)
+            api = NewRouteApi(Path("."), suit_store_root=suit_store_root, trial_storage="event-log", event_log_compact_every=2)
+            api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0001"})
+            for _ in range(3):
+                api.post("/v1/trials/S-TRIAL-UNIT-0001/events", {"event_type": "DEPOSITION_PROGRESS", "state_after": "DEPOSITION"})
+            api.post("/v1/trials/S-TRIAL-UNIT-0001/events", {"event_type": "DEPOSITION_COMPLETED", "state_after": "ACTIVE"})
+            trial_dir = api.trial_store_root / "S-TRIAL-UNIT-0001"
+            snapshot = json.loads((trial_dir / "transform-session.json").read_text(encoding="utf-8"))
+
+            replay = api.get("/v1/trials/S-TRIAL-UNIT-0001/replay")
+            latest = api.get("/v1/trials/latest")
+
+            self.assertEqual(len(snapshot["events"]), 5)
+            self.assertEqual(snapshot["state"], "ACTIVE")
+            self.assertIn("completed_at", snapshot)
+            self.assertEqual((trial_dir / "events.jsonl").read_text(encoding="utf-8"), "")
+            assert replay is not None and latest is not None
+            self.assertEqual(replay.status, 200)
+            self.assertEqual(len(replay.body["replay"]["source_events"]["event_ids"]), 5)
+            self.assertEqual(latest.body["summary"]["event_count"], 5)
+            self.assertEqual(latest.body["summary"]["last_event_type"], "DEPOSITION_COMPLETED")
+
+    def test_batch_events_apply_state_rule_and_idempotency_per_event(self) -> None:
+        for trial_storage, backend in (("document", "local-json"), ("event-log", "local-json"), ("document", "sqlite")):
+            with self.subTest(trial_storage=trial_storage, backend=backend), tempfile.TemporaryDirectory() as tmp:
+                suit_store_root = Path(tmp) / "suits"
+                self._api_with_manifest(suit_store_root, storage_backend=backend)
+                api = NewRouteApi(
+                    Path("."), suit_store_root=suit_store_root, trial_storage=trial_storage, storage_backend=backend
+                )
+                api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0001"})
+                api.post(
+                    "/v1/trials/S-TRIAL-UNIT-0001/events",
+                    {"event_type": "DEPOSITION_STARTED", "state_after": "DEPOSITION", "idempotency_key": "dep-start"},
+                )
+
+                response = api.post(
+                    "/v1/trials/S-TRIAL-UNIT-0001/events:batch",
+                    {
+                        "events": [
+                            {"event_type": "DEPOSITION_STARTED", "state_after": "DEPOSITION", "idempotency_key": "dep-start"},
+                            {"event_type": "DEPOSITION_PROGRESS", "payload": {"progress": 0.5}, "idempotency_key": "p-50"},
+                            {"event_type": "DEPOSITION_PROGRESS", "payload": {"progress": 0.5}, "idempotency_key": "p-50"},
+                            {"event_type": "NOT_A_TYPE"},
+                            {"event_type": "DEPOSITION_COMPLETED", "state_after": "ACTIVE"},
+                            {"event_type": "VOICE_CAPTURED", "state_after": "POSTED"},
+                        ]
+                    },
+                )
+                fetched = api.get("/v1/trials/S-TRIAL-UNIT-0001")
+
+                assert response is not None and fetched is not None
+                self.assertEqual(response.status, 201)
+                self.assertFalse(response.body["ok"])
+                self.assertEqual([result["status"] for result in response.body["results"]], [200, 201, 200, 400, 201, 201])
+                self.assertEqual(response.body["created_count"], 3)
+                self.assertEqual(response.body["results"][2]["event"]["sequence"], 2)
+                self.assertEqual(response.body["results"][5]["event"]["state_before"], "ACTIVE")
+                self.assertEqual(response.body["results"][5]["event"]["state_after"], "ACTIVE")
+                self.assertEqual(response.body["summary"]["event_count"], 5)
+                self.assertEqual([event["sequence"] for event in fetched.body["trial"]["events"]], [0, 1, 2, 3, 4])
+                self.assertEqual(fetched.body["trial"]["state"], "ACTIVE")
+
+    def test_batch_events_accept_array_body_and_reject_oversized_batches(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            api = self._api_with_manifest(Path(tmp) / "suits")
+            api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0001"})
+
+            accepted = api.post(
+                "/v1/trials/S-TRIAL-UNIT-0001/events:batch",
+                [{"event_type": "TRACKING_FRAME_BATCH"}, {"event_type": "TRACKING_FRAME_BATCH"}],
+            )
+            oversized = api.post(
+                "/v1/trials/S-TRIAL-UNIT-0001/events:batch",
+                [{"event_type": "TRACKING_FRAME_BATCH"}] * 513,
+            )
+
+            assert accepted is not None and oversized is not None
+            self.assertEqual(accepted.status, 201)
+            self.assertTrue(accepted.body["ok"])
+            self.assertEqual(accepted.body["summary"]["last_event_type"], "TRACKING_FRAME_BATCH")
+            self.assertEqual(oversized.status, 400)
+
+    def test_sqlite_backend_serves_suit_trial_and_replay_flow(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            suit_store_root = Path(tmp) / "suits"
+            api = self._api_with_manifest(suit_store_root, storage_backend="sqlite")
+            overwritten = api.post("/v1/suits", {"suitspec": self._sample_suitspec(), "overwrite": True})
+            suit = api.get("/v1/suits/VDA-AXIS-OP-00-0001")
+            manifest = api.get("/v1/suits/VDA-AXIS-OP-00-0001/manifest")
+            created = api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0001"})
+            api.post("/v1/trials", {"manifest_id": "MNF-20260424-SAMP", "session_id": "S-TRIAL-UNIT-0002"})
+            appended = api.post(
+                "/v1/trials/S-TRIAL-UNIT-0001/events",
+                {"event_type": "DEPOSITION_STARTED", "state_after": "DEPOSITION", "idempotency_key": "dep-start"},
+            )
+            repeated = api.post(
+                "/v1/trials/S-TRIAL-UNIT-0001/events",
+                {"event_type": "DEPOSITION_STARTED", "state_after": "DEPOSITION", "idempotency_key": "dep-start"},
+            )
+            replay = api.get("/v1/trials/S-TRIAL-UNIT-0001/replay")
+            latest_replay = NewRouteApi(Path("."), suit_store_root=suit_store_root, storage_backend="sqlite").get(
+                "/v1/replays/latest"
+            )
+            trials = api.get("/v1/trials")
+            rebuilt = api.rebuild_trial_index()
+
+            assert overwritten is not None and suit is not None and manifest is not None and created is not None
+            assert appended is not None and repeated is not None and replay is not None
+            assert latest_replay is not None and trials is not None
+            self.assertTrue((Path(tmp) / "new-route.sqlite3").is_file())
+            self.assertFalse((suit_store_root / "VDA-AXIS-OP-00-0001" / "suit.json").exists())
+            self.assertTrue(overwritten.body["suitspec_path"].endswith("#suit_versions/VDA-AXIS-OP-00-0001/2"))
+            self.assertEqual(suit.body["suit"]["manifest_id"], "MNF-20260424-ABCD")
+            self.assertEqual(suit.body["suitspec"]["suit_id"], "VDA-AXIS-OP-00-0001")
+            self.assertEqual(manifest.body["manifest"]["manifest_id"], "MNF-20260424-ABCD")
+            self.assertEqual(created.body["storage"]["backend"], "sqlite")
+            self.assertEqual(appended.status, 201)
+            self.assertEqual(appended.body["summary"]["event_count"], 2)
+            self.assertEqual(repeated.status, 200)
+            self.assertEqual(repeated.body["event"]["event_id"], appended.body["event"]["event_id"])
+            self.assertEqual(replay.status, 200)
+            self.assertEqual(len(replay.body["replay"]["source_events"]["event_ids"]), 2)
+            self.assertEqual(latest_replay.body["trial_id"], "S-TRIAL-UNIT-0001")
+            self.assertEqual(latest_replay.body["trial"]["events"][1]["idempotency_key"], "dep-start")
+            self.assertEqual(trials.body["count"], 2)
+            self.assertEqual(trials.body["latest"]["session_id"], "S-TRIAL-UNIT-0001")
+            self.assertEqual(rebuilt["trial_count"], 2)
+            self.assertEqual(rebuilt["replay_count"], 1)
+
+    def test_manifest_index_resolves_manifests_without_scanning_suits(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            suit_store_root = Path(tmp) / "suits"
+            api = self._api_with_manifest(suit_store_root)
+            index = json.loads((suit_store_root / "manifest-index.json").read_text(encoding="utf-8"))
+            api.post("/v1/trials", {"manifest_id": "MNF-20260424-ABCD", "session_id": "S-TRIAL-UNIT-0001"})
+
+            with mock.patch.object(Path, "glob", side_effect=AssertionError("manifest lookup must not glob")):
+                fetched = api.get("/v1/manifests/MNF-20260424-ABCD")
+                created = api.post("/v1/trials", {"manifest_id": "MNF-20260424-ABCD", "session_id": "S-TRIAL-UNIT-0002"})
+
+            entry = index["manifests"]["MNF-20260424-ABCD"]
+            self.assertEqual(entry["suit_id"], "VDA-AXIS-OP-00-0001")
+            self.assertEqual(entry["path"], "VDA-AXIS-OP-00-0001/manifests/MNF-20260424-ABCD.json")
+            self.assertEqual(entry["version"], 1)
+            assert fetched is not None and created is not None
+            self.assertEqual(fetched.status, 200)
+            self.assertEqual(created.status, 201)
+
+    def test_manifest_index_check_reports_drift_and_rebuild_repairs_it(self) -> None:
+        for backend in ("local-json", "sqlite"):
+            with self.subTest(backend=backend), tempfile.TemporaryDirectory() as tmp:
+                suit_store_root = Path(tmp) / "suits"
+                api = self._api_with_manifest(suit_store_root, storage_backend=backend)
+                api.post(
+                    "/v1/suits/VDA-AXIS-OP-00-0001/manifest",
+                    {"manifest_id": "MNF-20260424-EFGH", "status": "READY"},
+                )
+                manifests_dir = suit_store_root / "VDA-AXIS-OP-00-0001" / "manifests"
+                clean = api.check_manifest_index()
+                copied = json.loads((manifests_dir / "MNF-20260424-ABCD.json").read_text(encoding="utf-8"))
+                copied["manifest_id"] = "MNF-20260424-IJKL"
+                (manifests_dir / "MNF-20260424-IJKL.json").write_text(json.dumps(copied), encoding="utf-8")
+                (manifests_dir / "MNF-20260424-EFGH.json").unlink()
+
+                drifted = api.check_manifest_index()
+                rebuilt = api.rebuild_manifest_index()
+                repaired = api.check_manifest_index()
+                fetched = api.get("/v1/manifests/MNF-20260424-IJKL")
+
+                self.assertTrue(clean["ok"])
+                self.assertEqual(clean["manifest_count"], 2)
+                self.assertFalse(drifted["ok"])
+                self.assertEqual(drifted["missing"], ["MNF-20260424-EFGH"])
+                self.assertEqual(drifted["unindexed"], ["MNF-20260424-IJKL"])
+                self.assertEqual(rebuilt["manifest_count"], 2)
+                self.assertTrue(repaired["ok"])
+                assert fetched is not None
+                self.assertEqual(fetched.status, 200)
+
+    def test_list_trials_paginates_with_cursor_and_filters(self) -> None:
+        for backend in ("local-json", "sqlite"):
+            with self.subTest(backend=backend), tempfile.TemporaryDirectory() as tmp:
+                api = self._api_with_manifest(Path(tmp) / "suits", storage_backend=backend)
+                for index in range(5):
+                    api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": f"S-TRIAL-PAGE-{index:04d}"})
+                api.post("/v1/trials", {"manifest_id": "MNF-20260424-SAMP", "session_id": "S-TRIAL-OTHER-0001"})
+                api.post("/v1/trials/S-TRIAL-PAGE-0001/events", {"event_type": "DEPOSITION_COMPLETED", "state_after": "ACTIVE"})
+                everything = api.get("/v1/trials")
+                assert everything is not None
+                newest_first = [summary["session_id"] for summary in everything.body["trials"]]
+
+                pages: list[list[str]] = []
+                cursor = None
+                while True:
+                    query = {"limit": ["2"]}
+                    if cursor:
+                        query["cursor"] = [cursor]
+                    page = api.get("/v1/trials", query)
+                    assert page is not None
+                    pages.append([summary["session_id"] for summary in page.body["trials"]])
+                    cursor = page.body["next_cursor"]
+                    if cursor is None:
+                        break
+                active = api.get("/v1/trials", {"state": ["ACTIVE"], "fields": ["state"]})
+                other_suit = api.get("/v1/trials", {"suit_id": ["VDA-AXIS-OP-00-0002"]})
+                middle = everything.body["trials"][2]["updated_at"]
+                window = api.get("/v1/trials", {"since": [middle], "until": [everything.body["trials"][0]["updated_at"]]})
+                bad_cursor = api.get("/v1/trials", {"cursor": ["not-a-cursor"]})
+                bad_field = api.get("/v1/trials", {"fields": ["secret"]})
+
+                self.assertEqual(newest_first[0], "S-TRIAL-PAGE-0001")
+                self.assertEqual([len(page) for page in pages], [2, 2, 2])
+                self.assertEqual([session_id for page in pages for session_id in page], newest_first)
+                assert active is not None and other_suit is not None
+                assert window is not None and bad_cursor is not None and bad_field is not None
+                self.assertEqual(
+                    active.body["trials"],
+                    [
+                        {
+                            "session_id": "S-TRIAL-PAGE-0001",
+                            "state": "ACTIVE",
+                            "updated_at": everything.body["trials"][0]["updated_at"],
+                        }
+                    ],
+                )
+                self.assertEqual(other_suit.body["count"], 0)
+                self.assertEqual([summary["session_id"] for summary in window.body["trials"]], newest_first[1:3])
+                self.assertEqual(bad_cursor.status, 400)
+                self.assertEqual(bad_field.status, 400)
+
+    def test_revision_etag_changes_only_when_summaries_change(self) -> None:
+        for backend in ("local-json", "sqlite"):
+            with self.subTest(backend=backend), tempfile.TemporaryDirectory() as tmp:
+                api = self._api_with_manifest(Path(tmp) / "suits", storage_backend=backend)
+                api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0001"})
+
+                before = api.revision_etag("/v1/trials/latest")
+                api.get("/v1/trials/latest")
+                unchanged = api.revision_etag("/v1/trials/latest")
+                paged = api.revision_etag("/v1/trials", {"limit": ["1"]})
+                api.post("/v1/trials/S-TRIAL-UNIT-0001/events", {"event_type": "TRACKING_FRAME_BATCH"})
+                after = api.revision_etag("/v1/trials/latest")
+
+                self.assertIsNotNone(before)
+                self.assertEqual(before, unchanged)
+                self.assertNotEqual(before, paged)
+                self.assertNotEqual(before, after)
+                self.assertIsNone(api.revision_etag("/v1/trials/S-TRIAL-UNIT-0001"))
+
+    def test_trial_replay_is_cached_by_event_watermark(self) -> None:
+        for backend in ("local-json", "sqlite"):
+            with self.subTest(backend=backend), tempfile.TemporaryDirectory() as tmp:
+                api = self._api_with_manifest(Path(tmp) / "suits", storage_backend=backend)
+                api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0001"})
+                api.post("/v1/trials/S-TRIAL-UNIT-0001/events", {"event_type": "DEPOSITION_STARTED", "state_after": "DEPOSITION"})
+                first = api.get("/v1/trials/S-TRIAL-UNIT-0001/replay")
+                with (
+                    mock.patch.object(api.store, "save_replay", side_effect=AssertionError("replay rewritten")),
+                    mock.patch.object(api.store, "save_trial", side_effect=AssertionError("trial rewritten")),
+                ):
+                    cached = api.get("/v1/trials/S-TRIAL-UNIT-0001/replay")
+                api.post("/v1/trials/S-TRIAL-UNIT-0001/events", {"event_type": "DEPOSITION_PROGRESS"})
+                with mock.patch.object(api, "_build_replay_script", side_effect=AssertionError("full rebuild")):
+                    extended = api.get("/v1/trials/S-TRIAL-UNIT-0001/replay")
+                rebuilt = api._build_replay_script(api.store.read_trial("S-TRIAL-UNIT-0001"))
+                listed = api.get("/v1/replays")
+
+                assert first is not None and cached is not None and extended is not None and listed is not None
+                self.assertEqual(first.body["replay_cache"], "rebuilt")
+                self.assertEqual(cached.status, 200)
+                self.assertEqual(cached.body["replay_cache"], "hit")
+                self.assertEqual(cached.body["replay"], first.body["replay"])
+                self.assertEqual(extended.body["replay_cache"], "extended")
+                self.assertEqual(extended.body["replay"]["timeline"], rebuilt["timeline"])
+                self.assertEqual(extended.body["replay"]["source_events"], rebuilt["source_events"])
+                self.assertEqual(extended.body["replay"]["duration_sec"], rebuilt["duration_sec"])
+                self.assertEqual(listed.body["latest"]["source_event_count"], 3)
+
+    def test_trial_replay_compacts_progress_runs_across_incremental_updates(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            api = self._api_with_manifest(Path(tmp) / "suits")
+            api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0001"})
+            progress = [
+                {"event_type": "DEPOSITION_PROGRESS", "state_after": "DEPOSITION", "payload": {"progress": step / 40}}
+                for step in range(40)
+            ]
+            api.post("/v1/trials/S-TRIAL-UNIT-0001/events:batch", {"events": progress[:25]})
+            first = api.get("/v1/trials/S-TRIAL-UNIT-0001/replay")
+            api.post("/v1/trials/S-TRIAL-UNIT-0001/events:batch", {"events": progress[25:]})
+            extended = api.get("/v1/trials/S-TRIAL-UNIT-0001/replay")
+            session = api.store.read_trial("S-TRIAL-UNIT-0001")
+            rebuilt = api._build_replay_script(session)
+
+            assert first is not None and extended is not None
+            replay = extended.body["replay"]
+            validate_against_schema(replay, "replay-script")
+            self.assertEqual(len(first.body["replay"]["timeline"]), 2)
+            self.assertEqual(extended.body["replay_cache"], "extended")
+            self.assertEqual(replay["timeline"], rebuilt["timeline"])
+            self.assertEqual(len(replay["timeline"]), 2)
+            self.assertEqual(replay["timeline"][1]["actions"][0]["params"]["event_count"], 40)
+            self.assertEqual(
+                [event_id for segment in replay["timeline"] for event_id in segment["source_event_ids"]],
+                replay["source_events"]["event_ids"],
+            )
+            self.assertEqual(replay["source_events"]["event_ids"], [event["event_id"] for event in session["events"]])
+
+    def test_replay_sample_returns_state_at_times(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            api = self._api_with_manifest(Path(tmp) / "suits")
+            api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0001"})
+            api.post(
+                "/v1/trials/S-TRIAL-UNIT-0001/events:batch",
+                {
+                    "events": [
+                        {"event_type": "DEPOSITION_PROGRESS", "state_after": "DEPOSITION", "payload": {"progress": 0.5}},
+                        {"event_type": "DEPOSITION_COMPLETED", "state_after": "ACTIVE"},
+                    ]
+                },
+            )
+
+            single = api.get("/v1/trials/S-TRIAL-UNIT-0001/replay/sample", {"t": ["0"]})
+            ranged = api.get("/v1/trials/S-TRIAL-UNIT-0001/replay/sample", {"from": ["0"], "to": ["1"], "step": ["0.25"]})
+            with mock.patch.object(api, "_build_replay_script", side_effect=AssertionError("replay rebuilt")):
+                cached = api.get("/v1/trials/S-TRIAL-UNIT-0001/replay/sample", {"t": ["10"]})
+            api.post("/v1/trials/S-TRIAL-UNIT-0001/events", {"event_type": "VOICE_CAPTURED", "state_after": "ACTIVE"})
+            refreshed = api.get("/v1/trials/S-TRIAL-UNIT-0001/replay/sample", {"t": ["0"]})
+            missing = api.get("/v1/trials/S-TRIAL-UNIT-0001/replay/sample", {})
+            too_many = api.get("/v1/trials/S-TRIAL-UNIT-0001/replay/sample", {"to": ["100"], "step": ["0.01"]})
+            negative = api.get("/v1/trials/S-TRIAL-UNIT-0001/replay/sample", {"t": ["-1"]})
+
+            assert single is not None and ranged is not None and cached is not None
+            assert missing is not None and too_many is not None and negative is not None
+            self.assertEqual(single.status, 200)
+            self.assertEqual(single.body["source_event_count"], 3)
+            self.assertEqual(single.body["sample"]["t"], 0.0)
+            self.assertTrue(single.body["sample"]["active"])
+            self.assertEqual([sample["t"] for sample in ranged.body["samples"]], [0.0, 0.25, 0.5, 0.75, 1.0])
+            self.assertEqual(cached.body["sample"]["state"], "ACTIVE")
+            self.assertEqual(cached.body["sample"]["deposition_progress"], 0.5)
+            assert refreshed is not None
+            self.assertEqual(refreshed.body["source_event_count"], 4)
+            self.assertGreater(refreshed.body["duration_sec"], single.body["duration_sec"])
+            self.assertEqual((missing.status, too_many.status, negative.status), (400, 400, 400))
+
+    def test_stream_variants_emit_header_then_events_or_segments(self) -> None:
+        for backend, trial_storage in (("local-json", "document"), ("local-json", "event-log"), ("sqlite", None)):
+            with self.subTest(backend=backend, trial_storage=trial_storage), tempfile.TemporaryDirectory() as tmp:
+                suit_store_root = Path(tmp) / "suits"
+                self._api_with_manifest(suit_store_root, storage_backend=backend)
+                api = NewRouteApi(
+                    Path("."),
+                    suit_store_root=suit_store_root,
+                    storage_backend=backend,
+                    trial_storage=trial_storage,
+                    event_log_compact_every=100,
+                )
+                api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0001"})
+                api.post(
+                    "/v1/trials/S-TRIAL-UNIT-0001/events:batch",
+                    {"events": [{"event_type": "TRACKING_FRAME_BATCH", "payload": {"frames": [index]}} for index in range(5)]},
+                )
+
+                streamed = api.get("/v1/trials/S-TRIAL-UNIT-0001", {"stream": ["1"]})
+                with mock.patch.object(api, "_write_trial_replay", side_effect=AssertionError("replay document built")):
+                    replay = api.get("/v1/trials/S-TRIAL-UNIT-0001/replay", stream=True)
+                plain = api.get("/v1/trials/S-TRIAL-UNIT-0001")
+
+                assert streamed is not None and replay is not None and plain is not None
+                assert streamed.records is not None and replay.records is not None
+                records = list(streamed.records)
+                replay_records = list(replay.records)
+                self.assertIsNone(plain.records)
+                self.assertEqual(records[0]["type"], "header")
+                self.assertNotIn("events", records[0]["session"])
+                self.assertEqual(records[0]["session"]["state"], plain.body["trial"]["state"])
+                self.assertEqual([record["event"] for record in records[1:-1]], plain.body["trial"]["events"])
+                self.assertEqual(records[-1], {"type": "end", "count": 6})
+                self.assertEqual(replay_records[0]["replay"]["replay_id"], replay.body["replay_id"])
+                self.assertEqual(replay_records[0]["replay_cache"], "rebuilt")
+                self.assertNotIn("timeline", replay_records[0]["replay"])
+                self.assertEqual({record["type"] for record in replay_records[1:-1]}, {"segment"})
+                self.assertEqual(replay_records[-1]["count"], len(replay_records) - 2)
+
+    def test_tracking_frame_batches_are_stored_in_sidecar_and_served_by_range(self) -> None:
+        batch = [{"dt_sec": 0.033, "joints": {"head": [0.0, 1.5 + index / 100], "left_wrist": [0.25, 0.5]}} for index in range(6)]
+        for backend in ("local-json", "sqlite"):
+            with self.subTest(backend=backend), tempfile.TemporaryDirectory() as tmp:
+                suit_store_root = Path(tmp) / "suits"
+                api = self._api_with_manifest(suit_store_root, storage_backend=backend)
+                api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0001"})
+                first = api.post(
+                    "/v1/trials/S-TRIAL-UNIT-0001/events",
+                    {"event_type": "TRACKING_FRAME_BATCH", "payload": {"source": "mocopi", "frames": batch[:4]}},
+                )
+                api.post(
+                    "/v1/trials/S-TRIAL-UNIT-0001/events:batch",
+                    {"events": [{"event_type": "TRACKING_FRAME_BATCH", "payload": {"frames": batch[4:]}}]},
+                )
+
+                ranged = api.get("/v1/trials/S-TRIAL-UNIT-0001/frames", {"from": ["2"], "to": ["5"]})
+                everything = api.get("/v1/trials/S-TRIAL-UNIT-0001/frames")
+                oversized = api.get("/v1/trials/S-TRIAL-UNIT-0001/frames", {"to": ["6000"], "from": ["0"]})
+                invalid = api.get("/v1/trials/S-TRIAL-UNIT-0001/frames", {"from": ["-1"]})
+
+                assert first is not None and ranged is not None and everything is not None
+                assert oversized is not None and invalid is not None
+                payload = first.body["event"]["payload"]
+                self.assertNotIn("frames", payload)
+                self.assertEqual(payload["source"], "mocopi")
+                self.assertEqual(payload["frames_ref"]["frame_count"], 4)
+                self.assertEqual(payload["frames_ref"]["encoding"], "f32")
+                self.assertTrue(payload["frames_ref"]["path"].endswith("S-TRIAL-UNIT-0001/tracking-frames.bin"))
+                self.assertEqual(ranged.status, 200)
+                self.assertEqual([frame["frame_index"] for frame in ranged.body["frames"]], [2, 3, 4])
+                self.assertEqual(ranged.body["frames"][2]["joints"]["left_wrist"], [0.25, 0.5])
+                self.assertEqual(everything.body["frame_count"], 6)
+                self.assertEqual(len(everything.body["frames"]), 6)
+                self.assertEqual(oversized.body["to"], 6)
+                self.assertEqual(invalid.status, 400)
+
+    def test_summary_time_filters_compare_offsets_in_utc(self) -> None:
+        for backend in ("local-json", "sqlite"):
+            with self.subTest(backend=backend), tempfile.TemporaryDirectory() as tmp:
+                api = self._api_with_manifest(Path(tmp) / "suits", storage_backend=backend)
+                api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0001"})
+                api.post(
+                    "/v1/trials/S-TRIAL-UNIT-0001/events",
+                    {"event_type": "DEPOSITION_STARTED", "state_after": "DEPOSITION", "occurred_at": "2026-10-19T20:00:00+09:00"},
+                )
+                since = api.get("/v1/trials", {"since": ["2026-10-19T12:00:00Z"]})
+                until = api.get("/v1/trials", {"until": ["2026-10-19T12:00:00Z"]})
+
+                assert since is not None and until is not None
+                self.assertEqual(since.body["count"], 0)
+                self.assertEqual([summary["session_id"] for summary in until.body["trials"]], ["S-TRIAL-UNIT-0001"])
+                self.assertEqual(until.body["trials"][0]["updated_at"], "2026-10-19T11:00:00+00:00")
+
+    def test_explicit_event_ids_are_unique_per_trial_on_every_backend(self) -> None:
+        event = {"event_id": "EVT-20260424-ABC123", "event_type": "DEPOSITION_STARTED", "state_after": "DEPOSITION"}
+        for backend in ("local-json", "sqlite"):
+            with self.subTest(backend=backend), tempfile.TemporaryDirectory() as tmp:
+                api = self._api_with_manifest(Path(tmp) / "suits", storage_backend=backend)
+                api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0001"})
+                api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0002"})
+                first = api.post("/v1/trials/S-TRIAL-UNIT-0001/events", event)
+                second = api.post("/v1/trials/S-TRIAL-UNIT-0002/events", event)
+
+                assert first is not None and second is not None
+                self.assertEqual((first.status, second.status), (201, 201))
+                self.assertEqual(second.body["event"]["event_id"], "EVT-20260424-ABC123")
+
+    def test_sqlite_backend_rekeys_events_from_older_databases(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            database = Path(tmp) / "new-route.sqlite3"
+            with sqlite3.connect(database) as conn:
+                legacy = SQLITE_SCHEMA.replace("event_id text not null", "event_id text primary key")
+                conn.executescript(legacy.replace("  primary key (session_id, event_id),\n", ""))
+            api = self._api_with_manifest(Path(tmp) / "suits", storage_backend="sqlite")
+            event = {"event_id": "EVT-20260424-ABC123", "event_type": "DEPOSITION_STARTED", "state_after": "DEPOSITION"}
+            api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0001"})
+            api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0002"})
+            first = api.post("/v1/trials/S-TRIAL-UNIT-0001/events", event)
+            second = api.post("/v1/trials/S-TRIAL-UNIT-0002/events", event)
+            trial = api.get("/v1/trials/S-TRIAL-UNIT-0001")
+
+            assert first is not None and second is not None and trial is not None
+            self.assertEqual((first.status, second.status), (201, 201))
+            self.assertEqual(len(trial.body["trial"]["events"]), 2)
+
+    def test_non_string_enum_values_are_rejected_with_400(self) -> None:
+        for backend in ("local-json", "sqlite"):
+            with self.subTest(backend=backend), tempfile.TemporaryDirectory() as tmp:
+                api = self._api_with_manifest(Path(tmp) / "suits", storage_backend=backend)
+                api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0001"})
+                batch = api.post("/v1/trials/S-TRIAL-UNIT-0001/events:batch", {"events": [{"actor": {"type": {"a": 1}}}]})
+                single = api.post("/v1/trials/S-TRIAL-UNIT-0001/events", {"actor": {"type": ["device"]}})
+
+                assert batch is not None and single is not None
+                self.assertEqual((batch.status, single.status), (400, 400))
+                self.assertEqual(batch.body["results"][0]["status"], 400)
+
+    def test_rejected_tracking_frame_batches_leave_no_sidecar_frames(self) -> None:
+        frames = [{"dt_sec": 0.033, "joints": {"head": [0.0, 1.5]}} for _ in range(3)]
+        for backend in ("local-json", "sqlite"):
+            with self.subTest(backend=backend), tempfile.TemporaryDirectory() as tmp:
+                suit_store_root = Path(tmp) / "suits"
+                api = self._api_with_manifest(suit_store_root, storage_backend=backend)
+                api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0001"})
+                sidecar = TrackingFrameStore(api.store.trial_dir("S-TRIAL-UNIT-0001"))
+                rejected = api.post(
+                    "/v1/trials/S-TRIAL-UNIT-0001/events",
+                    {"event_type": "TRACKING_FRAME_BATCH", "actor": {"type": "alien"}, "payload": {"frames": frames}},
+                )
+                rejected_batch = api.post(
+                    "/v1/trials/S-TRIAL-UNIT-0001/events:batch",
+                    [{"event_type": "TRACKING_FRAME_BATCH", "actor": {"type": "alien"}, "payload": {"frames": frames}}],
+                )
+                accepted = api.post(
+                    "/v1/trials/S-TRIAL-UNIT-0001/events",
+                    {"event_type": "TRACKING_FRAME_BATCH", "payload": {"frames": frames}},
+                )
+
+                assert rejected is not None and rejected_batch is not None and accepted is not None
+                self.assertEqual((rejected.status, rejected_batch.status), (400, 400))
+                self.assertEqual(accepted.status, 201)
+                self.assertEqual(accepted.body["event"]["payload"]["frames_ref"]["frame_start"], 0)
+                self.assertEqual(sidecar.frame_count, 3)
+
+    def test_mixed_dimension_tracking_frames_stay_inline(self) -> None:
+        frames = [{"dt_sec": 0.033, "joints": {"head": [0.0, 1.5, 0.2], "left_wrist": [0.25, 0.5]}}]
+        with tempfile.TemporaryDirectory() as tmp:
+            api = self._api_with_manifest(Path(tmp) / "suits")
+            api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0001"})
+            response = api.post(
+                "/v1/trials/S-TRIAL-UNIT-0001/events",
+                {"event_type": "TRACKING_FRAME_BATCH", "payload": {"frames": frames}},
+            )
+
+            assert response is not None
+            self.assertEqual(response.body["event"]["payload"], {"frames": frames})
+
+    def test_inline_tracking_encoding_keeps_frames_in_payload(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            suit_store_root = Path(tmp) / "suits"
+            self._api_with_manifest(suit_store_root)
+            api = NewRouteApi(Path("."), suit_store_root=suit_store_root, tracking_encoding="inline")
+            api.post("/v1/trials", {"suit_id": "VDA-AXIS-OP-00-0001", "session_id": "S-TRIAL-UNIT-0001"})
+            frames = [{"dt_sec": 0.033, "joints": {"head": [0.0, 1.5]}}]
+            response = api.post(
+                "/v1/trials/S-TRIAL-UNIT-0001/events",
+                {"event_type": "TRACKING_FRAME_BATCH", "payload": {"frames": frames}},
+            )
+
+            assert response is not None
+            self.assertEqual(response.body["event"]["payload"], {"frames": frames})
+            self.assertFalse((Path(tmp) / "trials" / "S-TRIAL-UNIT-0001" / "tracking-frames.bin").exists())
+        with self.assertRaises(ValueError):
+            NewRouteApi(Path("."), tracking_encoding="f16")
+
     def _sample_suitspec(self) -> dict:
         return json.loads(Path("examples/suitspec.sample.json").read_text(encoding="utf-8"))
 
-    def _api_with_manifest(self, suit_store_root: Path) -> NewRouteApi:
-        api = NewRouteApi(Path("."), suit_store_root=suit_store_root)
+    def _api_with_manifest(self, suit_store_root: Path, *, storage_backend: str | None = None) -> NewRouteApi:
+        api = NewRouteApi(Path("."), suit_store_root=suit_store_root, storage_backend=storage_backend)
         api.post("/v1/suits", {"suitspec": self._sample_suitspec()})
         api.post(
             "/v1/suits/VDA-AXIS-OP-00-0001/manifest",
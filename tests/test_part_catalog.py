@@ -0,0 +1,45 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from henshin import part_catalog as part_catalog_module
+from henshin.part_catalog import load_part_catalog
+
+
+class TestPartCatalog(unittest.TestCase):
+    def test_catalog_is_loaded_once_per_file_version(self) -> None:
+        seed = json.loads(Path("examples/partcatalog.seed.json").read_text(encoding="utf-8"))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "partcatalog.json"
+            path.write_text(json.dumps(seed), encoding="utf-8")
+            with mock.patch.object(part_catalog_module, "load_json", wraps=part_catalog_module.load_json) as load_json:
+                first = load_part_catalog(path)
+                second = load_part_catalog(path)
+                seed["parts"] = seed["parts"][:1]
+                path.write_text(json.dumps(seed), encoding="utf-8")
+                bumped_ns = path.stat().st_mtime_ns + 1_000_000
+                os.utime(path, ns=(bumped_ns, bumped_ns))
+                updated = load_part_catalog(path)
+
+        self.assertIs(first, second)
+        self.assertEqual(load_json.call_count, 2)
+        self.assertNotEqual(updated.version, first.version)
+        self.assertEqual(len(updated.catalog["parts"]), 1)
+        self.assertEqual(first.lookup["helmet"], "viewer.mesh.helmet.v1")
+
+    def test_invalid_catalog_raises_and_is_not_cached(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "partcatalog.json"
+            path.write_text(json.dumps({"catalog_id": "broken"}), encoding="utf-8")
+
+            with self.assertRaises(ValueError):
+                load_part_catalog(path)
+            with self.assertRaises(ValueError):
+                load_part_catalog(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
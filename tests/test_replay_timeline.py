@@ -0,0 +1,91 @@
+import unittest
+
+from henshin.replay_timeline import ReplayIndex, compact_timeline
+
+
+def _segment(index: int, t: float, action_type: str, event_type: str, payload: dict, state: str = "DEPOSITION") -> dict:
+    return {
+        "segment_id": f"SEG-{index:04d}",
+        "start_time_sec": t,
+        "duration_sec": 0.5,
+        "source_event_ids": [f"EVT-20260424-{index:06d}"],
+        "actions": [
+            {
+                "action_type": action_type,
+                "at_time_sec": t,
+                "params": {"event_type": event_type, "state_before": state, "state_after": state, "payload": payload},
+            }
+        ],
+    }
+
+
+class TestReplayTimeline(unittest.TestCase):
+    def test_progress_run_becomes_ranged_segment_with_simplified_keyframes(self) -> None:
+        segments = [_segment(0, 0.0, "fx", "DEPOSITION_STARTED", {})]
+        segments += [
+            _segment(index, float(index), "deposition_progress", "DEPOSITION_PROGRESS", {"progress": index / 10})
+            for index in range(1, 11)
+        ]
+        segments[6]["actions"][0]["params"]["payload"]["progress"] = 0.9
+
+        compacted = compact_timeline(segments, tolerance=0.01)
+        loose = compact_timeline(segments, tolerance=1.0)
+
+        self.assertEqual(len(compacted), 2)
+        ranged = compacted[1]
+        action = ranged["actions"][0]
+        self.assertEqual(ranged["segment_id"], "SEG-0001")
+        self.assertEqual((ranged["start_time_sec"], ranged["duration_sec"]), (1.0, 9.5))
+        self.assertEqual(ranged["source_event_ids"], [f"EVT-20260424-{index:06d}" for index in range(1, 11)])
+        self.assertEqual(action["params"]["event_count"], 10)
+        self.assertEqual(action["params"]["interpolation"], "linear")
+        self.assertEqual([keyframe["t"] for keyframe in action["params"]["keyframes"]], [1.0, 5.0, 6.0, 7.0, 10.0])
+        self.assertEqual([keyframe["t"] for keyframe in loose[1]["actions"][0]["params"]["keyframes"]], [1.0, 10.0])
+
+    def test_only_identical_state_markers_collapse(self) -> None:
+        segments = [
+            _segment(0, 0.0, "state_marker", "TRACKING_FRAME_BATCH", {}),
+            _segment(1, 1.0, "state_marker", "TRACKING_FRAME_BATCH", {}),
+            _segment(2, 2.0, "state_marker", "TRACKING_FRAME_BATCH", {}),
+            _segment(3, 3.0, "state_marker", "TRACKING_FRAME_BATCH", {"frames": [1]}),
+            _segment(4, 4.0, "text", "VOICE_CAPTURED", {}),
+        ]
+
+        compacted = compact_timeline(segments)
+
+        self.assertEqual([segment["segment_id"] for segment in compacted], ["SEG-0000", "SEG-0003", "SEG-0004"])
+        self.assertEqual(compacted[0]["actions"][0]["params"]["event_count"], 3)
+        self.assertEqual(compacted[0]["actions"][0]["params"]["until_sec"], 2.0)
+        self.assertEqual(compacted[0]["duration_sec"], 2.5)
+        self.assertIs(compacted[1], segments[3])
+
+    def test_replay_index_samples_state_progress_and_active_segments(self) -> None:
+        segments = [_segment(0, 0.0, "fx", "DEPOSITION_STARTED", {}, state="APPROVED")]
+        segments[0]["actions"][0]["params"]["state_after"] = "DEPOSITION"
+        segments += [
+            _segment(index, float(index), "deposition_progress", "DEPOSITION_PROGRESS", {"progress": index / 4})
+            for index in range(1, 5)
+        ]
+        segments.append(_segment(5, 6.0, "fx", "DEPOSITION_COMPLETED", {}))
+        segments[-1]["actions"][0]["params"]["state_after"] = "ACTIVE"
+        timeline = compact_timeline(segments, tolerance=0.0)
+        index = ReplayIndex({"replay_id": "RPL-20260424-ABCD", "duration_sec": 6.5, "timeline": timeline})
+
+        before = index.sample(0.25)
+        mid = index.sample(2.5)
+        held = index.sample(5.8)
+        after = index.sample(7.0)
+
+        self.assertEqual(before["state"], "DEPOSITION")
+        self.assertIsNone(before["deposition_progress"])
+        self.assertEqual([segment["segment_id"] for segment in before["active"]], ["SEG-0000"])
+        self.assertEqual(mid["deposition_progress"], 0.625)
+        self.assertEqual(mid["active"][0]["progress"], 0.625)
+        self.assertEqual(held["deposition_progress"], 1.0)
+        self.assertEqual(held["active"], [])
+        self.assertEqual(after["state"], "ACTIVE")
+        self.assertEqual(after["active"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
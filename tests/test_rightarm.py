@@ -1,6 +1,14 @@
 import unittest
 
-from henshin.rightarm import CoverScale, DockCharger, RightArmFrame, Vec2, norm_to_world, run_rightarm_sequence
+from henshin.rightarm import (
+    CoverScale,
+    DockCharger,
+    RightArmFrame,
+    RightArmSequenceStream,
+    Vec2,
+    norm_to_world,
+    run_rightarm_sequence,
+)
 
 
 class TestRightArm(unittest.TestCase):
@@ -28,6 +36,16 @@ class TestRightArm(unittest.TestCase):
         self.assertTrue(out["equipped"])
         self.assertGreaterEqual(out["equip_frame"], 0)
 
+    def test_stream_records_match_sequence(self) -> None:
+        frames = [RightArmFrame(0.1, (0.32, 0.56), (0.225, 0.625)) for _ in range(5)]
+        expected = run_rightarm_sequence(frames, hold_to_equip_sec=0.25)
+
+        records = list(RightArmSequenceStream(iter(frames), hold_to_equip_sec=0.25).records())
+
+        self.assertEqual([record["frame"] for record in records if record["type"] == "frame"], expected["frames"])
+        self.assertEqual([record["index"] for record in records if record["type"] == "equip"], [expected["equip_frame"]])
+        self.assertEqual(records[-1]["frame_count"], 5)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,105 @@
+import gzip
+import http.client
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from henshin.fit_regression import serve_static_root
+from henshin.static_files import SENDFILE_MIN_BYTES, precompress_static_tree
+
+
+class TestStaticFiles(unittest.TestCase):
+    def _write_assets(self, root: Path) -> bytes:
+        viewer = root / "viewer"
+        viewer.mkdir()
+        payload = ('{"frames": [' + ",".join(str(i) for i in range(2000)) + "]}").encode("utf-8")
+        (viewer / "sim.json").write_bytes(payload)
+        (viewer / "index.html").write_text("<!doctype html><title>viewer</title>", encoding="utf-8")
+        (viewer / "model.glb").write_bytes(bytes(range(256)) * ((SENDFILE_MIN_BYTES // 256) + 8))
+        return payload
+
+    def test_keep_alive_validators_ranges_and_sidecars(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            payload = self._write_assets(root)
+            with serve_static_root(root) as server:
+                conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+
+                def fetch(path: str, headers: dict[str, str] | None = None) -> tuple[http.client.HTTPResponse, bytes]:
+                    conn.request("GET", path, headers=headers or {})
+                    response = conn.getresponse()
+                    return response, response.read()
+
+                try:
+                    first, first_body = fetch("/viewer/sim.json", {"Accept-Encoding": "gzip"})
+                    socket_after_first = conn.sock
+                    etag = first.getheader("ETag")
+                    revalidated, revalidated_body = fetch("/viewer/sim.json", {"If-None-Match": str(etag)})
+                    partial, partial_body = fetch("/viewer/sim.json", {"Range": "bytes=2-9"})
+                    suffix, suffix_body = fetch("/viewer/sim.json", {"Range": "bytes=-4"})
+                    stale_if_range, _ = fetch("/viewer/sim.json", {"Range": "bytes=0-3", "If-Range": '"0-0"'})
+                    unsatisfiable, _ = fetch("/viewer/sim.json", {"Range": f"bytes={len(payload)}-"})
+                    index, index_body = fetch("/viewer/")
+                    large, large_body = fetch("/viewer/model.glb")
+                    reused = conn.sock is socket_after_first
+
+                    summary = precompress_static_tree(root)
+                    compressed, compressed_body = fetch("/viewer/sim.json", {"Accept-Encoding": "br;q=0, gzip"})
+                    ranged, ranged_body = fetch("/viewer/sim.json", {"Accept-Encoding": "gzip", "Range": "bytes=0-0"})
+                    identity, _ = fetch("/viewer/sim.json", {"Accept-Encoding": "identity"})
+                    weak_coded, _ = fetch("/viewer/sim.json", {"If-None-Match": f"W/{compressed.getheader('ETag')}"})
+                    os.utime(root / "viewer" / "sim.json", ns=(1, 1))
+                    stale, stale_body = fetch("/viewer/sim.json", {"Accept-Encoding": "gzip"})
+                finally:
+                    conn.close()
+
+        self.assertEqual(first.status, 200)
+        self.assertEqual(first_body, payload)
+        self.assertIsNone(first.getheader("Content-Encoding"))
+        self.assertEqual(first.getheader("Accept-Ranges"), "bytes")
+        self.assertTrue(str(etag).startswith('"') and not str(etag).startswith("W/"))
+        self.assertEqual(revalidated.status, 304)
+        self.assertEqual(revalidated_body, b"")
+        self.assertEqual((partial.status, partial_body), (206, payload[2:10]))
+        self.assertEqual(partial.getheader("Content-Range"), f"bytes 2-9/{len(payload)}")
+        self.assertEqual(suffix_body, payload[-4:])
+        self.assertEqual(stale_if_range.status, 200)
+        self.assertEqual(unsatisfiable.status, 416)
+        self.assertEqual(unsatisfiable.getheader("Content-Range"), f"bytes */{len(payload)}")
+        self.assertEqual(index.status, 200)
+        self.assertIn(b"viewer", index_body)
+        self.assertEqual(large.status, 200)
+        self.assertEqual(large_body, bytes(range(256)) * ((SENDFILE_MIN_BYTES // 256) + 8))
+        self.assertTrue(reused)
+
+        self.assertEqual(summary["written"], 2)
+        self.assertEqual(compressed.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(gzip.decompress(compressed_body), payload)
+        self.assertNotEqual(compressed.getheader("ETag"), etag)
+        self.assertEqual((weak_coded.status, weak_coded.getheader("ETag")), (304, etag))
+        self.assertIsNone(ranged.getheader("Content-Encoding"))
+        self.assertEqual(ranged_body, payload[:1])
+        self.assertIsNone(identity.getheader("Content-Encoding"))
+        self.assertIsNone(stale.getheader("Content-Encoding"))
+        self.assertEqual(stale_body, payload)
+
+    def test_precompress_skips_current_and_small_files(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            self._write_assets(root)
+            first = precompress_static_tree(root)
+            second = precompress_static_tree(root)
+            forced = precompress_static_tree(root, force=True)
+            sidecar = root / "viewer" / "sim.json.gz"
+            source_mtime = (root / "viewer" / "sim.json").stat().st_mtime_ns
+            sidecar_mtime = sidecar.stat().st_mtime_ns
+
+        self.assertEqual((first["written"], first["skipped_small"]), (2, 1))
+        self.assertEqual((second["written"], second["up_to_date"]), (0, 2))
+        self.assertEqual(forced["written"], 2)
+        self.assertEqual(sidecar_mtime, source_mtime)
+
+
+if __name__ == "__main__":
+    unittest.main()
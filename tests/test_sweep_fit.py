@@ -0,0 +1,159 @@
+import csv
+import itertools
+import json
+import math
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+from henshin.bodyfit import BodyFrame, CoverScale, Vec2, run_body_sequence
+from henshin.bodyfit_batch import numpy_available
+from henshin.rightarm import RightArmFrame, run_rightarm_sequence
+from henshin.sweep_fit import (
+    SweepGrid,
+    load_sweep_sequence,
+    parse_grid_values,
+    run_sweep,
+    sweep_sequence,
+    write_sweep_csv,
+)
+
+GRID = SweepGrid(
+    dock_center_x=(0.5, 0.55, 0.6),
+    dock_center_y=(-0.3, -0.25),
+    dock_radius=(0.08, 0.12, 0.18, 0.25),
+    hold_to_equip_sec=(0.2, 0.45, 0.7, 1.2),
+    smooth_gain=(6.0, 18.0),
+)
+
+
+def _wander(frame_count: int, seed: int, *, near_dock: bool) -> list[dict]:
+    # Around (0.225, 0.625) in xy01 the mirrored wrist sits on the default dock center.
+    rng = random.Random(seed)
+    base = (0.225, 0.625) if near_dock else (0.7, 0.2)
+    frames = []
+    for index in range(frame_count):
+        reach = 0.09 * math.sin(index / 7 + seed)
+        wrist = [base[0] + reach + rng.uniform(-0.02, 0.02), base[1] - reach * 0.5 + rng.uniform(-0.02, 0.02)]
+        frames.append(
+            {
+                "dt_sec": rng.choice([1 / 60, 1 / 30, 0.05]),
+                "right_elbow_xy01": [wrist[0] + 0.1, wrist[1] - 0.14],
+                "right_wrist_xy01": wrist,
+            }
+        )
+    return frames
+
+
+def _write(tmp: Path, name: str, payload: dict) -> Path:
+    path = tmp / name
+    path.write_text(json.dumps(payload), encoding="utf-8")
+    return path
+
+
+class TestParseGridValues(unittest.TestCase):
+    def test_lists_and_inclusive_ranges(self) -> None:
+        self.assertEqual(parse_grid_values("0.1:0.3:0.1,0.5"), (0.1, 0.2, 0.3, 0.5))
+        self.assertEqual(parse_grid_values("18"), (18.0,))
+        with self.assertRaises(ValueError):
+            parse_grid_values("0.3:0.1:0.1")
+
+
+@unittest.skipUnless(numpy_available(), "numpy is not installed")
+class TestSweepFit(unittest.TestCase):
+    def test_equip_frames_match_reference_simulations(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            arm_frames = _wander(160, seed=3, near_dock=True)
+            arm_path = _write(Path(tmp), "arm.json", {"mirror": True, "frames": arm_frames})
+            body_payload = {
+                "mirror": True,
+                "cover_scale": {"x": 1.0, "y": 1.0},
+                "dock": {"trigger_joint": "right_wrist"},
+                "frames": [
+                    {
+                        "dt_sec": item["dt_sec"],
+                        "joints": {"right_elbow": item["right_elbow_xy01"], "right_wrist": item["right_wrist_xy01"]},
+                    }
+                    for item in arm_frames
+                ],
+            }
+            # A few frames lose the wrist; the charger decays through them.
+            for item in body_payload["frames"][20:24]:
+                del item["joints"]["right_wrist"]
+            body_path = _write(Path(tmp), "body.json", body_payload)
+
+            arm = sweep_sequence(load_sweep_sequence(arm_path, kind="rightarm", expect_equip=True), GRID)
+            body = sweep_sequence(load_sweep_sequence(body_path, kind="body", expect_equip=True), GRID)
+
+        self.assertGreater((arm["equip_frame"] >= 0).sum(), 0)
+        self.assertGreater((arm["equip_frame"] < 0).sum(), 0)
+        body_frames = [
+            BodyFrame(item["dt_sec"], {name: tuple(xy) for name, xy in item["joints"].items()})
+            for item in body_payload["frames"]
+        ]
+        arm_inputs = [
+            RightArmFrame(item["dt_sec"], tuple(item["right_elbow_xy01"]), tuple(item["right_wrist_xy01"]))
+            for item in arm_frames
+        ]
+        combos = itertools.product(*(range(size) for size in arm["equip_frame"].shape))
+        for ix, iy, ir, ih in combos:
+            dock = dict(
+                dock_radius=GRID.dock_radius[ir],
+                hold_to_equip_sec=GRID.hold_to_equip_sec[ih],
+            )
+            expected_arm = run_rightarm_sequence(
+                arm_inputs,
+                cover_scale=CoverScale(1.0, 1.0),
+                dock_center=Vec2(GRID.dock_center_x[ix], GRID.dock_center_y[iy]),
+                **dock,
+            )
+            expected_body = run_body_sequence(
+                body_frames,
+                cover_scale=CoverScale(1.0, 1.0),
+                dock_center=Vec2(GRID.dock_center_x[ix], GRID.dock_center_y[iy]),
+                **dock,
+            )
+            with self.subTest(combo=(ix, iy, ir, ih)):
+                self.assertEqual(int(arm["equip_frame"][ix, iy, ir, ih]), _or_missing(expected_arm["equip_frame"]))
+                self.assertEqual(int(body["equip_frame"][ix, iy, ir, ih]), _or_missing(expected_body["equip_frame"]))
+
+        # Lower gains trail the forearm further but move less per frame.
+        self.assertGreater(body["lag"][0], body["lag"][1])
+        self.assertLess(body["jitter"][0], body["jitter"][1])
+
+    def test_run_sweep_ranks_by_false_triggers_and_misses(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = {
+                name: _write(Path(tmp), f"{name}.json", {"frames": _wander(120, seed=seed, near_dock=near)})
+                for name, seed, near in (("hit_a", 1, True), ("hit_b", 2, True), ("away", 5, False))
+            }
+            # Passing close to the dock: only generous radii and short holds fire on it.
+            brush = _wander(120, seed=9, near_dock=True)
+            for item in brush:
+                item["right_wrist_xy01"][1] -= 0.09
+            paths["brush"] = _write(Path(tmp), "brush.json", {"frames": brush})
+            sequences = [load_sweep_sequence(paths[name], kind="rightarm", expect_equip=name.startswith("hit")) for name in paths]
+
+            rows = run_sweep(sequences, GRID, workers=2)
+            self.assertEqual(rows, run_sweep(sequences, GRID, workers=1))
+            out = write_sweep_csv(Path(tmp) / "ranked.csv", rows)
+            with out.open(encoding="utf-8") as fp:
+                self.assertEqual(len(list(csv.DictReader(fp))), GRID.size)
+
+        self.assertEqual(len(rows), GRID.size)
+        self.assertEqual([row["rank"] for row in rows], list(range(1, GRID.size + 1)))
+        self.assertTrue(any(row["false_trigger_rate"] > 0 for row in rows))
+        best = rows[0]
+        self.assertEqual((best["false_trigger_rate"], best["miss_rate"]), (0.0, 0.0))
+        self.assertLessEqual(best["equip_sec_p50"], best["equip_sec_p90"])
+        keys = [(row["false_trigger_rate"], row["miss_rate"]) for row in rows]
+        self.assertEqual(keys, sorted(keys))
+
+
+def _or_missing(equip_frame: int | None) -> int:
+    return -1 if equip_frame is None else equip_frame
+
+
+if __name__ == "__main__":
+    unittest.main()
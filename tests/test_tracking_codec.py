@@ -0,0 +1,75 @@
+import math
+import tempfile
+import unittest
+from pathlib import Path
+
+from henshin.bodyfit import BodyFrame
+from henshin.iw_henshin import _serialize_body_frames
+from henshin.tracking_codec import decode_tracking, decode_tracking_block, encode_tracking, tracking_replay_block
+
+
+def _capture(count: int) -> list[BodyFrame]:
+    frames = []
+    for index in range(count):
+        joints = {
+            "left_wrist": (0.7 + 0.05 * math.sin(index / 7), 0.61),
+            "right_wrist": (0.225, 0.625 - 0.04 * math.cos(index / 5)),
+            "right_elbow": (-0.34, 0.48),
+        }
+        if index % 11 == 3:
+            del joints["left_wrist"]
+        frames.append(BodyFrame(dt_sec=1 / 30, joints_xy01=joints))
+    return frames
+
+
+class TestTrackingCodec(unittest.TestCase):
+    def assertFramesClose(self, expected: list[BodyFrame], actual: list[BodyFrame], precision: float) -> None:
+        self.assertEqual(len(expected), len(actual))
+        for before, after in zip(expected, actual):
+            self.assertEqual(set(before.joints_xy01), set(after.joints_xy01))
+            self.assertAlmostEqual(before.dt_sec, after.dt_sec, delta=1e-5)
+            for name, (x, y) in before.joints_xy01.items():
+                self.assertAlmostEqual(after.joints_xy01[name][0], x, delta=precision / 2 + 1e-12)
+                self.assertAlmostEqual(after.joints_xy01[name][1], y, delta=precision / 2 + 1e-12)
+
+    def test_round_trip_stays_within_declared_precision(self) -> None:
+        frames = _capture(95)
+        for precision in (1e-3, 1e-4):
+            with self.subTest(precision=precision):
+                meta, data = encode_tracking(frames, precision=precision, keyframe_interval=30)
+                self.assertEqual(len(meta["groups"]), 4)
+                self.assertFramesClose(frames, decode_tracking(meta, data), precision)
+
+    def test_range_decode_matches_full_decode(self) -> None:
+        meta, data = encode_tracking(_capture(95), keyframe_interval=30)
+        full = decode_tracking(meta, data)
+
+        self.assertEqual(decode_tracking(meta, data, start=28, end=64), full[28:64])
+        self.assertEqual(decode_tracking(meta, data, start=90), full[90:])
+        self.assertEqual(decode_tracking(meta, data, start=30, end=30), [])
+
+    def test_inline_and_sidecar_blocks_decode(self) -> None:
+        frames = _capture(40)
+        inline = tracking_replay_block(frames)
+        self.assertLess(len(inline["data"]), len(str(_serialize_body_frames(frames))) / 4)
+        self.assertFramesClose(frames, decode_tracking_block(inline), 1e-4)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            sidecar = Path(tmp) / "iwsdk-tracking.qdt"
+            block = tracking_replay_block(frames, sidecar_path=sidecar)
+            self.assertEqual(block["sidecar"]["path"], "iwsdk-tracking.qdt")
+            self.assertFramesClose(frames, decode_tracking_block(block, base_dir=Path(tmp)), 1e-4)
+
+            sidecar.write_bytes(b"\0" + sidecar.read_bytes()[1:])
+            with self.assertRaises(ValueError):
+                decode_tracking_block(block, base_dir=Path(tmp))
+
+    def test_plain_json_block_passes_through(self) -> None:
+        frames = _capture(3)
+        block = {"frames": _serialize_body_frames(frames), "frame_count": 3}
+
+        self.assertEqual(decode_tracking_block(block), frames)
+
+
+if __name__ == "__main__":
+    unittest.main()
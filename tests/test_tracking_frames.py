@@ -0,0 +1,76 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from henshin.tracking_frames import SIDECAR_FILENAME, TrackingFrameStore, encode_frame_block, frames_are_encodable
+
+
+def _frames(count: int, start: int = 0) -> list[dict]:
+    return [
+        {
+            "dt_sec": 1 / 30,
+            "joints": {"left_wrist": [0.1 * index, -0.5], "head": [0.0, 1.5 + 0.01 * index]},
+        }
+        for index in range(start, start + count)
+    ]
+
+
+class TestTrackingFrames(unittest.TestCase):
+    def test_only_body_sequence_frames_are_encodable(self) -> None:
+        self.assertTrue(frames_are_encodable(_frames(2)))
+        self.assertTrue(frames_are_encodable([{"joints": {"hip": [0, 1, 2]}}]))
+        self.assertFalse(frames_are_encodable([]))
+        self.assertFalse(frames_are_encodable([1, 2]))
+        self.assertFalse(frames_are_encodable([{"joints": {"hip": [0]}}]))
+        self.assertFalse(frames_are_encodable([{"dt_sec": "fast", "joints": {}}]))
+        self.assertFalse(frames_are_encodable([{"joints": {"hip": [0, 1, 2], "head": [0, 1]}}]))
+        with self.assertRaises(ValueError):
+            encode_frame_block([{"joints": {"hip": [0, 1, 2]}}, {"joints": {"hip": [0, 1]}}], frame_start=0)
+
+    def test_ranges_span_batches_and_keep_missing_joints_missing(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = TrackingFrameStore(Path(tmp))
+            first = store.append(_frames(4))
+            sparse = [{"dt_sec": 0.05, "joints": {"head": [0.0, 2.0]}}, {"dt_sec": 0.05, "joints": {"hip": [1.0, 0.5]}}]
+            second = store.append(sparse)
+
+            frames = TrackingFrameStore(Path(tmp)).read_frames(3, 6)
+
+        self.assertEqual((first["offset"], first["frame_start"]), (0, 0))
+        self.assertEqual((second["offset"], second["frame_start"]), (first["length"], 4))
+        self.assertEqual([frame["frame_index"] for frame in frames], [3, 4, 5])
+        self.assertAlmostEqual(frames[0]["joints"]["left_wrist"][0], 0.3, places=5)
+        self.assertAlmostEqual(frames[0]["dt_sec"], 1 / 30, places=5)
+        self.assertEqual(frames[1]["joints"], {"head": [0.0, 2.0]})
+        self.assertEqual(frames[2]["joints"], {"hip": [1.0, 0.5]})
+
+    def test_q16_is_smaller_and_within_quantization_step(self) -> None:
+        frames = _frames(50)
+        f32 = encode_frame_block(frames, frame_start=0, encoding="f32")
+        q16 = encode_frame_block(frames, frame_start=0, encoding="q16")
+        with tempfile.TemporaryDirectory() as tmp:
+            store = TrackingFrameStore(Path(tmp))
+            store.append(frames, encoding="q16")
+            decoded = store.read_frames(0, 50)
+
+        self.assertLess(len(q16), len(f32))
+        step = 4.9 / 65534
+        for original, frame in zip(frames, decoded):
+            for name, xy in original["joints"].items():
+                for expected, actual in zip(xy, frame["joints"][name]):
+                    self.assertLessEqual(abs(expected - actual), step)
+
+    def test_corrupted_block_fails_checksum(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = TrackingFrameStore(Path(tmp))
+            ref = store.append(_frames(3))
+            data = bytearray((Path(tmp) / SIDECAR_FILENAME).read_bytes())
+            data[ref["length"] - 1] ^= 0xFF
+            (Path(tmp) / SIDECAR_FILENAME).write_bytes(bytes(data))
+
+            with self.assertRaises(ValueError):
+                store.read_frames(0, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from henshin.iw_henshin import IWSDKHenshinConfig, IWSDKHenshinRequest, run_iwsdk_henshin
+from henshin.sakura_ai_engine import SakuraAIEngineConfig, SpeechResult
+from henshin.tts_cache import TTSCache, prewarm_tts_cache, tts_cache_key
+
+
+class _CountingClient:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    def synthesize_speech(self, input_text: str) -> SpeechResult:
+        self.calls.append(input_text)
+        return SpeechResult(f"audio:{input_text}".encode("utf-8"), "zundamon", "normal", "wav", input_text)
+
+
+class TestTTSCache(unittest.TestCase):
+    def test_key_covers_voice_and_endpoint(self) -> None:
+        config = SakuraAIEngineConfig(token="t")
+        trailing_slash = SakuraAIEngineConfig(base_url=config.base_url + "/")
+        self.assertEqual(tts_cache_key("a", config), tts_cache_key("a", trailing_slash))
+        for other in (
+            SakuraAIEngineConfig(tts_voice="other"),
+            SakuraAIEngineConfig(tts_model="other"),
+            SakuraAIEngineConfig(tts_format="mp3"),
+            SakuraAIEngineConfig(base_url="https://example.invalid/v1"),
+        ):
+            self.assertNotEqual(tts_cache_key("a", config), tts_cache_key("a", other))
+        self.assertNotEqual(tts_cache_key("a", config), tts_cache_key("b", config))
+
+    def test_miss_then_hit_and_hard_link(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = TTSCache(tmp)
+            client = _CountingClient()
+            config = SakuraAIEngineConfig(token="t")
+
+            first = cache.synthesize("hello", config, client)
+            second = cache.synthesize("hello", config, client)
+            self.assertEqual((first.hit, second.hit), (False, True))
+            self.assertEqual(client.calls, ["hello"])
+
+            linked = TTSCache.link_into(second, Path(tmp) / "S-1" / "artifacts" / "explainer.wav")
+            self.assertEqual(linked.read_bytes(), b"audio:hello")
+            self.assertTrue(os.path.samefile(linked, second.path))
+
+    def test_eviction_keeps_recently_used_entries_under_budget(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = TTSCache(tmp, max_bytes=25)
+            client = _CountingClient()
+            config = SakuraAIEngineConfig(token="t")
+            report = prewarm_tts_cache(cache, ["one", "two", "two"], config, client=client)
+            self.assertEqual([entry["hit"] for entry in report], [False, False])
+            first, second = (Path(entry["path"]) for entry in report)
+            os.utime(first, (1_000, 1_000))
+            os.utime(second, (2_000, 2_000))
+            linked = TTSCache.link_into(cache.get("one", config), Path(tmp) / "session.wav")
+
+            cache.synthesize("six", config, client)
+
+            # "one" was refreshed by the hit, so "two" is the oldest entry.
+            self.assertTrue(first.exists())
+            self.assertFalse(second.exists())
+            self.assertFalse(second.with_suffix(".json").exists())
+            self.assertLessEqual(cache.total_bytes(), 25)
+            self.assertEqual(linked.read_bytes(), b"audio:one")
+
+    def test_run_iwsdk_henshin_reuses_cached_explanation(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            client = _CountingClient()
+            results = [
+                run_iwsdk_henshin(
+                    IWSDKHenshinRequest(
+                        transcript="\u751f\u6210",
+                        root=tmp,
+                        session_id=f"S-IWTEST-TTS-{index}",
+                        sakura_config=SakuraAIEngineConfig(token="t"),
+                    ),
+                    client=client,
+                )
+                for index in range(2)
+            ]
+
+            self.assertEqual(len(client.calls), 1)
+            self.assertEqual([result["tts"]["cache"]["hit"] for result in results], [False, True])
+            paths = [Path(result["tts"]["audio_path"]) for result in results]
+            self.assertTrue(all(path.exists() for path in paths))
+            self.assertTrue(os.path.samefile(paths[0], paths[1]))
+
+            without_token = run_iwsdk_henshin(
+                IWSDKHenshinRequest(transcript="\u751f\u6210", root=tmp, sakura_config=SakuraAIEngineConfig())
+            )
+            self.assertEqual(without_token["tts"]["status"], "generated")
+            self.assertTrue(without_token["tts"]["cache"]["hit"])
+
+    def test_entry_evicted_after_lookup_is_a_miss(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = TTSCache(tmp)
+            client = _CountingClient()
+            config = SakuraAIEngineConfig(token="t")
+            cached = cache.synthesize("hello", config, client)
+            cached.path.unlink()
+
+            self.assertIsNone(TTSCache.link_into(cached, Path(tmp) / "session.wav"))
+            self.assertFalse((Path(tmp) / "session.wav").exists())
+
+            get = TTSCache.get
+
+            def get_then_evict(self: TTSCache, text: str, config: SakuraAIEngineConfig):
+                hit = get(self, text, config)
+                if hit is not None:
+                    hit.path.unlink()
+                return hit
+
+            cache.synthesize(IWSDKHenshinConfig().explanation_text, config, client)
+            with mock.patch.object(TTSCache, "get", get_then_evict):
+                result = run_iwsdk_henshin(
+                    IWSDKHenshinRequest(transcript="\u751f\u6210", root=tmp, sakura_config=config), client=client
+                )
+
+            self.assertEqual(result["tts"]["status"], "generated")
+            self.assertTrue(Path(result["tts"]["audio_path"]).is_file())
+            self.assertEqual(len(client.calls), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,21 @@
+import os
+import shutil
+import tempfile
 import unittest
+from pathlib import Path
+from unittest import mock
 
+from henshin import validators
 from henshin.forge import create_draft_morphotype, create_draft_suitspec
-from henshin.validators import validate_morphotype, validate_suitspec
+from henshin.validators import (
+    schema_validator,
+    validate_against_schema,
+    validate_morphotype,
+    validate_replay_script_header,
+    validate_suitspec,
+    validate_transform_event,
+    warm_schema_validators,
+)
 
 
 class TestValidators(unittest.TestCase):
@@ -25,6 +39,75 @@ class TestValidators(unittest.TestCase):
         with self.assertRaises(ValueError):
             validate_morphotype(payload)
 
+    def test_schema_validator_is_compiled_once_and_recompiled_on_change(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            schema_dir = Path(tmp)
+            shutil.copy(Path("schemas/replay-script.v0.1.schema.json"), schema_dir)
+            with mock.patch.object(validators, "_schema_dir", return_value=schema_dir), mock.patch.dict(
+                validators._COMPILED_VALIDATORS, clear=True
+            ):
+                first = schema_validator("replay-script")
+                second = schema_validator("replay-script")
+                schema_path = schema_dir / "replay-script.v0.1.schema.json"
+                stat = schema_path.stat()
+                os.utime(schema_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+                third = schema_validator("replay-script")
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, third)
+
+    def test_warm_schema_validators_compiles_every_kind(self) -> None:
+        kinds = warm_schema_validators()
+        self.assertIn("transform-session", kinds)
+        self.assertIn("transform-event", kinds)
+
+    def test_transform_event_fast_path_matches_schema(self) -> None:
+        event = {
+            "event_id": "EVT-20260424-ABC123",
+            "session_id": "S-TRIAL-UNIT-0001",
+            "sequence": 1,
+            "event_type": "DEPOSITION_PROGRESS",
+            "occurred_at": "2026-04-24T00:00:00+00:00",
+            "actor": {"type": "device", "id": "quest-local"},
+            "state_before": "DEPOSITION",
+            "state_after": "DEPOSITION",
+            "payload": {"progress": 0.5},
+            "idempotency_key": "p-50",
+        }
+        validate_transform_event(event)
+        validate_against_schema(event, "transform-event")
+        invalid_variants = [
+            {**event, "sequence": True},
+            {**event, "sequence": -1},
+            {**event, "event_type": "UNKNOWN"},
+            {**event, "actor": {"type": "robot"}},
+            {**event, "actor": {"type": {"a": 1}}},
+            {**event, "event_type": ["DEPOSITION_PROGRESS"]},
+            {**event, "state_after": {"state": "ACTIVE"}},
+            {**event, "extra": 1},
+            {key: value for key, value in event.items() if key != "occurred_at"},
+        ]
+        for variant in invalid_variants:
+            with self.subTest(variant=variant), self.assertRaises(ValueError) as ctx:
+                validate_transform_event(variant)
+            self.assertTrue(str(ctx.exception).startswith("transform-event"))
+
+    def test_replay_script_header_checks_top_level_fields(self) -> None:
+        replay = {
+            "schema_version": "0.1",
+            "replay_id": "RPL-20260424-AB12",
+            "session_id": "S-TRIAL-UNIT-0001",
+            "manifest_id": "MNF-20260424-ABCD",
+            "source_events": {"transform_session_schema_version": "0.1", "event_ids": ["EVT-20260424-ABC123"]},
+            "duration_sec": 0.5,
+            "timeline": [],
+        }
+        validate_replay_script_header(replay)
+        with self.assertRaises(ValueError):
+            validate_replay_script_header({**replay, "replay_id": "RPL-bad"})
+        with self.assertRaises(ValueError):
+            validate_replay_script_header({**replay, "source_events": {"event_ids": []}})
+
 
 if __name__ == "__main__":
     unittest.main()
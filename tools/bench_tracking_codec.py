@@ -0,0 +1,88 @@
+"""Size/precision benchmark for the qdelta-v1 replay tracking encoding.
+
+Compares the plain JSON ``tracking.frames`` section of an iwsdk deposition
+replay with qdelta-v1 at several quantization steps and keyframe intervals.
+
+    python tools/bench_tracking_codec.py --frames 18000
+    python tools/bench_tracking_codec.py --input examples/mocopi_sequence.sample.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_ROOT = REPO_ROOT / "src"
+
+if str(SRC_ROOT) not in sys.path:
+    sys.path.insert(0, str(SRC_ROOT))
+
+from henshin.bodyfit import BodyFrame  # noqa: E402
+from henshin.iw_henshin import _serialize_body_frames, create_demo_body_frames, normalize_mocopi_frames  # noqa: E402
+from henshin.tracking_codec import decode_tracking_block, tracking_replay_block  # noqa: E402
+
+
+def synthetic_capture(frame_count: int, *, seed: int = 7) -> list[BodyFrame]:
+    """A 30 fps capture: the demo pose with slow sway, sensor noise and occasional dropouts."""
+
+    rng = random.Random(seed)
+    base = create_demo_body_frames()[0].joints_xy01
+    frames = []
+    for index in range(frame_count):
+        t = index / 30.0
+        joints = {}
+        for offset, (name, (x, y)) in enumerate(sorted(base.items())):
+            if rng.random() < 0.01:
+                continue
+            joints[name] = (
+                x + 0.03 * math.sin(t * 1.3 + offset) + rng.gauss(0.0, 0.0008),
+                y + 0.02 * math.cos(t * 0.9 + offset) + rng.gauss(0.0, 0.0008),
+            )
+        frames.append(BodyFrame(dt_sec=1 / 30 + rng.gauss(0.0, 0.0005), joints_xy01=joints))
+    return frames
+
+
+def max_error(original: list[BodyFrame], decoded: list[BodyFrame]) -> float:
+    worst = 0.0
+    for before, after in zip(original, decoded):
+        for name, (x, y) in before.joints_xy01.items():
+            dx, dy = after.joints_xy01[name]
+            worst = max(worst, abs(dx - x), abs(dy - y))
+    return worst
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", help="mocopi capture JSON; defaults to a synthetic capture")
+    parser.add_argument("--frames", type=int, default=18000, help="Synthetic capture length (30 fps)")
+    parser.add_argument("--precisions", type=float, nargs="+", default=[1e-3, 1e-4, 1e-5])
+    parser.add_argument("--keyframe-intervals", type=int, nargs="+", default=[1, 30, 300])
+    args = parser.parse_args()
+
+    frames = normalize_mocopi_frames(json.loads(Path(args.input).read_text(encoding="utf-8"))) if args.input else synthetic_capture(args.frames)
+    json_bytes = len(json.dumps({"frames": _serialize_body_frames(frames), "frame_count": len(frames)}).encode("utf-8"))
+    print(f"frames={len(frames)} json_bytes={json_bytes}")
+    print(f"{'precision':>10} {'keyframes':>9} {'bytes':>10} {'ratio':>7} {'max_error':>10} {'encode_ms':>9} {'decode_ms':>9}")
+    for precision in args.precisions:
+        for interval in args.keyframe_intervals:
+            started = time.perf_counter()
+            block = tracking_replay_block(frames, precision=precision, keyframe_interval=interval)
+            encoded = time.perf_counter()
+            decoded = decode_tracking_block(block)
+            finished = time.perf_counter()
+            size = len(json.dumps(block).encode("utf-8"))
+            print(
+                f"{precision:>10g} {interval:>9d} {size:>10d} {json_bytes / size:>6.1f}x "
+                f"{max_error(frames, decoded):>10.2e} {(encoded - started) * 1000:>9.1f} {(finished - encoded) * 1000:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -417,6 +417,53 @@ async function loadJson(path) {
   return response.json();
 }
 
+const BODY_SIM_TRANSFORM_CHANNELS = ["position_x", "position_y", "position_z", "rotation_z", "scale_x", "scale_y", "scale_z"];
+
+// Columnar body-sim (.bsim, see henshin.body_sim_format): expands to the body-sim.json frame shape.
+async function loadBodySimBinary(path) {
+  const normalized = normalizePath(path);
+  const response = await fetch(normalized, { cache: "no-store" });
+  if (!response.ok) {
+    throw new Error(`Body-sim load failed: ${response.status} ${normalized}`);
+  }
+  const buffer = await response.arrayBuffer();
+  const view = new DataView(buffer);
+  const magic = new TextDecoder().decode(new Uint8Array(buffer, 0, 4));
+  if (magic !== "HBSM") {
+    throw new Error(`Not a body-sim file: ${normalized}`);
+  }
+  const headerLength = view.getUint32(8, true);
+  const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 12, headerLength)));
+  const dataStart = Math.ceil((12 + headerLength) / 4) * 4;
+  const columns = {};
+  for (const channel of header.channels) {
+    const start = dataStart + channel.offset;
+    columns[channel.name] = channel.dtype === "bitmap"
+      ? new Uint8Array(buffer, start, Math.ceil(channel.count / 8))
+      : new Float32Array(buffer, start, channel.count);
+  }
+  const segments = header.segments;
+  const frames = [];
+  for (let index = 0; index < header.frame_count; index += 1) {
+    const transforms = {};
+    segments.forEach((name, position) => {
+      const transform = {};
+      for (const channel of BODY_SIM_TRANSFORM_CHANNELS) {
+        transform[channel] = columns[channel][index * segments.length + position];
+      }
+      transforms[name] = transform;
+    });
+    frames.push({
+      index,
+      dt_sec: columns.dt_sec[index],
+      equipped: Boolean((columns.equipped[index >> 3] >> (index & 7)) & 1),
+      hold_sec: columns.hold_sec[index],
+      segments: transforms,
+    });
+  }
+  return frames;
+}
+
 async function loadReplay(path = getReplayPath()) {
   return loadJson(path);
 }
@@ -1645,6 +1692,9 @@ class QuestHenshinDemo {
   }
 
   async loadBodySim(rawPath) {
+    if (String(rawPath).endsWith(".bsim")) {
+      return loadBodySimBinary(rawPath);
+    }
     const bodySim = await loadJson(rawPath);
     return Array.isArray(bodySim.frames) ? bodySim.frames : [];
   }